@@ -14,6 +14,11 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import logging
 
+try:
+    from src.integrations.claude_response_cache import get_claude_response_cache, response_cache_key
+except ImportError:
+    from integrations.claude_response_cache import get_claude_response_cache, response_cache_key
+
 # Load environment variables
 load_dotenv()
 
@@ -32,6 +37,7 @@ class FinancialInsightsEngine:
         self.claude_api_key = os.getenv('CLAUDE_API_KEY')
         self.claude_api_url = os.getenv('CLAUDE_API_URL', 'https://api.anthropic.com/v1/messages')
         self.claude_model = os.getenv('CLAUDE_MODEL', 'claude-3-7-sonnet-20240307')
+        self.response_cache = get_claude_response_cache()
         
         # Australian tax categories for deduction identification
         self.ato_deduction_categories = {
@@ -65,22 +71,35 @@ class FinancialInsightsEngine:
             if not self.claude_api_key:
                 return {"error": "Claude API key not configured"}
                 
-            response = requests.post(
-                self.claude_api_url,
-                headers={
-                    "x-api-key": self.claude_api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": self.claude_model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": max_tokens
-                },
-                timeout=30
-            )
-            response.raise_for_status()
-            return self.parse_claude_response(response.json())
+            messages = [{"role": "user", "content": prompt}]
+            
+            def post_messages() -> Dict[str, Any]:
+                response = requests.post(
+                    self.claude_api_url,
+                    headers={
+                        "x-api-key": self.claude_api_key,
+                        "anthropic-version": "2023-06-01",
+                        "content-type": "application/json"
+                    },
+                    json={
+                        "model": self.claude_model,
+                        "messages": messages,
+                        "max_tokens": max_tokens
+                    },
+                    timeout=30
+                )
+                response.raise_for_status()
+                return response.json()
+            
+            # Dashboard refreshes re-run identical prompts; share cached and in-flight responses
+            if self.response_cache is not None:
+                cache_key = response_cache_key(self.claude_model, "", messages, None, max_tokens)
+                result, _ = self.response_cache.get_or_call(
+                    cache_key, post_messages, cacheable=lambda r: bool(r.get('content'))
+                )
+            else:
+                result = post_messages()
+            return self.parse_claude_response(result)
             
         except requests.exceptions.Timeout:
             self.logger.error("Claude API timeout")
@@ -2,6 +2,7 @@ import os
 import sys
 from flask import Flask, send_from_directory, render_template, g, request, jsonify, Response
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 import logging
 import time
@@ -48,6 +49,12 @@ except ImportError as e:
 app = Flask(__name__, template_folder='../frontend', static_folder='../frontend')
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
+# Honour X-Forwarded-For only for the number of proxies in front of the app
+# (load balancer, nginx); request.remote_addr is then the real client address
+trusted_proxy_count = int(os.environ.get('TRUSTED_PROXY_COUNT', '0'))
+if trusted_proxy_count > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxy_count)
+
 # Production configuration
 if config:
     app.config.update({
@@ -194,6 +201,29 @@ except ImportError as e:
 except Exception as e:
     logger.error(f"❌ Failed to initialize transfer processor: {e}")
 
+# --- Initialize Report Job Workers ---
+# In production run them separately: python backend/jobs/report_queue.py
+# REPORT_WORKERS_EMBEDDED=true starts them inside the web app for development
+try:
+    from jobs.report_queue import run_report_workers_daemon
+
+    if os.environ.get('REPORT_WORKERS_EMBEDDED', 'false').lower() == 'true' and not app.config.get('TESTING', False):
+        report_job_runner = run_report_workers_daemon()
+        logger.info("✅ Embedded report workers started")
+
+except ImportError as e:
+    logger.warning(f"⚠️ Report job queue not available: {e}")
+except Exception as e:
+    logger.error(f"❌ Failed to start report workers: {e}")
+
+# --- Shared user financial snapshots (request-scoped reads) ---
+try:
+    from services.user_snapshot import init_user_snapshot_loader
+    init_user_snapshot_loader(app)
+    logger.info("✅ User snapshot loader initialized")
+except ImportError as e:
+    logger.warning(f"⚠️ User snapshot loader not available: {e}")
+
 # --- Initialize Enhanced Notification and Analytics System ---
 try:
     from services.savings_advisor import init_savings_advisor
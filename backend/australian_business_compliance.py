@@ -17,15 +17,32 @@ Features:
 - Integration with existing tax categorization system
 """
 
+import os
 import re
 import requests
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any, Union
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple, Optional, Any, Union, Iterable
 from dataclasses import dataclass, field
 from enum import Enum
 from decimal import Decimal, ROUND_HALF_UP
 
+try:
+    from integrations.http_session import get_http_session
+except ImportError:
+    try:
+        from src.integrations.http_session import get_http_session
+    except ImportError:
+        get_http_session = None
+
+try:
+    from australian_tax_categorizer import categorize_receipt
+except ImportError:
+    try:
+        from backend.australian_tax_categorizer import categorize_receipt
+    except ImportError:
+        categorize_receipt = None
+
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -127,6 +144,25 @@ class BASQuarterData:
             self.line_items = []
 
 
+@dataclass
+class BASYearData:
+    """BAS preparation data for a calendar year, split into quarters"""
+    year: int
+    quarters: List[BASQuarterData] = field(default_factory=list)
+    sales_gst: Decimal = field(default_factory=lambda: Decimal('0'))
+    purchases_gst: Decimal = field(default_factory=lambda: Decimal('0'))
+    input_tax_credits: Decimal = field(default_factory=lambda: Decimal('0'))
+    net_gst: Decimal = field(default_factory=lambda: Decimal('0'))
+    payg_withholding: Decimal = field(default_factory=lambda: Decimal('0'))
+    payg_instalment: Decimal = field(default_factory=lambda: Decimal('0'))
+    total_refund_payable: Decimal = field(default_factory=lambda: Decimal('0'))
+    skipped_records: int = 0
+
+
+# Calendar quarter boundaries as (start month, end month, end day)
+BAS_QUARTERS = ((1, 3, 31), (4, 6, 30), (7, 9, 30), (10, 12, 31))
+
+
 class AustralianBusinessCompliance:
     """
     Comprehensive Australian business compliance system
@@ -234,7 +270,17 @@ class AustralianBusinessCompliance:
             'authenticationGuid': self.abr_api_key
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        if get_http_session:
+            session = get_http_session(
+                'abr',
+                pool_size=int(os.getenv('ABR_MAX_CONNECTIONS', '4')),
+                connect_timeout=float(os.getenv('ABR_CONNECT_TIMEOUT', '5')),
+                read_timeout=float(os.getenv('ABR_TIMEOUT', '10')),
+                max_retries=int(os.getenv('ABR_RETRY_ATTEMPTS', '2'))
+            )
+            response = session.get(url, params=params)
+        else:
+            response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
         
         # Parse XML response (simplified - would need proper XML parsing)
@@ -589,6 +635,72 @@ class AustralianBusinessCompliance:
             if quarter_start <= transaction_date <= quarter_end:
                 self._add_transaction_to_bas(transaction, bas_data, user_profile)
         
+        self._finalize_bas_totals(bas_data)
+        
+        return bas_data
+    
+    def prepare_bas_year_data(self,
+                              transactions: Iterable[Dict],
+                              receipts: Iterable[Dict],
+                              user_profile: Dict,
+                              year: int) -> BASYearData:
+        """
+        Prepare BAS data for all four quarters of a year in a single pass
+        
+        Each record's date is parsed once and each receipt is categorized once;
+        records are bucketed into quarters by calendar date. Totals are
+        accumulated as Decimal throughout.
+        
+        Args:
+            transactions: Banking transactions for the year
+            receipts: Receipt data for the year
+            user_profile: User's business profile
+            year: Calendar year
+            
+        Returns:
+            BASYearData with per-quarter BASQuarterData and annual totals
+        """
+        year_data = BASYearData(year=year, quarters=[
+            BASQuarterData(
+                period_start=datetime(year, start_month, 1),
+                period_end=datetime(year, end_month, end_day)
+            )
+            for start_month, end_month, end_day in BAS_QUARTERS
+        ])
+        
+        # Process receipts for purchases/input tax credits
+        for receipt in receipts:
+            quarter_index = self._bas_quarter_index(receipt.get('date'), year)
+            if quarter_index is None:
+                year_data.skipped_records += 1
+                continue
+            categorization = self._categorize_receipt(receipt, user_profile)
+            self._add_purchase_to_bas(receipt, year_data.quarters[quarter_index], user_profile, categorization)
+        
+        # Process transactions for sales and other items
+        for transaction in transactions:
+            quarter_index = self._bas_quarter_index(
+                transaction.get('postDate', transaction.get('date')), year
+            )
+            if quarter_index is None:
+                year_data.skipped_records += 1
+                continue
+            self._add_transaction_to_bas(transaction, year_data.quarters[quarter_index], user_profile)
+        
+        for bas_data in year_data.quarters:
+            self._finalize_bas_totals(bas_data)
+            year_data.sales_gst += bas_data.sales_gst
+            year_data.purchases_gst += bas_data.purchases_gst
+            year_data.input_tax_credits += bas_data.input_tax_credits
+            year_data.net_gst += bas_data.net_gst
+            year_data.payg_withholding += bas_data.payg_withholding
+            year_data.payg_instalment += bas_data.payg_instalment
+            year_data.total_refund_payable += bas_data.total_refund_payable
+        
+        return year_data
+    
+    def _finalize_bas_totals(self, bas_data: BASQuarterData):
+        """Calculate net GST and total refund/payable for a quarter"""
         # Calculate net GST
         bas_data.net_gst = bas_data.sales_gst - bas_data.input_tax_credits
         
@@ -598,8 +710,28 @@ class AustralianBusinessCompliance:
             bas_data.payg_withholding + 
             bas_data.payg_instalment
         )
+    
+    def _bas_quarter_index(self, value: Any, year: int) -> Optional[int]:
+        """Get the 0-based quarter of a date or ISO date string, or None if outside the year"""
+        if isinstance(value, datetime):
+            record_date = value.date()
+        elif isinstance(value, date):
+            record_date = value
+        else:
+            try:
+                record_date = date.fromisoformat(str(value)[:10])
+            except ValueError:
+                return None
         
-        return bas_data
+        if record_date.year != year:
+            return None
+        return (record_date.month - 1) // 3
+    
+    def _categorize_receipt(self, receipt: Dict, user_profile: Dict):
+        """Categorize a receipt with the Australian tax categorizer"""
+        if categorize_receipt is None:
+            raise RuntimeError('Australian tax categorizer not available')
+        return categorize_receipt(receipt, user_profile)
     
     def _parse_receipt_date(self, receipt: Dict) -> datetime:
         """Parse receipt date"""
@@ -617,12 +749,12 @@ class AustralianBusinessCompliance:
         except:
             return datetime.now()
     
-    def _add_purchase_to_bas(self, receipt: Dict, bas_data: BASQuarterData, user_profile: Dict):
+    def _add_purchase_to_bas(self, receipt: Dict, bas_data: BASQuarterData, user_profile: Dict,
+                             categorization=None):
         """Add purchase receipt to BAS data"""
-        from .australian_tax_categorizer import categorize_receipt
-        
-        # Categorize the receipt
-        categorization = categorize_receipt(receipt, user_profile)
+        # Categorize the receipt unless the caller already did
+        if categorization is None:
+            categorization = self._categorize_receipt(receipt, user_profile)
         
         # Extract GST
         gst_extraction = self.extract_gst_from_receipt(receipt)
@@ -736,6 +868,7 @@ __all__ = [
     "GSTExtraction", 
     "InputTaxCredit",
     "BASQuarterData",
+    "BASYearData",
     "BASLineItem",
     "GSTType",
     "BusinessType",
@@ -18,6 +18,8 @@ Features:
 
 import re
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
@@ -93,17 +95,104 @@ class CategorizationResult:
     alternative_categories: List[Tuple[TaxCategory, float]]
 
 
+@dataclass
+class BatchCategorizationResult:
+    """Columnar result of batch tax categorization, one entry per input row"""
+    category_codes: List[str]
+    confidences: List[float]
+    deductibility: List[float]
+    requires_verification: List[bool]
+    amounts: List[float]
+    result_index: List[int]  # row -> index into unique_results
+    unique_results: List[CategorizationResult]
+    errors: Dict[int, str]  # row -> error message for rows that could not be parsed
+    
+    def __len__(self) -> int:
+        return len(self.result_index)
+    
+    def result_for(self, row: int) -> CategorizationResult:
+        """Get the full categorization result for a row"""
+        return self.unique_results[self.result_index[row]]
+
+
 class AustralianTaxCategorizer:
     """
     Advanced Australian tax categorization engine
     """
     
-    def __init__(self):
+    # Maximum number of memoized (merchant, description, profile) results
+    RESULT_CACHE_SIZE = 10000
+    
+    def __init__(self, result_cache_size: int = RESULT_CACHE_SIZE):
         """Initialize the categorization engine with all rules and mappings"""
         self.merchant_rules = self._build_merchant_rules()
         self.occupation_rules = self._build_occupation_rules()
         self.category_descriptions = self._build_category_descriptions()
+        self._compile_merchant_matcher()
+        
+        # LRU memo of rule resolution results; amount-dependent evidence is
+        # still applied per call in _finalize_categorization
+        self._result_cache: "OrderedDict[Tuple, CategorizationResult]" = OrderedDict()
+        self._result_cache_size = result_cache_size
+        self._result_cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+    
+    def _compile_merchant_matcher(self):
+        """
+        Compile all merchant keywords into prioritised regex alternations.
+        
+        Keywords are ordered by (rule order, keyword order). A search with the full
+        alternation finds the leftmost keyword, preferring the earliest alternative
+        at that position; the matcher then only needs to look further right for
+        keywords with a strictly higher priority, using the precompiled prefix
+        alternation for that priority. Must be re-run if ``merchant_rules`` changes.
+        """
+        keywords: List[Tuple[str, str]] = []
+        seen = set()
+        for merchant_key, rule in self.merchant_rules.items():
+            for keyword in rule["keywords"]:
+                keyword_lower = keyword.lower()
+                if keyword_lower and keyword_lower not in seen:
+                    seen.add(keyword_lower)
+                    keywords.append((keyword_lower, merchant_key))
+        
+        self._merchant_keywords = keywords
+        self._merchant_keyword_priority = {
+            keyword: priority for priority, (keyword, _) in enumerate(keywords)
+        }
+        # _merchant_patterns[p] matches any keyword with priority < p;
+        # the last entry matches every keyword
+        self._merchant_patterns: List[Optional[re.Pattern]] = [None]
+        for priority in range(1, len(keywords) + 1):
+            alternation = "|".join(re.escape(keyword) for keyword, _ in keywords[:priority])
+            self._merchant_patterns.append(re.compile(alternation))
+    
+    def _match_merchant_rule(self, merchant_lower: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the first merchant rule matching a normalized merchant string.
         
+        Returns:
+            Tuple of (merchant_key, matched keyword) or None if nothing matched
+        """
+        pattern = self._merchant_patterns[-1]
+        if pattern is None or not merchant_lower:
+            return None
+        
+        match = pattern.search(merchant_lower)
+        if match is None:
+            return None
+        
+        priority = self._merchant_keyword_priority[match.group(0)]
+        while priority > 0:
+            match = self._merchant_patterns[priority].search(merchant_lower, match.start() + 1)
+            if match is None:
+                break
+            priority = self._merchant_keyword_priority[match.group(0)]
+        
+        keyword, merchant_key = self._merchant_keywords[priority]
+        return merchant_key, keyword
+    
     def _build_merchant_rules(self) -> Dict[str, Dict]:
         """Build comprehensive merchant categorization rules"""
         return {
@@ -390,48 +479,202 @@ class AustralianTaxCategorizer:
         merchant_lower = merchant_name.lower().strip()
         description_lower = description.lower().strip()
         
+        # Steps 1-3: Merchant, occupation and business rules (memoized)
+        cache_key = (merchant_lower, description_lower, self._profile_fingerprint(user_profile))
+        business_result = self._get_cached_result(cache_key)
+        if business_result is None:
+            business_result = self._resolve_rules(
+                merchant_lower, description_lower, user_profile, amount
+            )
+            self._store_cached_result(cache_key, business_result)
+        
+        # Step 4: Generate evidence requirements and alternatives
+        final_result = self._finalize_categorization(
+            business_result, merchant_name, amount, user_profile, receipt_data
+        )
+        
+        # Log categorization for learning
+        self._log_categorization(merchant_name, final_result, user_profile)
+        
+        return final_result
+    
+    def categorize_transactions_batch(self, transactions: List[Dict],
+                                      user_profile: Optional[Dict] = None) -> BatchCategorizationResult:
+        """
+        Categorize many banking transactions in one call
+        
+        Merchant strings are normalized up front, identical merchant/description
+        pairs are resolved once, and occupation rules are matched once for the
+        profile rather than once per row. Rows that share a rule result and an
+        evidence amount tier share the same CategorizationResult instance.
+        
+        Args:
+            transactions: Banking transactions (Basiq format)
+            user_profile: User's tax profile data
+            
+        Returns:
+            BatchCategorizationResult with per-row columns
+        """
+        
+        count = len(transactions)
+        amounts: List[float] = [0.0] * count
+        errors: Dict[int, str] = {}
+        
+        # Normalize all inputs at once
+        keys: List[Tuple[str, str]] = []
+        for row, transaction in enumerate(transactions):
+            description_lower = (transaction.get("description") or "").lower().strip()
+            keys.append((description_lower, description_lower))
+            try:
+                amounts[row] = abs(float(transaction.get("amount", 0) or 0))
+            except (TypeError, ValueError) as e:
+                errors[row] = f"Invalid amount: {e}"
+        
+        # Resolve profile-dependent state once
+        fingerprint = self._profile_fingerprint(user_profile)
+        matched_occupation_rules = self._matching_occupation_rules(user_profile)
+        
+        # Resolve rules once per distinct merchant/description pair
+        rule_results: Dict[Tuple[str, str], CategorizationResult] = {}
+        for key in dict.fromkeys(keys):
+            cache_key = (key[0], key[1], fingerprint)
+            result = self._get_cached_result(cache_key)
+            if result is None:
+                result = self._resolve_rules(
+                    key[0], key[1], user_profile, 0.0, matched_occupation_rules
+                )
+                self._store_cached_result(cache_key, result)
+            rule_results[key] = result
+        
+        # Finalize once per (pair, evidence amount tier)
+        unique_results: List[CategorizationResult] = []
+        unique_index: Dict[Tuple[Tuple[str, str], int], int] = {}
+        result_index: List[int] = [0] * count
+        for row, key in enumerate(keys):
+            amount = amounts[row]
+            tier = 2 if amount > 1000 else 1 if amount > 300 else 0
+            index = unique_index.get((key, tier))
+            if index is None:
+                index = len(unique_results)
+                unique_index[(key, tier)] = index
+                unique_results.append(self._finalize_categorization(
+                    rule_results[key], key[0], amount, user_profile, None
+                ))
+            result_index[row] = index
+        
+        logger.info(
+            f"Batch tax categorization: {count} transactions, "
+            f"{len(rule_results)} distinct merchants, {len(unique_results)} distinct results"
+        )
+        
+        return BatchCategorizationResult(
+            category_codes=[unique_results[i].category.name for i in result_index],
+            confidences=[unique_results[i].confidence for i in result_index],
+            deductibility=[unique_results[i].deductibility for i in result_index],
+            requires_verification=[unique_results[i].requires_verification for i in result_index],
+            amounts=amounts,
+            result_index=result_index,
+            unique_results=unique_results,
+            errors=errors
+        )
+    
+    def _resolve_rules(self, merchant_lower: str, description_lower: str,
+                       user_profile: Optional[Dict], amount: float,
+                       matched_occupation_rules: Optional[List[Tuple[str, Dict]]] = None) -> CategorizationResult:
+        """Run merchant, occupation and business rules for normalized inputs"""
+        
         # Step 1: Try merchant-based categorization
         merchant_result = self._categorize_by_merchant(merchant_lower, description_lower)
         
         # Step 2: Apply occupation-specific rules if user profile available
         if user_profile:
             occupation_result = self._apply_occupation_rules(
-                merchant_lower, description_lower, user_profile, merchant_result
+                merchant_lower, description_lower, user_profile, merchant_result,
+                matched_occupation_rules
             )
         else:
             occupation_result = merchant_result
         
         # Step 3: Apply business user rules
-        business_result = self._apply_business_rules(
-            occupation_result, user_profile, amount
-        )
+        return self._apply_business_rules(occupation_result, user_profile, amount)
+    
+    def _profile_fingerprint(self, user_profile: Optional[Dict]) -> Optional[Tuple]:
+        """
+        Reduce a tax profile to the fields the categorization rules read.
         
-        # Step 4: Generate evidence requirements and alternatives
-        final_result = self._finalize_categorization(
-            business_result, merchant_name, amount, user_profile, receipt_data
-        )
+        Two profiles with the same fingerprint always categorize identically, so
+        the fingerprint is safe to use as part of the result cache key.
+        """
+        if not user_profile:
+            return None
         
-        # Log categorization for learning
-        self._log_categorization(merchant_name, final_result, user_profile)
+        occupations = tuple(
+            employer["occupation"].lower()
+            for employer in user_profile.get("income", {}).get("employers") or []
+            if employer.get("occupation")
+        )
+        has_abn = bool(user_profile.get("personalInfo", {}).get("abn"))
+        has_business_income = bool(user_profile.get("income", {}).get("businessIncome"))
         
-        return final_result
+        return (occupations, has_abn, has_business_income)
+    
+    def _get_cached_result(self, cache_key: Tuple) -> Optional[CategorizationResult]:
+        """Look up a memoized rule resolution result"""
+        with self._result_cache_lock:
+            result = self._result_cache.get(cache_key)
+            if result is None:
+                self._cache_misses += 1
+                return None
+            self._result_cache.move_to_end(cache_key)
+            self._cache_hits += 1
+            return result
+    
+    def _store_cached_result(self, cache_key: Tuple, result: CategorizationResult):
+        """Memoize a rule resolution result, evicting the least recently used entry"""
+        if self._result_cache_size <= 0:
+            return
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = result
+            self._result_cache.move_to_end(cache_key)
+            while len(self._result_cache) > self._result_cache_size:
+                self._result_cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """Clear memoized categorization results and reset counters"""
+        with self._result_cache_lock:
+            self._result_cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get result cache statistics"""
+        with self._result_cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                "size": len(self._result_cache),
+                "max_size": self._result_cache_size,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / total if total else 0.0
+            }
     
     def _categorize_by_merchant(self, merchant_lower: str, description_lower: str) -> CategorizationResult:
         """Categorize based on merchant name patterns"""
         
-        # Check direct merchant matches
-        for merchant_key, rule in self.merchant_rules.items():
-            for keyword in rule["keywords"]:
-                if keyword.lower() in merchant_lower:
-                    return CategorizationResult(
-                        category=rule["category"],
-                        confidence=rule["confidence"].value,
-                        deductibility=rule.get("deductibility", DeductibilityLevel.FULL).value,
-                        reasoning=f"Matched merchant pattern: {keyword}",
-                        requires_verification=rule.get("requires_verification", False),
-                        suggested_evidence=[],
-                        alternative_categories=[]
-                    )
+        # Check direct merchant matches (single pass over the compiled matcher)
+        match = self._match_merchant_rule(merchant_lower)
+        if match:
+            merchant_key, keyword = match
+            rule = self.merchant_rules[merchant_key]
+            return CategorizationResult(
+                category=rule["category"],
+                confidence=rule["confidence"].value,
+                deductibility=rule.get("deductibility", DeductibilityLevel.FULL).value,
+                reasoning=f"Matched merchant pattern: {keyword}",
+                requires_verification=rule.get("requires_verification", False),
+                suggested_evidence=[],
+                alternative_categories=[]
+            )
         
         # Check description patterns for additional context
         if any(word in description_lower for word in ["fuel", "petrol", "gas"]):
@@ -456,9 +699,11 @@ class AustralianTaxCategorizer:
             alternative_categories=[]
         )
     
-    def _apply_occupation_rules(self, merchant_lower: str, description_lower: str, 
-                               user_profile: Dict, base_result: CategorizationResult) -> CategorizationResult:
-        """Apply occupation-specific categorization rules"""
+    def _matching_occupation_rules(self, user_profile: Optional[Dict]) -> List[Tuple[str, Dict]]:
+        """Resolve the occupation rules that apply to a profile, in priority order"""
+        
+        if not user_profile:
+            return []
         
         # Extract occupation from user profile
         occupations = []
@@ -467,33 +712,43 @@ class AustralianTaxCategorizer:
                 if employer.get("occupation"):
                     occupations.append(employer["occupation"].lower())
         
-        if not occupations:
-            return base_result
-        
-        # Find matching occupation rules
+        matched_rules = []
         for occupation_text in occupations:
             for occ_key, occ_rule in self.occupation_rules.items():
                 if any(keyword in occupation_text for keyword in occ_rule["keywords"]):
-                    # Check if this occupation has specific rules for this merchant/description
-                    for pattern, category_code in occ_rule["default_categories"].items():
-                        if pattern in merchant_lower or pattern in description_lower:
-                            try:
-                                category = TaxCategory(category_code)
-                            except ValueError:
-                                continue
-                            
-                            # Boost confidence for occupation match
-                            new_confidence = min(base_result.confidence + occ_rule["confidence_boost"], 1.0)
-                            
-                            return CategorizationResult(
-                                category=category,
-                                confidence=new_confidence,
-                                deductibility=base_result.deductibility,
-                                reasoning=f"Occupation-specific rule: {occ_key} + {pattern}",
-                                requires_verification=base_result.requires_verification,
-                                suggested_evidence=base_result.suggested_evidence,
-                                alternative_categories=base_result.alternative_categories
-                            )
+                    matched_rules.append((occ_key, occ_rule))
+        
+        return matched_rules
+    
+    def _apply_occupation_rules(self, merchant_lower: str, description_lower: str, 
+                               user_profile: Dict, base_result: CategorizationResult,
+                               matched_rules: Optional[List[Tuple[str, Dict]]] = None) -> CategorizationResult:
+        """Apply occupation-specific categorization rules"""
+        
+        if matched_rules is None:
+            matched_rules = self._matching_occupation_rules(user_profile)
+        
+        # Check if a matching occupation has specific rules for this merchant/description
+        for occ_key, occ_rule in matched_rules:
+            for pattern, category_code in occ_rule["default_categories"].items():
+                if pattern in merchant_lower or pattern in description_lower:
+                    try:
+                        category = TaxCategory(category_code)
+                    except ValueError:
+                        continue
+                    
+                    # Boost confidence for occupation match
+                    new_confidence = min(base_result.confidence + occ_rule["confidence_boost"], 1.0)
+                    
+                    return CategorizationResult(
+                        category=category,
+                        confidence=new_confidence,
+                        deductibility=base_result.deductibility,
+                        reasoning=f"Occupation-specific rule: {occ_key} + {pattern}",
+                        requires_verification=base_result.requires_verification,
+                        suggested_evidence=base_result.suggested_evidence,
+                        alternative_categories=base_result.alternative_categories
+                    )
         
         return base_result
     
@@ -627,6 +882,28 @@ class AustralianTaxCategorizer:
         return rules_map.get(category, {"percentage": 0, "method": "requires_assessment"})
 
 
+# Global categorizer instance
+_categorizer = None
+_categorizer_lock = threading.Lock()
+
+def get_categorizer() -> AustralianTaxCategorizer:
+    """Get the shared categorizer instance, building it on first use."""
+    global _categorizer
+    if _categorizer is None:
+        with _categorizer_lock:
+            if _categorizer is None:
+                _categorizer = AustralianTaxCategorizer()
+    return _categorizer
+
+def reload_categorizer() -> AustralianTaxCategorizer:
+    """Rebuild the shared categorizer, e.g. after merchant or occupation rules change."""
+    global _categorizer
+    categorizer = AustralianTaxCategorizer()
+    with _categorizer_lock:
+        _categorizer = categorizer
+    return categorizer
+
+
 # Convenience functions for integration
 def categorize_receipt(receipt_data: Dict, user_profile: Optional[Dict] = None) -> CategorizationResult:
     """
@@ -639,7 +916,7 @@ def categorize_receipt(receipt_data: Dict, user_profile: Optional[Dict] = None)
     Returns:
         CategorizationResult
     """
-    categorizer = AustralianTaxCategorizer()
+    categorizer = get_categorizer()
     
     merchant = receipt_data.get("merchant_name", "")
     amount = receipt_data.get("total_amount", 0)
@@ -665,7 +942,7 @@ def categorize_transaction(transaction_data: Dict, user_profile: Optional[Dict]
     Returns:
         CategorizationResult
     """
-    categorizer = AustralianTaxCategorizer()
+    categorizer = get_categorizer()
     
     merchant = transaction_data.get("description", "")
     amount = abs(float(transaction_data.get("amount", 0)))
@@ -679,9 +956,24 @@ def categorize_transaction(transaction_data: Dict, user_profile: Optional[Dict]
     )
 
 
+def categorize_transactions_batch(transactions: List[Dict],
+                                  user_profile: Optional[Dict] = None) -> BatchCategorizationResult:
+    """
+    Convenience function to categorize many banking transactions at once
+    
+    Args:
+        transactions: Banking transaction data
+        user_profile: User's tax profile data
+        
+    Returns:
+        BatchCategorizationResult
+    """
+    return get_categorizer().categorize_transactions_batch(transactions, user_profile)
+
+
 def get_all_categories() -> Dict[str, Dict]:
     """Get information about all tax categories"""
-    categorizer = AustralianTaxCategorizer()
+    categorizer = get_categorizer()
     
     categories = {}
     for category in TaxCategory:
@@ -697,7 +989,11 @@ __all__ = [
     "ConfidenceLevel",
     "DeductibilityLevel",
     "CategorizationResult",
+    "BatchCategorizationResult",
     "categorize_receipt",
     "categorize_transaction",
-    "get_all_categories"
+    "categorize_transactions_batch",
+    "get_all_categories",
+    "get_categorizer",
+    "reload_categorizer"
 ] 
\ No newline at end of file
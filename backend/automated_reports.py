@@ -4,13 +4,15 @@ Advanced system for generating comprehensive tax reports and ATO-compliant docum
 """
 
 import os
+import csv
 import json
+import hashlib
 import logging
+import tempfile
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
-import pandas as pd
 import io
 import base64
 from reportlab.lib.pagesizes import letter, A4
@@ -19,14 +21,43 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 import xlsxwriter
-from firebase_config import db
-from basiq_api import get_user_transactions
-from australian_tax_categorizer import categorize_transaction, TaxCategory
+
+try:
+    from firebase_config import db
+except ImportError:
+    try:
+        from backend.firebase_config import db
+    except ImportError:
+        print("Warning: Firebase config not available")
+        db = None
+
+try:
+    from basiq_api import get_user_accounts, iter_user_transactions
+    from australian_tax_categorizer import categorize_transaction, TaxCategory
+except ImportError:
+    from backend.basiq_api import get_user_accounts, iter_user_transactions
+    from backend.australian_tax_categorizer import categorize_transaction, TaxCategory
+
+try:
+    from services.user_snapshot import get_user_snapshot_loader
+except ImportError:
+    from backend.services.user_snapshot import get_user_snapshot_loader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Transactions listed individually in PDF reports; the full list goes to Excel/CSV
+PDF_TRANSACTION_DETAIL_LIMIT = 50
+
+# Transactions between progress callbacks while streaming a tax year
+PROGRESS_INTERVAL = 500
+
+# Column order of streamed transaction exports
+TRANSACTION_EXPORT_COLUMNS = [
+    'id', 'date', 'description', 'amount', 'direction', 'account', 'tax_category', 'deductible_amount'
+]
+
 class ReportType(Enum):
     INDIVIDUAL_TAX_RETURN = "individual_tax_return"
     BUSINESS_ACTIVITY_STATEMENT = "business_activity_statement"
@@ -56,9 +87,11 @@ class TaxReportData:
     gst_collected: float
     gst_paid: float
     net_gst: float
-    categories: Dict[str, float]
-    transactions: List[Dict]
-    receipts: List[Dict]
+    categories: Dict[str, Dict[str, float]]
+    transaction_count: int
+    income_transaction_count: int
+    receipt_count: int
+    sample_transactions: List[Dict]
     compliance_score: float
     audit_risks: List[str]
     generated_at: datetime
@@ -74,6 +107,309 @@ class ReportMetadata:
     abn: Optional[str]
     report_id: str
 
+class TaxReportAccumulator:
+    """
+    Running totals for a tax year streamed one categorized transaction at a time.
+
+    Only aggregates and a bounded sample of rows for the PDF detail table are
+    kept, so memory use does not grow with the number of transactions.
+    """
+
+    def __init__(self, gst_registered: bool, sample_size: int = PDF_TRANSACTION_DETAIL_LIMIT):
+        self.gst_registered = gst_registered
+        self.sample_size = sample_size
+        self.total_income = 0.0
+        self.total_expenses = 0.0
+        self.total_deductions = 0.0
+        self.gst_collected = 0.0
+        self.gst_paid = 0.0
+        self.categories: Dict[str, Dict[str, float]] = {}
+        self.transaction_count = 0
+        self.income_transaction_count = 0
+        self.business_transaction_count = 0
+        self.large_cash_count = 0
+        self.round_amount_count = 0
+        self.sample_transactions: List[Dict] = []
+
+    def add(self, transaction: Dict, categorization) -> Dict[str, Any]:
+        """
+        Fold one transaction and its categorization into the totals.
+
+        Args:
+            transaction: Raw Basiq transaction
+            categorization: Result of categorize_transaction for it
+
+        Returns:
+            Dict: Export row for the transaction
+        """
+        amount = abs(float(transaction.get('amount', 0) or 0))
+        direction = transaction.get('direction')
+        description = transaction.get('description', '') or ''
+        deductible_amount = 0.0
+
+        self.transaction_count += 1
+
+        if direction == 'credit':
+            self.total_income += amount
+            self.income_transaction_count += 1
+            if self.gst_registered:
+                self.gst_collected += amount * 0.1
+        elif direction == 'debit':
+            self.total_expenses += amount
+            category = self.categories.setdefault(
+                categorization.category.value,
+                {'total': 0, 'deductible': 0, 'count': 0}
+            )
+            category['total'] += amount
+            category['count'] += 1
+
+            if categorization.category != TaxCategory.PERSONAL:
+                deductible_amount = amount * categorization.deductibility
+                category['deductible'] += deductible_amount
+                self.total_deductions += deductible_amount
+                if self.gst_registered:
+                    self.gst_paid += amount * 0.1
+
+            if amount > 50:
+                self.business_transaction_count += 1
+
+        # Audit risk indicators
+        if amount > 10000 and 'cash' in description.lower():
+            self.large_cash_count += 1
+        if amount > 100 and amount % 100 == 0:
+            self.round_amount_count += 1
+
+        account = transaction.get('account')
+        row = {
+            'id': transaction.get('id', ''),
+            'date': transaction.get('postDate', '') or '',
+            'description': description,
+            'amount': amount,
+            'direction': direction or '',
+            'account': account.get('displayName', '') if isinstance(account, dict) else (account or ''),
+            'tax_category': categorization.category.value,
+            'deductible_amount': round(deductible_amount, 2)
+        }
+
+        if len(self.sample_transactions) < self.sample_size:
+            self.sample_transactions.append(row)
+
+        return row
+
+    def assess_compliance(self, receipt_count: int) -> Tuple[float, List[str]]:
+        """Assess tax compliance and identify risks from the accumulated counters"""
+        compliance_score = 100
+        audit_risks = []
+
+        # Check receipt coverage
+        if self.business_transaction_count:
+            receipt_coverage = receipt_count / self.business_transaction_count
+        else:
+            receipt_coverage = 1
+
+        if receipt_coverage < 0.7:
+            compliance_score -= 20
+            audit_risks.append("Low receipt coverage for business expenses")
+
+        # Check for large cash transactions
+        if self.large_cash_count > 0:
+            compliance_score -= 10 * self.large_cash_count
+            audit_risks.append(f"{self.large_cash_count} large cash transactions detected")
+
+        # Check for round number transactions
+        if self.round_amount_count > self.transaction_count * 0.2:
+            compliance_score -= 10
+            audit_risks.append("High percentage of round-number transactions")
+
+        return max(0, compliance_score), audit_risks
+
+    def to_report_data(self, user_id: str, tax_year: str, receipt_count: int) -> TaxReportData:
+        """Build the aggregate-only report data"""
+        compliance_score, audit_risks = self.assess_compliance(receipt_count)
+
+        return TaxReportData(
+            user_id=user_id,
+            report_type=ReportType.INDIVIDUAL_TAX_RETURN,
+            tax_year=tax_year,
+            total_income=self.total_income,
+            total_deductions=self.total_deductions,
+            total_expenses=self.total_expenses,
+            gst_collected=self.gst_collected,
+            gst_paid=self.gst_paid,
+            net_gst=self.gst_collected - self.gst_paid,
+            categories=self.categories,
+            transaction_count=self.transaction_count,
+            income_transaction_count=self.income_transaction_count,
+            receipt_count=receipt_count,
+            sample_transactions=self.sample_transactions,
+            compliance_score=compliance_score,
+            audit_risks=audit_risks,
+            generated_at=datetime.now()
+        )
+
+class CSVReportWriter:
+    """Streams transaction export rows into a temporary CSV file"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=TRANSACTION_EXPORT_COLUMNS)
+        self._writer.writeheader()
+
+    def write_transaction(self, transaction: Dict, row: Dict[str, Any]) -> None:
+        self._writer.writerow(row)
+
+    def write_receipt(self, receipt: Dict) -> None:
+        pass
+
+    def finish(self) -> bytes:
+        """Return the finished CSV file contents"""
+        self._file.seek(0)
+        return self._file.read().encode('utf-8')
+
+    def close(self) -> None:
+        self._file.close()
+
+class ExcelReportWriter:
+    """
+    Streams transaction rows into an xlsxwriter workbook in constant-memory mode.
+
+    Each worksheet is flushed to disk row by row, so rows must be written in
+    order per sheet; the aggregate sheets are filled in once the stream ends.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        self.workbook = xlsxwriter.Workbook(self.path, {'constant_memory': True})
+        self._closed = False
+
+        # Define formats
+        self.title_format = self.workbook.add_format({
+            'bold': True,
+            'font_size': 16,
+            'align': 'center',
+            'valign': 'vcenter',
+            'bg_color': '#366092',
+            'font_color': 'white'
+        })
+
+        self.header_format = self.workbook.add_format({
+            'bold': True,
+            'bg_color': '#D7E4BC',
+            'border': 1
+        })
+
+        self.currency_format = self.workbook.add_format({
+            'num_format': '$#,##0.00',
+            'border': 1
+        })
+
+        # Worksheets keep their original order; Summary and Deductions are written last
+        self.summary_ws = self.workbook.add_worksheet('Summary')
+        self.income_ws = self.workbook.add_worksheet('Income')
+        self.deductions_ws = self.workbook.add_worksheet('Deductions')
+        self.transactions_ws = self.workbook.add_worksheet('All Transactions')
+
+        for col, header in enumerate(['Date', 'Description', 'Amount', 'Account']):
+            self.income_ws.write(0, col, header, self.header_format)
+        for col, header in enumerate(['Date', 'Description', 'Amount', 'Type', 'Category', 'Account']):
+            self.transactions_ws.write(0, col, header, self.header_format)
+
+        self._income_row = 1
+        self._transaction_row = 1
+
+    def write_transaction(self, transaction: Dict, row: Dict[str, Any]) -> None:
+        if row['direction'] == 'credit':
+            self.income_ws.write(self._income_row, 0, row['date'])
+            self.income_ws.write(self._income_row, 1, row['description'])
+            self.income_ws.write(self._income_row, 2, row['amount'], self.currency_format)
+            self.income_ws.write(self._income_row, 3, row['account'])
+            self._income_row += 1
+
+        self.transactions_ws.write(self._transaction_row, 0, row['date'])
+        self.transactions_ws.write(self._transaction_row, 1, row['description'])
+        self.transactions_ws.write(self._transaction_row, 2, row['amount'], self.currency_format)
+        self.transactions_ws.write(self._transaction_row, 3, row['direction'])
+        self.transactions_ws.write(self._transaction_row, 4, row['tax_category'])
+        self.transactions_ws.write(self._transaction_row, 5, row['account'])
+        self._transaction_row += 1
+
+    def write_receipt(self, receipt: Dict) -> None:
+        pass
+
+    def finish(self) -> bytes:
+        """Close the workbook and return the finished file contents"""
+        self.workbook.close()
+        self._closed = True
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def close(self) -> None:
+        try:
+            if not self._closed:
+                self.workbook.close()
+                self._closed = True
+        except Exception as e:
+            logger.warning(f"Error closing Excel workbook: {e}")
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+class JSONReportWriter:
+    """Streams categorized transactions and receipts into a temporary JSON file"""
+
+    SECTIONS = ('transactions', 'receipts')
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+        self._section = None
+        self._items = 0
+
+    def _open_section(self, name: str) -> None:
+        # Sections are written in order; skipped ones become empty lists
+        while self._section != name:
+            next_index = 0 if self._section is None else self.SECTIONS.index(self._section) + 1
+            self._file.write('{' if self._section is None else '],')
+            self._section = self.SECTIONS[next_index]
+            self._file.write(f'{json.dumps(self._section)}: [')
+            self._items = 0
+
+    def _write_item(self, section: str, item: Dict) -> None:
+        self._open_section(section)
+        if self._items:
+            self._file.write(',')
+        self._file.write(json.dumps(item, default=str))
+        self._items += 1
+
+    def write_transaction(self, transaction: Dict, row: Dict[str, Any]) -> None:
+        self._write_item('transactions', {
+            **transaction,
+            'tax_category': row['tax_category'],
+            'deductible_amount': row['deductible_amount']
+        })
+
+    def write_receipt(self, receipt: Dict) -> None:
+        self._write_item('receipts', receipt)
+
+    def finish(self, fields: Dict[str, Any]) -> bytes:
+        """
+        Close the streamed sections and append the remaining top-level fields.
+
+        Args:
+            fields: Aggregate report fields (metadata, summary, ...)
+
+        Returns:
+            bytes: Finished JSON document
+        """
+        self._open_section(self.SECTIONS[-1])
+        self._file.write('],')
+        self._file.write(json.dumps(fields, default=str)[1:])
+        self._file.seek(0)
+        return self._file.read().encode('utf-8')
+
+    def close(self) -> None:
+        self._file.close()
+
 class AutomatedReportGenerator:
     """Advanced tax report generation system"""
     
@@ -113,12 +449,27 @@ class AutomatedReportGenerator:
         user_id: str, 
         report_type: ReportType,
         tax_year: str,
-        output_format: OutputFormat = OutputFormat.PDF
+        output_format: OutputFormat = OutputFormat.PDF,
+        progress_callback: Optional[Callable[[int, str], None]] = None
     ) -> Dict[str, Any]:
-        """Generate comprehensive tax report"""
+        """
+        Generate comprehensive tax report
+
+        Args:
+            user_id: User ID
+            report_type: Type of report
+            tax_year: Start year of the Australian financial year
+            output_format: Output format
+            progress_callback: Optional callable receiving (percent, message) updates
+
+        Raises:
+            ValueError: If the output format is not supported
+        """
+        # Transaction-level formats are written while the year is streamed
+        writer = self._create_report_writer(output_format)
         try:
             # Collect and process data
-            report_data = await self._collect_tax_data(user_id, tax_year)
+            report_data = await self._collect_tax_data(user_id, tax_year, writer, progress_callback)
             
             if not report_data:
                 return {
@@ -126,20 +477,18 @@ class AutomatedReportGenerator:
                     'error': 'No data available for report generation'
                 }
             
+            if progress_callback:
+                progress_callback(85, 'Rendering report')
+            
             # Generate report based on type and format
-            if output_format == OutputFormat.PDF:
+            if writer is None:
                 result = await self._generate_pdf_report(report_data, report_type)
-            elif output_format == OutputFormat.EXCEL:
-                result = await self._generate_excel_report(report_data, report_type)
-            elif output_format == OutputFormat.CSV:
-                result = await self._generate_csv_report(report_data, report_type)
-            elif output_format == OutputFormat.JSON:
-                result = await self._generate_json_report(report_data, report_type)
+            elif isinstance(writer, ExcelReportWriter):
+                result = await self._generate_excel_report(report_data, report_type, writer)
+            elif isinstance(writer, CSVReportWriter):
+                result = await self._generate_csv_report(report_data, report_type, writer)
             else:
-                return {
-                    'success': False,
-                    'error': f'Unsupported output format: {output_format.value}'
-                }
+                result = await self._generate_json_report(report_data, report_type, writer)
             
             # Store report metadata
             await self._store_report_metadata(user_id, report_type, tax_year, result)
@@ -152,187 +501,141 @@ class AutomatedReportGenerator:
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            if writer is not None:
+                writer.close()
     
-    async def _collect_tax_data(self, user_id: str, tax_year: str) -> Optional[TaxReportData]:
-        """Collect comprehensive tax data for the user"""
+    def compute_data_fingerprint(self, user_id: str, tax_year: str) -> str:
+        """
+        Cheap fingerprint of the data a tax year report is built from.
+
+        Hashes each BASIQ account's id, balance, available funds and
+        lastUpdated marker from a single accounts request instead of reading
+        the year's transactions. BASIQ only changes transaction data when a
+        connection refreshes, which moves lastUpdated, and any new or changed
+        posting moves the balance, so a change anywhere in the year yields a
+        new fingerprint. Refreshes outside the tax year invalidate it too,
+        which errs towards regenerating. The tax profile and the count and
+        latest update time of the user's receipts are hashed as well.
+
+        Args:
+            user_id: User ID
+            tax_year: Start year of the Australian financial year
+
+        Returns:
+            str: Hex digest; a fresh random value if the data could not be read
+        """
+        digest = hashlib.sha256()
+        
+        accounts_result = get_user_accounts(user_id)
+        if not accounts_result.get('success'):
+            # Never reuse a stored report when the current data is unknown
+            logger.warning(f"Could not fingerprint accounts for user {user_id}: {accounts_result.get('error')}")
+            return os.urandom(16).hex()
+        
+        accounts = accounts_result.get('accounts', {}).get('data', [])
+        for account in sorted(accounts, key=lambda account: str(account.get('id'))):
+            digest.update(
+                f"account|{account.get('id')}|{account.get('balance')}|"
+                f"{account.get('availableFunds')}|{account.get('lastUpdated')}\n".encode('utf-8')
+            )
+        
+        if db:
+            for doc in db.collection('taxProfiles').where('userId', '==', user_id).limit(1).get():
+                digest.update(json.dumps(doc.to_dict(), sort_keys=True, default=str).encode('utf-8'))
+            
+            receipt_count = 0
+            latest_update = ''
+            receipts_ref = db.collection('receipts').where('userId', '==', user_id).select([])
+            for doc in receipts_ref.stream():
+                receipt_count += 1
+                latest_update = max(latest_update, str(getattr(doc, 'update_time', '') or ''))
+            digest.update(f"receipts|{receipt_count}|{latest_update}\n".encode('utf-8'))
+        
+        return digest.hexdigest()
+    
+    def _create_report_writer(
+        self, output_format: OutputFormat
+    ) -> Optional[Union[ExcelReportWriter, CSVReportWriter, JSONReportWriter]]:
+        """
+        Create the streaming row writer for a format (PDF needs aggregates only)
+
+        Raises:
+            ValueError: If the output format is not supported
+        """
+        if output_format == OutputFormat.PDF:
+            return None
+        if output_format == OutputFormat.EXCEL:
+            return ExcelReportWriter()
+        if output_format == OutputFormat.CSV:
+            return CSVReportWriter()
+        if output_format == OutputFormat.JSON:
+            return JSONReportWriter()
+        raise ValueError(f'Unsupported output format: {output_format.value}')
+    
+    async def _collect_tax_data(self, user_id: str, tax_year: str, writer=None,
+                                progress_callback: Optional[Callable[[int, str], None]] = None) -> Optional[TaxReportData]:
+        """
+        Stream the tax year and aggregate it in a single pass.
+
+        Each transaction is categorized exactly once; the result feeds the
+        totals, GST and compliance counters and, when given, the writer that
+        renders transaction rows. Only aggregates are returned.
+
+        Args:
+            user_id: User ID
+            tax_year: Start year of the Australian financial year
+            writer: Optional streaming writer receiving every transaction and receipt
+            progress_callback: Optional callable receiving (percent, message) updates
+
+        Returns:
+            TaxReportData: Aggregated report data, or None on failure
+        """
         try:
             # Define tax year dates (Australian financial year: July 1 - June 30)
             start_date = datetime(int(tax_year), 7, 1)
             end_date = datetime(int(tax_year) + 1, 6, 30)
             
-            # Get transactions for the tax year
-            filter_str = f"transaction.postDate.gte={start_date.isoformat()}&transaction.postDate.lte={end_date.isoformat()}"
-            transactions_result = get_user_transactions(user_id, filter_str)
-            
-            if not transactions_result.get('success'):
-                return None
-            
-            transactions = transactions_result.get('transactions', {}).get('data', [])
+            # Get user tax profile (shared with the insights engines)
+            snapshot = await get_user_snapshot_loader().load_async(user_id, ['tax_profile'])
+            tax_profile = snapshot.tax_profile
             
-            # Get user profile and tax profile
-            user_profile = None
-            tax_profile = None
+            # GST only applies to users registered with an ABN
+            gst_registered = bool(tax_profile and tax_profile.get('personalInfo', {}).get('abn'))
+            accumulator = TaxReportAccumulator(gst_registered)
             
+            # Stream transactions for the tax year page by page
+            filter_str = f"transaction.postDate.gte={start_date.isoformat()}&transaction.postDate.lte={end_date.isoformat()}"
+            for transaction in iter_user_transactions(user_id, filter_str):
+                categorization = categorize_transaction(transaction, tax_profile)
+                row = accumulator.add(transaction, categorization)
+                if writer:
+                    writer.write_transaction(transaction, row)
+                if progress_callback and accumulator.transaction_count % PROGRESS_INTERVAL == 0:
+                    # The year's total is unknown while streaming, so approach 80% asymptotically
+                    count = accumulator.transaction_count
+                    progress_callback(5 + int(75 * count / (count + 10000)), f'Processed {count} transactions')
+            
+            # Stream receipts; only the count is kept
+            receipt_count = 0
             if db:
-                user_ref = db.collection('users').document(user_id)
-                user_doc = user_ref.get()
-                if user_doc.exists:
-                    user_profile = user_doc.to_dict()
-                
-                tax_profile_ref = db.collection('taxProfiles').where('userId', '==', user_id).get()
-                if tax_profile_ref:
-                    tax_profile = tax_profile_ref[0].to_dict()
-                
-                # Get receipts for the tax year
                 receipts_ref = db.collection('receipts').where('userId', '==', user_id)
-                receipts = [doc.to_dict() for doc in receipts_ref.get()]
-            
-            # Process transactions and categorize
-            categorized_data = self._categorize_transactions(transactions, tax_profile)
-            
-            # Calculate totals
-            total_income = sum(
-                abs(float(t.get('amount', 0))) for t in transactions 
-                if t.get('direction') == 'credit'
-            )
-            
-            total_expenses = sum(
-                abs(float(t.get('amount', 0))) for t in transactions 
-                if t.get('direction') == 'debit'
+                for doc in receipts_ref.stream():
+                    receipt_count += 1
+                    if writer:
+                        writer.write_receipt(doc.to_dict())
+            
+            logger.info(
+                f"Aggregated {accumulator.transaction_count} transactions and "
+                f"{receipt_count} receipts for user {user_id}, tax year {tax_year}"
             )
             
-            total_deductions = categorized_data['total_deductions']
-            
-            # Calculate GST (if applicable)
-            gst_data = self._calculate_gst(transactions, tax_profile)
-            
-            # Assess compliance
-            compliance_score, audit_risks = self._assess_compliance(transactions, receipts or [])
-            
-            return TaxReportData(
-                user_id=user_id,
-                report_type=ReportType.INDIVIDUAL_TAX_RETURN,
-                tax_year=tax_year,
-                total_income=total_income,
-                total_deductions=total_deductions,
-                total_expenses=total_expenses,
-                gst_collected=gst_data['collected'],
-                gst_paid=gst_data['paid'],
-                net_gst=gst_data['net'],
-                categories=categorized_data['categories'],
-                transactions=transactions,
-                receipts=receipts or [],
-                compliance_score=compliance_score,
-                audit_risks=audit_risks,
-                generated_at=datetime.now()
-            )
+            return accumulator.to_report_data(user_id, tax_year, receipt_count)
             
         except Exception as e:
             logger.error(f"Error collecting tax data for user {user_id}: {e}")
             return None
     
-    def _categorize_transactions(self, transactions: List[Dict], tax_profile: Optional[Dict]) -> Dict[str, Any]:
-        """Categorize transactions for tax purposes"""
-        categories = {}
-        total_deductions = 0
-        
-        for transaction in transactions:
-            if transaction.get('direction') == 'debit':
-                amount = abs(float(transaction.get('amount', 0)))
-                
-                # Use the categorization system
-                categorization = categorize_transaction(transaction, tax_profile)
-                category_name = categorization.category.value
-                
-                if category_name not in categories:
-                    categories[category_name] = {
-                        'total': 0,
-                        'deductible': 0,
-                        'transactions': []
-                    }
-                
-                categories[category_name]['total'] += amount
-                categories[category_name]['transactions'].append(transaction)
-                
-                # Calculate deductible amount
-                if categorization.category != TaxCategory.PERSONAL:
-                    deductible_amount = amount * categorization.deductibility
-                    categories[category_name]['deductible'] += deductible_amount
-                    total_deductions += deductible_amount
-        
-        return {
-            'categories': categories,
-            'total_deductions': total_deductions
-        }
-    
-    def _calculate_gst(self, transactions: List[Dict], tax_profile: Optional[Dict]) -> Dict[str, float]:
-        """Calculate GST collected and paid"""
-        gst_collected = 0
-        gst_paid = 0
-        
-        # Check if user is registered for GST
-        if tax_profile and tax_profile.get('personalInfo', {}).get('abn'):
-            for transaction in transactions:
-                amount = abs(float(transaction.get('amount', 0)))
-                
-                # Simple GST calculation (10% of eligible transactions)
-                if transaction.get('direction') == 'credit':
-                    # Income - GST collected
-                    gst_collected += amount * 0.1
-                elif transaction.get('direction') == 'debit':
-                    # Business expenses - GST paid
-                    categorization = categorize_transaction(transaction, tax_profile)
-                    if categorization.category != TaxCategory.PERSONAL:
-                        gst_paid += amount * 0.1
-        
-        return {
-            'collected': gst_collected,
-            'paid': gst_paid,
-            'net': gst_collected - gst_paid
-        }
-    
-    def _assess_compliance(self, transactions: List[Dict], receipts: List[Dict]) -> Tuple[float, List[str]]:
-        """Assess tax compliance and identify risks"""
-        compliance_score = 100
-        audit_risks = []
-        
-        # Check receipt coverage
-        business_transactions = [
-            t for t in transactions 
-            if t.get('direction') == 'debit' and abs(float(t.get('amount', 0))) > 50
-        ]
-        
-        receipt_coverage = len(receipts) / len(business_transactions) if business_transactions else 1
-        
-        if receipt_coverage < 0.7:
-            compliance_score -= 20
-            audit_risks.append("Low receipt coverage for business expenses")
-        
-        # Check for large cash transactions
-        large_cash_count = 0
-        for transaction in transactions:
-            amount = abs(float(transaction.get('amount', 0)))
-            description = transaction.get('description', '').lower()
-            
-            if amount > 10000 and 'cash' in description:
-                large_cash_count += 1
-                compliance_score -= 10
-        
-        if large_cash_count > 0:
-            audit_risks.append(f"{large_cash_count} large cash transactions detected")
-        
-        # Check for round number transactions
-        round_transactions = [
-            t for t in transactions 
-            if abs(float(t.get('amount', 0))) % 100 == 0 and abs(float(t.get('amount', 0))) > 100
-        ]
-        
-        if len(round_transactions) > len(transactions) * 0.2:
-            compliance_score -= 10
-            audit_risks.append("High percentage of round-number transactions")
-        
-        return max(0, compliance_score), audit_risks
-    
     async def _generate_pdf_report(self, report_data: TaxReportData, report_type: ReportType) -> Dict[str, Any]:
         """Generate PDF report"""
         try:
@@ -398,59 +701,23 @@ class AutomatedReportGenerator:
                 'error': str(e)
             }
     
-    async def _generate_excel_report(self, report_data: TaxReportData, report_type: ReportType) -> Dict[str, Any]:
+    async def _generate_excel_report(self, report_data: TaxReportData, report_type: ReportType,
+                                     writer: ExcelReportWriter) -> Dict[str, Any]:
         """Generate Excel report with multiple worksheets"""
         try:
-            buffer = io.BytesIO()
-            workbook = xlsxwriter.Workbook(buffer, {'in_memory': True})
-            
-            # Define formats
-            title_format = workbook.add_format({
-                'bold': True,
-                'font_size': 16,
-                'align': 'center',
-                'valign': 'vcenter',
-                'bg_color': '#366092',
-                'font_color': 'white'
-            })
-            
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#D7E4BC',
-                'border': 1
-            })
-            
-            currency_format = workbook.add_format({
-                'num_format': '$#,##0.00',
-                'border': 1
-            })
-            
-            # Summary worksheet
-            summary_ws = workbook.add_worksheet('Summary')
-            self._create_excel_summary(summary_ws, report_data, title_format, header_format, currency_format)
-            
-            # Income worksheet
-            income_ws = workbook.add_worksheet('Income')
-            self._create_excel_income(income_ws, report_data, header_format, currency_format)
-            
-            # Deductions worksheet
-            deductions_ws = workbook.add_worksheet('Deductions')
-            self._create_excel_deductions(deductions_ws, report_data, header_format, currency_format)
-            
-            # Transactions worksheet
-            transactions_ws = workbook.add_worksheet('All Transactions')
-            self._create_excel_transactions(transactions_ws, report_data, header_format, currency_format)
+            # Income and transaction sheets were streamed during collection
+            self._create_excel_summary(writer.summary_ws, report_data, writer.title_format,
+                                       writer.header_format, writer.currency_format)
+            self._create_excel_deductions(writer.deductions_ws, report_data,
+                                          writer.header_format, writer.currency_format)
             
             # GST worksheet (if applicable)
             if report_data.gst_collected > 0 or report_data.gst_paid > 0:
-                gst_ws = workbook.add_worksheet('GST Summary')
-                self._create_excel_gst(gst_ws, report_data, header_format, currency_format)
-            
-            workbook.close()
-            buffer.seek(0)
+                gst_ws = writer.workbook.add_worksheet('GST Summary')
+                self._create_excel_gst(gst_ws, report_data, writer.header_format, writer.currency_format)
             
             # Convert to base64
-            excel_data = buffer.getvalue()
+            excel_data = writer.finish()
             excel_base64 = base64.b64encode(excel_data).decode('utf-8')
             
             return {
@@ -468,25 +735,15 @@ class AutomatedReportGenerator:
                 'error': str(e)
             }
     
-    async def _generate_csv_report(self, report_data: TaxReportData, report_type: ReportType) -> Dict[str, Any]:
+    async def _generate_csv_report(self, report_data: TaxReportData, report_type: ReportType,
+                                   writer: CSVReportWriter) -> Dict[str, Any]:
         """Generate CSV report"""
         try:
-            # Create DataFrame from transactions
-            df = pd.DataFrame(report_data.transactions)
-            
-            # Add categorization
-            df['tax_category'] = df.apply(
-                lambda row: categorize_transaction(row.to_dict(), None).category.value, 
-                axis=1
-            )
-            
-            # Convert to CSV
-            csv_buffer = io.StringIO()
-            df.to_csv(csv_buffer, index=False)
-            csv_data = csv_buffer.getvalue()
+            # Rows were streamed to the writer during collection
+            csv_data = writer.finish()
             
             # Convert to base64
-            csv_base64 = base64.b64encode(csv_data.encode('utf-8')).decode('utf-8')
+            csv_base64 = base64.b64encode(csv_data).decode('utf-8')
             
             return {
                 'success': True,
@@ -503,10 +760,12 @@ class AutomatedReportGenerator:
                 'error': str(e)
             }
     
-    async def _generate_json_report(self, report_data: TaxReportData, report_type: ReportType) -> Dict[str, Any]:
+    async def _generate_json_report(self, report_data: TaxReportData, report_type: ReportType,
+                                    writer: JSONReportWriter) -> Dict[str, Any]:
         """Generate JSON report"""
         try:
-            report_dict = {
+            # Transactions and receipts were streamed; append the aggregates
+            json_data = writer.finish({
                 'metadata': {
                     'user_id': report_data.user_id,
                     'report_type': report_type.value,
@@ -517,6 +776,8 @@ class AutomatedReportGenerator:
                     'total_income': report_data.total_income,
                     'total_deductions': report_data.total_deductions,
                     'total_expenses': report_data.total_expenses,
+                    'transaction_count': report_data.transaction_count,
+                    'receipt_count': report_data.receipt_count,
                     'compliance_score': report_data.compliance_score
                 },
                 'gst': {
@@ -525,13 +786,10 @@ class AutomatedReportGenerator:
                     'net': report_data.net_gst
                 },
                 'categories': report_data.categories,
-                'transactions': report_data.transactions,
-                'receipts': report_data.receipts,
                 'audit_risks': report_data.audit_risks
-            }
+            })
             
-            json_data = json.dumps(report_dict, indent=2, default=str)
-            json_base64 = base64.b64encode(json_data.encode('utf-8')).decode('utf-8')
+            json_base64 = base64.b64encode(json_data).decode('utf-8')
             
             return {
                 'success': True,
@@ -629,14 +887,8 @@ class AutomatedReportGenerator:
         
         elements.append(Paragraph("Income Summary", self.styles['CustomHeading']))
         
-        # Income transactions
-        income_transactions = [
-            t for t in report_data.transactions 
-            if t.get('direction') == 'credit'
-        ]
-        
-        if income_transactions:
-            elements.append(Paragraph(f"Total income transactions: {len(income_transactions)}", self.styles['CustomBody']))
+        if report_data.income_transaction_count:
+            elements.append(Paragraph(f"Total income transactions: {report_data.income_transaction_count}", self.styles['CustomBody']))
             elements.append(Paragraph(f"Total income amount: ${report_data.total_income:,.2f}", self.styles['CustomBody']))
         else:
             elements.append(Paragraph("No income transactions found for this period.", self.styles['CustomBody']))
@@ -687,7 +939,7 @@ class AutomatedReportGenerator:
                     category,
                     f"${cat_data['total']:,.2f}",
                     f"${cat_data['deductible']:,.2f}",
-                    str(len(cat_data['transactions']))
+                    str(cat_data['count'])
                 ])
             
             table = Table(data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1*inch])
@@ -764,20 +1016,19 @@ class AutomatedReportGenerator:
         
         elements.append(Paragraph("Transaction Details", self.styles['CustomHeading']))
         
-        # Show first 50 transactions in PDF to avoid huge documents
-        display_transactions = report_data.transactions[:50]
+        # Only the first transactions are kept for the PDF to avoid huge documents
+        display_transactions = report_data.sample_transactions
         
         if display_transactions:
             data = [['Date', 'Description', 'Amount', 'Type', 'Category']]
             
             for transaction in display_transactions:
-                date_str = transaction.get('postDate', '')[:10]  # YYYY-MM-DD
-                description = transaction.get('description', '')[:30]  # Truncate long descriptions
-                amount = f"${abs(float(transaction.get('amount', 0))):,.2f}"
-                tx_type = transaction.get('direction', 'unknown')
-                category = categorize_transaction(transaction, None).category.value
+                date_str = transaction['date'][:10]  # YYYY-MM-DD
+                description = transaction['description'][:30]  # Truncate long descriptions
+                amount = f"${transaction['amount']:,.2f}"
+                tx_type = transaction['direction'] or 'unknown'
                 
-                data.append([date_str, description, amount, tx_type, category])
+                data.append([date_str, description, amount, tx_type, transaction['tax_category']])
             
             table = Table(data, colWidths=[1*inch, 2.5*inch, 1*inch, 0.8*inch, 1.2*inch])
             table.setStyle(TableStyle([
@@ -794,9 +1045,9 @@ class AutomatedReportGenerator:
             
             elements.append(table)
             
-            if len(report_data.transactions) > 50:
+            if report_data.transaction_count > len(display_transactions):
                 elements.append(Spacer(1, 12))
-                elements.append(Paragraph(f"Showing first 50 of {len(report_data.transactions)} transactions. Full details available in Excel export.", self.styles['CustomBody']))
+                elements.append(Paragraph(f"Showing first {len(display_transactions)} of {report_data.transaction_count} transactions. Full details available in Excel export.", self.styles['CustomBody']))
         
         return elements
     
@@ -828,22 +1079,6 @@ class AutomatedReportGenerator:
         worksheet.write(row, 0, 'Compliance Score')
         worksheet.write(row, 1, f"{report_data.compliance_score:.1f}%")
     
-    def _create_excel_income(self, worksheet, report_data, header_format, currency_format):
-        """Create Excel income worksheet"""
-        worksheet.write(0, 0, 'Date', header_format)
-        worksheet.write(0, 1, 'Description', header_format)
-        worksheet.write(0, 2, 'Amount', header_format)
-        worksheet.write(0, 3, 'Account', header_format)
-        
-        row = 1
-        for transaction in report_data.transactions:
-            if transaction.get('direction') == 'credit':
-                worksheet.write(row, 0, transaction.get('postDate', ''))
-                worksheet.write(row, 1, transaction.get('description', ''))
-                worksheet.write(row, 2, abs(float(transaction.get('amount', 0))), currency_format)
-                worksheet.write(row, 3, transaction.get('account', {}).get('displayName', ''))
-                row += 1
-    
     def _create_excel_deductions(self, worksheet, report_data, header_format, currency_format):
         """Create Excel deductions worksheet"""
         worksheet.write(0, 0, 'Category', header_format)
@@ -857,25 +1092,9 @@ class AutomatedReportGenerator:
                 worksheet.write(row, 0, category)
                 worksheet.write(row, 1, cat_data['total'], currency_format)
                 worksheet.write(row, 2, cat_data['deductible'], currency_format)
-                worksheet.write(row, 3, len(cat_data['transactions']))
+                worksheet.write(row, 3, cat_data['count'])
                 row += 1
     
-    def _create_excel_transactions(self, worksheet, report_data, header_format, currency_format):
-        """Create Excel all transactions worksheet"""
-        headers = ['Date', 'Description', 'Amount', 'Type', 'Category', 'Account']
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header, header_format)
-        
-        row = 1
-        for transaction in report_data.transactions:
-            worksheet.write(row, 0, transaction.get('postDate', ''))
-            worksheet.write(row, 1, transaction.get('description', ''))
-            worksheet.write(row, 2, abs(float(transaction.get('amount', 0))), currency_format)
-            worksheet.write(row, 3, transaction.get('direction', ''))
-            worksheet.write(row, 4, categorize_transaction(transaction, None).category.value)
-            worksheet.write(row, 5, transaction.get('account', {}).get('displayName', ''))
-            row += 1
-    
     def _create_excel_gst(self, worksheet, report_data, header_format, currency_format):
         """Create Excel GST worksheet"""
         worksheet.write(0, 0, 'GST Component', header_format)
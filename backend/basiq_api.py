@@ -22,8 +22,11 @@ sys.path.insert(0, project_root)
 sys.path.insert(0, os.path.join(project_root, 'src'))
 
 # Import the new comprehensive BASIQ client
-from integrations.basiq_client import basiq_client
-from config.basiq_config import get_basiq_config
+from integrations.basiq_client import basiq_client, get_basiq_http_session
+try:
+    from config.basiq_config import get_basiq_config
+except ImportError:
+    from backend.config.basiq_config import get_basiq_config
 
 # Load environment variables
 load_dotenv()
@@ -71,7 +74,7 @@ def get_basiq_token():
     }
 
     try:
-        response = requests.post(url, headers=headers, data=data)
+        response = get_basiq_http_session().post(url, headers=headers, data=data, retry_non_idempotent=True)
         response.raise_for_status()
         token_data = response.json()
         # Cache the token with expiration (subtract 5 minutes for safety)
@@ -147,7 +150,7 @@ def create_basiq_user(email, mobile=None, name=None, business_name=None,
     payload = {k: v for k, v in payload.items() if v is not None}
 
     try:
-        response = requests.post(f"{BASIQ_API_URL}/users", headers=headers, json=payload)
+        response = get_basiq_http_session().post(f"{BASIQ_API_URL}/users", headers=headers, json=payload)
         response.raise_for_status()
         return {
             'success': True,
@@ -190,7 +193,7 @@ def get_basiq_user(user_id):
     headers = get_headers()
     
     try:
-        response = requests.get(url, headers=headers)
+        response = get_basiq_http_session().get(url, headers=headers)
         response.raise_for_status()
         return {
             'success': True,
@@ -235,7 +238,7 @@ def create_auth_link(user_id, mobile=True):
     }   
     
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = get_basiq_http_session().post(url, headers=headers, json=payload)
         response.raise_for_status()
         return {
             'success': True,
@@ -279,7 +282,7 @@ def get_user_connections(user_id):
 
     
     try:
-        response = requests.get(url, headers=headers)
+        response = get_basiq_http_session().get(url, headers=headers)
         response.raise_for_status()
         return {
             'success': True,
@@ -307,7 +310,7 @@ def get_user_accounts(user_id):
     headers = get_headers(token_type="bearer", token=token)
 
     try:
-        response = requests.get(url, headers=headers)
+        response = get_basiq_http_session().get(url, headers=headers)
         response.raise_for_status()
 
         return {
@@ -347,7 +350,7 @@ def get_user_transactions(user_id, filter_str=None):
     headers = get_headers(token_type="bearer", token=token)
 
     try:
-        response = requests.get(url, headers=headers)
+        response = get_basiq_http_session().get(url, headers=headers)
         response.raise_for_status()
 
         return {
@@ -362,6 +365,22 @@ def get_user_transactions(user_id, filter_str=None):
             'error': str(e)
         }
 
+def iter_user_transactions(user_id, filter_str=None):
+    """
+    Stream every page of a user's transactions, one transaction at a time.
+
+    Args:
+        user_id (str): Basiq user ID
+        filter_str (str, optional): e.g. "account.id.eq('account-id')"
+
+    Yields:
+        dict: Raw Basiq transactions
+
+    Raises:
+        requests.exceptions.RequestException: If a page request fails
+    """
+    return basiq_client.iter_user_transactions(user_id, filter_str)
+
 def refresh_connection(user_id, connection_id):
     """
     Refresh a specific connection to update account and transaction data.
@@ -378,7 +397,7 @@ def refresh_connection(user_id, connection_id):
     headers = get_headers(token_type="bearer", token=token)
     
     try:
-        response = requests.get(url, headers=headers)
+        response = get_basiq_http_session().get(url, headers=headers)
         response.raise_for_status()
         return {
             'success': True,
@@ -405,7 +424,7 @@ def delete_connection(user_id, connection_id):
     headers = get_headers()
     
     try:
-        response = requests.delete(url, headers=headers)
+        response = get_basiq_http_session().delete(url, headers=headers)
         response.raise_for_status()
         return {
             'success': True,
@@ -6,7 +6,6 @@ import json
 import logging
 # import google.generativeai as genai
 import openai
-import requests
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +22,12 @@ except ImportError:
     claude_available = False
     logger.warning("Claude client not available - using OpenRouter fallback")
 
+# Webhook delivery runs off the response stream
+try:
+    from integrations.webhook_delivery import get_webhook_dispatcher
+except ImportError:
+    from src.integrations.webhook_delivery import get_webhook_dispatcher
+
 # # Initialize Gemini
 # genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
@@ -283,27 +288,22 @@ def chat():
         #     return jsonify({"error": "Failed to get response"}), 500
         def generate():
             buffer = ""
-            # Use Claude-enhanced response generation with OpenRouter fallback
-            for chunk in get_llm_response_with_claude(user_message, search_results):
-                # Replace actual newlines with the literal characters `\n`
-                chunk = chunk.replace("\n", "\\n")
-
-                buffer += chunk
-                yield chunk
-
-                # Webhook support: send each chunk to webhook if provided
-                if webhook_url:
-                    try:
-                        requests.post(webhook_url, json={"chunk": chunk})
-                    except Exception as e:
-                        logger.error(f"Webhook error: {e}")
+            # Webhook posts are queued and sent in batches so a slow receiver never stalls the stream
+            webhook_stream = get_webhook_dispatcher().open_stream(webhook_url) if webhook_url else None
+            try:
+                # Use Claude-enhanced response generation with OpenRouter fallback
+                for chunk in get_llm_response_with_claude(user_message, search_results):
+                    # Replace actual newlines with the literal characters `\n`
+                    chunk = chunk.replace("\n", "\\n")
 
-            # Optionally, send the full response at the end
-            if webhook_url:
-                try:
-                    requests.post(webhook_url, json={"full_response": buffer})
-                except Exception as e:
-                    logger.error(f"Webhook error (final): {e}")
+                    buffer += chunk
+                    if webhook_stream:
+                        webhook_stream.send(chunk)
+                    yield chunk
+            finally:
+                # Send the full response once queued chunks are delivered
+                if webhook_stream:
+                    webhook_stream.close(buffer)
 
         return Response(generate(), mimetype='text/plain')
 
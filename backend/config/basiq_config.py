@@ -107,11 +107,16 @@ class BasiqConfig:
             'base_url': self.get_base_url(),
             'api_version': '3.0',
             'timeout': int(os.getenv('BASIQ_TIMEOUT', '30')),
+            'connect_timeout': float(os.getenv('BASIQ_CONNECT_TIMEOUT', '5')),
             'retry_attempts': int(os.getenv('BASIQ_RETRY_ATTEMPTS', '3')),
             'retry_delay': float(os.getenv('BASIQ_RETRY_DELAY', '1.0')),
             'token_buffer_seconds': int(os.getenv('BASIQ_TOKEN_BUFFER_SECONDS', '300')),
             'max_connections': int(os.getenv('BASIQ_MAX_CONNECTIONS', '10')),
             'sync_interval_hours': int(os.getenv('BASIQ_SYNC_INTERVAL_HOURS', '6')),
+            'sync_workers': int(os.getenv('BASIQ_SYNC_WORKERS', '4')),
+            'sync_rate_limit_per_second': float(os.getenv('BASIQ_SYNC_RATE_LIMIT_PER_SECOND', '2.0')),
+            'sync_rate_limit_burst': int(os.getenv('BASIQ_SYNC_RATE_LIMIT_BURST', '4')),
+            'sync_user_timeout_seconds': int(os.getenv('BASIQ_SYNC_USER_TIMEOUT_SECONDS', '300')),
             'transaction_days_back': int(os.getenv('BASIQ_TRANSACTION_DAYS_BACK', '30')),
             'match_threshold': float(os.getenv('BASIQ_MATCH_THRESHOLD', '0.7')),
             'match_date_range_days': int(os.getenv('BASIQ_MATCH_DATE_RANGE_DAYS', '3')),
@@ -166,6 +171,12 @@ class BasiqConfig:
         if config['sync_interval_hours'] > 24:
             warnings.append("BASIQ sync interval is very infrequent (> 24 hours)")
         
+        if config['sync_workers'] < 1:
+            issues.append("BASIQ sync workers must be at least 1")
+        
+        if config['sync_rate_limit_per_second'] <= 0:
+            issues.append("BASIQ sync rate limit must be greater than 0")
+        
         # Check matching parameters
         if config['match_threshold'] < 0.5:
             warnings.append("BASIQ match threshold is very low (< 0.5)")
@@ -288,11 +299,16 @@ class BasiqConfig:
             'BASIQ_BASE_URL': config['base_url'],
             'BASIQ_API_VERSION': config['api_version'],
             'BASIQ_TIMEOUT': config['timeout'],
+            'BASIQ_CONNECT_TIMEOUT': config['connect_timeout'],
             'BASIQ_RETRY_ATTEMPTS': config['retry_attempts'],
             'BASIQ_RETRY_DELAY': config['retry_delay'],
             'BASIQ_TOKEN_BUFFER_SECONDS': config['token_buffer_seconds'],
             'BASIQ_MAX_CONNECTIONS': config['max_connections'],
             'BASIQ_SYNC_INTERVAL_HOURS': config['sync_interval_hours'],
+            'BASIQ_SYNC_WORKERS': config['sync_workers'],
+            'BASIQ_SYNC_RATE_LIMIT_PER_SECOND': config['sync_rate_limit_per_second'],
+            'BASIQ_SYNC_RATE_LIMIT_BURST': config['sync_rate_limit_burst'],
+            'BASIQ_SYNC_USER_TIMEOUT_SECONDS': config['sync_user_timeout_seconds'],
             'BASIQ_TRANSACTION_DAYS_BACK': config['transaction_days_back'],
             'BASIQ_MATCH_THRESHOLD': config['match_threshold'],
             'BASIQ_MATCH_DATE_RANGE_DAYS': config['match_date_range_days'],
@@ -15,6 +15,7 @@ sys.path.insert(0, str(project_root / "src"))
 sys.path.insert(0, str(project_root / "backend"))
 sys.path.insert(0, str(project_root / "database"))
 
+import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
@@ -36,6 +37,11 @@ except ImportError:
     claude_available = False
     logger.warning("Claude client not available - using fallback analysis")
 
+try:
+    from services.user_snapshot import get_user_snapshot_loader
+except ImportError:
+    from backend.services.user_snapshot import get_user_snapshot_loader
+
 # Helper functions to replace numpy functionality
 def mean(values):
     """Calculate mean without numpy"""
@@ -161,9 +167,9 @@ class FinancialInsightsService:
             # 2. Smart business insights
             if self.smart_engine:
                 try:
-                    smart_insights = self.smart_engine.generate_comprehensive_insights(
+                    smart_insights = asyncio.run(self.smart_engine.generate_comprehensive_insights(
                         request.user_id, self._get_period_months(request.period)
-                    )
+                    ))
                     insights.extend([asdict(insight) for insight in smart_insights])
                 except Exception as e:
                     logger.warning(f"Could not generate smart insights: {e}")
@@ -544,62 +550,19 @@ class FinancialInsightsService:
 
     def _fetch_user_data(self, request: InsightRequest) -> Dict[str, Any]:
         """Fetch comprehensive user data for analysis"""
-        data = {}
+        sources = ['transactions', 'profile', 'tax_profile', 'goals', 'subscriptions']
+        if request.include_receipts:
+            sources.append('receipts')
         
         try:
-            # Calculate date range
-            end_date = datetime.now()
-            period_months = self._get_period_months(request.period)
-            start_date = end_date - timedelta(days=period_months * 30)
-            
-            # Try to get transactions from BASIQ
-            try:
-                from backend.basiq_api import get_user_transactions
-                filter_str = f"transaction.postDate.gte={start_date.isoformat()}&transaction.postDate.lte={end_date.isoformat()}"
-                transactions_result = get_user_transactions(request.user_id, filter_str)
-                
-                if transactions_result.get('success'):
-                    data['transactions'] = transactions_result.get('transactions', {}).get('data', [])
-                else:
-                    data['transactions'] = []
-            except ImportError:
-                logger.warning("BASIQ API not available")
-                data['transactions'] = []
-            
-            # Try to get user data from Firebase
-            try:
-                from backend.firebase_config import db
-                if db:
-                    # User profile
-                    user_ref = db.collection('users').document(request.user_id)
-                    user_doc = user_ref.get()
-                    if user_doc.exists:
-                        data['profile'] = user_doc.to_dict()
-                    
-                    # Tax profile
-                    tax_profile_ref = db.collection('taxProfiles').where('userId', '==', request.user_id).get()
-                    if tax_profile_ref:
-                        data['tax_profile'] = tax_profile_ref[0].to_dict()
-                    
-                    # Goals
-                    goals_ref = db.collection('goals').where('userId', '==', request.user_id).get()
-                    data['goals'] = [doc.to_dict() for doc in goals_ref]
-                    
-                    # Receipts (if requested)
-                    if request.include_receipts:
-                        receipts_ref = db.collection('receipts').where('userId', '==', request.user_id).get()
-                        data['receipts'] = [doc.to_dict() for doc in receipts_ref]
-                    
-                    # Subscriptions
-                    subs_ref = db.collection('subscriptions').where('userId', '==', request.user_id).get()
-                    data['subscriptions'] = [doc.to_dict() for doc in subs_ref]
-            except ImportError:
-                logger.warning("Firebase not available")
-            
+            # Shared with the other engines so each source is read once per request
+            snapshot = get_user_snapshot_loader().load(
+                request.user_id, sources, period_months=self._get_period_months(request.period)
+            )
+            return snapshot.to_dict(sources)
         except Exception as e:
             logger.error(f"Error fetching user data: {e}")
-            
-        return data
+            return {}
 
     def _generate_ai_insights(self, request: InsightRequest, user_data: Dict) -> List[Dict]:
         """Generate insights using the AI financial engine"""
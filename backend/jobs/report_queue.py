@@ -0,0 +1,634 @@
+"""
+Report Job Queue for TAAXDOG Automated Tax Reports
+
+Moves report rendering out of the web request:
+- Jobs are persisted in a local SQLite database shared by web and worker processes
+- A worker pool (run as its own process, or embedded for development) claims
+  queued jobs and renders them with AutomatedReportGenerator
+- Jobs expose a status and progress percentage while they run
+- Finished reports are stored on disk keyed by (user, report type, tax year,
+  format, data fingerprint), so identical re-requests reuse the stored file
+- Finished jobs and stored reports are purged after REPORT_RETENTION_SECONDS
+
+Run the worker pool separately from the web workers with:
+    python backend/jobs/report_queue.py [worker_count]
+
+Setting REPORT_WORKERS_EMBEDDED=true starts the pool inside the web app
+instead, which is meant for development only.
+"""
+
+import sys
+import os
+import asyncio
+import base64
+import hashlib
+import logging
+import socket
+import sqlite3
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+
+# Add project paths
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+
+logger = logging.getLogger(__name__)
+
+REPORT_DATA_DIR = os.environ.get(
+    'REPORT_DATA_DIR', os.path.join(tempfile.gettempdir(), 'taaxdog_reports')
+)
+
+# Running jobs that stop reporting progress for this long are requeued
+STALE_JOB_SECONDS = int(os.environ.get('REPORT_JOB_STALE_SECONDS', '900'))
+MAX_JOB_ATTEMPTS = 3
+
+# Finished jobs and stored reports older than this are purged
+RETENTION_SECONDS = int(os.environ.get('REPORT_RETENTION_SECONDS', str(7 * 24 * 3600)))
+CLEANUP_INTERVAL_SECONDS = 3600
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'json': 'application/json'
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+class ReportJobStore:
+    """
+    SQLite-backed store for report jobs and their stored outputs.
+
+    Every call opens its own short-lived connection, so a single store can be
+    shared across threads and several processes can use the same database
+    file. Job claims use ``BEGIN IMMEDIATE`` so each job runs at most once at
+    a time.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            report_type TEXT NOT NULL,
+            tax_year TEXT NOT NULL,
+            output_format TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            report_id TEXT,
+            cached INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_id TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs (status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_report_jobs_user ON report_jobs (user_id, status);
+        CREATE TABLE IF NOT EXISTS report_artifacts (
+            id TEXT PRIMARY KEY,
+            cache_key TEXT NOT NULL UNIQUE,
+            user_id TEXT NOT NULL,
+            report_type TEXT NOT NULL,
+            tax_year TEXT NOT NULL,
+            output_format TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            path TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            content_type TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_report_artifacts_user ON report_artifacts (user_id, created_at);
+    """
+
+    def __init__(self, data_dir: str = REPORT_DATA_DIR):
+        """
+        Initialize the store.
+
+        Args:
+            data_dir: Directory holding the SQLite database and report files
+        """
+        self.data_dir = data_dir
+        self.artifact_dir = os.path.join(data_dir, 'artifacts')
+        self.db_path = os.path.join(data_dir, 'report_jobs.sqlite3')
+        os.makedirs(self.artifact_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def cache_key(user_id: str, report_type: str, tax_year: str, output_format: str, fingerprint: str) -> str:
+        """Key identifying a report rendered from a given snapshot of the user's data"""
+        raw = '|'.join([user_id, report_type, str(tax_year), output_format, fingerprint])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    # ==================== JOBS ====================
+
+    def enqueue(self, user_id: str, report_type: str, tax_year: str, output_format: str) -> Dict[str, Any]:
+        """
+        Queue a report job, reusing an identical job that is still queued or running.
+
+        Returns:
+            dict: The job
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    """SELECT * FROM report_jobs
+                       WHERE user_id = ? AND report_type = ? AND tax_year = ? AND output_format = ?
+                         AND status IN (?, ?)
+                       ORDER BY created_at DESC LIMIT 1""",
+                    (user_id, report_type, str(tax_year), output_format, *ACTIVE_STATUSES)
+                ).fetchone()
+                if row is None:
+                    job_id = uuid.uuid4().hex
+                    conn.execute(
+                        """INSERT INTO report_jobs
+                           (id, user_id, report_type, tax_year, output_format, status, progress,
+                            message, created_at, updated_at)
+                           VALUES (?, ?, ?, ?, ?, 'queued', 0, 'Queued', ?, ?)""",
+                        (job_id, user_id, report_type, str(tax_year), output_format, now, now)
+                    )
+                    row = conn.execute('SELECT * FROM report_jobs WHERE id = ?', (job_id,)).fetchone()
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return dict(row)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM report_jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim_next(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest queued job.
+
+        Returns:
+            dict: The claimed job, or None when the queue is empty
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    "SELECT id FROM report_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute('COMMIT')
+                    return None
+                conn.execute(
+                    """UPDATE report_jobs
+                       SET status = 'running', worker_id = ?, attempts = attempts + 1,
+                           message = 'Starting', updated_at = ?
+                       WHERE id = ?""",
+                    (worker_id, now, row['id'])
+                )
+                job = conn.execute('SELECT * FROM report_jobs WHERE id = ?', (row['id'],)).fetchone()
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return dict(job)
+
+    def update_progress(self, job_id: str, progress: int, message: Optional[str] = None):
+        """Record progress for a running job; also serves as its heartbeat"""
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE report_jobs SET progress = MAX(progress, ?), message = COALESCE(?, message),
+                          updated_at = ?
+                   WHERE id = ? AND status = 'running'""",
+                (max(0, min(int(progress), 99)), message, time.time(), job_id)
+            )
+
+    def complete_job(self, job_id: str, report_id: str, cached: bool = False):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE report_jobs
+                   SET status = 'completed', progress = 100, message = 'Completed', report_id = ?,
+                       cached = ?, error = NULL, updated_at = ?, finished_at = ?
+                   WHERE id = ?""",
+                (report_id, int(cached), now, now, job_id)
+            )
+
+    def fail_job(self, job_id: str, error: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE report_jobs
+                   SET status = 'failed', message = 'Failed', error = ?, updated_at = ?, finished_at = ?
+                   WHERE id = ?""",
+                (error, now, now, job_id)
+            )
+
+    def requeue_stale_jobs(self, stale_seconds: int = STALE_JOB_SECONDS) -> int:
+        """
+        Requeue running jobs whose worker stopped reporting progress.
+
+        Jobs that already used ``MAX_JOB_ATTEMPTS`` attempts are failed instead.
+
+        Returns:
+            int: Number of jobs requeued or failed
+        """
+        now = time.time()
+        cutoff = now - stale_seconds
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                failed = conn.execute(
+                    """UPDATE report_jobs
+                       SET status = 'failed', message = 'Failed', error = 'Worker stopped responding',
+                           updated_at = ?, finished_at = ?
+                       WHERE status = 'running' AND updated_at < ? AND attempts >= ?""",
+                    (now, now, cutoff, MAX_JOB_ATTEMPTS)
+                ).rowcount
+                requeued = conn.execute(
+                    """UPDATE report_jobs
+                       SET status = 'queued', progress = 0, message = 'Requeued', worker_id = NULL,
+                           updated_at = ?
+                       WHERE status = 'running' AND updated_at < ?""",
+                    (now, cutoff)
+                ).rowcount
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        if failed or requeued:
+            logger.warning(f"⚠️ Recovered stale report jobs: {requeued} requeued, {failed} failed")
+        return failed + requeued
+
+    # ==================== ARTIFACTS ====================
+
+    def find_artifact(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Find a stored report for a cache key whose file still exists"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM report_artifacts WHERE cache_key = ?', (cache_key,)).fetchone()
+        if row is None:
+            return None
+        if not os.path.exists(row['path']):
+            self._delete_artifact_row(row['id'])
+            return None
+        return dict(row)
+
+    def get_artifact(self, report_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM report_artifacts WHERE id = ?', (report_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_artifacts(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT * FROM report_artifacts WHERE user_id = ? ORDER BY created_at DESC LIMIT ?',
+                (user_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_artifact(self, cache_key: str, user_id: str, report_type: str, tax_year: str,
+                      output_format: str, fingerprint: str, filename: str, data: bytes) -> Dict[str, Any]:
+        """
+        Write a rendered report to disk and record it under its cache key.
+
+        The file is written to a temporary name and renamed into place so a
+        partially written report is never served.
+
+        Returns:
+            dict: The stored artifact
+        """
+        report_id = uuid.uuid4().hex
+        path = os.path.join(self.artifact_dir, f"{report_id}.{output_format}")
+        tmp_path = f"{path}.part"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        artifact = {
+            'id': report_id,
+            'cache_key': cache_key,
+            'user_id': user_id,
+            'report_type': report_type,
+            'tax_year': str(tax_year),
+            'output_format': output_format,
+            'fingerprint': fingerprint,
+            'path': path,
+            'filename': filename,
+            'content_type': CONTENT_TYPES.get(output_format, 'application/octet-stream'),
+            'size': len(data),
+            'created_at': time.time()
+        }
+
+        with self._connect() as conn:
+            previous = conn.execute(
+                'SELECT id, path FROM report_artifacts WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+            conn.execute(
+                """INSERT OR REPLACE INTO report_artifacts
+                   (id, cache_key, user_id, report_type, tax_year, output_format, fingerprint,
+                    path, filename, content_type, size, created_at)
+                   VALUES (:id, :cache_key, :user_id, :report_type, :tax_year, :output_format,
+                           :fingerprint, :path, :filename, :content_type, :size, :created_at)""",
+                artifact
+            )
+
+        if previous and previous['path'] != path and os.path.exists(previous['path']):
+            os.remove(previous['path'])
+
+        return artifact
+
+    def _delete_artifact_row(self, report_id: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM report_artifacts WHERE id = ?', (report_id,))
+
+    # ==================== RETENTION ====================
+
+    def purge_expired(self, retention_seconds: int = RETENTION_SECONDS) -> Dict[str, int]:
+        """
+        Delete finished jobs and stored reports older than the retention period.
+
+        Stored reports still referenced by a remaining job are kept, so a
+        recent job served from an older report can still be downloaded. Files
+        in the artifact directory without a row (e.g. left by a crash during
+        save) are removed once they are past the retention period too.
+
+        Args:
+            retention_seconds: Age after which finished jobs and reports are purged
+
+        Returns:
+            dict: Number of jobs, artifacts and orphaned files removed
+        """
+        cutoff = time.time() - retention_seconds
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                jobs = conn.execute(
+                    'DELETE FROM report_jobs WHERE status IN (?, ?) AND finished_at < ?',
+                    (*FINISHED_STATUSES, cutoff)
+                ).rowcount
+                expired = conn.execute(
+                    """SELECT id, path FROM report_artifacts
+                       WHERE created_at < ?
+                         AND id NOT IN (SELECT report_id FROM report_jobs WHERE report_id IS NOT NULL)""",
+                    (cutoff,)
+                ).fetchall()
+                conn.executemany('DELETE FROM report_artifacts WHERE id = ?', [(row['id'],) for row in expired])
+                known_paths = {row['path'] for row in conn.execute('SELECT path FROM report_artifacts')}
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        for row in expired:
+            if os.path.exists(row['path']):
+                os.remove(row['path'])
+
+        orphans = 0
+        for name in os.listdir(self.artifact_dir):
+            path = os.path.join(self.artifact_dir, name)
+            try:
+                if path not in known_paths and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    orphans += 1
+            except OSError:
+                continue
+
+        if jobs or expired or orphans:
+            logger.info(f"🧹 Purged {jobs} report jobs, {len(expired)} stored reports and {orphans} orphaned files")
+        return {'jobs': jobs, 'artifacts': len(expired), 'orphans': orphans}
+
+
+class ReportJobRunner:
+    """
+    Pool of worker threads that claim and render queued report jobs.
+
+    Intended to run in a dedicated worker process so report rendering never
+    occupies web workers; ``REPORT_WORKERS_EMBEDDED`` starts it inside the
+    web app for development. Idle workers also recover stale jobs and purge
+    expired jobs and reports.
+    """
+
+    def __init__(self, store: ReportJobStore, worker_count: int = 2,
+                 generator=None, poll_interval: float = 1.0,
+                 retention_seconds: int = RETENTION_SECONDS):
+        """
+        Initialize the runner.
+
+        Args:
+            store: Job store shared with the web processes
+            worker_count: Number of worker threads
+            generator: Report generator (defaults to AutomatedReportGenerator)
+            poll_interval: Seconds to wait between polls of an empty queue
+            retention_seconds: Age after which finished jobs and reports are purged
+        """
+        self.store = store
+        self.worker_count = max(worker_count, 1)
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._generator = generator
+        self._generator_lock = Lock()
+        self.stop_event = Event()
+        self.threads: List[Thread] = []
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._cleanup_lock = Lock()
+        self._next_cleanup = 0.0
+
+    @property
+    def generator(self):
+        with self._generator_lock:
+            if self._generator is None:
+                from automated_reports import AutomatedReportGenerator
+                self._generator = AutomatedReportGenerator()
+            return self._generator
+
+    def start(self):
+        """Start the worker threads."""
+        if self.threads:
+            logger.warning("⚠️ Report job runner is already running")
+            return
+
+        self.stop_event.clear()
+        self.store.requeue_stale_jobs()
+        self.purge_if_due()
+        for index in range(self.worker_count):
+            thread = Thread(
+                target=self._worker_loop, args=(f"{self.worker_prefix}:{index}",),
+                name=f'report-worker-{index}', daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+        logger.info(f"✅ Report job runner started with {self.worker_count} workers")
+
+    def stop(self, timeout: float = 30):
+        """Stop the worker threads after their current job."""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+        logger.info("🛑 Report job runner stopped")
+
+    def _worker_loop(self, worker_id: str):
+        while not self.stop_event.is_set():
+            try:
+                job = self.store.claim_next(worker_id)
+                if job is None:
+                    self.store.requeue_stale_jobs()
+                    self.purge_if_due()
+                    self.stop_event.wait(timeout=self.poll_interval)
+                    continue
+                self.run_job(job)
+            except Exception as e:
+                logger.error(f"❌ Error in report worker {worker_id}: {str(e)}")
+                self.stop_event.wait(timeout=self.poll_interval)
+
+    def purge_if_due(self):
+        """Purge expired jobs and reports, at most once per cleanup interval across workers"""
+        with self._cleanup_lock:
+            now = time.time()
+            if now < self._next_cleanup:
+                return
+            self._next_cleanup = now + CLEANUP_INTERVAL_SECONDS
+        try:
+            self.store.purge_expired(self.retention_seconds)
+        except Exception as e:
+            logger.error(f"❌ Error purging expired reports: {str(e)}")
+
+    def run_job(self, job: Dict[str, Any]):
+        """
+        Render one claimed job, reusing a stored report when the data is unchanged.
+
+        Args:
+            job: Job claimed from the store
+        """
+        job_id = job['id']
+
+        def report_progress(progress: int, message: Optional[str] = None):
+            self.store.update_progress(job_id, progress, message)
+
+        try:
+            from automated_reports import ReportType, OutputFormat
+
+            report_type = ReportType(job['report_type'])
+            output_format = OutputFormat(job['output_format'])
+
+            report_progress(2, 'Checking for changes')
+            fingerprint = self.generator.compute_data_fingerprint(job['user_id'], job['tax_year'])
+            cache_key = ReportJobStore.cache_key(
+                job['user_id'], job['report_type'], job['tax_year'], job['output_format'], fingerprint
+            )
+
+            artifact = self.store.find_artifact(cache_key)
+            if artifact:
+                self.store.complete_job(job_id, artifact['id'], cached=True)
+                logger.info(f"♻️ Report job {job_id} served from stored report {artifact['id']}")
+                return
+
+            result = asyncio.run(self.generator.generate_comprehensive_tax_report(
+                user_id=job['user_id'],
+                report_type=report_type,
+                tax_year=job['tax_year'],
+                output_format=output_format,
+                progress_callback=report_progress
+            ))
+
+            if not result.get('success'):
+                self.store.fail_job(job_id, result.get('error', 'Report generation failed'))
+                return
+
+            report_progress(97, 'Saving report')
+            artifact = self.store.save_artifact(
+                cache_key=cache_key,
+                user_id=job['user_id'],
+                report_type=job['report_type'],
+                tax_year=job['tax_year'],
+                output_format=job['output_format'],
+                fingerprint=fingerprint,
+                filename=result['filename'],
+                data=base64.b64decode(result['data'])
+            )
+            self.store.complete_job(job_id, artifact['id'])
+            logger.info(f"✅ Report job {job_id} completed ({artifact['size']} bytes)")
+
+        except Exception as e:
+            logger.error(f"❌ Report job {job_id} failed: {str(e)}")
+            self.store.fail_job(job_id, str(e))
+
+
+# Global report job store instance
+report_job_store = None
+
+
+def get_report_job_store() -> ReportJobStore:
+    """Get the global report job store instance."""
+    global report_job_store
+    if report_job_store is None:
+        report_job_store = ReportJobStore()
+    return report_job_store
+
+
+def serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job for API responses"""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'message': job['message'],
+        'report_type': job['report_type'],
+        'tax_year': job['tax_year'],
+        'format': job['output_format'],
+        'report_id': job['report_id'],
+        'cached': bool(job['cached']),
+        'error': job['error'],
+        'created_at': datetime.fromtimestamp(job['created_at']).isoformat(),
+        'finished_at': datetime.fromtimestamp(job['finished_at']).isoformat() if job['finished_at'] else None
+    }
+
+
+def run_report_workers_daemon(worker_count: Optional[int] = None) -> ReportJobRunner:
+    """Run report workers as daemon threads in the current process."""
+    if worker_count is None:
+        worker_count = int(os.environ.get('REPORT_WORKERS', '2'))
+    runner = ReportJobRunner(get_report_job_store(), worker_count=worker_count)
+    runner.start()
+    return runner
+
+
+def run_report_workers(worker_count: Optional[int] = None):
+    """Run the report worker pool in the foreground until interrupted."""
+    runner = run_report_workers_daemon(worker_count)
+
+    logger.info("🚀 Report workers running")
+
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_report_workers(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -37,19 +37,26 @@ except ImportError:
         db = None
 
 try:
-    from services.transfer_engine import get_transfer_engine
+    from services.transfer_engine import get_transfer_engine, TransferRunContext
     from services.income_detector import get_income_detector
 except ImportError:
     try:
-        from backend.services.transfer_engine import get_transfer_engine
+        from backend.services.transfer_engine import get_transfer_engine, TransferRunContext
         from backend.services.income_detector import get_income_detector
     except ImportError:
         print("Warning: Transfer services not available")
+        TransferRunContext = None
         def get_transfer_engine():
             return None
         def get_income_detector():
             return None
 
+# Part of the backend with no hard third-party dependencies, so no None fallback
+try:
+    from utils.firestore_batch import BatchCommitError, FirestoreWriteBatcher
+except ImportError:
+    from backend.utils.firestore_batch import BatchCommitError, FirestoreWriteBatcher
+
 try:
     from notifications.notification_system import get_notification_system
 except ImportError:
@@ -125,9 +132,9 @@ class TransferProcessor:
                 logger.error("❌ Transfer engine not available")
                 return
             
-            # Get and process pending transfers
+            # Page through and process every due transfer
             result = self.transfer_engine.execute_scheduled_transfers(
-                limit=self.max_transfers_per_batch
+                page_size=self.max_transfers_per_batch
             )
             
             if result['success']:
@@ -145,6 +152,8 @@ class TransferProcessor:
                 logger.info(f"   ✅ Successful: {self.daily_stats['transfers_successful']}")
                 logger.info(f"   ❌ Failed: {self.daily_stats['transfers_failed']}")
                 logger.info(f"   💰 Total transferred: ${self.daily_stats['total_amount_transferred']:.2f}")
+                cache_stats = transfer_data.get('cache', {})
+                logger.info(f"   🗄️ BASIQ fetches saved: {cache_stats.get('transaction_fetches_saved', 0)}")
                 
                 # Process retry logic for failed transfers
                 self._process_failed_transfer_retries()
@@ -193,13 +202,16 @@ class TransferProcessor:
             
             logger.info(f"🔄 Processing {len(retry_rules)} retry transfers")
             
+            # Retries on the same account share one transaction fetch
+            run_context = TransferRunContext() if TransferRunContext else None
+            
             for rule_data in retry_rules:
                 try:
                     # Create a temporary transfer rule object for retry
                     rule = self.transfer_engine._dict_to_transfer_rule(rule_data)
                     
-                    # Execute the transfer
-                    retry_result = self.transfer_engine._execute_single_transfer(rule)
+                    # Execute the transfer (a slot that already succeeded is skipped)
+                    retry_result = self.transfer_engine._execute_idempotent_transfer(rule, run_context)
                     
                     if retry_result['success']:
                         logger.info(f"✅ Retry successful for rule {rule.id}")
@@ -293,33 +305,46 @@ class TransferProcessor:
                         goal_updates[goal_id] = 0.0
                     goal_updates[goal_id] += amount
             
-            # Update each goal's progress
-            for goal_id, transfer_amount in goal_updates.items():
+            if not goal_updates:
+                return
+            
+            # Apply all increments atomically server-side in batched commits
+            updated_at = datetime.now().isoformat()
+            try:
+                with FirestoreWriteBatcher(self.db) as writer:
+                    for goal_id, transfer_amount in goal_updates.items():
+                        writer.increment('goals', goal_id, 'currentAmount', transfer_amount,
+                                         data={'updatedAt': updated_at})
+            except BatchCommitError as e:
+                # Not retried: the commit may have landed, and a replay would double count
+                unconfirmed = {document_id for _, document_id in e.documents}
+                logger.error(f"❌ Goal progress not confirmed for {sorted(unconfirmed)}; "
+                             f"reconcile before re-applying: {str(e.cause)}")
+                goal_updates = {goal_id: amount for goal_id, amount in goal_updates.items()
+                                if goal_id not in unconfirmed}
+                if not goal_updates:
+                    return
+            
+            # One batched read to detect goals completed by this run
+            goal_refs = [self.db.collection('goals').document(goal_id) for goal_id in goal_updates]
+            for goal_doc in self.db.get_all(goal_refs):
                 try:
-                    goal_ref = self.db.collection('goals').document(goal_id)
-                    goal_doc = goal_ref.get()
+                    if not goal_doc.exists:
+                        continue
                     
-                    if goal_doc.exists:
-                        goal_data = goal_doc.to_dict()
-                        current_amount = goal_data.get('currentAmount', 0.0)
-                        new_amount = current_amount + transfer_amount
-                        
-                        # Update goal
-                        goal_ref.update({
-                            'currentAmount': new_amount,
-                            'updatedAt': datetime.now().isoformat()
-                        })
-                        
-                        # Check if goal is completed
-                        target_amount = goal_data.get('targetAmount', 0.0)
-                        if new_amount >= target_amount and current_amount < target_amount:
-                            # Goal just completed!
-                            self._handle_goal_completion(goal_id, goal_data)
-                        
-                        logger.info(f"✅ Updated goal {goal_id} progress: ${current_amount:.2f} → ${new_amount:.2f}")
+                    goal_data = goal_doc.to_dict()
+                    new_amount = goal_data.get('currentAmount', 0.0)
+                    previous_amount = new_amount - goal_updates[goal_doc.id]
+                    target_amount = goal_data.get('targetAmount', 0.0)
+                    
+                    if new_amount >= target_amount and previous_amount < target_amount:
+                        # Goal just completed!
+                        self._handle_goal_completion(goal_doc.id, goal_data)
+                    
+                    logger.info(f"✅ Updated goal {goal_doc.id} progress: ${previous_amount:.2f} → ${new_amount:.2f}")
                 
                 except Exception as e:
-                    logger.error(f"❌ Error updating goal {goal_id} progress: {str(e)}")
+                    logger.error(f"❌ Error checking goal {goal_doc.id} progress: {str(e)}")
             
         except Exception as e:
             logger.error(f"❌ Error updating goal progress: {str(e)}")
@@ -0,0 +1,427 @@
+"""
+TAAXDOG Rate Limiting Engine
+Sliding-window-counter rate limiting shared by every middleware layer
+"""
+
+import os
+import time
+import math
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from flask import Flask, request, jsonify, g
+except ImportError:
+    Flask = request = jsonify = g = None
+
+logger = logging.getLogger('taaxdog.security')
+
+# In-process store bounds
+DEFAULT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '200000'))
+PURGE_BATCH = 16
+
+WINDOW_UNITS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+# Sliding window counter, evaluated atomically in Redis.
+# State per key is a 3-field hash: window index, current count, previous count.
+SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local current = math.floor(now_ms / window_ms)
+
+local state = redis.call('HMGET', KEYS[1], 'w', 'c', 'p')
+local w = tonumber(state[1])
+local c = tonumber(state[2]) or 0
+local p = tonumber(state[3]) or 0
+if w == nil then
+    c = 0
+    p = 0
+elseif w ~= current then
+    if w == current - 1 then p = c else p = 0 end
+    c = 0
+end
+
+local elapsed = (now_ms - current * window_ms) / window_ms
+local estimated = p * (1 - elapsed) + c
+local allowed = 0
+if estimated + cost <= limit then
+    c = c + cost
+    estimated = estimated + cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'w', current, 'c', c, 'p', p)
+redis.call('PEXPIRE', KEYS[1], window_ms * 2)
+return {allowed, tostring(estimated), tostring(elapsed)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A limit of ``limit`` requests per ``window`` seconds"""
+    limit: int
+    window: int = 60
+
+    @classmethod
+    def parse(cls, value: Union[str, int, 'RateLimit'], window: int = 60) -> 'RateLimit':
+        """
+        Parse a limit such as ``"100/minute"``, ``"5 per second"`` or ``"30/10s"``.
+
+        Args:
+            value: Limit string, request count, or RateLimit
+            window: Window in seconds when ``value`` is a bare count
+
+        Returns:
+            RateLimit: Parsed limit
+        """
+        if isinstance(value, RateLimit):
+            return value
+        if isinstance(value, int):
+            return cls(value, window)
+
+        text = value.strip().lower().replace(' per ', '/')
+        count, _, period = text.partition('/')
+        period = period.strip() or 'minute'
+        if period.endswith('s') and period[:-1].isdigit():
+            seconds = int(period[:-1])
+        else:
+            seconds = WINDOW_UNITS[period.rstrip('s')]
+        return cls(int(count), seconds)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+    def headers(self) -> Dict[str, str]:
+        """Standard rate limit response headers"""
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining)
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _retry_after(previous: float, current: float, elapsed: float, limit: RateLimit, cost: int) -> float:
+    """Seconds until a request of ``cost`` would fit in the sliding window"""
+    headroom = limit.limit - current - cost
+    if headroom < 0 or previous <= 0:
+        # Not enough room until this window rolls over
+        return (1 - elapsed) * limit.window
+    # Previous window's weight must decay to ``headroom``
+    target_elapsed = 1 - headroom / previous
+    return max(0.0, (target_elapsed - elapsed) * limit.window)
+
+
+class InMemoryRateLimitStore:
+    """
+    Process-local sliding window counters.
+
+    Each key holds ``[window_index, current_count, previous_count, expires_at]``.
+    Keys live in an LRU ordered dict capped at ``max_keys``; idle keys expire
+    after two windows and are purged a few at a time on each hit.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS, clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, list]" = OrderedDict()
+        self.stats = {'evicted': 0, 'expired': 0}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        now = self.clock()
+        window = limit.window
+        current_window = int(now // window)
+        elapsed = (now - current_window * window) / window
+
+        with self.lock:
+            self._purge(now)
+
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = [current_window, 0, 0, 0.0]
+                self.entries[key] = entry
+                if len(self.entries) > self.max_keys:
+                    self.entries.popitem(last=False)
+                    self.stats['evicted'] += 1
+            else:
+                self.entries.move_to_end(key)
+                if entry[0] != current_window:
+                    entry[2] = entry[1] if entry[0] == current_window - 1 else 0
+                    entry[1] = 0
+                    entry[0] = current_window
+
+            previous, current = entry[2], entry[1]
+            if previous * (1 - elapsed) + current + cost > limit.limit:
+                entry[3] = now + 2 * window
+                return RateLimitResult(
+                    False, limit.limit, 0, _retry_after(previous, current, elapsed, limit, cost)
+                )
+
+            entry[1] = current + cost
+            entry[3] = now + 2 * window
+            remaining = max(0, int(limit.limit - (previous * (1 - elapsed) + entry[1])))
+            return RateLimitResult(True, limit.limit, remaining, 0.0)
+
+    def _purge(self, now: float):
+        # Least recently used keys sit at the front; stop at the first live one
+        for _ in range(PURGE_BATCH):
+            if not self.entries:
+                return
+            key, entry = next(iter(self.entries.items()))
+            if entry[3] > now:
+                return
+            del self.entries[key]
+            self.stats['expired'] += 1
+
+    def reset(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class RedisRateLimitStore:
+    """Sliding window counters shared across processes via an atomic Lua script"""
+
+    def __init__(self, client, key_prefix: str = 'ratelimit:'):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.script = client.register_script(SLIDING_WINDOW_LUA)
+
+    def hit(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        allowed, estimated, elapsed = self.script(
+            keys=[f"{self.key_prefix}{key}:{limit.window}"],
+            args=[limit.limit, limit.window * 1000, cost]
+        )
+        estimated = float(estimated)
+        elapsed = float(elapsed)
+        if int(allowed):
+            return RateLimitResult(True, limit.limit, max(0, int(limit.limit - estimated)), 0.0)
+
+        # Worst-case wait: the rest of the current window
+        return RateLimitResult(False, limit.limit, 0, (1 - elapsed) * limit.window)
+
+    def reset(self, key: str):
+        for redis_key in self.client.scan_iter(f"{self.key_prefix}{key}:*"):
+            self.client.delete(redis_key)
+
+
+class RateLimitEngine:
+    """
+    Unified rate limiting engine.
+
+    Uses Redis when available so limits hold across web workers, and falls
+    back to the bounded in-process store when Redis is missing or failing.
+    """
+
+    def __init__(self, redis_client=None, max_keys: int = DEFAULT_MAX_KEYS,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the engine.
+
+        Args:
+            redis_client: Optional Redis client for shared limits
+            max_keys: Capacity of the in-process fallback store
+            clock: Time source for the in-process store
+        """
+        self.memory_store = InMemoryRateLimitStore(max_keys=max_keys, clock=clock)
+        self.redis_store = None
+        self.stats = {'allowed': 0, 'limited': 0, 'redis_errors': 0}
+
+        if redis_client is not None:
+            try:
+                self.redis_store = RedisRateLimitStore(redis_client)
+            except Exception as e:
+                logger.warning(f"Redis rate limiting unavailable, using in-process store: {e}")
+
+    def hit(self, key: str, limit: Union[RateLimit, str, int], cost: int = 1) -> RateLimitResult:
+        """
+        Count a request against ``key`` and report whether it is allowed.
+
+        Args:
+            key: Rate limit key (e.g. ``"ip:1.2.3.4"`` or ``"user:abc"``)
+            limit: Limit to enforce
+            cost: Units this request consumes
+
+        Returns:
+            RateLimitResult: Decision with remaining quota and retry delay
+        """
+        limit = RateLimit.parse(limit)
+        result = None
+
+        if self.redis_store is not None:
+            try:
+                result = self.redis_store.hit(key, limit, cost)
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.error(f"Redis rate limit check failed, using in-process store: {e}")
+
+        if result is None:
+            result = self.memory_store.hit(key, limit, cost)
+
+        self.stats['allowed' if result.allowed else 'limited'] += 1
+        return result
+
+    def is_allowed(self, key: str, limit: int, window: int = 60) -> bool:
+        """Count a request and return whether it is within ``limit`` per ``window`` seconds"""
+        return self.hit(key, RateLimit(limit, window)).allowed
+
+    def reset(self, key: str):
+        """Clear the counters for a key"""
+        self.memory_store.reset(key)
+        if self.redis_store is not None:
+            try:
+                self.redis_store.reset(key)
+            except Exception as e:
+                logger.error(f"Failed to reset Redis rate limit for {key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get decision counts and in-process store size"""
+        return {
+            **self.stats,
+            **self.memory_store.stats,
+            'backend': 'redis' if self.redis_store is not None else 'memory',
+            'tracked_keys': len(self.memory_store)
+        }
+
+
+def _setup_redis():
+    """Connect to Redis for shared rate limits"""
+    if not redis:
+        return None
+    try:
+        redis_url = os.environ.get('RATE_LIMIT_REDIS_URL') or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+        client = redis.from_url(redis_url, socket_timeout=0.25)
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Redis unavailable for rate limiting, using in-process store: {e}")
+        return None
+
+
+# Global rate limit engine instance
+rate_limit_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_rate_limit_engine() -> RateLimitEngine:
+    """Get the global rate limit engine instance."""
+    global rate_limit_engine
+    if rate_limit_engine is None:
+        with _engine_lock:
+            if rate_limit_engine is None:
+                rate_limit_engine = RateLimitEngine(_setup_redis())
+    return rate_limit_engine
+
+
+def _client_ip() -> str:
+    # Forwarding headers are client-controlled; behind trusted proxies the app
+    # is wrapped in ProxyFix (TRUSTED_PROXY_COUNT), which sets remote_addr
+    return request.remote_addr or '127.0.0.1'
+
+
+def _current_user_id() -> Optional[str]:
+    return getattr(request, 'user_id', None) or getattr(g, 'user_id', None)
+
+
+class RateLimiter:
+    """
+    Flask integration of the rate limit engine with per-route and per-user limits.
+
+    Authenticated requests are limited per user, anonymous requests per
+    client IP. Per-user overrides (e.g. raised limits for a partner
+    integration) take precedence over a route's user limit.
+    """
+
+    def __init__(self, engine: Optional[RateLimitEngine] = None):
+        self._engine = engine
+        self.user_overrides: Dict[str, RateLimit] = {}
+
+    @property
+    def engine(self) -> RateLimitEngine:
+        return self._engine or get_rate_limit_engine()
+
+    def init_app(self, app):
+        """Register the limiter on the Flask app"""
+        app.extensions = getattr(app, 'extensions', {})
+        app.extensions['taaxdog_rate_limiter'] = self
+
+    def set_user_limit(self, user_id: str, limit: Union[RateLimit, str, int]):
+        """Override the per-user limit for one user on every limited route"""
+        self.user_overrides[user_id] = RateLimit.parse(limit)
+
+    def check(self, scope: str, limit: Union[RateLimit, str, int],
+              user_limit: Union[RateLimit, str, int, None] = None) -> RateLimitResult:
+        """
+        Check the current request against a route's limits.
+
+        Args:
+            scope: Route identifier the counters are kept under
+            limit: Limit per client IP for anonymous requests
+            user_limit: Limit per user for authenticated requests (defaults to ``limit``)
+
+        Returns:
+            RateLimitResult: Decision for this request
+        """
+        user_id = _current_user_id()
+        if user_id:
+            effective = self.user_overrides.get(user_id) or RateLimit.parse(user_limit or limit)
+            return self.engine.hit(f"route:{scope}:user:{user_id}", effective)
+        return self.engine.hit(f"route:{scope}:ip:{_client_ip()}", RateLimit.parse(limit))
+
+    def apply_rate_limit(self, limit: Union[RateLimit, str, int],
+                         user_limit: Union[RateLimit, str, int, None] = None,
+                         scope: Optional[str] = None):
+        """
+        Decorator limiting a route.
+
+        Args:
+            limit: Limit per client IP, e.g. ``"10/minute"``
+            user_limit: Limit per authenticated user
+            scope: Counter namespace (defaults to the view function name)
+        """
+        def decorator(func):
+            route_scope = scope or f"{func.__module__}.{func.__name__}"
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                result = self.check(route_scope, limit, user_limit)
+                if not result.allowed:
+                    logger.warning(f"Rate limit exceeded on {route_scope} for {_current_user_id() or _client_ip()}")
+                    response = jsonify({
+                        'success': False,
+                        'error': 'Rate limit exceeded',
+                        'retry_after': math.ceil(result.retry_after)
+                    })
+                    response.status_code = 429
+                    response.headers.update(result.headers())
+                    return response
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
@@ -0,0 +1,217 @@
+"""
+TAAXDOG Request Inspection Engine
+Precompiled, single-pass request checks for the security middleware
+
+- Attack signatures are compiled once at startup; each inspected field is
+  lowercased once and matched case-sensitively, which avoids the cost of
+  re.IGNORECASE on every search
+- Headers are walked once, checking CRLF/NUL injection, size and folding
+  and collecting Content-Length/Transfer-Encoding in the same pass
+- Per-check call, detection and timing counters
+
+The engine works on plain strings and (name, value) header pairs, so it
+has no Flask dependency and can be benchmarked offline.
+"""
+
+import re
+import time
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# (pattern, description), in reporting order. Written in lowercase so they
+# can be matched against lowercased fields without re.IGNORECASE.
+ATTACK_SIGNATURES: List[Tuple[str, str]] = [
+    (r'<script[^>]*>.*?</script>', 'XSS Script tag'),
+    (r'javascript:', 'JavaScript protocol'),
+    (r'vbscript:', 'VBScript protocol'),
+    (r'on\w+\s*=', 'Event handler'),
+    (r'(union|select|insert|update|delete|drop)\s+', 'SQL injection'),
+    (r'file://', 'File protocol'),
+    (r'\.\./|\.\.\/', 'Directory traversal'),
+    (r'\x00', 'Null byte'),
+    (r'%00', 'URL encoded null byte'),
+    (r'(exec|eval|system|shell_exec)', 'Code execution'),
+]
+
+CHECKS = ('user_agent', 'smuggling', 'patterns')
+
+_HEADER_INJECTION = re.compile(r'[\r\n\x00]')
+
+
+def compile_signatures(signatures: Sequence[Tuple[str, str]]) -> List[Tuple['re.Pattern', str]]:
+    """
+    Precompile signatures for matching against lowercased text.
+
+    Signatures containing uppercase characters (e.g. ``\\S``) keep
+    re.IGNORECASE so they still match once the text is lowercased.
+
+    Returns:
+        List[Tuple[re.Pattern, str]]: Compiled pattern and description, in reporting order
+    """
+    return [
+        (re.compile(pattern) if pattern == pattern.lower() else re.compile(pattern, re.IGNORECASE), description)
+        for pattern, description in signatures
+    ]
+
+
+class RequestInspector:
+    """
+    Request inspection with signatures compiled once at startup.
+
+    Each check returns ``(detected, reason)`` like the middleware
+    functions it backs.
+    """
+
+    def __init__(self, blocked_user_agents: Iterable[str], dangerous_methods: Iterable[str],
+                 max_header_count: int, max_header_size: int, max_url_length: int,
+                 signatures: Sequence[Tuple[str, str]] = ATTACK_SIGNATURES):
+        """
+        Initialize the inspector.
+
+        Args:
+            blocked_user_agents: Scanner substrings blocked in User-Agent (case-insensitive)
+            dangerous_methods: HTTP methods rejected outright
+            max_header_count: Maximum number of headers
+            max_header_size: Maximum length of a header name plus value
+            max_url_length: Maximum URL length
+            signatures: (regex, description) attack signatures
+        """
+        self.signatures = compile_signatures(signatures)
+        agents = [re.escape(agent.lower()) for agent in blocked_user_agents]
+        self.blocked_agent_pattern = re.compile('|'.join(agents)) if agents else None
+        self.dangerous_methods = frozenset(dangerous_methods)
+        self.max_header_count = max_header_count
+        self.max_header_size = max_header_size
+        self.max_url_length = max_url_length
+
+        self._stats_lock = threading.Lock()
+        self._stats = {check: [0, 0, 0] for check in CHECKS}  # calls, detections, total ns
+
+    def _record(self, check: str, started_ns: int, detected: bool):
+        elapsed = time.perf_counter_ns() - started_ns
+        with self._stats_lock:
+            counters = self._stats[check]
+            counters[0] += 1
+            counters[1] += detected
+            counters[2] += elapsed
+
+    def check_user_agent(self, user_agent: str) -> Tuple[bool, str]:
+        """Detect known scanner user agents"""
+        started = time.perf_counter_ns()
+        match = None
+        if user_agent and self.blocked_agent_pattern is not None:
+            match = self.blocked_agent_pattern.search(user_agent.lower())
+        self._record('user_agent', started, match is not None)
+        if match:
+            return True, f"Blocked user agent: {match.group(0)}"
+        return False, ""
+
+    def check_smuggling(self, method: str, url: str, headers: Iterable[Tuple[str, Any]]) -> Tuple[bool, str]:
+        """
+        Detect HTTP request smuggling with a single pass over the headers.
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            headers: (name, value) pairs in request order
+
+        Returns:
+            Tuple[bool, str]: (is_smuggling, reason)
+        """
+        started = time.perf_counter_ns()
+        detected, reason = self._check_smuggling(method, url, headers)
+        self._record('smuggling', started, detected)
+        return detected, reason
+
+    def _check_smuggling(self, method: str, url: str, headers: Iterable[Tuple[str, Any]]) -> Tuple[bool, str]:
+        header_count = 0
+        content_length_count = 0
+        content_length = None
+        transfer_encoding = None
+        injected = None
+        oversized = None
+        folded = None
+
+        for name, value in headers:
+            header_count += 1
+            value = value if isinstance(value, str) else str(value)
+
+            lowered = name.lower()
+            if lowered == 'content-length':
+                content_length_count += 1
+                if content_length is None:
+                    content_length = value
+            elif lowered == 'transfer-encoding' and transfer_encoding is None:
+                transfer_encoding = value
+
+            # Only the first offending header is reported, as before
+            if injected is None and oversized is None:
+                if _HEADER_INJECTION.search(value):
+                    injected = name
+                elif len(name) + len(value) > self.max_header_size:
+                    oversized = name
+            if folded is None and value.startswith((' ', '\t')):
+                folded = name
+
+        # Same precedence as the original sequence of checks
+        if content_length_count > 1:
+            return True, "Multiple Content-Length headers detected"
+        if transfer_encoding and content_length:
+            return True, "Transfer-Encoding and Content-Length conflict"
+        if method in self.dangerous_methods:
+            return True, f"Dangerous HTTP method: {method}"
+        if header_count > self.max_header_count:
+            return True, f"Too many headers: {header_count}"
+        if injected is not None:
+            return True, f"Header injection detected in {injected}"
+        if oversized is not None:
+            return True, f"Header too large: {oversized}"
+        if folded is not None:
+            return True, f"Folded header detected: {folded}"
+        if len(url) > self.max_url_length:
+            return True, f"URL too long: {len(url)}"
+        if '\x00' in url:
+            return True, "Null byte in URL"
+        return False, ""
+
+    def check_patterns(self, fields: Iterable[str]) -> Tuple[bool, str]:
+        """
+        Scan request fields (URL, path, query, headers) for attack signatures.
+
+        Args:
+            fields: Strings to scan, in reporting order
+
+        Returns:
+            Tuple[bool, str]: (is_malicious, reason)
+        """
+        started = time.perf_counter_ns()
+        for field in fields:
+            if not field:
+                continue
+            lowered = field.lower()
+            for pattern, description in self.signatures:
+                if pattern.search(lowered):
+                    self._record('patterns', started, True)
+                    return True, f"{description} in {field[:100]}"
+        self._record('patterns', started, False)
+        return False, ""
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-check calls, detections and timing"""
+        with self._stats_lock:
+            snapshot = {check: list(counters) for check, counters in self._stats.items()}
+        return {
+            check: {
+                'calls': calls,
+                'detections': detections,
+                'total_ms': round(total_ns / 1e6, 3),
+                'avg_us': round(total_ns / calls / 1e3, 3) if calls else 0.0
+            }
+            for check, (calls, detections, total_ns) in snapshot.items()
+        }
+
+    def reset_stats(self):
+        """Clear the per-check counters"""
+        with self._stats_lock:
+            self._stats = {check: [0, 0, 0] for check in CHECKS}
+
@@ -13,7 +13,6 @@ from typing import Dict, Any, Optional, List, Callable, Tuple
 from functools import wraps
 from flask import Flask, request, jsonify, g, abort
 from werkzeug.exceptions import TooManyRequests
-import re
 import json
 
 try:
@@ -26,6 +25,13 @@ except ImportError:
     Limiter = None
     Talisman = None
 
+try:
+    from middleware.rate_limiter import RateLimiter, RateLimit, get_rate_limit_engine
+    from middleware.request_inspection import RequestInspector
+except ImportError:
+    from backend.middleware.rate_limiter import RateLimiter, RateLimit, get_rate_limit_engine
+    from backend.middleware.request_inspection import RequestInspector
+
 # Configure security logging
 security_logger = logging.getLogger('taaxdog.security')
 security_logger.setLevel(logging.INFO)
@@ -52,19 +58,17 @@ class SecurityConfig:
         'masscan', 'zap', 'burp', 'vega'
     ]
 
-# In-memory rate limiting store (use Redis in production)
-rate_limit_store: Dict[str, Dict[str, List[float]]] = {}
+# Global request inspector instance; signatures are compiled once at import
+request_inspector = RequestInspector(
+    blocked_user_agents=SecurityConfig.BLOCKED_USER_AGENTS,
+    dangerous_methods=SecurityConfig.DANGEROUS_METHODS,
+    max_header_count=SecurityConfig.MAX_HEADER_COUNT,
+    max_header_size=SecurityConfig.MAX_HEADER_SIZE,
+    max_url_length=SecurityConfig.MAX_URL_LENGTH
+)
 
 def get_client_ip() -> str:
-    """Get client IP with proxy support"""
-    forwarded = request.headers.get('X-Forwarded-For')
-    if forwarded:
-        return forwarded.split(',')[0].strip()
-    
-    real_ip = request.headers.get('X-Real-IP')
-    if real_ip:
-        return real_ip
-    
+    """Get client IP (set from X-Forwarded-For by ProxyFix only behind trusted proxies)"""
     return request.remote_addr or '127.0.0.1'
 
 def log_security_event(event: str, level: str, details: Optional[Dict] = None):
@@ -89,104 +93,30 @@ def log_security_event(event: str, level: str, details: Optional[Dict] = None):
 
 def check_rate_limit(ip: str) -> bool:
     """Check if IP is within rate limits"""
-    now = time.time()
-    window_start = now - SecurityConfig.RATE_LIMIT_WINDOW
-    
-    if ip not in rate_limit_store:
-        rate_limit_store[ip] = {'requests': [now]}
-        return True
-    
-    # Clean old requests
-    requests_list = rate_limit_store[ip]['requests']
-    filtered_requests = [req_time for req_time in requests_list if req_time > window_start]
-    
-    if len(filtered_requests) >= SecurityConfig.RATE_LIMIT_MAX:
-        return False
-    
-    filtered_requests.append(now)
-    rate_limit_store[ip] = {'requests': filtered_requests}
-    return True
+    limit = RateLimit(SecurityConfig.RATE_LIMIT_MAX, SecurityConfig.RATE_LIMIT_WINDOW)
+    return get_rate_limit_engine().hit(f"ip:{ip}", limit).allowed
 
 def detect_request_smuggling() -> Tuple[bool, str]:
     """
     CRITICAL: Detect HTTP request smuggling attempts
     Returns (is_smuggling, reason)
-    """
-    
-    # Check for multiple Content-Length headers
-    content_length_headers = request.headers.getlist('Content-Length')
-    if len(content_length_headers) > 1:
-        return True, "Multiple Content-Length headers detected"
-    
-    # Check for Transfer-Encoding and Content-Length conflict
-    transfer_encoding = request.headers.get('Transfer-Encoding')
-    content_length = request.headers.get('Content-Length')
-    if transfer_encoding and content_length:
-        return True, "Transfer-Encoding and Content-Length conflict"
-    
-    # Check for dangerous HTTP methods
-    if request.method in SecurityConfig.DANGEROUS_METHODS:
-        return True, f"Dangerous HTTP method: {request.method}"
-    
-    # Check header count
-    if len(request.headers) > SecurityConfig.MAX_HEADER_COUNT:
-        return True, f"Too many headers: {len(request.headers)}"
-    
-    # Check for header injection (CRLF injection)
-    for header_name, header_value in request.headers:
-        if any(char in str(header_value) for char in ['\r', '\n', '\x00']):
-            return True, f"Header injection detected in {header_name}"
-        
-        # Check header size
-        if len(header_name) + len(str(header_value)) > SecurityConfig.MAX_HEADER_SIZE:
-            return True, f"Header too large: {header_name}"
-    
-    # Check for folded headers (deprecated in HTTP/1.1)
-    for header_name, header_value in request.headers:
-        if str(header_value).startswith(' ') or str(header_value).startswith('\t'):
-            return True, f"Folded header detected: {header_name}"
     
-    # Check URL length
-    if len(request.url) > SecurityConfig.MAX_URL_LENGTH:
-        return True, f"URL too long: {len(request.url)}"
-    
-    # Check for null bytes in URL
-    if '\x00' in request.url:
-        return True, "Null byte in URL"
-    
-    return False, ""
+    Headers are materialized once and scanned in a single pass.
+    """
+    return request_inspector.check_smuggling(request.method, request.url, list(request.headers))
 
 def detect_malicious_patterns() -> Tuple[bool, str]:
     """Detect common attack patterns"""
     
-    patterns = [
-        (r'<script[^>]*>.*?</script>', 'XSS Script tag'),
-        (r'javascript:', 'JavaScript protocol'),
-        (r'vbscript:', 'VBScript protocol'),
-        (r'on\w+\s*=', 'Event handler'),
-        (r'(union|select|insert|update|delete|drop)\s+', 'SQL injection'),
-        (r'file://', 'File protocol'),
-        (r'\.\./|\.\.\/', 'Directory traversal'),
-        (r'\x00', 'Null byte'),
-        (r'%00', 'URL encoded null byte'),
-        (r'(?i)(exec|eval|system|shell_exec)', 'Code execution'),
-    ]
-    
-    # Check URL and query parameters
-    test_strings = [
+    # URL, path, query parameters and free-text headers, each lowercased once and
+    # checked against the precompiled signatures in order
+    return request_inspector.check_patterns((
         request.url,
         request.path,
         str(request.args),
         request.headers.get('User-Agent', ''),
         request.headers.get('Referer', '')
-    ]
-    
-    for test_string in test_strings:
-        for pattern, description in patterns:
-            if re.search(pattern, test_string, re.IGNORECASE):
-                return True, f"{description} in {test_string[:100]}"
-    
-    return False, ""
+    ))
 
 def validate_request_integrity() -> Tuple[bool, str]:
     """Validate request integrity and structure"""
@@ -221,14 +151,14 @@ def security_middleware():
     user_agent = request.headers.get('User-Agent', '')
     
     # 1. Block malicious user agents
-    for blocked_agent in SecurityConfig.BLOCKED_USER_AGENTS:
-        if blocked_agent.lower() in user_agent.lower():
-            log_security_event(
-                'blocked_user_agent', 
-                'warn', 
-                {'user_agent': user_agent, 'ip': client_ip}
-            )
-            return jsonify({'error': 'Access denied'}), 403
+    is_blocked, _ = request_inspector.check_user_agent(user_agent)
+    if is_blocked:
+        log_security_event(
+            'blocked_user_agent', 
+            'warn', 
+            {'user_agent': user_agent, 'ip': client_ip}
+        )
+        return jsonify({'error': 'Access denied'}), 403
     
     # 2. Rate limiting
     if not check_rate_limit(client_ip):
@@ -379,11 +309,11 @@ class SecurityMiddleware:
     def before_request(self):
         """Security checks before each request"""
         # Check user agent
-        user_agent = request.headers.get('User-Agent', '').lower()
-        for blocked_agent in SecurityConfig.BLOCKED_USER_AGENTS:
-            if blocked_agent in user_agent:
-                self.logger.warning(f"Blocked user agent: {user_agent}")
-                abort(403)
+        user_agent = request.headers.get('User-Agent', '')
+        is_blocked, _ = request_inspector.check_user_agent(user_agent)
+        if is_blocked:
+            self.logger.warning(f"Blocked user agent: {user_agent.lower()}")
+            abort(403)
         
         # Validate input data
         if request.is_json and request.get_json():
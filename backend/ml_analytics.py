@@ -35,6 +35,11 @@ warnings.filterwarnings('ignore')
 from firebase_config import db
 from basiq_api import get_user_transactions
 
+try:
+    from utils.model_registry import model_registry
+except ImportError:
+    from backend.utils.model_registry import model_registry
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -555,9 +560,10 @@ class IntelligentCategorizationEngine:
             y_pred = self.model.predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
             
-            # Save model
-            model_filename = f'categorization_model_{"global" if not user_id else user_id}.joblib'
-            joblib.dump(self.model, os.path.join(self.model_path, model_filename))
+            # Save model and drop any cached copy of the previous version
+            model_file = self._model_file(user_id)
+            joblib.dump(self.model, model_file)
+            model_registry.invalidate(model_file)
             
             # Feature importance
             feature_importance = dict(zip(self.feature_columns, self.model.feature_importances_))
@@ -577,6 +583,18 @@ class IntelligentCategorizationEngine:
             logger.error(f"Error training categorization model: {str(e)}")
             return {'error': f'Training failed: {str(e)}'}
     
+    def _model_file(self, user_id: str = None) -> str:
+        """Path of the global or per-user model file"""
+        model_filename = f'categorization_model_{"global" if not user_id else user_id}.joblib'
+        return os.path.join(self.model_path, model_filename)
+    
+    def preload_global_model(self) -> bool:
+        """Load the global model into the registry before the first prediction"""
+        loaded = model_registry.preload(self._model_file())
+        if loaded:
+            logger.info("Preloaded global categorization model")
+        return loaded
+    
     def predict_transaction_category(self, transaction: Dict, user_id: str = None) -> Dict[str, Any]:
         """
         Predict category for a new transaction using trained model
@@ -589,16 +607,13 @@ class IntelligentCategorizationEngine:
             Predicted category with confidence scores
         """
         try:
-            # Load appropriate model
-            model_filename = f'categorization_model_{"global" if not user_id else user_id}.joblib'
-            model_path = os.path.join(self.model_path, model_filename)
+            # Get appropriate model from the in-process registry
+            model = model_registry.get(self._model_file(user_id), pin=not user_id)
             
-            if not os.path.exists(model_path):
+            if model is None:
                 # Fallback to rule-based categorization
                 return self._rule_based_categorization(transaction)
             
-            model = joblib.load(model_path)
-            
             # Extract features for prediction
             features = self._extract_single_transaction_features(transaction)
             
@@ -830,9 +845,13 @@ class PredictiveBudgetingEngine:
 # Factory function to create analytics instances
 def create_analytics_suite() -> Dict[str, Any]:
     """Create complete analytics suite for TAAXDOG"""
+    categorization_engine = IntelligentCategorizationEngine()
+    if os.getenv('ML_PRELOAD_GLOBAL_MODEL', 'true').lower() == 'true':
+        categorization_engine.preload_global_model()
+    
     return {
         'spending_analyzer': SpendingPatternAnalyzer(),
         'fraud_detector': FraudDetectionSystem(),
-        'categorization_engine': IntelligentCategorizationEngine(),
+        'categorization_engine': categorization_engine,
         'budget_predictor': PredictiveBudgetingEngine()
     } 
\ No newline at end of file
@@ -0,0 +1,420 @@
+"""
+Background Health Probe Scheduler for TAAXDOG
+Runs dependency health checks off the request path and publishes snapshots
+
+Each registered probe runs on its own interval with a timeout on a shared
+worker pool. Results are published as an immutable HealthSnapshot that is
+swapped in atomically, so health endpoints read the latest state with a
+single attribute load and never call a dependency themselves.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger('taaxdog.health')
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+UNHEALTHY = 'unhealthy'
+UNKNOWN = 'unknown'
+
+DEFAULT_INTERVAL_SECONDS = float(os.environ.get('HEALTH_PROBE_INTERVAL', '30'))
+DEFAULT_TIMEOUT_SECONDS = float(os.environ.get('HEALTH_PROBE_TIMEOUT', '10'))
+MAX_SLEEP_SECONDS = 1.0
+
+
+def default_status(value: Any) -> str:
+    """
+    Derive a status string from a check's return value.
+
+    Accepts objects with a ``status`` attribute (ServiceHealth,
+    ComponentHealth), dicts with a ``status`` key and booleans; any other
+    value from a check that did not raise counts as healthy.
+    """
+    status = getattr(value, 'status', None)
+    if status is None and isinstance(value, dict):
+        status = value.get('status')
+    if isinstance(status, Enum):
+        status = status.value
+    if status is not None:
+        return str(status)
+    if value is False:
+        return UNHEALTHY
+    return HEALTHY
+
+
+@dataclass(frozen=True)
+class HealthProbe:
+    """A registered dependency check"""
+    name: str
+    check: Callable[[], Any]
+    interval: float = DEFAULT_INTERVAL_SECONDS
+    timeout: float = DEFAULT_TIMEOUT_SECONDS
+    critical: bool = False
+    stale_after: Optional[float] = None
+    status_of: Callable[[Any], str] = default_status
+
+    @property
+    def max_age(self) -> float:
+        """Age after which the last result is reported as stale"""
+        if self.stale_after is not None:
+            return self.stale_after
+        return self.interval * 2 + self.timeout
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Outcome of one probe run"""
+    name: str
+    status: str
+    checked_at: float
+    response_time_ms: float
+    value: Any = None
+    error: Optional[str] = None
+    timed_out: bool = False
+
+
+@dataclass(frozen=True)
+class HealthSnapshot:
+    """
+    Immutable view of the latest probe results.
+
+    ``results`` only holds probes that have completed at least once;
+    registered probes without a result are reported as pending.
+    """
+    probes: Mapping[str, HealthProbe] = field(default_factory=lambda: MappingProxyType({}))
+    results: Mapping[str, ProbeResult] = field(default_factory=lambda: MappingProxyType({}))
+    published_at: float = 0.0
+
+    def value(self, name: str, default: Any = None) -> Any:
+        """Return value of the last successful run of a probe"""
+        result = self.results.get(name)
+        if result is None or result.error is not None:
+            return default
+        return result.value
+
+    def component(self, name: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Status, timing and staleness of one probe"""
+        now = time.time() if now is None else now
+        probe = self.probes.get(name)
+        result = self.results.get(name)
+        if result is None:
+            return {
+                'status': UNKNOWN,
+                'pending': True,
+                'critical': bool(probe and probe.critical),
+                'last_check': None,
+                'age_seconds': None,
+                'stale': False
+            }
+
+        age = max(0.0, now - result.checked_at)
+        return {
+            'status': result.status,
+            'pending': False,
+            'critical': bool(probe and probe.critical),
+            'last_check': datetime.fromtimestamp(result.checked_at).isoformat(),
+            'age_seconds': round(age, 3),
+            'stale': bool(probe) and age > probe.max_age,
+            'response_time_ms': round(result.response_time_ms, 2),
+            'error_message': result.error,
+            'timed_out': result.timed_out
+        }
+
+    def components(self, names: Optional[Iterable[str]] = None, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Component views for the given probes (defaults to all)"""
+        now = time.time() if now is None else now
+        return {name: self.component(name, now) for name in (names or self.probes)}
+
+    def overall_status(self, names: Optional[Iterable[str]] = None, now: Optional[float] = None) -> str:
+        """
+        Roll component statuses up into one status.
+
+        Unhealthy if a critical component is unhealthy, degraded if any
+        component is unhealthy, degraded, stale or still pending.
+        """
+        components = self.components(names, now)
+        if not components:
+            return UNKNOWN
+        if any(c['critical'] and c['status'] == UNHEALTHY for c in components.values()):
+            return UNHEALTHY
+        if all(c['status'] == HEALTHY and not c['stale'] for c in components.values()):
+            return HEALTHY
+        return DEGRADED
+
+    def readiness(self, names: Optional[Iterable[str]] = None, now: Optional[float] = None) -> Tuple[bool, List[str]]:
+        """
+        Whether every critical component has a fresh healthy or degraded result.
+
+        Returns:
+            Tuple[bool, List[str]]: Ready flag and reasons when not ready
+        """
+        reasons = []
+        for name, component in self.components(names, now).items():
+            if not component['critical']:
+                continue
+            if component['pending']:
+                reasons.append(f"{name}: awaiting first health probe")
+            elif component['status'] not in (HEALTHY, DEGRADED):
+                reasons.append(f"{name}: {component['error_message'] or component['status']}")
+            elif component['stale']:
+                reasons.append(f"{name}: health result is stale ({component['age_seconds']:.0f}s old)")
+        return not reasons, reasons
+
+
+class _ProbeState:
+    """Scheduling state for one probe, guarded by the scheduler lock"""
+
+    __slots__ = ('probe', 'next_run', 'future', 'started_at', 'timed_out')
+
+    def __init__(self, probe: HealthProbe):
+        self.probe = probe
+        self.next_run = 0.0
+        self.future: Optional[Future] = None
+        self.started_at = 0.0
+        self.timed_out = False
+
+
+class HealthProbeScheduler:
+    """
+    Runs registered probes concurrently, each on its own interval.
+
+    A probe that exceeds its timeout is published as unhealthy straight
+    away; it is not started again until the hung call returns, so a stuck
+    dependency cannot exhaust the worker pool.
+    """
+
+    def __init__(self, max_workers: int = 8, clock: Callable[[], float] = time.time):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_workers: Probes that may run at the same time
+            clock: Time source
+        """
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='health-probe')
+        self._states: Dict[str, _ProbeState] = {}
+        # Reentrant: a probe that finishes instantly runs its done callback inside _start_locked
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = HealthSnapshot()
+        self.stats = {'runs': 0, 'failures': 0, 'timeouts': 0, 'late_results': 0}
+
+    @property
+    def snapshot(self) -> HealthSnapshot:
+        """Latest published snapshot; safe to read from any thread without locking"""
+        return self._snapshot
+
+    def register(self, name: str, check: Callable[[], Any], interval: float = DEFAULT_INTERVAL_SECONDS,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, critical: bool = False,
+                 stale_after: Optional[float] = None,
+                 status_of: Callable[[Any], str] = default_status) -> HealthProbe:
+        """
+        Register (or replace) a probe. It first runs on the next scheduler tick.
+
+        Args:
+            name: Component name reported in snapshots
+            check: Callable performing the dependency check; raising marks it unhealthy
+            interval: Seconds between runs
+            timeout: Seconds before a run is reported as timed out
+            critical: Whether readiness depends on this component
+            stale_after: Result age reported as stale (defaults to 2 intervals + timeout)
+            status_of: Maps the check's return value to a status string
+
+        Returns:
+            HealthProbe: The registered probe
+        """
+        probe = HealthProbe(name=name, check=check, interval=interval, timeout=timeout,
+                            critical=critical, stale_after=stale_after, status_of=status_of)
+        with self._lock:
+            self._states[name] = _ProbeState(probe)
+            self._publish_locked()
+        self._wake.set()
+        return probe
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._snapshot.probes
+
+    def start(self):
+        """Start the scheduler thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, name='health-probe-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"🩺 Health probe scheduler started ({len(self._states)} probes)")
+
+    def stop(self):
+        """Stop scheduling probes; runs in progress are left to finish."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.executor.shutdown(wait=False)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            next_wake = self._tick()
+            self._wake.wait(max(0.0, min(MAX_SLEEP_SECONDS, next_wake - self.clock())))
+            self._wake.clear()
+
+    def _tick(self) -> float:
+        """Start due probes and time out overdue ones; returns when to wake next"""
+        now = self.clock()
+        next_wake = now + MAX_SLEEP_SECONDS
+        with self._lock:
+            for state in list(self._states.values()):
+                if state.future is not None:
+                    deadline = state.started_at + state.probe.timeout
+                    if state.timed_out:
+                        continue
+                    if now >= deadline:
+                        state.timed_out = True
+                        self.stats['timeouts'] += 1
+                        self._record_locked(ProbeResult(
+                            name=state.probe.name,
+                            status=UNHEALTHY,
+                            checked_at=now,
+                            response_time_ms=(now - state.started_at) * 1000,
+                            error=f"Health check timed out after {state.probe.timeout:g}s",
+                            timed_out=True
+                        ))
+                        logger.warning(f"⚠️ Health probe {state.probe.name} timed out")
+                    else:
+                        next_wake = min(next_wake, deadline)
+                    continue
+
+                if now >= state.next_run:
+                    self._start_locked(state, now)
+                    next_wake = min(next_wake, now + state.probe.timeout)
+                else:
+                    next_wake = min(next_wake, state.next_run)
+        return next_wake
+
+    def _start_locked(self, state: _ProbeState, now: float) -> Future:
+        state.started_at = now
+        state.next_run = now + state.probe.interval
+        state.timed_out = False
+        future = self.executor.submit(self._run_probe, state.probe)
+        state.future = future
+        future.add_done_callback(lambda done: self._finish(state, done))
+        return future
+
+    def _run_probe(self, probe: HealthProbe) -> ProbeResult:
+        start = time.perf_counter()
+        try:
+            value = probe.check()
+            status = probe.status_of(value)
+            error = None
+        except Exception as e:
+            value = None
+            status = UNHEALTHY
+            error = str(e) or type(e).__name__
+        return ProbeResult(
+            name=probe.name,
+            status=status,
+            checked_at=self.clock(),
+            response_time_ms=(time.perf_counter() - start) * 1000,
+            value=value,
+            error=error
+        )
+
+    def _finish(self, state: _ProbeState, future: Future):
+        with self._lock:
+            state.future = None
+            if self._states.get(state.probe.name) is not state:
+                return  # Probe was replaced while running
+            if state.timed_out:
+                # The timeout was already published; the next run reports recovery
+                self.stats['late_results'] += 1
+                return
+            result = future.result()
+            self.stats['runs'] += 1
+            if result.error is not None:
+                self.stats['failures'] += 1
+                logger.warning(f"⚠️ Health probe {result.name} failed: {result.error}")
+            self._record_locked(result)
+        self._wake.set()
+
+    def _record_locked(self, result: ProbeResult):
+        results = dict(self._snapshot.results)
+        results[result.name] = result
+        self._publish_locked(results)
+
+    def _publish_locked(self, results: Optional[Dict[str, ProbeResult]] = None):
+        if results is None:
+            results = {name: result for name, result in self._snapshot.results.items() if name in self._states}
+        # A single reference assignment, so readers never see a partial update
+        self._snapshot = HealthSnapshot(
+            probes=MappingProxyType({name: state.probe for name, state in self._states.items()}),
+            results=MappingProxyType(results),
+            published_at=self.clock()
+        )
+
+    def run_now(self, names: Optional[Iterable[str]] = None) -> HealthSnapshot:
+        """
+        Run probes immediately and wait for them (bounded by their timeouts).
+
+        Probes that are already running are not started twice.
+
+        Args:
+            names: Probes to run (defaults to all)
+
+        Returns:
+            HealthSnapshot: Snapshot after the runs completed or timed out
+        """
+        now = self.clock()
+        waits = []
+        with self._lock:
+            for name in names or list(self._states):
+                state = self._states[name]
+                future = state.future or self._start_locked(state, now)
+                if not state.timed_out:
+                    waits.append((state, future))
+
+        for state, future in waits:
+            try:
+                future.result(timeout=max(0.0, state.started_at + state.probe.timeout - self.clock()))
+            except Exception:
+                pass
+        self._tick()
+        return self._snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get run counters and scheduler state"""
+        with self._lock:
+            in_flight = sum(1 for state in self._states.values() if state.future is not None)
+        return {**self.stats, 'probes': len(self._states), 'in_flight': in_flight, 'running': self.running}
+
+
+# Global health probe scheduler instance
+health_probe_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_health_probe_scheduler() -> HealthProbeScheduler:
+    """Get the global health probe scheduler, starting it on first use."""
+    global health_probe_scheduler
+    if health_probe_scheduler is None:
+        with _scheduler_lock:
+            if health_probe_scheduler is None:
+                health_probe_scheduler = HealthProbeScheduler(
+                    max_workers=int(os.environ.get('HEALTH_PROBE_WORKERS', '8'))
+                )
+                health_probe_scheduler.start()
+    return health_probe_scheduler
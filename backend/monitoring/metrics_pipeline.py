@@ -0,0 +1,447 @@
+"""
+Batched Request Metrics Pipeline for TAAXDOG
+Buffers request metrics per thread and aggregates them off the request path
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('taaxdog.performance')
+
+# Latency histogram: geometric buckets growing by 10% from 1ms (<=10% percentile error)
+HISTOGRAM_BASE_SECONDS = 0.001
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_MAX_BUCKET = 200  # ~190s; slower requests land in the last bucket
+
+AGGREGATE_RETENTION_HOURS = 24 * 7
+MAX_USERS_PER_HOUR = 1000
+REDIS_KEY_TTL_SECONDS = 86400 * 7
+
+# (timestamp, endpoint, method, user_id, duration, status_code)
+MetricRecord = Tuple[float, str, str, Optional[str], float, int]
+
+
+def bucket_for(duration: float) -> int:
+    """Histogram bucket index for a duration in seconds"""
+    if duration <= HISTOGRAM_BASE_SECONDS:
+        return 0
+    index = math.ceil(math.log(duration / HISTOGRAM_BASE_SECONDS, HISTOGRAM_GROWTH))
+    return min(index, HISTOGRAM_MAX_BUCKET)
+
+
+def bucket_upper_bound(index: int) -> float:
+    """Upper bound in seconds of a histogram bucket"""
+    return HISTOGRAM_BASE_SECONDS * HISTOGRAM_GROWTH ** index
+
+
+def hour_key(timestamp: float) -> str:
+    """Hourly aggregation bucket for a UNIX timestamp (UTC)"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y%m%d%H')
+
+
+class MetricsAggregate:
+    """
+    Compact aggregate of request metrics: counters, a latency histogram and
+    per-endpoint/per-user totals. Size depends on the number of distinct
+    endpoints and (capped) users, not on request volume.
+    """
+
+    __slots__ = ('count', 'errors', 'duration_sum', 'histogram', 'endpoints', 'users', 'untracked_users')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.histogram: Dict[int, int] = {}
+        self.endpoints: Dict[str, List[float]] = {}  # endpoint -> [count, duration_sum]
+        self.users: Dict[str, int] = {}
+        self.untracked_users = 0
+
+    def add(self, endpoint: str, user_id: Optional[str], duration: float, status_code: int):
+        self.count += 1
+        if status_code >= 400:
+            self.errors += 1
+        self.duration_sum += duration
+
+        bucket = bucket_for(duration)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += duration
+
+        if user_id:
+            self.add_user(user_id, 1)
+
+    def add_user(self, user_id: str, count: int):
+        if user_id in self.users or len(self.users) < MAX_USERS_PER_HOUR:
+            self.users[user_id] = self.users.get(user_id, 0) + count
+        else:
+            self.untracked_users += count
+
+    def merge(self, other: 'MetricsAggregate'):
+        self.count += other.count
+        self.errors += other.errors
+        self.duration_sum += other.duration_sum
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        for endpoint, (count, duration_sum) in other.endpoints.items():
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = [0, 0.0]
+            stats[0] += count
+            stats[1] += duration_sum
+        for user_id, count in other.users.items():
+            self.add_user(user_id, count)
+        self.untracked_users += other.untracked_users
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate percentile (upper bound of the bucket holding it)"""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(self.count * fraction))
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= target:
+                return bucket_upper_bound(bucket)
+        return bucket_upper_bound(max(self.histogram))
+
+    def summary(self) -> Dict[str, Any]:
+        """Performance summary in the shape returned by PerformanceMonitor"""
+        if not self.count:
+            return {
+                'total_requests': 0,
+                'average_response_time': 0,
+                'error_rate': 0,
+                'slowest_endpoints': [],
+                'most_active_users': []
+            }
+
+        slowest_endpoints = sorted(
+            [(endpoint, duration_sum / count) for endpoint, (count, duration_sum) in self.endpoints.items() if count],
+            key=lambda x: x[1], reverse=True
+        )[:5]
+
+        most_active_users = sorted(self.users.items(), key=lambda x: x[1], reverse=True)[:10]
+
+        return {
+            'total_requests': self.count,
+            'average_response_time': self.duration_sum / self.count,
+            'error_rate': (self.errors / self.count) * 100,
+            'slowest_endpoints': slowest_endpoints,
+            'most_active_users': most_active_users,
+            'p95_response_time': self.percentile(0.95),
+            'p99_response_time': self.percentile(0.99)
+        }
+
+    # ==================== REDIS ENCODING ====================
+
+    def write_to_redis(self, pipe, hour: str):
+        """Queue this aggregate as increments on the hour's Redis keys"""
+        agg_key = f"metrics:agg:{hour}"
+        users_key = f"metrics:users:{hour}"
+
+        pipe.hincrby(agg_key, 'count', self.count)
+        if self.errors:
+            pipe.hincrby(agg_key, 'errors', self.errors)
+        pipe.hincrbyfloat(agg_key, 'duration_sum', self.duration_sum)
+        for bucket, count in self.histogram.items():
+            pipe.hincrby(agg_key, f"h:{bucket}", count)
+        for endpoint, (count, duration_sum) in self.endpoints.items():
+            pipe.hincrby(agg_key, f"ec:{endpoint}", count)
+            pipe.hincrbyfloat(agg_key, f"es:{endpoint}", duration_sum)
+        if self.untracked_users:
+            pipe.hincrby(agg_key, 'untracked_users', self.untracked_users)
+        pipe.expire(agg_key, REDIS_KEY_TTL_SECONDS)
+
+        if self.users:
+            for user_id, count in self.users.items():
+                pipe.zincrby(users_key, count, user_id)
+            pipe.expire(users_key, REDIS_KEY_TTL_SECONDS)
+
+    @classmethod
+    def from_redis(cls, fields: Dict[Any, Any], users: List[Tuple[Any, float]]) -> 'MetricsAggregate':
+        """Decode an hour's hash and top users read back from Redis"""
+        aggregate = cls()
+        for raw_field, raw_value in fields.items():
+            field = raw_field.decode('utf-8') if isinstance(raw_field, bytes) else raw_field
+            value = float(raw_value)
+            if field == 'count':
+                aggregate.count = int(value)
+            elif field == 'errors':
+                aggregate.errors = int(value)
+            elif field == 'duration_sum':
+                aggregate.duration_sum = value
+            elif field == 'untracked_users':
+                aggregate.untracked_users = int(value)
+            elif field.startswith('h:'):
+                aggregate.histogram[int(field[2:])] = int(value)
+            elif field.startswith('ec:'):
+                aggregate.endpoints.setdefault(field[3:], [0, 0.0])[0] = int(value)
+            elif field.startswith('es:'):
+                aggregate.endpoints.setdefault(field[3:], [0, 0.0])[1] = value
+        for raw_user, score in users:
+            user_id = raw_user.decode('utf-8') if isinstance(raw_user, bytes) else raw_user
+            aggregate.users[user_id] = int(score)
+        return aggregate
+
+
+class _ThreadBuffer:
+    """Ring buffer owned by one request thread"""
+
+    __slots__ = ('thread', 'records', 'dropped')
+
+    def __init__(self, thread: threading.Thread, size: int):
+        self.thread = thread
+        self.records = deque(maxlen=size)
+        self.dropped = 0
+
+
+class MetricsPipeline:
+    """
+    Non-blocking request metrics pipeline.
+
+    Request threads append to their own bounded ring buffer without taking a
+    lock; when a buffer is full new metrics are dropped and counted. A
+    background flusher drains all buffers every ``flush_interval_ms`` (or
+    sooner once a buffer holds ``flush_batch`` metrics), folds them into
+    hourly aggregates and writes each batch to Redis in a single pipeline.
+    """
+
+    def __init__(self, redis_client=None, flush_interval_ms: Optional[int] = None,
+                 flush_batch: Optional[int] = None, buffer_size: Optional[int] = None,
+                 on_flush=None, start: bool = True):
+        """
+        Initialize the pipeline.
+
+        Args:
+            redis_client: Optional Redis client for cross-process aggregates
+            flush_interval_ms: Maximum time metrics wait in a buffer
+            flush_batch: Buffered metrics per thread that trigger an early flush
+            buffer_size: Ring buffer capacity per thread
+            on_flush: Optional callable receiving each drained batch of records
+            start: Start the background flusher thread
+        """
+        self.redis_client = redis_client
+        self.flush_interval = (flush_interval_ms or int(os.environ.get('METRICS_FLUSH_INTERVAL_MS', '500'))) / 1000
+        self.flush_batch = flush_batch or int(os.environ.get('METRICS_FLUSH_BATCH', '256'))
+        self.buffer_size = buffer_size or int(os.environ.get('METRICS_BUFFER_SIZE', '4096'))
+        self.on_flush = on_flush
+
+        self._local = threading.local()
+        self._buffers: List[_ThreadBuffer] = []
+        self._register_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Hour -> aggregate, for summaries without Redis
+        self.aggregates: Dict[str, MetricsAggregate] = {}
+        self.stats = {
+            'recorded': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'redis_writes': 0,
+            'redis_errors': 0
+        }
+
+        if start:
+            self.start()
+
+    def start(self):
+        """Start the background flusher thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher after a final flush."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    # ==================== RECORDING (REQUEST PATH) ====================
+
+    def _thread_buffer(self) -> _ThreadBuffer:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = _ThreadBuffer(threading.current_thread(), self.buffer_size)
+            with self._register_lock:
+                self._buffers.append(buffer)
+            self._local.buffer = buffer
+        return buffer
+
+    def record(self, endpoint: str, method: str, user_id: Optional[str], duration: float,
+               status_code: int, timestamp: Optional[float] = None):
+        """Buffer one request metric; never blocks on I/O or shared locks"""
+        buffer = self._thread_buffer()
+        records = buffer.records
+        if len(records) >= self.buffer_size:
+            buffer.dropped += 1
+            return
+        records.append((timestamp or time.time(), endpoint, method, user_id, duration, status_code))
+        if len(records) >= self.flush_batch and not self._wake.is_set():
+            self._wake.set()
+
+    # ==================== FLUSHING ====================
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Metrics flush failed: {e}")
+
+    def _drain(self) -> List[MetricRecord]:
+        batch: List[MetricRecord] = []
+        with self._register_lock:
+            buffers = list(self._buffers)
+
+        finished = []
+        for buffer in buffers:
+            records = buffer.records
+            while True:
+                try:
+                    batch.append(records.popleft())
+                except IndexError:
+                    break
+            if not buffer.thread.is_alive():
+                finished.append(buffer)
+
+        if finished:
+            # Fold counters of exited threads in and forget their buffers
+            with self._register_lock:
+                for buffer in finished:
+                    self.stats['dropped'] += buffer.dropped
+                    self._buffers.remove(buffer)
+        return batch
+
+    def flush(self) -> int:
+        """
+        Drain every thread buffer into the aggregates and Redis.
+
+        Returns:
+            int: Number of metrics flushed
+        """
+        with self._flush_lock:
+            batch = self._drain()
+            if not batch:
+                return 0
+
+            deltas: Dict[str, MetricsAggregate] = {}
+            for timestamp, endpoint, method, user_id, duration, status_code in batch:
+                hour = hour_key(timestamp)
+                delta = deltas.get(hour)
+                if delta is None:
+                    delta = deltas[hour] = MetricsAggregate()
+                delta.add(endpoint, user_id, duration, status_code)
+
+            for hour, delta in deltas.items():
+                aggregate = self.aggregates.get(hour)
+                if aggregate is None:
+                    self.aggregates[hour] = delta
+                else:
+                    aggregate.merge(delta)
+            self._expire_aggregates()
+
+            if self.redis_client:
+                self._write_redis(deltas)
+
+            self.stats['recorded'] += len(batch)
+            self.stats['flushes'] += 1
+
+            if self.on_flush:
+                try:
+                    self.on_flush(batch)
+                except Exception as e:
+                    logger.error(f"Metrics flush callback failed: {e}")
+
+            return len(batch)
+
+    def _write_redis(self, deltas: Dict[str, MetricsAggregate]):
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for hour, delta in deltas.items():
+                delta.write_to_redis(pipe, hour)
+            pipe.execute()
+            self.stats['redis_writes'] += 1
+        except Exception as e:
+            # Aggregates are kept locally, so the batch is still summarized in-process
+            self.stats['redis_errors'] += 1
+            logger.error(f"Failed to store metrics in Redis: {e}")
+
+    def _expire_aggregates(self):
+        if len(self.aggregates) <= AGGREGATE_RETENTION_HOURS:
+            return
+        for hour in sorted(self.aggregates)[:-AGGREGATE_RETENTION_HOURS]:
+            del self.aggregates[hour]
+
+    # ==================== READING ====================
+
+    def _hours(self, hours: int) -> List[str]:
+        now = datetime.now(timezone.utc)
+        return [(now - timedelta(hours=offset)).strftime('%Y%m%d%H') for offset in range(max(hours, 1))]
+
+    def summarize(self, hours: int = 24) -> Dict[str, Any]:
+        """
+        Summarize the last ``hours`` hourly buckets (including the current hour).
+
+        Reads the shared Redis aggregates when available, otherwise this
+        process's own aggregates.
+        """
+        self.flush()
+        hour_keys = self._hours(hours)
+
+        if self.redis_client:
+            try:
+                return self._redis_aggregate(hour_keys).summary()
+            except Exception as e:
+                logger.error(f"Failed to get performance summary from Redis: {e}")
+
+        total = MetricsAggregate()
+        with self._flush_lock:
+            for hour in hour_keys:
+                if hour in self.aggregates:
+                    total.merge(self.aggregates[hour])
+        return total.summary()
+
+    def _redis_aggregate(self, hour_keys: List[str]) -> MetricsAggregate:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for hour in hour_keys:
+            pipe.hgetall(f"metrics:agg:{hour}")
+            pipe.zrevrange(f"metrics:users:{hour}", 0, 99, withscores=True)
+        results = pipe.execute()
+
+        total = MetricsAggregate()
+        for index in range(0, len(results), 2):
+            total.merge(MetricsAggregate.from_redis(results[index] or {}, results[index + 1] or []))
+        return total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pipeline counters, including metrics dropped by full buffers"""
+        with self._register_lock:
+            buffers = list(self._buffers)
+            dropped = self.stats['dropped'] + sum(buffer.dropped for buffer in buffers)
+        return {
+            **self.stats,
+            'dropped': dropped,
+            'pending': sum(len(buffer.records) for buffer in buffers),
+            'thread_buffers': len(buffers),
+            'aggregated_hours': len(self.aggregates)
+        }
@@ -15,6 +15,11 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 import threading
 
+try:
+    from monitoring.metrics_pipeline import MetricsPipeline
+except ImportError:
+    from backend.monitoring.metrics_pipeline import MetricsPipeline
+
 try:
     import redis
     REDIS_AVAILABLE = True
@@ -98,11 +103,13 @@ class PerformanceMonitor:
     def __init__(self):
         self.logger = logging.getLogger('taaxdog.performance')
         self.redis_client = self._setup_redis()
-        self.metrics_buffer = deque(maxlen=1000)  # Buffer for metrics when Redis unavailable
         self.prometheus_metrics = self._setup_prometheus()
-        self.current_requests = {}  # Track active requests
+        self.current_requests = {}  # Track active requests (single-key dict ops are atomic)
         self.lock = threading.Lock()
         
+        # Per-thread buffers flushed in batches by a background thread
+        self.pipeline = MetricsPipeline(self.redis_client, on_flush=self._export_prometheus)
+        
         # Start Prometheus metrics server
         if os.environ.get('ENABLE_PROMETHEUS', 'true').lower() == 'true':
             self._start_prometheus_server()
@@ -147,68 +154,69 @@ class PerformanceMonitor:
     
     def start_request_tracking(self, request_id: str, endpoint: str, method: str, user_id: Optional[str] = None):
         """Start tracking a new request"""
-        with self.lock:
-            self.current_requests[request_id] = {
-                'start_time': time.time(),
-                'endpoint': endpoint,
-                'method': method,
-                'user_id': user_id
-            }
+        self.current_requests[request_id] = {
+            'start_time': time.time(),
+            'endpoint': endpoint,
+            'method': method,
+            'user_id': user_id
+        }
     
     def end_request_tracking(self, request_id: str, status_code: int, memory_usage: Optional[float] = None):
         """Complete request tracking and record metrics"""
-        with self.lock:
-            if request_id not in self.current_requests:
-                self.logger.warning(f"Request {request_id} not found in tracking")
-                return
-            
-            request_data = self.current_requests.pop(request_id)
-            duration = time.time() - request_data['start_time']
-            
-            metric = PerformanceMetric(
-                request_id=request_id,
-                endpoint=request_data['endpoint'],
-                method=request_data['method'],
-                user_id=request_data['user_id'],
-                duration=duration,
-                status_code=status_code,
-                timestamp=datetime.utcnow(),
-                memory_usage=memory_usage
-            )
-            
-            self._record_metric(metric)
+        request_data = self.current_requests.pop(request_id, None)
+        if request_data is None:
+            self.logger.warning(f"Request {request_id} not found in tracking")
+            return
+        
+        duration = time.time() - request_data['start_time']
+        
+        metric = PerformanceMetric(
+            request_id=request_id,
+            endpoint=request_data['endpoint'],
+            method=request_data['method'],
+            user_id=request_data['user_id'],
+            duration=duration,
+            status_code=status_code,
+            timestamp=datetime.utcnow(),
+            memory_usage=memory_usage
+        )
+        
+        self._record_metric(metric)
     
     def _record_metric(self, metric: PerformanceMetric):
-        """Record performance metric to storage"""
-        # Update Prometheus metrics
-        if self.prometheus_metrics:
-            self.prometheus_metrics['request_count'].labels(
-                method=metric.method,
-                endpoint=metric.endpoint,
-                status=str(metric.status_code)
-            ).inc()
-            
-            self.prometheus_metrics['request_duration'].labels(
-                method=metric.method,
-                endpoint=metric.endpoint
-            ).observe(metric.duration)
-        
-        # Store in Redis or buffer
-        if self.redis_client:
-            try:
-                key = f"metrics:{datetime.utcnow().strftime('%Y-%m-%d')}"
-                self.redis_client.lpush(key, json.dumps(metric.to_dict()))
-                self.redis_client.expire(key, 86400 * 7)  # Keep for 7 days
-            except Exception as e:
-                self.logger.error(f"Failed to store metric in Redis: {e}")
-                self.metrics_buffer.append(metric)
-        else:
-            self.metrics_buffer.append(metric)
+        """Buffer a performance metric; storage happens on the background flusher"""
+        self.pipeline.record(
+            endpoint=metric.endpoint,
+            method=metric.method,
+            user_id=metric.user_id,
+            duration=metric.duration,
+            status_code=metric.status_code
+        )
         
         # Log slow requests
         if metric.duration > 5.0:
             self.logger.warning(f"Slow request detected: {metric.endpoint} took {metric.duration:.2f}s")
     
+    def _export_prometheus(self, batch):
+        """Update Prometheus request metrics for a flushed batch"""
+        if not self.prometheus_metrics:
+            return
+        
+        counts = defaultdict(int)
+        for timestamp, endpoint, method, user_id, duration, status_code in batch:
+            counts[(method, endpoint, str(status_code))] += 1
+            self.prometheus_metrics['request_duration'].labels(
+                method=method,
+                endpoint=endpoint
+            ).observe(duration)
+        
+        for (method, endpoint, status), count in counts.items():
+            self.prometheus_metrics['request_count'].labels(
+                method=method,
+                endpoint=endpoint,
+                status=status
+            ).inc(count)
+    
     def track_receipt_processing(self, success: bool, processing_time: float, error_type: Optional[str] = None):
         """Track receipt processing metrics"""
         status = 'success' if success else 'failure'
@@ -232,91 +240,17 @@ class PerformanceMonitor:
             self.logger.warning(f"Gemini API call failed, response time: {response_time:.2f}s")
     
     def get_performance_summary(self, hours: int = 24) -> Dict[str, Any]:
-        """Get performance summary for the last N hours"""
-        if not self.redis_client:
-            # Use in-memory buffer for summary
-            return self._get_buffer_summary(hours)
-        
-        try:
-            # Get metrics from Redis
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(hours=hours)
-            
-            metrics = []
-            for day_offset in range(hours // 24 + 1):
-                date = (end_time - timedelta(days=day_offset)).strftime('%Y-%m-%d')
-                key = f"metrics:{date}"
-                raw_metrics = self.redis_client.lrange(key, 0, -1)
-                
-                for raw_metric in raw_metrics:
-                    try:
-                        metric_data = json.loads(raw_metric)
-                        metric_time = datetime.fromisoformat(metric_data['timestamp'])
-                        if start_time <= metric_time <= end_time:
-                            metrics.append(metric_data)
-                    except Exception:
-                        continue
-            
-            return self._analyze_metrics(metrics)
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get performance summary from Redis: {e}")
-            return self._get_buffer_summary(hours)
-    
-    def _get_buffer_summary(self, hours: int) -> Dict[str, Any]:
-        """Get performance summary from in-memory buffer"""
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        recent_metrics = [
-            m for m in self.metrics_buffer 
-            if m.timestamp >= cutoff_time
-        ]
+        """
+        Get performance summary for the last N hours.
         
-        return self._analyze_metrics([m.to_dict() for m in recent_metrics])
+        Percentiles come from pre-aggregated hourly latency histograms, so the
+        cost does not depend on request volume (p95/p99 are within 10%).
+        """
+        return self.pipeline.summarize(hours)
     
-    def _analyze_metrics(self, metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze metrics and generate summary"""
-        if not metrics:
-            return {
-                'total_requests': 0,
-                'average_response_time': 0,
-                'error_rate': 0,
-                'slowest_endpoints': [],
-                'most_active_users': []
-            }
-        
-        total_requests = len(metrics)
-        response_times = [m['duration'] for m in metrics]
-        error_count = len([m for m in metrics if m['status_code'] >= 400])
-        
-        # Endpoint analysis
-        endpoint_stats = defaultdict(list)
-        for metric in metrics:
-            endpoint_stats[metric['endpoint']].append(metric['duration'])
-        
-        slowest_endpoints = sorted(
-            [(endpoint, sum(times)/len(times)) for endpoint, times in endpoint_stats.items()],
-            key=lambda x: x[1], reverse=True
-        )[:5]
-        
-        # User activity analysis
-        user_activity = defaultdict(int)
-        for metric in metrics:
-            if metric['user_id']:
-                user_activity[metric['user_id']] += 1
-        
-        most_active_users = sorted(
-            user_activity.items(), key=lambda x: x[1], reverse=True
-        )[:10]
-        
-        return {
-            'total_requests': total_requests,
-            'average_response_time': sum(response_times) / len(response_times),
-            'error_rate': (error_count / total_requests) * 100,
-            'slowest_endpoints': slowest_endpoints,
-            'most_active_users': most_active_users,
-            'p95_response_time': sorted(response_times)[int(len(response_times) * 0.95)] if response_times else 0,
-            'p99_response_time': sorted(response_times)[int(len(response_times) * 0.99)] if response_times else 0
-        }
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """Get metrics pipeline counters, including dropped metrics"""
+        return self.pipeline.get_stats()
 
 
 class UserAnalytics:
@@ -13,6 +13,11 @@ import firebase_admin
 from firebase_admin import firestore
 from .notification_system import run_notification_checks, notification_system
 
+try:
+    from services.user_snapshot import get_user_snapshot_loader
+except ImportError:
+    from backend.services.user_snapshot import get_user_snapshot_loader
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,10 +52,10 @@ class NotificationScheduler:
         try:
             user_data = {}
             
-            # Get user document
-            user_doc = self.db.collection('users').document(user_id).get()
-            if user_doc.exists:
-                user_data.update(user_doc.to_dict())
+            # Get user document (shared snapshot, reused by dashboards within its TTL)
+            snapshot = await get_user_snapshot_loader().load_async(user_id, ['profile'])
+            if snapshot.profile:
+                user_data.update(snapshot.profile)
             
             # Get transactions (last 30 days)
             cutoff_date = datetime.now() - timedelta(days=30)
@@ -12,6 +12,7 @@ Comprehensive health monitoring endpoints including:
 
 import os
 import sys
+import threading
 from flask import Blueprint, jsonify, request
 from datetime import datetime
 import time
@@ -37,21 +38,72 @@ except ImportError as e:
     def get_monitoring_dashboard(): return {}
     def get_backup_status(): return {'backup_running': False}
 
+try:
+    from monitoring.health_probes import get_health_probe_scheduler, HEALTHY, DEGRADED, UNHEALTHY, UNKNOWN
+except ImportError:
+    from backend.monitoring.health_probes import get_health_probe_scheduler, HEALTHY, DEGRADED, UNHEALTHY, UNKNOWN
+
 # Create enhanced health blueprint
 health_bp = Blueprint('enhanced_health', __name__)
 
+# Component probes run in the background; endpoints only read the latest snapshot
+PROBE_NAMES = ('database', 'cache', 'performance', 'security', 'backup', 'monitoring')
+_probes_lock = threading.Lock()
+
+def _database_status(db_health):
+    overall = db_health.get('overall')
+    if overall in (HEALTHY, DEGRADED, UNKNOWN):
+        return overall
+    return UNHEALTHY
+
+def _security_status(security_data):
+    return {
+        'normal': HEALTHY,
+        'elevated': DEGRADED,
+        'critical': UNHEALTHY
+    }.get(security_data.get('security_status'), UNKNOWN)
+
+def _performance_probe_status(performance_metrics):
+    status = _get_performance_status(performance_metrics)
+    return DEGRADED if status == 'warning' else status
+
+def _probe_scheduler():
+    """Get the probe scheduler, registering this blueprint's component probes once"""
+    scheduler = get_health_probe_scheduler()
+    if not scheduler.is_registered('database'):
+        with _probes_lock:
+            if not scheduler.is_registered('database'):
+                scheduler.register('cache', get_cache_stats, interval=30, timeout=5,
+                                   status_of=lambda stats: HEALTHY if stats else UNKNOWN)
+                scheduler.register('performance', get_performance_metrics, interval=30, timeout=5,
+                                   status_of=_performance_probe_status)
+                scheduler.register('security', get_security_dashboard, interval=30, timeout=5,
+                                   status_of=_security_status)
+                scheduler.register('backup', get_backup_status, interval=300, timeout=10)
+                scheduler.register('monitoring', get_monitoring_dashboard, interval=60, timeout=5,
+                                   status_of=lambda data: HEALTHY if data else UNKNOWN)
+                # Registered last: its presence marks the set as registered
+                scheduler.register('database', get_database_health, interval=15, timeout=5,
+                                   critical=True, status_of=_database_status)
+    return scheduler
+
+def _probe_value(snapshot, name, default):
+    """Last successful probe value, or ``default`` while pending or failing"""
+    value = snapshot.value(name)
+    return default if value is None else value
+
 @health_bp.route('/health/status')
 def basic_health():
     """Basic health check endpoint for load balancers"""
     try:
-        # Quick checks for essential services
-        db_health = get_database_health()
+        # Latest database probe result, no dependency call on the request path
+        database = _probe_scheduler().snapshot.component('database')
         
         # Determine overall status
-        if db_health.get('overall') == 'healthy':
+        if database['status'] == 'healthy':
             status = 'healthy'
             http_code = 200
-        elif db_health.get('overall') == 'degraded':
+        elif database['status'] == 'degraded':
             status = 'degraded'
             http_code = 200
         else:
@@ -61,6 +113,8 @@ def basic_health():
         return jsonify({
             'status': status,
             'timestamp': datetime.now().isoformat(),
+            'last_check': database['last_check'],
+            'stale': database['stale'],
             'version': os.getenv('APP_VERSION', '1.0.0'),
             'environment': os.getenv('FLASK_ENV', 'production')
         }), http_code
@@ -78,13 +132,16 @@ def detailed_health():
     try:
         start_time = time.time()
         
-        # Gather all health information
-        database_health = get_database_health()
-        cache_stats = get_cache_stats()
-        performance_metrics = get_performance_metrics()
-        security_status = get_security_dashboard()
-        monitoring_data = get_monitoring_dashboard()
-        backup_status = get_backup_status()
+        # Gather all health information from the latest probe snapshot
+        snapshot = _probe_scheduler().snapshot
+        database_health = _probe_value(
+            snapshot, 'database', {'overall': snapshot.component('database')['status']}
+        )
+        cache_stats = _probe_value(snapshot, 'cache', {})
+        performance_metrics = _probe_value(snapshot, 'performance', {})
+        security_status = _probe_value(snapshot, 'security', {'security_status': 'unknown'})
+        monitoring_data = _probe_value(snapshot, 'monitoring', {})
+        backup_status = _probe_value(snapshot, 'backup', {'backup_running': False})
         
         # System resource information
         system_info = _get_system_info()
@@ -126,6 +183,7 @@ def detailed_health():
                     'active_alerts': len(monitoring_data.get('active_alerts', []))
                 }
             },
+            'probes': snapshot.components(PROBE_NAMES),
             'system': system_info,
             'compliance': compliance_status,
             'uptime': _get_uptime(),
@@ -157,7 +215,7 @@ def detailed_health():
 def performance_health():
     """Performance-focused health check"""
     try:
-        performance_data = get_performance_metrics()
+        performance_data = _probe_value(_probe_scheduler().snapshot, 'performance', {})
         
         # Performance thresholds
         response_time_threshold = 2000  # 2 seconds
@@ -208,13 +266,15 @@ def performance_health():
 def security_health():
     """Security-focused health check"""
     try:
-        security_data = get_security_dashboard()
+        snapshot = _probe_scheduler().snapshot
+        security_data = _probe_value(snapshot, 'security', {'security_status': 'unknown'})
         
         security_status = {
             'overall': security_data.get('security_status', 'unknown'),
             'recent_events': len(security_data.get('recent_events', [])),
             'blocked_ips': len(security_data.get('blocked_ips', [])),
             'event_counts': security_data.get('event_counts', {}),
+            'probe': snapshot.component('security'),
             'timestamp': datetime.now().isoformat()
         }
         
@@ -238,7 +298,7 @@ def security_health():
 def backup_health():
     """Backup system health check"""
     try:
-        backup_data = get_backup_status()
+        backup_data = _probe_value(_probe_scheduler().snapshot, 'backup', {'backup_running': False})
         
         backup_health = {
             'overall': 'healthy',
@@ -281,10 +341,10 @@ def backup_health():
 def readiness_probe():
     """Kubernetes readiness probe"""
     try:
-        # Check if application is ready to serve traffic
-        db_health = get_database_health()
+        # Ready when every critical probe (the database) has a fresh usable result
+        ready, reasons = _probe_scheduler().snapshot.readiness(PROBE_NAMES)
         
-        if db_health.get('overall') in ['healthy', 'degraded']:
+        if ready:
             return jsonify({
                 'ready': True,
                 'timestamp': datetime.now().isoformat()
@@ -293,6 +353,7 @@ def readiness_probe():
             return jsonify({
                 'ready': False,
                 'reason': 'Database not available',
+                'details': reasons,
                 'timestamp': datetime.now().isoformat()
             }), 503
             
@@ -307,11 +368,17 @@ def readiness_probe():
 def liveness_probe():
     """Kubernetes liveness probe"""
     try:
-        # Basic application aliveness check
+        # Basic application aliveness check; probe staleness is reported, not fatal
+        scheduler = _probe_scheduler()
+        components = scheduler.snapshot.components(PROBE_NAMES)
         return jsonify({
             'alive': True,
             'timestamp': datetime.now().isoformat(),
-            'uptime': _get_uptime()
+            'uptime': _get_uptime(),
+            'health_probes': {
+                'running': scheduler.running,
+                'stale': [name for name, component in components.items() if component['stale']]
+            }
         })
         
     except Exception as e:
@@ -6,7 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from firebase_config import db
-from basiq_api import get_user_transactions
+from basiq_api import get_user_transactions, iter_user_transactions
 from ai.financial_insights import (
     analyze_transactions,
     identify_tax_deductions,
@@ -14,7 +14,7 @@ from ai.financial_insights import (
     suggest_financial_goals
 )
 from .utils import api_error, login_required, logger
-from australian_tax_categorizer import categorize_transaction, get_all_categories, TaxCategory
+from australian_tax_categorizer import categorize_transactions_batch, get_all_categories, TaxCategory
 from australian_business_compliance import AustralianBusinessCompliance, BASQuarterData
 from datetime import datetime, timedelta
 
@@ -227,42 +227,37 @@ def categorize_transactions_bulk():
         except Exception as profile_error:
             logger.warning(f"Could not fetch tax profile for transaction categorization: {profile_error}")
         
+        batch = categorize_transactions_batch(transactions, user_tax_profile)
+        
+        # Build each distinct categorization payload once and share it across rows
+        categorization_payloads = [
+            {
+                'category': result.category.name,
+                'category_description': result.category.value,
+                'confidence': result.confidence,
+                'deductibility_percentage': result.deductibility,
+                'requires_verification': result.requires_verification,
+                'reasoning': result.reasoning,
+                'suggested_evidence': result.suggested_evidence,
+                'alternative_categories': [
+                    {
+                        'category': alt_cat.name,
+                        'description': alt_cat.value,
+                        'confidence': alt_conf
+                    }
+                    for alt_cat, alt_conf in result.alternative_categories
+                ]
+            }
+            for result in batch.unique_results
+        ]
+        
         categorized_transactions = []
         
-        for transaction in transactions:
-            try:
-                # Apply categorization
-                categorization_result = categorize_transaction(transaction, user_tax_profile)
-                
-                # Create response for this transaction
-                categorized_transaction = {
-                    'transaction_id': transaction.get('id', ''),
-                    'original_description': transaction.get('description', ''),
-                    'amount': transaction.get('amount', 0),
-                    'categorization': {
-                        'category': categorization_result.category.name,
-                        'category_description': categorization_result.category.value,
-                        'confidence': categorization_result.confidence,
-                        'deductibility_percentage': categorization_result.deductibility,
-                        'requires_verification': categorization_result.requires_verification,
-                        'reasoning': categorization_result.reasoning,
-                        'suggested_evidence': categorization_result.suggested_evidence,
-                        'alternative_categories': [
-                            {
-                                'category': alt_cat.name,
-                                'description': alt_cat.value,
-                                'confidence': alt_conf
-                            }
-                            for alt_cat, alt_conf in categorization_result.alternative_categories
-                        ]
-                    }
-                }
-                
-                categorized_transactions.append(categorized_transaction)
-                
-            except Exception as e:
+        for row, transaction in enumerate(transactions):
+            error = batch.errors.get(row)
+            if error:
                 # Continue with other transactions if one fails
-                logger.error(f"Failed to categorize transaction {transaction.get('id', 'unknown')}: {str(e)}")
+                logger.error(f"Failed to categorize transaction {transaction.get('id', 'unknown')}: {error}")
                 categorized_transactions.append({
                     'transaction_id': transaction.get('id', ''),
                     'original_description': transaction.get('description', ''),
@@ -273,12 +268,20 @@ def categorize_transactions_bulk():
                         'confidence': 0.0,
                         'deductibility_percentage': 0.0,
                         'requires_verification': True,
-                        'reasoning': f'Categorization error: {str(e)}',
+                        'reasoning': f'Categorization error: {error}',
                         'suggested_evidence': [],
                         'alternative_categories': []
                     },
-                    'error': str(e)
+                    'error': error
                 })
+                continue
+            
+            categorized_transactions.append({
+                'transaction_id': transaction.get('id', ''),
+                'original_description': transaction.get('description', ''),
+                'amount': transaction.get('amount', 0),
+                'categorization': categorization_payloads[batch.result_index[row]]
+            })
         
         # Calculate summary statistics
         total_transactions = len(categorized_transactions)
@@ -338,45 +341,45 @@ def get_categorization_summary():
         total_amount = 0.0
         transactions_requiring_review = []
         
-        for transaction in transactions:
-            try:
-                amount = abs(float(transaction.get('amount', 0)))
-                total_amount += amount
-                
-                categorization_result = categorize_transaction(transaction, user_tax_profile)
-                category = categorization_result.category.name
-                
-                # Track category totals
-                if category not in category_totals:
-                    category_totals[category] = {
-                        'total_amount': 0.0,
-                        'transaction_count': 0,
-                        'description': categorization_result.category.value,
-                        'deductibility': categorization_result.deductibility
-                    }
-                
-                category_totals[category]['total_amount'] += amount
-                category_totals[category]['transaction_count'] += 1
-                
-                # Calculate potential deductions
-                if category != 'PERSONAL':
-                    deductible_amount = amount * categorization_result.deductibility
-                    total_potential_deductions += deductible_amount
-                
-                # Track transactions needing review
-                if categorization_result.requires_verification or categorization_result.confidence < 0.8:
-                    transactions_requiring_review.append({
-                        'transaction_id': transaction.get('id', ''),
-                        'description': transaction.get('description', ''),
-                        'amount': amount,
-                        'suggested_category': category,
-                        'confidence': categorization_result.confidence,
-                        'reasoning': categorization_result.reasoning
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Failed to analyze transaction: {str(e)}")
+        batch = categorize_transactions_batch(transactions, user_tax_profile)
+        
+        for row, transaction in enumerate(transactions):
+            if row in batch.errors:
+                logger.error(f"Failed to analyze transaction: {batch.errors[row]}")
                 continue
+            
+            amount = batch.amounts[row]
+            category = batch.category_codes[row]
+            confidence = batch.confidences[row]
+            deductibility = batch.deductibility[row]
+            total_amount += amount
+            
+            # Track category totals
+            if category not in category_totals:
+                category_totals[category] = {
+                    'total_amount': 0.0,
+                    'transaction_count': 0,
+                    'description': TaxCategory[category].value,
+                    'deductibility': deductibility
+                }
+            
+            category_totals[category]['total_amount'] += amount
+            category_totals[category]['transaction_count'] += 1
+            
+            # Calculate potential deductions
+            if category != 'PERSONAL':
+                total_potential_deductions += amount * deductibility
+            
+            # Track transactions needing review
+            if batch.requires_verification[row] or confidence < 0.8:
+                transactions_requiring_review.append({
+                    'transaction_id': transaction.get('id', ''),
+                    'description': transaction.get('description', ''),
+                    'amount': amount,
+                    'suggested_category': category,
+                    'confidence': confidence,
+                    'reasoning': batch.result_for(row).reasoning
+                })
         
         # Calculate percentages and insights
         deduction_percentage = (total_potential_deductions / total_amount * 100) if total_amount > 0 else 0
@@ -723,84 +726,53 @@ def get_annual_bas_summary():
         if not user_profile:
             return api_error('Tax profile required for BAS analysis', status=400)
         
-        # Initialize business compliance engine
+        # Fetch the whole year once
+        year_start = datetime(year, 1, 1)
+        year_end = datetime(year, 12, 31)
+        filter_str = f"transaction.postDate.gte('{year_start.isoformat()}')"
+        filter_str += f"&transaction.postDate.lte('{year_end.isoformat()}')"
+        transactions = iter_user_transactions(user_id, filter_str)
+        
+        receipts = []
+        if db:
+            try:
+                receipts_ref = db.collection('users').document(user_id).collection('receipts')
+                receipts_docs = receipts_ref.where('date', '>=', year_start.strftime('%Y-%m-%d')).where('date', '<=', year_end.strftime('%Y-%m-%d')).stream()
+                for doc in receipts_docs:
+                    receipt = doc.to_dict()
+                    receipt['id'] = doc.id
+                    receipts.append(receipt)
+            except Exception as e:
+                logger.error(f"Error fetching receipts for {year}: {e}")
+        
+        # Bucket every record into its quarter in a single pass
         compliance = AustralianBusinessCompliance()
+        year_data = compliance.prepare_bas_year_data(
+            transactions=transactions,
+            receipts=receipts,
+            user_profile=user_profile,
+            year=year
+        )
         
-        # Process each quarter
         annual_summary = {
             'year': year,
             'quarters': [],
             'annual_totals': {
-                'sales_gst': 0,
-                'input_tax_credits': 0,
-                'net_gst': 0,
-                'payg_withholding': 0,
-                'payg_instalment': 0,
-                'total_refund_payable': 0
+                'sales_gst': float(year_data.sales_gst),
+                'input_tax_credits': float(year_data.input_tax_credits),
+                'net_gst': float(year_data.net_gst),
+                'payg_withholding': float(year_data.payg_withholding),
+                'payg_instalment': float(year_data.payg_instalment),
+                'total_refund_payable': float(year_data.total_refund_payable)
             }
         }
         
-        for quarter_num in range(1, 5):
-            # Calculate quarter dates
-            if quarter_num == 1:
-                quarter_start = datetime(year, 1, 1)
-                quarter_end = datetime(year, 3, 31)
-            elif quarter_num == 2:
-                quarter_start = datetime(year, 4, 1)
-                quarter_end = datetime(year, 6, 30)
-            elif quarter_num == 3:
-                quarter_start = datetime(year, 7, 1)
-                quarter_end = datetime(year, 9, 30)
-            else:  # Q4
-                quarter_start = datetime(year, 10, 1)
-                quarter_end = datetime(year, 12, 31)
-            
-            # Get transactions for quarter
-            filter_str = f"transaction.postDate.gte('{quarter_start.isoformat()}')"
-            filter_str += f"&transaction.postDate.lte('{quarter_end.isoformat()}')"
-            
-            transactions_result = get_user_transactions(user_id, filter_str)
-            
-            if transactions_result.get('success'):
-                transactions = transactions_result.get('transactions', {}).get('data', [])
-                
-                # Get receipts for quarter
-                receipts = []
-                if db:
-                    try:
-                        receipts_ref = db.collection('users').document(user_id).collection('receipts')
-                        receipts_docs = receipts_ref.where('date', '>=', quarter_start.strftime('%Y-%m-%d')).where('date', '<=', quarter_end.strftime('%Y-%m-%d')).get()
-                        for doc in receipts_docs:
-                            receipt = doc.to_dict()
-                            receipt['id'] = doc.id
-                            receipts.append(receipt)
-                    except Exception as e:
-                        logger.error(f"Error fetching receipts for Q{quarter_num}: {e}")
-                
-                # Prepare BAS data for quarter
-                bas_data = compliance.prepare_bas_quarter_data(
-                    transactions=transactions,
-                    receipts=receipts,
-                    user_profile=user_profile,
-                    quarter_start=quarter_start,
-                    quarter_end=quarter_end
-                )
-                
-                # Generate quarter summary
-                quarter_summary = compliance.generate_bas_summary(bas_data)
-                annual_summary['quarters'].append({
-                    'quarter': f"Q{quarter_num}",
-                    'quarter_num': quarter_num,
-                    **quarter_summary
-                })
-                
-                # Add to annual totals
-                annual_summary['annual_totals']['sales_gst'] += quarter_summary['gst_summary']['sales_gst']
-                annual_summary['annual_totals']['input_tax_credits'] += quarter_summary['gst_summary']['input_tax_credits']
-                annual_summary['annual_totals']['net_gst'] += quarter_summary['gst_summary']['net_gst']
-                annual_summary['annual_totals']['payg_withholding'] += quarter_summary['payg_summary']['withholding']
-                annual_summary['annual_totals']['payg_instalment'] += quarter_summary['payg_summary']['instalment']
-                annual_summary['annual_totals']['total_refund_payable'] += quarter_summary['total_refund_payable']
+        for quarter_num, bas_data in enumerate(year_data.quarters, start=1):
+            annual_summary['quarters'].append({
+                'quarter': f"Q{quarter_num}",
+                'quarter_num': quarter_num,
+                **compliance.generate_bas_summary(bas_data)
+            })
         
         return jsonify({
             'success': True,
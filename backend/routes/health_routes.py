@@ -12,6 +12,7 @@ Production health monitoring endpoints including:
 
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
+import threading
 import time
 import os
 from typing import Dict, Any
@@ -47,9 +48,61 @@ try:
 except ImportError:
     db = None
 
+try:
+    from monitoring.health_probes import get_health_probe_scheduler
+except ImportError:
+    from backend.monitoring.health_probes import get_health_probe_scheduler
+
 # Create blueprint for health monitoring
 health_bp = Blueprint('health', __name__)
 
+# External service probes run in the background; endpoints read the latest snapshot
+SERVICE_PROBES = ('gemini_api', 'firebase', 'basiq_api', 'abr_api')
+_probes_lock = threading.Lock()
+
+def _probe_snapshot():
+    """Latest service health snapshot, registering the service probes once"""
+    scheduler = get_health_probe_scheduler()
+    if health_monitor is not None and not scheduler.is_registered('firebase'):
+        with _probes_lock:
+            if not scheduler.is_registered('firebase'):
+                # Gemini is probed with a generation call, so it runs least often
+                scheduler.register('gemini_api', health_monitor.check_gemini_health, interval=300, timeout=15)
+                scheduler.register('basiq_api', health_monitor.check_basiq_health, interval=60, timeout=10)
+                scheduler.register('abr_api', health_monitor.check_abr_health, interval=60, timeout=10)
+                # Registered last: its presence marks the set as registered
+                scheduler.register('firebase', health_monitor.check_firebase_health, interval=30, timeout=10,
+                                   critical=True)
+    return scheduler.snapshot
+
+def _overall_health() -> Dict[str, Any]:
+    """Overall status from the latest probe results, with per-service staleness"""
+    services = _probe_snapshot().components(SERVICE_PROBES)
+    
+    unhealthy_count = sum(1 for s in services.values() if s['status'] == ServiceStatus.UNHEALTHY.value)
+    degraded_count = sum(1 for s in services.values() if s['status'] == ServiceStatus.DEGRADED.value)
+    healthy_count = sum(1 for s in services.values() if s['status'] == ServiceStatus.HEALTHY.value)
+    
+    if unhealthy_count > 1:
+        overall_status = ServiceStatus.UNHEALTHY
+    elif unhealthy_count > 0 or degraded_count > 1 or any(s['pending'] or s['stale'] for s in services.values()):
+        overall_status = ServiceStatus.DEGRADED
+    else:
+        overall_status = ServiceStatus.HEALTHY
+    
+    return {
+        'overall_status': overall_status.value,
+        'timestamp': datetime.now().isoformat(),
+        'services': services,
+        'summary': {
+            'total_services': len(services),
+            'healthy': healthy_count,
+            'degraded': degraded_count,
+            'unhealthy': unhealthy_count,
+            'stale': sum(1 for s in services.values() if s['stale'])
+        }
+    }
+
 @health_bp.before_request
 def before_request():
     """Set request context for logging"""
@@ -87,7 +140,7 @@ def detailed_health_check():
     Includes response times and error messages
     """
     try:
-        health_data = health_monitor.get_overall_health()
+        health_data = _overall_health()
         
         # Determine HTTP status code based on overall health
         if health_data['overall_status'] == ServiceStatus.HEALTHY.value:
@@ -295,18 +348,8 @@ def readiness_check():
     Returns OK only if all critical services are available
     """
     try:
-        health_data = health_monitor.get_overall_health()
-        
-        # Critical services that must be healthy for readiness
-        critical_services = ['firebase']
-        
-        # Check if all critical services are at least degraded (not unhealthy)
-        ready = True
-        for service_name, health in health_data['services'].items():
-            if service_name in critical_services:
-                if health['status'] == ServiceStatus.UNHEALTHY.value:
-                    ready = False
-                    break
+        # Critical services (firebase) must have a fresh healthy or degraded probe result
+        ready, reasons = _probe_snapshot().readiness(SERVICE_PROBES)
         
         if ready:
             logger.info("Readiness check passed")
@@ -319,6 +362,7 @@ def readiness_check():
             return jsonify({
                 'status': 'not_ready',
                 'reason': 'Critical services unavailable',
+                'details': reasons,
                 'timestamp': datetime.now().isoformat()
             }), 503
             
@@ -15,11 +15,13 @@ from .utils import (
     login_required
 )
 from datetime import datetime
-from basiq_api import get_user_transactions
+from basiq_api import iter_user_transactions
 from werkzeug.utils import secure_filename
 import requests
 import tempfile, mimetypes, base64
 from integrations.formx_client import extract_data_from_image_with_gemini, extract_data_from_image_enhanced
+from integrations.transaction_matching import MatchIndex, match_receipt as find_receipt_match, get_match_index_registry
+from services.user_snapshot import invalidate_user_snapshot
 from flask import current_app
 import time
 import re
@@ -363,68 +365,23 @@ def match_receipt_with_transaction(receipt, transactions):
     """
     Helper function to match a receipt with banking transactions.
     Uses amount and date proximity to find the best match.
+    
+    ``transactions`` may be a prebuilt MatchIndex (see get_user_transaction_index)
+    or any iterable of transactions, which is indexed for this lookup only.
     """
     start_time = time.time()
     try:
-        receipt_amount = receipt.get('amount', 0)
-        receipt_date = receipt.get('date')
-        
-        if not receipt_amount or not receipt_date:
+        if not receipt.get('amount', 0) or not receipt.get('date'):
             log_processing_step("transaction_matching", None, None, "WARNING", 
                               "Receipt missing amount or date for matching")
             return None
         
-        # Convert receipt date to datetime if it's a string
-        if isinstance(receipt_date, str):
-            try:
-                receipt_date = datetime.fromisoformat(receipt_date.replace('Z', '+00:00'))
-            except:
-                log_processing_step("transaction_matching", None, None, "WARNING", 
-                                  f"Invalid receipt date format: {receipt_date}")
-                return None
-        
-        best_match = None
-        best_score = 0.0
-        transactions_processed = 0
-        
-        for transaction in transactions:
-            try:
-                transactions_processed += 1
-                transaction_amount = abs(float(transaction.get('amount', 0)))
-                transaction_date_str = transaction.get('postDateTime') or transaction.get('transactionDate')
-                
-                if not transaction_amount or not transaction_date_str:
-                    continue
-                
-                # Parse transaction date
-                transaction_date = datetime.fromisoformat(transaction_date_str.replace('Z', '+00:00'))
-                
-                # Calculate amount similarity (exact match = 1.0)
-                amount_diff = abs(receipt_amount - transaction_amount)
-                amount_score = 1.0 if amount_diff < 0.01 else max(0, 1.0 - (amount_diff / max(receipt_amount, transaction_amount)))
-                
-                # Calculate date proximity (same day = 1.0, decreases with days apart)
-                date_diff = abs((receipt_date - transaction_date).days)
-                date_score = max(0, 1.0 - (date_diff / 7))  # 7 days max tolerance
-                
-                # Combined score (amount is more important)
-                combined_score = (amount_score * 0.7) + (date_score * 0.3)
-                
-                if combined_score > best_score and combined_score > 0.6:  # Minimum 60% confidence
-                    best_score = combined_score
-                    best_match = {
-                        'transaction': transaction,
-                        'transaction_id': transaction.get('id'),
-                        'confidence': combined_score
-                    }
-                    
-            except Exception as e:
-                logger.warning(f"Error processing transaction for matching: {e}")
-                continue
+        best_match = find_receipt_match(receipt, transactions)
         
         matching_time = time.time() - start_time
+        indexed = len(transactions) if isinstance(transactions, MatchIndex) else 'streamed'
         log_processing_step("transaction_matching", None, None, "SUCCESS", 
-                          f"Processed {transactions_processed} transactions, found match: {best_match is not None}",
+                          f"Probed index of {indexed} transactions, found match: {best_match is not None}",
                           matching_time)
         return best_match
         
@@ -433,6 +390,15 @@ def match_receipt_with_transaction(receipt, transactions):
         log_processing_step("transaction_matching", None, None, "ERROR", str(e), matching_time)
         return None
 
+def get_user_transaction_index(basiq_user_id):
+    """
+    Get the user's transaction match index, streaming their history from
+    BASIQ only the first time. The BASIQ sync keeps it current afterwards.
+    """
+    return get_match_index_registry().get(
+        'transactions', basiq_user_id, lambda: iter_user_transactions(basiq_user_id)
+    )
+
 @receipt_routes.route('/', methods=['GET'])
 @require_auth
 def get_receipts():
@@ -759,6 +725,7 @@ def upload_receipt():
         
         # Step 6: Attempt to match with banking transactions
         matching_start = time.time()
+        basiq_user_id = None
         try:
             log_processing_step("bank_matching", firebase_user_id, receipt_id, "START")
             
@@ -770,26 +737,17 @@ def upload_receipt():
                 log_processing_step("bank_matching", firebase_user_id, receipt_id, "PROGRESS", 
                                   "Fetching banking transactions...")
                 
-                def get_transactions():
-                    return get_user_transactions(basiq_user_id)
-                
-                transaction_result = retry_with_backoff(get_transactions)
+                transaction_index = get_user_transaction_index(basiq_user_id)
+                match_result = match_receipt_with_transaction(receipt_data, transaction_index)
                 
-                if transaction_result.get('success'):
-                    transactions = transaction_result.get('transactions', [])
-                    match_result = match_receipt_with_transaction(receipt_data, transactions)
-                    
-                    if match_result:
-                        receipt_data['matched_transaction_id'] = match_result.get('transaction_id')
-                        receipt_data['match_confidence'] = match_result.get('confidence')
-                        log_processing_step("bank_matching", firebase_user_id, receipt_id, "SUCCESS", 
-                                          f"Transaction match found with {match_result.get('confidence'):.2f} confidence")
-                    else:
-                        log_processing_step("bank_matching", firebase_user_id, receipt_id, "INFO", 
-                                          "No matching transaction found")
+                if match_result:
+                    receipt_data['matched_transaction_id'] = match_result.get('transaction_id')
+                    receipt_data['match_confidence'] = match_result.get('confidence')
+                    log_processing_step("bank_matching", firebase_user_id, receipt_id, "SUCCESS", 
+                                      f"Transaction match found with {match_result.get('confidence'):.2f} confidence")
                 else:
-                    log_processing_step("bank_matching", firebase_user_id, receipt_id, "WARNING", 
-                                      f"Failed to fetch transactions: {transaction_result.get('error')}")
+                    log_processing_step("bank_matching", firebase_user_id, receipt_id, "INFO", 
+                                      "No matching transaction found")
             else:
                 log_processing_step("bank_matching", firebase_user_id, receipt_id, "INFO", 
                                   "No Basiq user ID found, skipping transaction matching")
@@ -807,6 +765,13 @@ def upload_receipt():
             
             receipt_ref = db.collection('users').document(firebase_user_id).collection('receipts').document(receipt_data['id'])
             receipt_ref.set(receipt_data)
+            invalidate_user_snapshot(firebase_user_id, ['receipts'])
+            
+            # Unmatched receipts stay available to transactions synced later
+            if basiq_user_id and not receipt_data.get('matched_transaction_id'):
+                get_match_index_registry().update(
+                    'receipts', basiq_user_id, [dict(receipt_data, firebase_user_id=firebase_user_id)]
+                )
             
             storage_time = time.time() - storage_start
             log_processing_step("firebase_storage", firebase_user_id, receipt_id, "SUCCESS", 
@@ -948,6 +913,7 @@ def delete_receipt(receipt_id):
         
         # Delete the receipt
         receipt_ref.delete()
+        invalidate_user_snapshot(firebase_user_id, ['receipts'])
         
         return jsonify({
             'success': True,
@@ -982,15 +948,8 @@ def suggest_receipt_match(receipt_id):
         if not basiq_user_id:
             return create_error_response('No banking connection found', status=400)
         
-        # Get recent transactions
-        transaction_result = get_user_transactions(basiq_user_id)
-        if not transaction_result.get('success'):
-            return create_error_response('Failed to retrieve transactions', status=500, details=transaction_result.get('error'))
-            
-        transactions = transaction_result.get('transactions', [])
-        
-        # Try to match with a transaction
-        match_result = match_receipt_with_transaction(receipt, transactions)
+        # Try to match with a transaction from the user's cached index
+        match_result = match_receipt_with_transaction(receipt, get_user_transaction_index(basiq_user_id))
         
         if match_result:
             return jsonify({
@@ -20,6 +20,7 @@ try:
     from subscription_manager import subscription_manager, FeatureAccess
     from utils.auth_middleware import require_auth
     from utils.validators import validate_json
+    from jobs.report_queue import get_report_job_store, serialize_job
 except ImportError:
     # Fallback for development mode
     class AutomatedReportGenerator: pass
@@ -29,6 +30,8 @@ except ImportError:
     class FeatureAccess: pass
     def require_auth(func): return func
     def validate_json(*args): return lambda func: func
+    get_report_job_store = None
+    def serialize_job(job): return job
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -108,20 +111,16 @@ def generate_tax_report():
                         'upgrade_required': True
                     }), 403
             
-            # Generate the report
-            result = loop.run_until_complete(
-                report_generator.generate_comprehensive_tax_report(
-                    user_id=user_id,
-                    report_type=report_type,
-                    tax_year=tax_year,
-                    output_format=output_fmt
-                )
+            # Queue the report for the worker pool; rendering happens outside the request
+            job = get_report_job_store().enqueue(
+                user_id, report_type.value, str(tax_year), output_fmt.value
             )
             
-            if not result.get('success'):
-                return jsonify(result), 500
-            
-            return jsonify(result)
+            return jsonify({
+                'success': True,
+                'job': serialize_job(job),
+                'status_url': f"/api/reports/jobs/{job['id']}"
+            }), 202
             
         finally:
             loop.close()
@@ -133,23 +132,59 @@ def generate_tax_report():
             'error': 'Failed to generate report'
         }), 500
 
-@reports_bp.route('/api/reports/download/<report_id>', methods=['GET'])
+@reports_bp.route('/api/reports/jobs/<job_id>', methods=['GET'])
 @require_auth
-def download_report(report_id):
-    """Download a generated report"""
+def get_report_job(job_id):
+    """Get the status and progress of a report job"""
     try:
         user_id = request.user_id
         
-        # Get report metadata from database
-        # This would typically be stored when the report is generated
-        # For now, we'll generate a new report
+        job = get_report_job_store().get_job(job_id)
+        if not job or job['user_id'] != user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Report job not found'
+            }), 404
+        
+        response = {
+            'success': True,
+            'job': serialize_job(job)
+        }
+        if job['report_id']:
+            response['download_url'] = f"/api/reports/download/{job['report_id']}"
+        
+        return jsonify(response)
         
-        # In a real implementation, you'd fetch the stored report file
-        # Here we'll return an error for now since we need to implement file storage
+    except Exception as e:
+        logger.error(f"Error getting report job {job_id} for user {user_id}: {e}")
         return jsonify({
             'success': False,
-            'error': 'Report download not yet implemented - use generate endpoint'
-        }), 501
+            'error': 'Failed to get report job'
+        }), 500
+
+@reports_bp.route('/api/reports/download/<report_id>', methods=['GET'])
+@require_auth
+def download_report(report_id):
+    """Download a generated report (supports HTTP Range requests for resumable downloads)"""
+    try:
+        user_id = request.user_id
+        
+        artifact = get_report_job_store().get_artifact(report_id)
+        if not artifact or artifact['user_id'] != user_id or not os.path.exists(artifact['path']):
+            return jsonify({
+                'success': False,
+                'error': 'Report not found'
+            }), 404
+        
+        # conditional=True answers Range and If-Range/If-None-Match requests with 206/304
+        return send_file(
+            artifact['path'],
+            mimetype=artifact['content_type'],
+            as_attachment=True,
+            download_name=artifact['filename'],
+            conditional=True,
+            etag=artifact['cache_key']
+        )
         
     except Exception as e:
         logger.error(f"Error downloading report {report_id} for user {user_id}: {e}")
@@ -165,14 +200,23 @@ def list_user_reports():
     try:
         user_id = request.user_id
         
-        # Get reports from database
-        # This would fetch stored report metadata
-        # For now, return empty list
+        reports = [
+            {
+                'report_id': artifact['id'],
+                'report_type': artifact['report_type'],
+                'tax_year': artifact['tax_year'],
+                'format': artifact['output_format'],
+                'filename': artifact['filename'],
+                'size': artifact['size'],
+                'generated_at': datetime.fromtimestamp(artifact['created_at']).isoformat(),
+                'download_url': f"/api/reports/download/{artifact['id']}"
+            }
+            for artifact in get_report_job_store().list_artifacts(user_id)
+        ]
         
         return jsonify({
             'success': True,
-            'reports': [],
-            'message': 'Report history not yet implemented'
+            'reports': reports
         })
         
     except Exception as e:
@@ -225,8 +269,8 @@ def preview_report_data():
                 'gst_collected': report_data.gst_collected,
                 'gst_paid': report_data.gst_paid,
                 'net_gst': report_data.net_gst,
-                'transaction_count': len(report_data.transactions),
-                'receipt_count': len(report_data.receipts),
+                'transaction_count': report_data.transaction_count,
+                'receipt_count': report_data.receipt_count,
                 'compliance_score': report_data.compliance_score,
                 'audit_risks': report_data.audit_risks,
                 'categories': report_data.categories
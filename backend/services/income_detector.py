@@ -13,7 +13,7 @@ import os
 import logging
 import re
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Iterable
 from dataclasses import dataclass
 from enum import Enum
 import json
@@ -174,21 +174,13 @@ class IncomeDetector:
             analysis_days = analysis_days or self.analysis_period_days
             from_date = (datetime.now() - timedelta(days=analysis_days)).strftime('%Y-%m-%d')
             
-            # Get account transactions
-            transactions_result = self.basiq_client.get_account_transactions(
+            # Stream account transactions (synced history when it covers the window)
+            transactions = self.basiq_client.iter_synced_account_transactions(
                 user_id=user_id,
                 account_id=account_id,
                 from_date=from_date
             )
             
-            if not transactions_result['success']:
-                return {
-                    'success': False,
-                    'error': 'Failed to get account transactions'
-                }
-            
-            transactions = transactions_result['transactions'].get('data', [])
-            
             # Filter and categorize income transactions
             income_transactions = self._filter_income_transactions(transactions)
             
@@ -225,8 +217,8 @@ class IncomeDetector:
                 'error': str(e)
             }
     
-    def _filter_income_transactions(self, transactions: List[Dict]) -> List[Dict]:
-        """Filter transactions that appear to be income."""
+    def _filter_income_transactions(self, transactions: Iterable[Dict]) -> List[Dict]:
+        """Filter transactions that appear to be income (accepts any iterable, including streams)."""
         income_transactions = []
         
         for transaction in transactions:
@@ -448,8 +440,8 @@ class IncomeDetector:
             analysis_days = analysis_days or self.analysis_period_days
             from_date = (datetime.now() - timedelta(days=analysis_days)).strftime('%Y-%m-%d')
             
-            # Get account transactions
-            transactions_result = self.basiq_client.get_account_transactions(
+            # Get account transactions (synced history when it covers the window)
+            transactions_result = self.basiq_client.get_synced_account_transactions(
                 user_id=user_id,
                 account_id=account_id,
                 from_date=from_date
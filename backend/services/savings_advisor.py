@@ -31,6 +31,14 @@ except ImportError:
         print("Warning: Firebase config not available")
         db = None
 
+try:
+    from src.integrations.async_basiq_client import AsyncBasiqClient
+except ImportError:
+    try:
+        from integrations.async_basiq_client import AsyncBasiqClient
+    except ImportError:
+        AsyncBasiqClient = None
+
 try:
     from src.integrations.claude_client import claude_client
 except ImportError:
@@ -40,6 +48,11 @@ except ImportError:
         print("Warning: Claude client not available")
         claude_client = None
 
+try:
+    from services.user_snapshot import get_user_snapshot_loader
+except ImportError:
+    from backend.services.user_snapshot import get_user_snapshot_loader
+
 try:
     from services.income_detector import get_income_detector
     from services.transfer_engine import get_transfer_engine
@@ -205,14 +218,9 @@ class SavingsAdvisor:
             if not self.db:
                 return {'success': False, 'error': 'Database not available'}
             
-            # Get user goals
-            goals_query = self.db.collection('goals').where('userId', '==', user_id)
-            goals = []
-            for doc in goals_query.stream():
-                goal_data = doc.to_dict()
-                goal_data['id'] = doc.id
-                goals.append(goal_data)
-            financial_data['goals'] = goals
+            # Goals and the user document come from the shared snapshot
+            snapshot = await get_user_snapshot_loader().load_async(user_id, ['goals', 'profile'])
+            financial_data['goals'] = snapshot.goals
             
             # Get subaccounts
             subaccounts_query = self.db.collection('goal_subaccounts').where('userId', '==', user_id)
@@ -235,18 +243,34 @@ class SavingsAdvisor:
             
             # Get user bank accounts (if available)
             try:
-                user_doc = self.db.collection('users').document(user_id).get()
-                if user_doc.exists:
-                    user_data = user_doc.to_dict()
+                if snapshot.profile:
+                    user_data = snapshot.profile
                     basiq_user_id = user_data.get('basiq_user_id')
                     
-                    if basiq_user_id and self.income_detector:
-                        # This would normally get actual account data
-                        # For now, use placeholder data
-                        financial_data['account_balances'] = [
-                            {'account_id': 'account_1', 'balance': 5000, 'type': 'checking'},
-                            {'account_id': 'account_2', 'balance': 15000, 'type': 'savings'}
-                        ]
+                    if basiq_user_id and AsyncBasiqClient:
+                        # The session belongs to this request's event loop and is closed with it
+                        async with AsyncBasiqClient() as basiq:
+                            accounts_result = await basiq.get_user_accounts(basiq_user_id)
+                            if accounts_result['success']:
+                                accounts = (accounts_result['accounts'] or {}).get('data', [])
+                                financial_data['account_balances'] = [
+                                    {
+                                        'account_id': account.get('id'),
+                                        'balance': float(account.get('balance') or 0),
+                                        'type': (account.get('class') or {}).get('type', 'unknown')
+                                    }
+                                    for account in accounts
+                                ]
+
+                                # Fetch recent activity for every account concurrently
+                                from_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+                                by_account = await basiq.fetch_accounts_transactions(
+                                    basiq_user_id, [account['id'] for account in accounts], from_date
+                                )
+                                financial_data['recent_transactions'] = sorted(
+                                    (t for transactions in by_account.values() for t in transactions),
+                                    key=lambda t: t.get('postDate') or '', reverse=True
+                                )[:100]
             except Exception as e:
                 logger.warning(f"Could not get account data: {e}")
             
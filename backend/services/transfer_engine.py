@@ -14,11 +14,14 @@ import os
 import logging
 import uuid
 from datetime import datetime, timedelta, time
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable, Iterable
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
 import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
 
 # Add project paths
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -36,6 +39,11 @@ except ImportError:
         print("Warning: Firebase config not available")
         db = None
 
+try:
+    from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+except ImportError:
+    AlreadyExists = FailedPrecondition = None
+
 try:
     from src.integrations.basiq_client import BasiqClient
 except ImportError:
@@ -45,6 +53,14 @@ except ImportError:
         print("Warning: BASIQ client not available")
         BasiqClient = None
 
+try:
+    from utils.firestore_batch import FirestoreWriteBatcher
+except ImportError:
+    try:
+        from backend.utils.firestore_batch import FirestoreWriteBatcher
+    except ImportError:
+        FirestoreWriteBatcher = None
+
 try:
     from services.subaccount_manager import SubaccountManager
 except ImportError:
@@ -140,11 +156,83 @@ class TransferRecord:
     income_source: Optional[str] = None
     surplus_calculation: Optional[Dict] = None
     
+    # Key of the (rule, scheduled date) slot this transfer executes
+    idempotency_key: Optional[str] = None
+    
     # Audit trail
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
 
+class TransferRunContext:
+    """
+    Run-scoped cache shared by every rule executed in one batch.
+    
+    Recent transactions are fetched once per (user, source account) and
+    income analysis is computed once per (user, source account, income
+    threshold), so several income-based rules on the same account cost a
+    single BASIQ fetch per run. Rule updates are accumulated in ``writer``
+    and committed in batches; transfer records and idempotency slots are
+    written directly so the audit trail never lags the money movement.
+    """
+    
+    def __init__(self, database=None):
+        self.writer = FirestoreWriteBatcher(database) if database and FirestoreWriteBatcher else None
+        self.lock = Lock()
+        self._key_locks: Dict[Tuple, Lock] = defaultdict(Lock)
+        self._transactions: Dict[Tuple[str, str], List[Dict]] = {}
+        self._income: Dict[Tuple[str, str, float], Dict] = {}
+        self.stats = {
+            'transaction_fetches': 0,
+            'transaction_fetches_saved': 0,
+            'income_analyses': 0,
+            'income_analyses_saved': 0
+        }
+    
+    def _memoize(self, cache: Dict, key: Tuple, compute: Callable[[], Any], stat: str) -> Any:
+        with self.lock:
+            if key in cache:
+                self.stats[f'{stat}_saved'] += 1
+                return cache[key]
+            key_lock = self._key_locks[key]
+        
+        # Concurrent callers for the same key wait for the first computation
+        with key_lock:
+            with self.lock:
+                if key in cache:
+                    self.stats[f'{stat}_saved'] += 1
+                    return cache[key]
+            
+            value = compute()
+            with self.lock:
+                cache[key] = value
+                self.stats[stat] += 1
+            return value
+    
+    def get_transactions(self, user_id: str, account_id: str,
+                         fetch: Callable[[], Iterable[Dict]]) -> List[Dict]:
+        """Get an account's recent transactions, fetching them once per run."""
+        return self._memoize(
+            self._transactions, (user_id, account_id), lambda: list(fetch()), 'transaction_fetches'
+        )
+    
+    def get_income(self, rule: 'TransferRule', analyze: Callable[[], Dict]) -> Dict:
+        """Get a rule's income analysis, computing it once per run."""
+        key = (rule.user_id, rule.source_account_id, rule.minimum_income_threshold)
+        return self._memoize(self._income, key, analyze, 'income_analyses')
+    
+    def flush(self) -> int:
+        """Commit any batched writes."""
+        return self.writer.flush() if self.writer is not None else 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        if self.writer is not None:
+            stats['writes'] = self.writer.get_stats()
+        return stats
+
+
 class TransferEngine:
     """
     Core automated transfer engine for TAAXDOG savings system.
@@ -169,6 +257,12 @@ class TransferEngine:
         self.retry_backoff_multiplier = 2
         self.max_retry_delay_hours = 24
         self.transfer_timeout_minutes = 30
+        self.max_concurrent_transfers = int(os.getenv('TRANSFER_MAX_WORKERS', '8'))
+        self.transfer_page_size = int(os.getenv('TRANSFER_PAGE_SIZE', '100'))
+        
+        # Per-user locks so one user's rules never run concurrently
+        self._user_locks: Dict[str, Lock] = defaultdict(Lock)
+        self._user_locks_lock = Lock()
         
         if app:
             self.init_app(app)
@@ -337,12 +431,21 @@ class TransferEngine:
     
     # ==================== TRANSFER EXECUTION ====================
     
-    def execute_scheduled_transfers(self, limit: int = 100) -> Dict:
+    def execute_scheduled_transfers(self, limit: Optional[int] = None,
+                                    max_workers: Optional[int] = None,
+                                    page_size: Optional[int] = None) -> Dict:
         """
         Execute all pending scheduled transfers.
         
+        Due rules are paged through with a query cursor and executed on a
+        bounded thread pool. Rules belonging to the same user run one at a
+        time, and each (rule, scheduled date) slot is claimed with an
+        idempotency key so a retried or overlapping batch cannot transfer twice.
+        
         Args:
-            limit: Maximum number of transfers to process
+            limit: Maximum number of transfers to process (None for all due rules)
+            max_workers: Maximum concurrent transfers (defaults to TRANSFER_MAX_WORKERS)
+            page_size: Rules fetched per query page (defaults to TRANSFER_PAGE_SIZE)
             
         Returns:
             dict: Execution results
@@ -351,38 +454,55 @@ class TransferEngine:
             if not self.db:
                 return {'success': False, 'error': 'Database not available'}
             
-            # Get pending transfer rules
-            current_time = datetime.now()
-            
-            query = (self.db.collection('transfer_rules')
-                    .where('is_active', '==', True)
-                    .where('next_execution_date', '<=', current_time.isoformat())
-                    .limit(limit))
-            
-            pending_rules = []
-            for doc in query.stream():
-                rule_data = doc.to_dict()
-                pending_rules.append(self._dict_to_transfer_rule(rule_data))
-            
             results = {
                 'total_processed': 0,
                 'successful': 0,
                 'failed': 0,
+                'skipped': 0,
+                'pages': 0,
                 'transfers': []
             }
-            
-            # Process each rule
-            for rule in pending_rules:
-                transfer_result = self._execute_single_transfer(rule)
-                results['transfers'].append(transfer_result)
-                results['total_processed'] += 1
+            results_lock = Lock()
+            run_context = TransferRunContext(self.db)
+            
+            def record(transfer_result: Dict):
+                with results_lock:
+                    results['transfers'].append(transfer_result)
+                    results['total_processed'] += 1
+                    if transfer_result.get('skipped'):
+                        results['skipped'] += 1
+                    elif transfer_result['success']:
+                        results['successful'] += 1
+                    else:
+                        results['failed'] += 1
+            
+            def run_user_rules(rules: List[TransferRule]):
+                with self._user_lock(rules[0].user_id):
+                    for rule in rules:
+                        record(self._execute_idempotent_transfer(rule, run_context))
+            
+            with ThreadPoolExecutor(max_workers=max_workers or self.max_concurrent_transfers,
+                                    thread_name_prefix='transfer') as executor:
+                futures = []
+                for page in self._iter_due_rule_pages(page_size or self.transfer_page_size, limit):
+                    results['pages'] += 1
+                    
+                    # One task per user per page keeps a user's rules in order
+                    rules_by_user = defaultdict(list)
+                    for rule in page:
+                        rules_by_user[rule.user_id].append(rule)
+                    
+                    for user_rules in rules_by_user.values():
+                        futures.append(executor.submit(run_user_rules, user_rules))
                 
-                if transfer_result['success']:
-                    results['successful'] += 1
-                else:
-                    results['failed'] += 1
+                for future in as_completed(futures):
+                    future.result()
+            
+            run_context.flush()
+            results['cache'] = run_context.get_stats()
             
-            logger.info(f"✅ Executed {results['total_processed']} scheduled transfers")
+            logger.info(f"✅ Executed {results['total_processed']} scheduled transfers "
+                       f"across {results['pages']} pages ({results['skipped']} already executed)")
             return {
                 'success': True,
                 'data': results
@@ -395,12 +515,180 @@ class TransferEngine:
                 'error': str(e)
             }
     
-    def _execute_single_transfer(self, rule: TransferRule) -> Dict:
+    def _iter_due_rule_pages(self, page_size: int, limit: Optional[int] = None):
+        """
+        Yield pages of due transfer rules using a query cursor.
+        
+        Args:
+            page_size: Rules per page
+            limit: Maximum number of rules in total (None for all)
+            
+        Yields:
+            list: TransferRule objects
+        """
+        current_time = datetime.now()
+        base_query = (self.db.collection('transfer_rules')
+                      .where('is_active', '==', True)
+                      .where('next_execution_date', '<=', current_time.isoformat())
+                      .order_by('next_execution_date'))
+        
+        last_doc = None
+        remaining = limit
+        while remaining is None or remaining > 0:
+            fetch = page_size if remaining is None else min(page_size, remaining)
+            query = base_query.start_after(last_doc) if last_doc else base_query
+            docs = list(query.limit(fetch).stream())
+            if not docs:
+                return
+            
+            yield [self._dict_to_transfer_rule(doc.to_dict()) for doc in docs]
+            
+            last_doc = docs[-1]
+            if remaining is not None:
+                remaining -= len(docs)
+            if len(docs) < fetch:
+                return
+    
+    def _user_lock(self, user_id: str) -> Lock:
+        """Get the lock serializing transfers for a user."""
+        with self._user_locks_lock:
+            return self._user_locks[user_id]
+    
+    @staticmethod
+    def _idempotency_key(rule: TransferRule) -> str:
+        """Key identifying one scheduled execution of a rule."""
+        scheduled = rule.next_execution_date or rule.start_date
+        return f"{rule.id}_{scheduled.strftime('%Y-%m-%d')}"
+    
+    def _claim_transfer_slot(self, key: str, rule: TransferRule) -> bool:
+        """
+        Claim a (rule, scheduled date) slot before transferring.
+        
+        A slot can only be reclaimed if its previous attempt failed. A slot
+        left processing (e.g. the worker died mid-transfer) may already have
+        moved money, so it is left for reconciliation rather than retried.
+        
+        Returns:
+            bool: True if this caller owns the slot
+        """
+        slot_ref = self.db.collection('transfer_idempotency').document(key)
+        claim = {
+            'rule_id': rule.id,
+            'user_id': rule.user_id,
+            'status': TransferStatus.PROCESSING.value,
+            'claimed_at': datetime.now().isoformat()
+        }
+        
+        if AlreadyExists is None:
+            # Without Firestore preconditions fall back to a best-effort check
+            existing = slot_ref.get()
+            if existing.exists and not self._slot_reclaimable(existing.to_dict()):
+                return False
+            slot_ref.set(claim)
+            return True
+        
+        try:
+            slot_ref.create(claim)
+            return True
+        except AlreadyExists:
+            existing = slot_ref.get()
+            if not existing.exists or not self._slot_reclaimable(existing.to_dict()):
+                return False
+            try:
+                slot_ref.update(claim, option=self.db.write_option(last_update_time=existing.update_time))
+                return True
+            except FailedPrecondition:
+                # Another worker reclaimed it first
+                return False
+    
+    def _slot_reclaimable(self, slot: Dict) -> bool:
+        """Check whether a previously claimed slot may be attempted again."""
+        if slot.get('status') == TransferStatus.FAILED.value:
+            return True
+        if slot.get('status') == TransferStatus.PROCESSING.value and slot.get('claimed_at'):
+            claimed_at = datetime.fromisoformat(slot['claimed_at'])
+            if datetime.now() - claimed_at > timedelta(minutes=self.transfer_timeout_minutes):
+                logger.warning(f"⚠️ Transfer slot for rule {slot.get('rule_id')} has been processing since "
+                               f"{slot['claimed_at']}; needs reconciliation before it can be retried")
+        return False
+    
+    def _advance_completed_rule(self, key: str, rule: TransferRule,
+                                run_context: Optional[TransferRunContext] = None):
+        """
+        Advance a rule whose slot completed but whose batched rule update was
+        never committed (e.g. the run stopped before its final flush).
+        """
+        try:
+            slot = self.db.collection('transfer_idempotency').document(key).get()
+            if not slot.exists or slot.to_dict().get('status') != TransferStatus.COMPLETED.value:
+                return
+            
+            finished_at = slot.to_dict().get('finished_at')
+            rule.last_execution_date = datetime.fromisoformat(finished_at) if finished_at else datetime.now()
+            rule.next_execution_date = self._calculate_next_execution_date(rule)
+            rule.retry_count = 0
+            rule.last_error = None
+            rule.updated_at = datetime.now()
+            self._save_transfer_rule(rule, run_context.writer if run_context else None)
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to advance rule {rule.id} for completed slot {key}: {str(e)}")
+    
+    def _execute_idempotent_transfer(self, rule: TransferRule,
+                                     run_context: Optional[TransferRunContext] = None) -> Dict:
+        """
+        Execute a rule's transfer at most once per scheduled date.
+        
+        Args:
+            rule: Transfer rule to execute
+            run_context: Run-scoped cache shared across the batch
+            
+        Returns:
+            dict: Transfer execution result (``skipped`` if already executed)
+        """
+        key = self._idempotency_key(rule)
+        try:
+            if not self._claim_transfer_slot(key, rule):
+                logger.info(f"ℹ️ Transfer for rule {rule.id} already executed or in progress ({key})")
+                self._advance_completed_rule(key, rule, run_context)
+                return {
+                    'success': True,
+                    'skipped': True,
+                    'rule_id': rule.id,
+                    'idempotency_key': key
+                }
+        except Exception as e:
+            logger.error(f"❌ Failed to claim transfer slot {key}: {str(e)}")
+            return {
+                'success': False,
+                'rule_id': rule.id,
+                'error': f'Could not claim transfer slot: {str(e)}'
+            }
+        
+        result = self._execute_single_transfer(rule, idempotency_key=key, run_context=run_context)
+        result['idempotency_key'] = key
+        
+        try:
+            status = TransferStatus.COMPLETED if result['success'] else TransferStatus.FAILED
+            self.db.collection('transfer_idempotency').document(key).update({
+                'status': status.value,
+                'transfer_id': result.get('transfer_id'),
+                'finished_at': datetime.now().isoformat()
+            })
+        except Exception as e:
+            logger.error(f"❌ Failed to record transfer slot {key}: {str(e)}")
+        
+        return result
+    
+    def _execute_single_transfer(self, rule: TransferRule, idempotency_key: Optional[str] = None,
+                                 run_context: Optional[TransferRunContext] = None) -> Dict:
         """
         Execute a single transfer for a rule.
         
         Args:
             rule: Transfer rule to execute
+            idempotency_key: Claimed (rule, scheduled date) slot, if any
+            run_context: Run-scoped cache shared across the batch
             
         Returns:
             dict: Transfer execution result
@@ -410,7 +698,7 @@ class TransferEngine:
             transfer_id = str(uuid.uuid4())
             
             # Calculate transfer amount
-            amount_result = self._calculate_transfer_amount(rule)
+            amount_result = self._calculate_transfer_amount(rule, run_context)
             if not amount_result['success']:
                 return {
                     'success': False,
@@ -434,11 +722,12 @@ class TransferEngine:
                 detected_income_amount=amount_result.get('detected_income'),
                 income_source=amount_result.get('income_source'),
                 surplus_calculation=amount_result.get('surplus_calculation'),
+                idempotency_key=idempotency_key,
                 created_at=datetime.now(),
                 updated_at=datetime.now()
             )
             
-            # Save transfer record
+            # Save transfer record before any money moves
             self._save_transfer_record(transfer)
             
             # Execute the transfer
@@ -486,11 +775,13 @@ class TransferEngine:
             rule.updated_at = datetime.now()
             
             self._save_transfer_record(transfer)
-            self._save_transfer_rule(rule)
+            self._save_transfer_rule(rule, run_context.writer if run_context else None)
             
             return {
                 'success': execution_result['success'],
                 'rule_id': rule.id,
+                'goal_id': rule.goal_id,
+                'user_id': rule.user_id,
                 'transfer_id': transfer_id,
                 'amount': transfer_amount,
                 'error': execution_result.get('error')
@@ -504,12 +795,14 @@ class TransferEngine:
                 'error': str(e)
             }
     
-    def _calculate_transfer_amount(self, rule: TransferRule) -> Dict:
+    def _calculate_transfer_amount(self, rule: TransferRule,
+                                   run_context: Optional[TransferRunContext] = None) -> Dict:
         """
         Calculate the transfer amount based on rule configuration.
         
         Args:
             rule: Transfer rule
+            run_context: Run-scoped cache shared across the batch
             
         Returns:
             dict: Calculated amount and metadata
@@ -524,7 +817,7 @@ class TransferEngine:
             elif rule.transfer_type == TransferType.PERCENTAGE_INCOME:
                 if rule.income_detection_enabled:
                     # Get recent income detection
-                    income_result = self._detect_recent_income(rule)
+                    income_result = self._detect_recent_income(rule, run_context)
                     if income_result['success']:
                         income_amount = income_result['amount']
                         transfer_amount = (rule.amount / 100) * income_amount
@@ -551,7 +844,7 @@ class TransferEngine:
             
             elif rule.transfer_type == TransferType.SMART_SURPLUS:
                 # Calculate surplus after essential expenses
-                surplus_result = self._calculate_surplus(rule)
+                surplus_result = self._calculate_surplus(rule, run_context)
                 if surplus_result['success']:
                     surplus_amount = surplus_result['surplus']
                     transfer_amount = (rule.amount / 100) * surplus_amount
@@ -583,12 +876,15 @@ class TransferEngine:
                 'error': str(e)
             }
     
-    def _detect_recent_income(self, rule: TransferRule) -> Dict:
+    def _detect_recent_income(self, rule: TransferRule,
+                              run_context: Optional[TransferRunContext] = None) -> Dict:
         """
         Detect recent income for the user's source account.
         
         Args:
             rule: Transfer rule
+            run_context: Run-scoped cache; when given, transactions and the
+                analysis are shared with other rules on the same account
             
         Returns:
             dict: Income detection result
@@ -600,56 +896,16 @@ class TransferEngine:
                     'error': 'BASIQ client not available'
                 }
             
-            # Get recent transactions for the source account
-            from_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            
-            transactions_result = self.basiq_client.get_account_transactions(
-                user_id=rule.user_id,
-                account_id=rule.source_account_id,
-                from_date=from_date
-            )
-            
-            if not transactions_result['success']:
-                return {
-                    'success': False,
-                    'error': 'Failed to get account transactions'
-                }
+            if run_context is None:
+                return self._analyze_recent_income(rule, self._fetch_recent_transactions(rule))
             
-            transactions = transactions_result['transactions'].get('data', [])
-            
-            # Analyze transactions for income patterns
-            income_transactions = []
-            for transaction in transactions:
-                amount = float(transaction.get('amount', 0))
-                description = transaction.get('description', '').lower()
-                
-                # Look for positive amounts that match income patterns
-                if amount > rule.minimum_income_threshold:
-                    if any(keyword in description for keyword in [
-                        'salary', 'wage', 'income', 'payroll', 'deposit', 'transfer'
-                    ]):
-                        income_transactions.append({
-                            'amount': amount,
-                            'description': transaction.get('description'),
-                            'date': transaction.get('date')
-                        })
-            
-            if income_transactions:
-                # Calculate average recent income
-                total_income = sum(t['amount'] for t in income_transactions)
-                avg_income = total_income / len(income_transactions)
-                
-                return {
-                    'success': True,
-                    'amount': avg_income,
-                    'source': 'transaction_analysis',
-                    'transactions': income_transactions
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'No income transactions found in recent period'
-                }
+            return run_context.get_income(rule, lambda: self._analyze_recent_income(
+                rule,
+                run_context.get_transactions(
+                    rule.user_id, rule.source_account_id,
+                    lambda: self._fetch_recent_transactions(rule)
+                )
+            ))
                 
         except Exception as e:
             logger.error(f"❌ Failed to detect income: {str(e)}")
@@ -658,12 +914,68 @@ class TransferEngine:
                 'error': str(e)
             }
     
-    def _calculate_surplus(self, rule: TransferRule) -> Dict:
+    def _fetch_recent_transactions(self, rule: TransferRule) -> Iterable[Dict]:
+        """Stream the last 30 days of transactions for the rule's source account."""
+        from_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        
+        return self.basiq_client.iter_synced_account_transactions(
+            user_id=rule.user_id,
+            account_id=rule.source_account_id,
+            from_date=from_date
+        )
+    
+    def _analyze_recent_income(self, rule: TransferRule, transactions: Iterable[Dict]) -> Dict:
+        """
+        Analyze transactions for income patterns.
+        
+        Args:
+            rule: Transfer rule (supplies the minimum income threshold)
+            transactions: Recent source account transactions
+            
+        Returns:
+            dict: Income detection result
+        """
+        income_transactions = []
+        for transaction in transactions:
+            amount = float(transaction.get('amount', 0))
+            description = transaction.get('description', '').lower()
+            
+            # Look for positive amounts that match income patterns
+            if amount > rule.minimum_income_threshold:
+                if any(keyword in description for keyword in [
+                    'salary', 'wage', 'income', 'payroll', 'deposit', 'transfer'
+                ]):
+                    income_transactions.append({
+                        'amount': amount,
+                        'description': transaction.get('description'),
+                        'date': transaction.get('date')
+                    })
+        
+        if income_transactions:
+            # Calculate average recent income
+            total_income = sum(t['amount'] for t in income_transactions)
+            avg_income = total_income / len(income_transactions)
+            
+            return {
+                'success': True,
+                'amount': avg_income,
+                'source': 'transaction_analysis',
+                'transactions': income_transactions
+            }
+        else:
+            return {
+                'success': False,
+                'error': 'No income transactions found in recent period'
+            }
+    
+    def _calculate_surplus(self, rule: TransferRule,
+                           run_context: Optional[TransferRunContext] = None) -> Dict:
         """
         Calculate available surplus after essential expenses.
         
         Args:
             rule: Transfer rule
+            run_context: Run-scoped cache shared across the batch
             
         Returns:
             dict: Surplus calculation result
@@ -673,7 +985,7 @@ class TransferEngine:
             # with expense categorization and budget analysis
             
             # Get recent income and expenses
-            income_result = self._detect_recent_income(rule)
+            income_result = self._detect_recent_income(rule, run_context)
             if not income_result['success']:
                 return {
                     'success': False,
@@ -912,17 +1224,21 @@ class TransferEngine:
                 'detected_income_amount': transfer.detected_income_amount,
                 'income_source': transfer.income_source,
                 'surplus_calculation': transfer.surplus_calculation,
+                'idempotency_key': transfer.idempotency_key,
                 'created_at': transfer.created_at.isoformat() if transfer.created_at else None,
                 'updated_at': transfer.updated_at.isoformat() if transfer.updated_at else None
             }
             
             self.db.collection('transfer_records').document(transfer.id).set(transfer_dict)
     
-    def _save_transfer_rule(self, rule: TransferRule):
-        """Save transfer rule to database."""
+    def _save_transfer_rule(self, rule: TransferRule, writer=None):
+        """Save transfer rule to database (batched when a writer is given)."""
         if self.db:
             rule_dict = self._transfer_rule_to_dict(rule)
-            self.db.collection('transfer_rules').document(rule.id).set(rule_dict)
+            if writer is not None:
+                writer.set('transfer_rules', rule.id, rule_dict)
+            else:
+                self.db.collection('transfer_rules').document(rule.id).set(rule_dict)
     
     # ==================== TRANSFER HISTORY ====================
     
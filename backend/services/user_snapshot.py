@@ -0,0 +1,345 @@
+"""
+Shared User Financial Snapshot Loader for TAAXDOG
+
+One loader for the per-user data every insights, savings and reporting
+engine reads, so a single dashboard render fetches each source once:
+- Sources (BASIQ transactions, user document, tax profile, goals, receipts,
+  subscriptions) are fetched concurrently on a shared thread pool
+- Request scope: within one Flask request every source is read at most once
+- Short-TTL cross-request cache with in-flight deduplication, so concurrent
+  requests for the same user share one upstream read
+- Invalidation hooks for BASIQ sync and receipt upload
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SOURCES = ('transactions', 'profile', 'tax_profile', 'goals', 'receipts', 'subscriptions')
+DEFAULT_TTL_SECONDS = int(os.getenv('USER_SNAPSHOT_TTL', '60'))
+DEFAULT_MAX_ENTRIES = int(os.getenv('USER_SNAPSHOT_MAX_ENTRIES', '5000'))
+DEFAULT_PERIOD_MONTHS = 6
+
+# Values read during the current request, keyed like the shared cache
+_request_scope: contextvars.ContextVar = contextvars.ContextVar('user_snapshot_scope', default=None)
+
+
+@dataclass
+class UserFinancialSnapshot:
+    """
+    Point-in-time view of a user's financial data.
+
+    Source values are shared with other callers through the caches and
+    must be treated as read-only.
+    """
+    user_id: str
+    period_months: int = DEFAULT_PERIOD_MONTHS
+    transactions: List[Dict] = field(default_factory=list)
+    profile: Optional[Dict] = None
+    tax_profile: Optional[Dict] = None
+    goals: List[Dict] = field(default_factory=list)
+    receipts: List[Dict] = field(default_factory=list)
+    subscriptions: List[Dict] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.time)
+
+    def to_dict(self, sources: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Build the ``user_data`` dict the insights engines consume.
+
+        Sources that were not loaded or had no data are omitted, matching
+        the dicts the engines used to build themselves.
+        """
+        data = {}
+        for source in sources or SNAPSHOT_SOURCES:
+            value = getattr(self, source)
+            if value is not None:
+                data[source] = value
+        return data
+
+
+def _get_db():
+    try:
+        from firebase_config import db
+    except ImportError:
+        try:
+            from backend.firebase_config import db
+        except ImportError:
+            db = None
+    return db
+
+
+def _fetch_transactions(user_id: str, period_months: int) -> List[Dict]:
+    try:
+        from basiq_api import iter_user_transactions
+    except ImportError:
+        from backend.basiq_api import iter_user_transactions
+
+    # Day granularity keeps the window identical for every read within a day
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=period_months * 30)
+    filter_str = f"transaction.postDate.gte={start_date.isoformat()}&transaction.postDate.lte={end_date.isoformat()}"
+    return list(iter_user_transactions(user_id, filter_str))
+
+
+def _fetch_profile(user_id: str, period_months: int) -> Optional[Dict]:
+    db = _get_db()
+    if not db:
+        return None
+    user_doc = db.collection('users').document(user_id).get()
+    return user_doc.to_dict() if user_doc.exists else None
+
+
+def _fetch_tax_profile(user_id: str, period_months: int) -> Optional[Dict]:
+    db = _get_db()
+    if not db:
+        return None
+    tax_profile_ref = db.collection('taxProfiles').where('userId', '==', user_id).limit(1).get()
+    return tax_profile_ref[0].to_dict() if tax_profile_ref else None
+
+
+def _fetch_collection(collection: str) -> Callable[[str, int], List[Dict]]:
+    def fetch(user_id: str, period_months: int) -> List[Dict]:
+        db = _get_db()
+        if not db:
+            return []
+        documents = []
+        for doc in db.collection(collection).where('userId', '==', user_id).stream():
+            document = doc.to_dict()
+            document['id'] = doc.id
+            documents.append(document)
+        return documents
+    return fetch
+
+
+DEFAULT_FETCHERS: Dict[str, Callable[[str, int], Any]] = {
+    'transactions': _fetch_transactions,
+    'profile': _fetch_profile,
+    'tax_profile': _fetch_tax_profile,
+    'goals': _fetch_collection('goals'),
+    'receipts': _fetch_collection('receipts'),
+    'subscriptions': _fetch_collection('subscriptions')
+}
+
+
+class UserSnapshotLoader:
+    """
+    Loads and caches UserFinancialSnapshot objects.
+    """
+
+    def __init__(self, fetchers: Optional[Dict[str, Callable[[str, int], Any]]] = None,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_workers: int = 12, clock: Callable[[], float] = time.time):
+        """
+        Initialize the loader.
+
+        Args:
+            fetchers: Source name -> callable(user_id, period_months); defaults to Firestore/BASIQ
+            ttl_seconds: How long a source stays cached across requests (0 disables)
+            max_entries: Maximum cached (user, source) values
+            max_workers: Concurrent upstream reads across all users
+            clock: Time source
+        """
+        self.fetchers = dict(DEFAULT_FETCHERS, **(fetchers or {}))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='user-snapshot')
+
+        self.lock = threading.Lock()
+        self.cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self.in_flight: Dict[Tuple, Future] = {}
+        # Bumped on invalidation so reads already in flight are not cached afterwards
+        self.generations: Dict[Tuple[str, str], int] = {}
+        self.stats = {'fetches': 0, 'cache_hits': 0, 'request_hits': 0, 'shared_fetches': 0,
+                      'errors': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _key(user_id: str, source: str, period_months: int) -> Tuple:
+        # Only the transaction window depends on the period
+        return (user_id, source, period_months if source == 'transactions' else None)
+
+    def load(self, user_id: str, sources: Optional[Iterable[str]] = None,
+             period_months: int = DEFAULT_PERIOD_MONTHS) -> UserFinancialSnapshot:
+        """
+        Load a user's snapshot, fetching missing sources concurrently.
+
+        Args:
+            user_id: Firebase user ID
+            sources: Sources to load (defaults to all)
+            period_months: Transaction window in months
+
+        Returns:
+            UserFinancialSnapshot: Snapshot with the requested sources; failed
+            sources are left empty and reported in ``errors``
+        """
+        snapshot = UserFinancialSnapshot(user_id=user_id, period_months=period_months)
+        scope = _request_scope.get()
+        pending: Dict[str, Future] = {}
+
+        for source in sources or SNAPSHOT_SOURCES:
+            key = self._key(user_id, source, period_months)
+            if scope is not None and key in scope:
+                self.stats['request_hits'] += 1
+                setattr(snapshot, source, scope[key])
+                continue
+            found, value = self._cached(key)
+            if found:
+                self.stats['cache_hits'] += 1
+                setattr(snapshot, source, value)
+                if scope is not None:
+                    scope[key] = value
+                continue
+            pending[source] = self._fetch(key)
+
+        for source, future in pending.items():
+            try:
+                value = future.result()
+            except Exception as e:
+                self.stats['errors'] += 1
+                snapshot.errors[source] = str(e)
+                logger.warning(f"⚠️ Could not load {source} for user {user_id}: {e}")
+                continue
+            setattr(snapshot, source, value)
+            if scope is not None:
+                scope[self._key(user_id, source, period_months)] = value
+
+        return snapshot
+
+    async def load_async(self, user_id: str, sources: Optional[Iterable[str]] = None,
+                         period_months: int = DEFAULT_PERIOD_MONTHS) -> UserFinancialSnapshot:
+        """Load a snapshot without blocking the event loop, sharing the caller's request scope"""
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, context.run, self.load, user_id, sources, period_months)
+
+    def _cached(self, key: Tuple) -> Tuple[bool, Any]:
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self.cache[key]
+                return False, None
+            self.cache.move_to_end(key)
+            return True, value
+
+    def _fetch(self, key: Tuple) -> Future:
+        """Start (or join) the upstream read for a key"""
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats['shared_fetches'] += 1
+                return future
+            generation = self.generations.get(key[:2], 0)
+            future = self.executor.submit(self._run_fetcher, key)
+            self.in_flight[key] = future
+            self.stats['fetches'] += 1
+
+        future.add_done_callback(lambda done: self._store(key, generation, done))
+        return future
+
+    def _run_fetcher(self, key: Tuple) -> Any:
+        user_id, source, period_months = key
+        return self.fetchers[source](user_id, period_months or DEFAULT_PERIOD_MONTHS)
+
+    def _store(self, key: Tuple, generation: int, future: Future):
+        with self.lock:
+            self.in_flight.pop(key, None)
+            if future.exception() is not None or self.ttl_seconds <= 0:
+                return
+            if self.generations.get(key[:2], 0) != generation:
+                return
+            self.cache[key] = (self.clock() + self.ttl_seconds, future.result())
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def invalidate(self, user_id: str, sources: Optional[Iterable[str]] = None):
+        """
+        Drop cached sources for a user after their data changes.
+
+        Args:
+            user_id: Firebase user ID
+            sources: Sources to drop (defaults to all)
+        """
+        sources = set(sources or SNAPSHOT_SOURCES)
+        with self.lock:
+            for key in [key for key in self.cache if key[0] == user_id and key[1] in sources]:
+                del self.cache[key]
+            for source in sources:
+                self.generations[(user_id, source)] = self.generations.get((user_id, source), 0) + 1
+            self.stats['invalidations'] += 1
+
+        scope = _request_scope.get()
+        if scope is not None:
+            for key in [key for key in scope if key[0] == user_id and key[1] in sources]:
+                del scope[key]
+
+    @contextmanager
+    def request_scope(self):
+        """Read each source at most once inside the block"""
+        token = _request_scope.set({})
+        try:
+            yield
+        finally:
+            _request_scope.reset(token)
+
+    def init_app(self, app):
+        """Open a request scope for every Flask request"""
+        @app.before_request
+        def open_snapshot_scope():
+            from flask import g
+            g.user_snapshot_scope_token = _request_scope.set({})
+
+        @app.teardown_request
+        def close_snapshot_scope(exc=None):
+            from flask import g
+            token = g.pop('user_snapshot_scope_token', None)
+            if token is not None:
+                _request_scope.reset(token)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fetch, cache and invalidation counters"""
+        with self.lock:
+            return {**self.stats, 'cached_entries': len(self.cache), 'in_flight': len(self.in_flight)}
+
+
+# Global user snapshot loader instance
+user_snapshot_loader = None
+_loader_lock = threading.Lock()
+
+
+def get_user_snapshot_loader() -> UserSnapshotLoader:
+    """Get the global user snapshot loader instance."""
+    global user_snapshot_loader
+    if user_snapshot_loader is None:
+        with _loader_lock:
+            if user_snapshot_loader is None:
+                user_snapshot_loader = UserSnapshotLoader()
+    return user_snapshot_loader
+
+
+def init_user_snapshot_loader(app) -> UserSnapshotLoader:
+    """Initialize the global loader and its per-request scope."""
+    loader = get_user_snapshot_loader()
+    loader.init_app(app)
+    return loader
+
+
+def invalidate_user_snapshot(user_id: str, sources: Optional[Iterable[str]] = None):
+    """Invalidation hook for sync jobs and upload routes."""
+    if user_snapshot_loader is not None:
+        user_snapshot_loader.invalidate(user_id, sources)
@@ -16,7 +16,16 @@ from collections import defaultdict
 import requests
 from ai.financial_insights import analyze_transactions
 from firebase_config import db
-from basiq_api import get_user_transactions
+
+try:
+    from services.user_snapshot import get_user_snapshot_loader
+except ImportError:
+    from backend.services.user_snapshot import get_user_snapshot_loader
+
+try:
+    from transaction_frame import TransactionFrame
+except ImportError:
+    from backend.transaction_frame import TransactionFrame
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -98,14 +107,17 @@ class SmartInsightsEngine:
                 logger.warning(f"No data found for user {user_id}")
                 return insights
             
+            # Convert transactions to columns once; every analyzer shares the frame and its aggregates
+            frame = TransactionFrame.from_transactions(user_data.get('transactions', []))
+            
             # Generate different types of insights
-            insights.extend(await self._analyze_spending_patterns(user_id, user_data))
-            insights.extend(await self._generate_tax_optimization_insights(user_id, user_data))
-            insights.extend(await self._create_budget_recommendations(user_id, user_data))
-            insights.extend(await self._identify_savings_opportunities(user_id, user_data))
-            insights.extend(await self._analyze_subscription_efficiency(user_id, user_data))
-            insights.extend(await self._predict_cash_flow(user_id, user_data))
-            insights.extend(await self._assess_audit_risks(user_id, user_data))
+            insights.extend(await self._analyze_spending_patterns(user_id, user_data, frame))
+            insights.extend(await self._generate_tax_optimization_insights(user_id, user_data, frame))
+            insights.extend(await self._create_budget_recommendations(user_id, user_data, frame))
+            insights.extend(await self._identify_savings_opportunities(user_id, user_data, frame))
+            insights.extend(await self._analyze_subscription_efficiency(user_id, user_data, frame))
+            insights.extend(await self._predict_cash_flow(user_id, user_data, frame))
+            insights.extend(await self._assess_audit_risks(user_id, user_data, frame))
             
             # Sort by priority and confidence
             insights.sort(key=lambda x: (x.priority.value, -x.confidence_score), reverse=True)
@@ -120,70 +132,24 @@ class SmartInsightsEngine:
     
     async def _get_user_data(self, user_id: str, period_months: int) -> Dict[str, Any]:
         """Collect comprehensive user data for analysis"""
-        data = {}
-        
         try:
-            # Get transactions
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=period_months * 30)
-            filter_str = f"transaction.postDate.gte={start_date.isoformat()}&transaction.postDate.lte={end_date.isoformat()}"
-            
-            transactions_result = get_user_transactions(user_id, filter_str)
-            if transactions_result.get('success'):
-                data['transactions'] = transactions_result.get('transactions', {}).get('data', [])
-            
-            # Get user profile from Firebase
-            if db:
-                user_ref = db.collection('users').document(user_id)
-                user_doc = user_ref.get()
-                if user_doc.exists:
-                    data['profile'] = user_doc.to_dict()
-                
-                # Get tax profile
-                tax_profile_ref = db.collection('taxProfiles').where('userId', '==', user_id).get()
-                if tax_profile_ref:
-                    data['tax_profile'] = tax_profile_ref[0].to_dict()
-                
-                # Get goals
-                goals_ref = db.collection('goals').where('userId', '==', user_id).get()
-                data['goals'] = [doc.to_dict() for doc in goals_ref]
-                
-                # Get subscriptions
-                subs_ref = db.collection('subscriptions').where('userId', '==', user_id).get()
-                data['subscriptions'] = [doc.to_dict() for doc in subs_ref]
-                
-                # Get receipts
-                receipts_ref = db.collection('receipts').where('userId', '==', user_id).get()
-                data['receipts'] = [doc.to_dict() for doc in receipts_ref]
-            
+            # Reuses anything the calling request already loaded
+            snapshot = await get_user_snapshot_loader().load_async(user_id, period_months=period_months)
+            return snapshot.to_dict()
         except Exception as e:
             logger.error(f"Error getting user data for {user_id}: {e}")
-            
-        return data
+            return {}
     
-    async def _analyze_spending_patterns(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _analyze_spending_patterns(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Analyze spending patterns and identify trends"""
         insights = []
         
         try:
-            transactions = user_data.get('transactions', [])
-            if not transactions:
+            if not len(frame):
                 return insights
             
-            # Group by category and month
-            category_spending = defaultdict(lambda: defaultdict(float))
-            monthly_totals = defaultdict(float)
-            
-            for transaction in transactions:
-                if transaction.get('direction') == 'debit':
-                    amount = abs(float(transaction.get('amount', 0)))
-                    category = transaction.get('category', 'Other')
-                    date_str = transaction.get('postDate', '')
-                    
-                    if date_str:
-                        month_key = date_str[:7]  # YYYY-MM
-                        category_spending[category][month_key] += amount
-                        monthly_totals[month_key] += amount
+            # Debit spending grouped by category and month (months ascending)
+            category_spending = frame.debit_spending_by_category_month
             
             # Analyze trends for each category
             for category, monthly_amounts in category_spending.items():
@@ -191,7 +157,7 @@ class SmartInsightsEngine:
                     continue
                 
                 amounts = list(monthly_amounts.values())
-                months = sorted(monthly_amounts.keys())
+                months = list(monthly_amounts.keys())
                 
                 # Calculate trend
                 trend = self._calculate_trend(amounts)
@@ -257,7 +223,7 @@ class SmartInsightsEngine:
             
         return insights
     
-    async def _generate_tax_optimization_insights(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _generate_tax_optimization_insights(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Generate tax optimization recommendations"""
         insights = []
         
@@ -266,7 +232,7 @@ class SmartInsightsEngine:
             tax_profile = user_data.get('tax_profile', {})
             receipts = user_data.get('receipts', [])
             
-            if not transactions:
+            if not len(frame):
                 return insights
             
             # Analyze potential deductions
@@ -277,25 +243,17 @@ class SmartInsightsEngine:
             
             # Check for missing business expense categories
             business_categories = ['Office Supplies', 'Professional Development', 'Travel', 'Equipment']
-            found_categories = set()
+            found_categories = set(frame.categories)
             
-            for transaction in transactions:
-                category = transaction.get('category', '')
-                if category in business_categories:
-                    found_categories.add(category)
-                
-                # Check for high cash transactions (audit risk)
-                if float(transaction.get('amount', 0)) > 10000:
-                    audit_risks.append(f"High-value cash transaction: ${transaction.get('amount')}")
-                    compliance_score -= 5
+            # Check for high cash transactions (audit risk)
+            for index in np.flatnonzero(frame.amount > 10000):
+                audit_risks.append(f"High-value cash transaction: ${transactions[index].get('amount')}")
+                compliance_score -= 5
             
             missing_categories = [cat for cat in business_categories if cat not in found_categories]
             
             # Calculate potential savings from better categorization
-            uncategorized_amount = sum(
-                abs(float(t.get('amount', 0))) for t in transactions 
-                if t.get('direction') == 'debit' and not t.get('category')
-            )
+            uncategorized_amount = float(frame.abs_amount[frame.is_debit & frame.blank_category].sum())
             
             # Estimate tax savings (30% tax rate assumption)
             potential_tax_savings = uncategorized_amount * 0.3 * 0.5  # Conservative estimate
@@ -352,35 +310,23 @@ class SmartInsightsEngine:
             
         return insights
     
-    async def _create_budget_recommendations(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _create_budget_recommendations(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Create intelligent budget recommendations"""
         insights = []
         
         try:
-            transactions = user_data.get('transactions', [])
             goals = user_data.get('goals', [])
             
-            if not transactions:
+            if not len(frame):
                 return insights
             
-            # Calculate current spending by category
-            category_spending = defaultdict(float)
-            monthly_income = 0
-            
-            for transaction in transactions:
-                amount = abs(float(transaction.get('amount', 0)))
-                category = transaction.get('category', 'Other')
-                
-                if transaction.get('direction') == 'credit':
-                    monthly_income += amount
-                else:
-                    category_spending[category] += amount
-            
             # Calculate monthly averages (assume 6 months of data)
             months = 6
-            monthly_income = monthly_income / months
-            for category in category_spending:
-                category_spending[category] = category_spending[category] / months
+            monthly_income = frame.total_income / months
+            category_spending = {
+                category: amount / months
+                for category, amount in frame.expense_totals_by_category.items()
+            }
             
             total_expenses = sum(category_spending.values())
             
@@ -460,12 +406,11 @@ class SmartInsightsEngine:
             
         return insights
     
-    async def _identify_savings_opportunities(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _identify_savings_opportunities(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Identify specific savings opportunities"""
         insights = []
         
         try:
-            transactions = user_data.get('transactions', [])
             subscriptions = user_data.get('subscriptions', [])
             
             # Analyze subscription efficiency
@@ -496,12 +441,10 @@ class SmartInsightsEngine:
                 ))
             
             # Identify frequent small purchases that add up
-            small_purchases = [t for t in transactions 
-                             if t.get('direction') == 'debit' 
-                             and 5 <= abs(float(t.get('amount', 0))) <= 25]
+            small_purchases = frame.abs_amount[frame.is_debit & (frame.abs_amount >= 5) & (frame.abs_amount <= 25)]
             
             if len(small_purchases) > 20:  # More than 20 small purchases
-                total_small = sum(abs(float(t.get('amount', 0))) for t in small_purchases)
+                total_small = float(small_purchases.sum())
                 
                 insights.append(SmartInsight(
                     id=f"small_purchases_{user_id}_{datetime.now().strftime('%Y%m')}",
@@ -531,13 +474,12 @@ class SmartInsightsEngine:
             
         return insights
     
-    async def _analyze_subscription_efficiency(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _analyze_subscription_efficiency(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Analyze subscription efficiency and usage"""
         insights = []
         
         try:
             subscriptions = user_data.get('subscriptions', [])
-            transactions = user_data.get('transactions', [])
             
             # Group subscriptions by category
             category_subs = defaultdict(list)
@@ -577,32 +519,19 @@ class SmartInsightsEngine:
             
         return insights
     
-    async def _predict_cash_flow(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _predict_cash_flow(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Predict future cash flow and identify potential issues"""
         insights = []
         
         try:
-            transactions = user_data.get('transactions', [])
             subscriptions = user_data.get('subscriptions', [])
             goals = user_data.get('goals', [])
             
-            if not transactions:
+            if not len(frame):
                 return insights
             
             # Calculate average monthly income and expenses
-            monthly_data = defaultdict(lambda: {'income': 0, 'expenses': 0})
-            
-            for transaction in transactions:
-                amount = abs(float(transaction.get('amount', 0)))
-                date_str = transaction.get('postDate', '')
-                
-                if date_str:
-                    month_key = date_str[:7]  # YYYY-MM
-                    
-                    if transaction.get('direction') == 'credit':
-                        monthly_data[month_key]['income'] += amount
-                    else:
-                        monthly_data[month_key]['expenses'] += amount
+            monthly_data = frame.monthly_flows
             
             # Calculate averages
             months = list(monthly_data.keys())
@@ -673,12 +602,11 @@ class SmartInsightsEngine:
             
         return insights
     
-    async def _assess_audit_risks(self, user_id: str, user_data: Dict) -> List[SmartInsight]:
+    async def _assess_audit_risks(self, user_id: str, user_data: Dict, frame: TransactionFrame) -> List[SmartInsight]:
         """Assess potential audit risks and compliance issues"""
         insights = []
         
         try:
-            transactions = user_data.get('transactions', [])
             receipts = user_data.get('receipts', [])
             tax_profile = user_data.get('tax_profile', {})
             
@@ -686,33 +614,25 @@ class SmartInsightsEngine:
             risk_score = 0
             
             # Check for high cash transactions
-            high_cash_count = 0
-            for transaction in transactions:
-                amount = abs(float(transaction.get('amount', 0)))
-                if amount > 10000 and transaction.get('description', '').lower().find('cash') != -1:
-                    high_cash_count += 1
-                    risk_score += 10
+            high_cash_count = int(np.count_nonzero((frame.abs_amount > 10000) & frame.mentions_cash))
+            risk_score += 10 * high_cash_count
             
             if high_cash_count > 0:
                 risk_factors.append(f"{high_cash_count} high-value cash transactions")
             
             # Check receipt compliance
-            business_transactions = [t for t in transactions 
-                                   if t.get('direction') == 'debit' 
-                                   and abs(float(t.get('amount', 0))) > 50]
+            business_transaction_count = int(np.count_nonzero(frame.is_debit & (frame.abs_amount > 50)))
             
-            receipt_coverage = len(receipts) / len(business_transactions) if business_transactions else 0
+            receipt_coverage = len(receipts) / business_transaction_count if business_transaction_count else 0
             
             if receipt_coverage < 0.7:  # Less than 70% receipt coverage
                 risk_factors.append("Low receipt coverage for business expenses")
                 risk_score += 15
             
             # Check for round number transactions (potential red flag)
-            round_transactions = [t for t in transactions 
-                                if abs(float(t.get('amount', 0))) % 100 == 0 
-                                and abs(float(t.get('amount', 0))) > 100]
+            round_transaction_count = int(np.count_nonzero((frame.abs_amount % 100 == 0) & (frame.abs_amount > 100)))
             
-            if len(round_transactions) > len(transactions) * 0.2:  # More than 20% round numbers
+            if round_transaction_count > len(frame) * 0.2:  # More than 20% round numbers
                 risk_factors.append("High percentage of round-number transactions")
                 risk_score += 5
             
@@ -12,8 +12,9 @@ import logging
 import time
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 from typing import Dict, List, Any, Optional
 
 # Add parent directory to path for cross-module imports
@@ -21,11 +22,22 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 sys.path.insert(0, os.path.join(project_root, 'src'))
 
-from integrations.basiq_client import basiq_client
-from config.basiq_config import get_basiq_config
+from integrations.basiq_client import basiq_client, basiq_rate_limiter
+from integrations.http_session import TokenBucket
+
+try:
+    from config.basiq_config import get_basiq_config
+except ImportError:
+    from backend.config.basiq_config import get_basiq_config
+
+try:
+    from services.user_snapshot import invalidate_user_snapshot
+except ImportError:
+    from backend.services.user_snapshot import invalidate_user_snapshot
 
 logger = logging.getLogger(__name__)
 
+
 class BasiqSyncScheduler:
     """
     Background scheduler for BASIQ transaction synchronization.
@@ -48,6 +60,20 @@ class BasiqSyncScheduler:
             'errors': []
         }
         
+        # Concurrent sync state. The rate limiter is the BASIQ client's own
+        # bucket, so it paces each HTTP request rather than each user.
+        config = self.config.get_config()
+        self.rate_limiter: TokenBucket = basiq_rate_limiter
+        self.rate_limiter.configure(
+            config.get('sync_rate_limit_per_second', 2.0),
+            config.get('sync_rate_limit_burst', 4)
+        )
+        self.progress_lock = Lock()
+        self.progress = self._new_progress()
+        self.cycle_id = 0
+        # user_id -> (cycle_id, future), kept across cycles until the sync finishes
+        self.active_syncs: Dict[str, tuple] = {}
+        
         # Initialize Firestore if available
         try:
             self.db = firestore.client()
@@ -161,34 +187,7 @@ class BasiqSyncScheduler:
                 'errors': []
             }
             
-            # Sync each user
-            for user_id, basiq_user_id in users_to_sync:
-                try:
-                    user_result = self._sync_user(user_id, basiq_user_id)
-                    sync_results['users_processed'] += 1
-                    
-                    if user_result['success']:
-                        sync_results['users_successful'] += 1
-                        sync_results['total_transactions'] += user_result.get('transactions_count', 0)
-                        sync_results['total_accounts'] += user_result.get('accounts_count', 0)
-                    else:
-                        sync_results['users_failed'] += 1
-                        sync_results['errors'].append({
-                            'user_id': user_id,
-                            'error': user_result.get('error', 'Unknown error')
-                        })
-                
-                except Exception as e:
-                    logger.error(f"❌ Failed to sync user {user_id}: {str(e)}")
-                    sync_results['users_failed'] += 1
-                    sync_results['errors'].append({
-                        'user_id': user_id,
-                        'error': str(e)
-                    })
-                
-                # Small delay between users to avoid rate limiting
-                if not self.stop_event.is_set():
-                    time.sleep(1)
+            self._run_sync_cycle(users_to_sync, sync_results)
             
             # Update statistics
             if sync_results['users_failed'] == 0:
@@ -221,6 +220,149 @@ class BasiqSyncScheduler:
                 'type': 'sync_error'
             })
     
+    @staticmethod
+    def _new_progress() -> Dict[str, Any]:
+        return {
+            'cycle_running': False,
+            'total': 0,
+            'queued': 0,
+            'in_flight': 0,
+            'completed': 0,
+            'timed_out': 0,
+            'skipped_in_flight': 0
+        }
+    
+    def _release_user(self, user_id: str, future: Future):
+        """Forget a user's sync once its worker has actually finished."""
+        with self.progress_lock:
+            active = self.active_syncs.get(user_id)
+            if active is not None and active[1] is future:
+                del self.active_syncs[user_id]
+    
+    def _run_sync_cycle(self, users_to_sync: List[tuple], sync_results: Dict):
+        """
+        Sync users on a bounded worker pool.
+        
+        Each BASIQ request is paced by the client's shared token bucket, each
+        user is given ``sync_user_timeout_seconds`` once it starts running, and
+        results are aggregated into ``sync_results`` under a lock as workers
+        finish.
+        
+        Timed-out workers cannot be interrupted, so they are tracked until they
+        return: their users are skipped by later cycles, and they only update
+        the progress counters of the cycle that started them.
+        
+        Args:
+            users_to_sync: List of (user_id, basiq_user_id) tuples
+            sync_results: Counters to aggregate into
+        """
+        config = self.config.get_config()
+        workers = max(config.get('sync_workers', 4), 1)
+        user_timeout = config.get('sync_user_timeout_seconds', 300)
+        self.rate_limiter.configure(
+            config.get('sync_rate_limit_per_second', 2.0),
+            config.get('sync_rate_limit_burst', 4)
+        )
+        
+        results_lock = Lock()
+        started_at: Dict[str, float] = {}
+        finished: set = set()
+        progress = self._new_progress()
+        progress.update({'cycle_running': True, 'total': len(users_to_sync)})
+        
+        with self.progress_lock:
+            self.cycle_id += 1
+            cycle_id = self.cycle_id
+            self.progress = progress
+        
+        def record(user_id: str, user_result: Dict):
+            with results_lock:
+                if user_id in finished:
+                    # Already counted as timed out
+                    return
+                finished.add(user_id)
+                sync_results['users_processed'] += 1
+                if user_result.get('success'):
+                    sync_results['users_successful'] += 1
+                    sync_results['total_transactions'] += user_result.get('transactions_count', 0)
+                    sync_results['total_accounts'] += user_result.get('accounts_count', 0)
+                else:
+                    sync_results['users_failed'] += 1
+                    sync_results['errors'].append({
+                        'user_id': user_id,
+                        'error': user_result.get('error', 'Unknown error')
+                    })
+                
+                with self.progress_lock:
+                    progress['completed'] += 1
+        
+        def run_user(user_id: str, basiq_user_id: str):
+            with self.progress_lock:
+                progress['queued'] -= 1
+                progress['in_flight'] += 1
+            with results_lock:
+                started_at[user_id] = time.monotonic()
+            
+            try:
+                user_result = self._sync_user(user_id, basiq_user_id)
+            except Exception as e:
+                logger.error(f"❌ Failed to sync user {user_id}: {str(e)}")
+                user_result = {'success': False, 'error': str(e)}
+            finally:
+                with self.progress_lock:
+                    progress['in_flight'] -= 1
+            
+            record(user_id, user_result)
+        
+        def reap_timeouts(pending: Dict[Future, str]):
+            now = time.monotonic()
+            for future, user_id in list(pending.items()):
+                if future.done():
+                    del pending[future]
+                    continue
+                with results_lock:
+                    start = started_at.get(user_id)
+                if start is not None and now - start > user_timeout:
+                    logger.error(f"❌ Sync for user {user_id} timed out after {user_timeout}s")
+                    record(user_id, {'success': False, 'error': f'Sync timed out after {user_timeout}s'})
+                    with self.progress_lock:
+                        progress['timed_out'] += 1
+                    del pending[future]
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='basiq-sync')
+        pending: Dict[Future, str] = {}
+        
+        try:
+            for user_id, basiq_user_id in users_to_sync:
+                if self.stop_event.is_set():
+                    break
+                
+                with self.progress_lock:
+                    active = self.active_syncs.get(user_id)
+                    if active is not None and not active[1].done():
+                        # A timed-out worker from an earlier cycle is still syncing this user
+                        progress['skipped_in_flight'] += 1
+                        logger.warning(f"⚠️ Skipping user {user_id}: previous sync still running")
+                        continue
+                    progress['queued'] += 1
+                    future = executor.submit(run_user, user_id, basiq_user_id)
+                    self.active_syncs[user_id] = (cycle_id, future)
+                
+                future.add_done_callback(lambda done, user_id=user_id: self._release_user(user_id, done))
+                pending[future] = user_id
+                reap_timeouts(pending)
+            
+            while pending and not self.stop_event.is_set():
+                wait(list(pending), timeout=1.0, return_when=FIRST_COMPLETED)
+                reap_timeouts(pending)
+        
+        finally:
+            # Do not block on hung or timed-out workers; cancel anything still queued
+            executor.shutdown(wait=False, cancel_futures=True)
+            with self.progress_lock:
+                progress['cycle_running'] = False
+                progress['queued'] = 0
+    
     def _get_users_with_basiq_connections(self) -> List[tuple]:
         """
         Get list of users who have BASIQ connections.
@@ -274,6 +416,9 @@ class BasiqSyncScheduler:
             # Sync accounts
             accounts = basiq_client.sync_user_accounts(basiq_user_id)
             
+            # Insights must not keep serving pre-sync transactions
+            invalidate_user_snapshot(user_id, ['transactions'])
+            
             logger.info(f"✅ Synced user {user_id}: {len(transactions)} transactions, {len(accounts)} accounts")
             
             return {
@@ -379,16 +524,37 @@ class BasiqSyncScheduler:
             'environment': self.config.environment,
             'config': {
                 'sync_interval_hours': self.config.get_config().get('sync_interval_hours', 6),
-                'transaction_days_back': self.config.get_config().get('transaction_days_back', 30)
+                'transaction_days_back': self.config.get_config().get('transaction_days_back', 30),
+                'sync_workers': self.config.get_config().get('sync_workers', 4),
+                'sync_rate_limit_per_second': self.config.get_config().get('sync_rate_limit_per_second', 2.0)
             },
             'statistics': self.stats.copy(),
+            'progress': self.get_progress(),
             'next_sync': self._get_next_sync_time(),
             'basiq_client_status': {
                 'token_cached': bool(basiq_client.access_token),
-                'environment': basiq_client.environment
+                'environment': basiq_client.environment,
+                'http': basiq_client.http.get_metrics()
             }
         }
     
+    def get_progress(self) -> Dict:
+        """
+        Get progress of the current (or most recent) sync cycle.
+        
+        Returns:
+            dict: Total, queued, in-flight, completed, timed-out and skipped user
+            counts, plus workers still running from earlier cycles
+        """
+        with self.progress_lock:
+            progress = self.progress.copy()
+            # Timed-out workers from earlier cycles that have not returned yet
+            progress['stragglers'] = sum(
+                1 for cycle_id, future in self.active_syncs.values()
+                if cycle_id != self.cycle_id and not future.done()
+            )
+            return progress
+    
     def _get_next_sync_time(self) -> Optional[str]:
         """Get the next scheduled sync time."""
         if not self.stats['last_sync']:
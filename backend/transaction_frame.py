@@ -0,0 +1,209 @@
+"""
+TAAXDOG Columnar Transaction Frame
+Compact NumPy representation of a user's transactions for the insights analyzers.
+
+The transaction dicts are scanned once: amounts are parsed, post dates are
+converted to epoch days and categories are interned into a code table.
+Monthly and per-category aggregates are then vectorized group-bys that are
+computed on first use and shared by every analyzer.
+"""
+
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+NO_DATE = np.iinfo(np.int32).min
+
+
+def _parse_amount(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _parse_amounts(values: List[Any]) -> np.ndarray:
+    """Convert amount strings to float64, 0.0 for missing or unparseable values"""
+    try:
+        amounts = np.array(values, dtype=np.float64)
+        # None converts to NaN instead of raising
+        if not np.isnan(amounts).any():
+            return amounts
+    except (TypeError, ValueError):
+        pass
+    return np.nan_to_num(np.array([_parse_amount(value) for value in values], dtype=np.float64))
+
+
+def _parse_epoch_days(date_strings: List[str]) -> np.ndarray:
+    """Convert ISO dates (or datetimes) to days since 1970-01-01, NO_DATE when missing or invalid"""
+    days = np.full(len(date_strings), NO_DATE, dtype=np.int32)
+    heads = [value[:10] if value else '' for value in date_strings]
+    try:
+        parsed = np.array([head or 'NaT' for head in heads], dtype='datetime64[D]')
+        valid = ~np.isnat(parsed)
+        days[valid] = parsed[valid].astype(np.int64)
+        return days
+    except ValueError:
+        pass
+
+    # A malformed date somewhere in the batch; parse one at a time
+    for i, head in enumerate(heads):
+        if not head:
+            continue
+        try:
+            days[i] = np.datetime64(head, 'D').astype(np.int64)
+        except ValueError:
+            continue
+    return days
+
+
+class TransactionFrame:
+    """
+    Columnar view of a list of BASIQ transaction dicts.
+
+    Columns (one entry per transaction, in input order):
+        amount: Signed amount as float64
+        abs_amount: Absolute amount
+        epoch_day: Post date as days since epoch (NO_DATE when missing)
+        month: Months since 1970-01 (NO_DATE when missing)
+        is_debit: direction == 'debit'
+        is_credit: direction == 'credit'
+        category_code: Index into ``categories``
+        mentions_cash: Description contains 'cash'
+    """
+
+    def __init__(self, amount: np.ndarray, epoch_day: np.ndarray, is_debit: np.ndarray,
+                 is_credit: np.ndarray, category_code: np.ndarray, categories: List[Optional[str]],
+                 mentions_cash: np.ndarray):
+        self.amount = amount
+        self.abs_amount = np.abs(amount)
+        self.epoch_day = epoch_day
+        self.has_date = epoch_day != NO_DATE
+        self.month = np.where(
+            self.has_date,
+            epoch_day.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64),
+            NO_DATE
+        ).astype(np.int32)
+        self.is_debit = is_debit
+        self.is_credit = is_credit
+        self.category_code = category_code
+        self.categories = categories
+        self.mentions_cash = mentions_cash
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Dict[str, Any]]) -> 'TransactionFrame':
+        """
+        Build a frame, reading each field of the transaction dicts once.
+
+        Args:
+            transactions: BASIQ transaction dicts
+
+        Returns:
+            TransactionFrame: Columnar transactions
+        """
+        if not isinstance(transactions, list):
+            transactions = list(transactions)
+
+        category_index: Dict[Optional[str], int] = {}
+        codes = [category_index.setdefault(t.get('category'), len(category_index)) for t in transactions]
+        directions = np.array([t.get('direction') for t in transactions], dtype=object)
+
+        return cls(
+            amount=_parse_amounts([t.get('amount', 0) for t in transactions]),
+            epoch_day=_parse_epoch_days([t.get('postDate') or '' for t in transactions]),
+            is_debit=directions == 'debit',
+            is_credit=directions == 'credit',
+            category_code=np.array(codes, dtype=np.int32),
+            categories=list(category_index),
+            mentions_cash=np.array(['cash' in (t.get('description') or '').lower() for t in transactions],
+                                   dtype=bool)
+        )
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @staticmethod
+    def month_label(month: int) -> str:
+        """Format a month index as YYYY-MM"""
+        return str(np.datetime64(int(month), 'M'))
+
+    def category_label(self, code: int, default: str = 'Other') -> str:
+        category = self.categories[code]
+        return default if category is None else category
+
+    def category_mask(self, names: Iterable[str]) -> np.ndarray:
+        """Boolean mask of transactions whose category is one of ``names``"""
+        wanted = set(names)
+        table = np.array([category in wanted for category in self.categories], dtype=bool)
+        return table[self.category_code] if len(self) else np.zeros(0, dtype=bool)
+
+    @cached_property
+    def blank_category(self) -> np.ndarray:
+        """Transactions with no category (missing, None or empty)"""
+        table = np.array([not category for category in self.categories], dtype=bool)
+        return table[self.category_code] if len(self) else np.zeros(0, dtype=bool)
+
+    @cached_property
+    def _labels(self):
+        """Category labels with missing categories folded into 'Other', and the code -> label map"""
+        labels: List[str] = []
+        label_index: Dict[str, int] = {}
+        code_to_label = np.zeros(len(self.categories), dtype=np.int64)
+        for code in range(len(self.categories)):
+            label = self.category_label(code)
+            if label not in label_index:
+                label_index[label] = len(labels)
+                labels.append(label)
+            code_to_label[code] = label_index[label]
+        return labels, code_to_label[self.category_code] if len(self) else np.zeros(0, dtype=np.int64)
+
+    @cached_property
+    def debit_spending_by_category_month(self) -> Dict[str, Dict[str, float]]:
+        """Dated debit spending per category (missing -> 'Other') per month, months ascending"""
+        labels, label_codes = self._labels
+        mask = self.is_debit & self.has_date
+        if not mask.any():
+            return {}
+
+        months = self.month[mask].astype(np.int64)
+        first_month = months.min()
+        span = int(months.max() - first_month) + 1
+        keys, key_index = np.unique(label_codes[mask] * span + (months - first_month), return_inverse=True)
+        sums = np.bincount(key_index, weights=self.abs_amount[mask])
+
+        result: Dict[str, Dict[str, float]] = {}
+        for key, amount in zip(keys.tolist(), sums.tolist()):
+            label, month_offset = divmod(key, span)
+            result.setdefault(labels[label], {})[self.month_label(first_month + month_offset)] = amount
+        return result
+
+    @cached_property
+    def expense_totals_by_category(self) -> Dict[str, float]:
+        """Non-credit spending per category (missing -> 'Other') over the whole frame"""
+        labels, label_codes = self._labels
+        mask = ~self.is_credit
+        sums = np.bincount(label_codes[mask], weights=self.abs_amount[mask], minlength=len(labels))
+        present = np.bincount(label_codes[mask], minlength=len(labels)) > 0
+        return {labels[i]: float(sums[i]) for i in np.flatnonzero(present)}
+
+    @cached_property
+    def total_income(self) -> float:
+        """Sum of credit amounts"""
+        return float(self.abs_amount[self.is_credit].sum())
+
+    @cached_property
+    def monthly_flows(self) -> Dict[str, Dict[str, float]]:
+        """Income (credit) and expenses (everything else) per month for dated transactions"""
+        months = self.month[self.has_date]
+        if not len(months):
+            return {}
+        unique_months, month_index = np.unique(months, return_inverse=True)
+        amounts = self.abs_amount[self.has_date]
+        credit = self.is_credit[self.has_date]
+        income = np.bincount(month_index, weights=np.where(credit, amounts, 0.0), minlength=len(unique_months))
+        expenses = np.bincount(month_index, weights=np.where(credit, 0.0, amounts), minlength=len(unique_months))
+        return {
+            self.month_label(month): {'income': float(income[i]), 'expenses': float(expenses[i])}
+            for i, month in enumerate(unique_months)
+        }
@@ -8,12 +8,20 @@ from flask import request, jsonify, g
 from firebase_admin import auth
 import logging
 import time
-import hashlib
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import redis
 import os
-import json
+
+try:
+    from middleware.rate_limiter import get_rate_limit_engine
+except ImportError:
+    from backend.middleware.rate_limiter import get_rate_limit_engine
+
+try:
+    from utils.token_cache import TokenVerificationCache
+except ImportError:
+    from backend.utils.token_cache import TokenVerificationCache
 
 # Setup logging with security event formatting
 logging.basicConfig(
@@ -31,7 +39,9 @@ class SecurityConfig:
     
     # Token validation settings
     TOKEN_MIN_LENGTH = 32
-    TOKEN_CACHE_TTL = 3600  # 1 hour
+    TOKEN_CACHE_TTL = 3600  # 1 hour, and never past the token's exp
+    TOKEN_CACHE_MAX_ENTRIES = 10000
+    TOKEN_NEGATIVE_CACHE_TTL = 30  # seconds a rejected token is remembered
     
     # Blocked patterns
     SUSPICIOUS_PATTERNS = [
@@ -49,83 +59,25 @@ except Exception as e:
     logger.warning(f"Redis unavailable, using memory cache: {e}")
     redis_client = None
 
-# In-memory cache fallback
-memory_cache = {}
-rate_limit_cache = {}
-
-def get_cache(key: str) -> Optional[str]:
-    """Get value from cache (Redis preferred, memory fallback)"""
-    if redis_client:
-        try:
-            return redis_client.get(key)
-        except Exception:
-            pass
-    return memory_cache.get(key)
+# Global token verification cache instance (bounded LRU in front of Redis)
+token_cache = TokenVerificationCache(
+    redis_client=redis_client,
+    max_entries=SecurityConfig.TOKEN_CACHE_MAX_ENTRIES,
+    max_ttl=SecurityConfig.TOKEN_CACHE_TTL,
+    negative_ttl=SecurityConfig.TOKEN_NEGATIVE_CACHE_TTL
+)
 
-def set_cache(key: str, value: Any, ttl: int = 3600):
-    """Set value in cache with TTL"""
-    if redis_client:
-        try:
-            redis_client.setex(key, ttl, str(value))
-            return
-        except Exception:
-            pass
-    
-    # Memory cache with expiration
-    memory_cache[key] = {
-        'value': value,
-        'expires': time.time() + ttl
-    }
+def get_token_cache_stats() -> Dict[str, Any]:
+    """Get token cache hit ratio and verification latency"""
+    return token_cache.get_stats()
 
 def get_client_ip() -> str:
-    """Get client IP with proxy support"""
-    # Check forwarded headers from load balancer
-    forwarded_for = request.headers.get('X-Forwarded-For')
-    if forwarded_for:
-        return forwarded_for.split(',')[0].strip()
-    
-    real_ip = request.headers.get('X-Real-IP')
-    if real_ip:
-        return real_ip
-    
+    """Get client IP (set from X-Forwarded-For by ProxyFix only behind trusted proxies)"""
     return request.remote_addr or '127.0.0.1'
 
 def check_rate_limit(identifier: str, limit: int) -> bool:
     """Check if identifier exceeds rate limit"""
-    current_time = int(time.time())
-    window_start = current_time - SecurityConfig.RATE_LIMIT_WINDOW
-    
-    # Rate limit key
-    rate_key = f"rate_limit:{identifier}:{current_time // 60}"  # Per minute buckets
-    
-    if redis_client:
-        try:
-            # Increment counter and set expiration
-            count = redis_client.incr(rate_key)
-            if count == 1:
-                redis_client.expire(rate_key, SecurityConfig.RATE_LIMIT_WINDOW)
-            
-            return count <= limit
-        except Exception:
-            pass
-    
-    # Memory fallback
-    if identifier not in rate_limit_cache:
-        rate_limit_cache[identifier] = []
-    
-    # Clean old entries
-    rate_limit_cache[identifier] = [
-        timestamp for timestamp in rate_limit_cache[identifier]
-        if timestamp > window_start
-    ]
-    
-    # Check limit
-    if len(rate_limit_cache[identifier]) >= limit:
-        return False
-    
-    # Add current request
-    rate_limit_cache[identifier].append(current_time)
-    return True
+    return get_rate_limit_engine().is_allowed(identifier, limit, SecurityConfig.RATE_LIMIT_WINDOW)
 
 def log_security_event(event_type: str, level: str, details: Dict[str, Any]):
     """Log security event with standardized format"""
@@ -152,22 +104,16 @@ def validate_firebase_token(token: str) -> Optional[Dict[str, Any]]:
     if not token or len(token) < SecurityConfig.TOKEN_MIN_LENGTH:
         return None
     
-    # Check cache first
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    cache_key = f"validated_token:{token_hash}"
-    
-    cached_result = get_cache(cache_key)
-    if cached_result:
-        try:
-            # Return cached user data if valid
-            user_data = json.loads(cached_result)
-            return user_data
-        except Exception:
-            pass
+    # Check cache first; a cached None is a token Firebase already rejected
+    found, user_data = token_cache.get(token)
+    if found:
+        return user_data
     
+    started = time.perf_counter()
     try:
         # Verify with Firebase
         decoded_token = auth.verify_id_token(token)
+        token_cache.record_verification(time.perf_counter() - started, True)
         user_id = decoded_token['uid']
         
         # Create user data object
@@ -181,8 +127,8 @@ def validate_firebase_token(token: str) -> Optional[Dict[str, Any]]:
             'exp': decoded_token.get('exp')
         }
         
-        # Cache valid token for performance
-        set_cache(cache_key, json.dumps(user_data), SecurityConfig.TOKEN_CACHE_TTL)
+        # Cache valid token until it expires
+        token_cache.put(token, user_data)
         
         log_security_event('token_validated', 'info', {
             'user_id': user_id,
@@ -192,6 +138,8 @@ def validate_firebase_token(token: str) -> Optional[Dict[str, Any]]:
         return user_data
         
     except auth.ExpiredIdTokenError as e:
+        token_cache.record_verification(time.perf_counter() - started, False)
+        token_cache.put_invalid(token, 'expired')
         log_security_event('expired_token', 'warning', {
             'error': 'Expired ID token',
             'token_length': len(token)
@@ -199,6 +147,8 @@ def validate_firebase_token(token: str) -> Optional[Dict[str, Any]]:
         return None
         
     except auth.InvalidIdTokenError as e:
+        token_cache.record_verification(time.perf_counter() - started, False)
+        token_cache.put_invalid(token, 'invalid')
         log_security_event('invalid_token', 'warning', {
             'error': 'Invalid ID token',
             'token_length': len(token)
@@ -206,6 +156,8 @@ def validate_firebase_token(token: str) -> Optional[Dict[str, Any]]:
         return None
         
     except Exception as e:
+        # Not cached: the failure may be transient (e.g. certificate fetch)
+        token_cache.record_verification(time.perf_counter() - started, False)
         log_security_event('token_validation_error', 'error', {
             'error': str(e),
             'token_length': len(token)
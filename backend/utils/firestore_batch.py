@@ -0,0 +1,223 @@
+"""
+Batched Firestore Writes for TAAXDOG
+===================================
+
+Write-batching layer for hot paths that issue many small Firestore mutations:
+- Accumulates set/update/increment mutations per document
+- Coalesces repeated writes to the same document into one
+- Commits in WriteBatch chunks of up to 500 writes
+- Applies counters as atomic server-side increments (no read-modify-write)
+
+Increments are never re-sent after a failed commit: the commit may have
+been applied server side, and replaying it would count the amount twice.
+"""
+
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from google.cloud.firestore import Increment
+except ImportError:
+    Increment = None
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+
+class BatchCommitError(Exception):
+    """Raised by flush() when increment writes may or may not have been applied"""
+
+    def __init__(self, documents: List[Tuple[str, str]], cause: Exception):
+        self.documents = documents
+        self.cause = cause
+        super().__init__(f"{len(documents)} increment writes not confirmed: {cause}")
+
+
+class FirestoreWriteBatcher:
+    """
+    Thread-safe accumulator of Firestore mutations committed in batches.
+
+    Mutations to the same document are merged before commit: a later ``set``
+    replaces earlier writes, ``update`` fields are merged, and increments on
+    the same field are summed. Pending writes are committed automatically
+    when a full batch accumulates, and on ``flush()``.
+    """
+
+    def __init__(self, db, max_batch_size: int = MAX_BATCH_WRITES, auto_flush: bool = True):
+        """
+        Initialize the batcher.
+
+        Args:
+            db: Firestore client
+            max_batch_size: Writes per commit (capped at 500)
+            auto_flush: Commit as soon as a full batch is pending
+        """
+        self.db = db
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_WRITES)
+        self.auto_flush = auto_flush
+        self.lock = Lock()
+        self._pending: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self.stats = {
+            'mutations': 0,
+            'writes': 0,
+            'commits': 0,
+            'failed_writes': 0,
+            'unconfirmed_writes': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def _entry(self, collection: str, document_id: str) -> Dict[str, Any]:
+        key = (collection, document_id)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = {'mode': 'update', 'data': {}, 'increments': {}}
+            self._pending[key] = entry
+        return entry
+
+    def set(self, collection: str, document_id: str, data: Dict[str, Any], merge: bool = False):
+        """Queue a document set (replaces any earlier queued write to the document)."""
+        with self.lock:
+            entry = self._entry(collection, document_id)
+            if merge and entry['mode'] != 'update':
+                entry['data'].update(data)
+            elif merge:
+                entry.update(mode='merge', data={**entry['data'], **data})
+            else:
+                entry.update(mode='set', data=dict(data), increments={})
+            self.stats['mutations'] += 1
+        self._maybe_flush()
+
+    def update(self, collection: str, document_id: str, data: Dict[str, Any]):
+        """Queue a field update; the document must exist at commit time."""
+        with self.lock:
+            self._entry(collection, document_id)['data'].update(data)
+            self.stats['mutations'] += 1
+        self._maybe_flush()
+
+    def increment(self, collection: str, document_id: str, field: str, amount: float,
+                  data: Optional[Dict[str, Any]] = None):
+        """
+        Queue an atomic server-side increment.
+
+        Args:
+            collection: Collection name
+            document_id: Document ID
+            field: Numeric field to increment
+            amount: Amount to add
+            data: Extra fields to update alongside the increment
+        """
+        with self.lock:
+            entry = self._entry(collection, document_id)
+            entry['increments'][field] = entry['increments'].get(field, 0) + amount
+            if data:
+                entry['data'].update(data)
+            self.stats['mutations'] += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.auto_flush and len(self._pending) >= self.max_batch_size:
+            self.flush()
+
+    def _payload(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        payload = dict(entry['data'])
+        for field, amount in entry['increments'].items():
+            if Increment is None:
+                raise RuntimeError('Firestore Increment transform not available')
+            payload[field] = Increment(amount)
+        return payload
+
+    def _apply(self, writer, collection: str, document_id: str, entry: Dict[str, Any]):
+        doc_ref = self.db.collection(collection).document(document_id)
+        payload = self._payload(entry)
+        if entry['mode'] == 'set':
+            writer.set(doc_ref, payload)
+        elif entry['mode'] == 'merge':
+            writer.set(doc_ref, payload, merge=True)
+        else:
+            writer.update(doc_ref, payload)
+
+    def flush(self) -> int:
+        """
+        Commit every pending write.
+
+        A chunk that fails to commit (e.g. an update to a deleted document) is
+        retried one write at a time so a single bad document does not drop
+        the rest of the chunk. Writes carrying increments are not retried,
+        since the failed commit may still have been applied.
+
+        Returns:
+            int: Number of documents written successfully
+
+        Raises:
+            BatchCommitError: After every chunk has been attempted, if a failed
+                commit contained increments; ``documents`` lists the
+                (collection, document_id) pairs to reconcile
+        """
+        with self.lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+
+        written = 0
+        unconfirmed: List[Tuple[str, str]] = []
+        error: Optional[Exception] = None
+        for start in range(0, len(pending), self.max_batch_size):
+            chunk = pending[start:start + self.max_batch_size]
+            try:
+                batch = self.db.batch()
+                for (collection, document_id), entry in chunk:
+                    self._apply(batch, collection, document_id, entry)
+                batch.commit()
+                written += len(chunk)
+                with self.lock:
+                    self.stats['commits'] += 1
+                    self.stats['writes'] += len(chunk)
+            except Exception as e:
+                retryable = [item for item in chunk if not item[1]['increments']]
+                ambiguous = [key for key, entry in chunk if entry['increments']]
+                logger.warning(f"⚠️ Batch commit of {len(chunk)} writes failed, retrying "
+                               f"{len(retryable)} individually: {str(e)}")
+                written += self._commit_individually(retryable)
+                if ambiguous:
+                    with self.lock:
+                        self.stats['unconfirmed_writes'] += len(ambiguous)
+                    unconfirmed.extend(ambiguous)
+                    error = e
+
+        if error is not None:
+            logger.error(f"❌ {len(unconfirmed)} increment writes may not have been applied: {str(error)}")
+            raise BatchCommitError(unconfirmed, error)
+        return written
+
+    def _commit_individually(self, chunk: List[Tuple[Tuple[str, str], Dict[str, Any]]]) -> int:
+        written = 0
+        for (collection, document_id), entry in chunk:
+            try:
+                batch = self.db.batch()
+                self._apply(batch, collection, document_id, entry)
+                batch.commit()
+                written += 1
+                with self.lock:
+                    self.stats['commits'] += 1
+                    self.stats['writes'] += 1
+            except Exception as e:
+                with self.lock:
+                    self.stats['failed_writes'] += 1
+                logger.error(f"❌ Failed to write {collection}/{document_id}: {str(e)}")
+        return written
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get mutation, write and commit counts."""
+        with self.lock:
+            return dict(self.stats, pending=len(self._pending))
@@ -0,0 +1,160 @@
+"""
+TAAXDOG Model Registry
+In-process cache for trained scikit-learn models persisted with joblib
+
+- Each model file is loaded once and served from memory afterwards
+- Files are stat'ed on every lookup; a changed mtime or size triggers a reload
+- Per-user models are evicted least recently used once the memory budget
+  (ML_MODEL_CACHE_MB) is exceeded; the global model is pinned
+- Hit rate, load time and residency counters
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from threading import Lock, RLock
+from typing import Any, Dict
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    In-process cache of trained models loaded from disk.
+
+    Models are keyed by file path and reloaded when the file's mtime or size
+    changes (e.g. after retraining). Unpinned models are evicted least
+    recently used first once the resident size exceeds the memory budget;
+    size is estimated from the serialized file size.
+    """
+
+    def __init__(self, memory_budget_mb: float = None):
+        budget_mb = memory_budget_mb if memory_budget_mb is not None else float(os.getenv('ML_MODEL_CACHE_MB', '512'))
+        self.memory_budget_bytes = int(budget_mb * 1024 * 1024)
+        self.lock = RLock()
+        self._models = OrderedDict()  # path -> {'model', 'mtime_ns', 'size_bytes', 'pinned'}
+        self._load_locks: Dict[str, Lock] = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'load_errors': 0,
+            'stale_reloads': 0,
+            'evictions': 0,
+            'total_load_time': 0.0
+        }
+
+    def get(self, model_path: str, pin: bool = False):
+        """
+        Get a model, loading it from disk only on first use or after it changed
+
+        Args:
+            model_path: Path to the joblib model file
+            pin: Exempt the model from LRU eviction (used for the global model)
+
+        Returns:
+            Loaded model, or None if the file does not exist
+        """
+        try:
+            stat = os.stat(model_path)
+        except FileNotFoundError:
+            self.invalidate(model_path)
+            return None
+
+        with self.lock:
+            entry = self._models.get(model_path)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size_bytes'] == stat.st_size:
+                self._models.move_to_end(model_path)
+                entry['pinned'] = entry['pinned'] or pin
+                self.stats['hits'] += 1
+                return entry['model']
+            self.stats['misses'] += 1
+            if entry:
+                self.stats['stale_reloads'] += 1
+            load_lock = self._load_locks.setdefault(model_path, Lock())
+
+        # One loader per path; concurrent callers wait and reuse its result
+        with load_lock:
+            with self.lock:
+                entry = self._models.get(model_path)
+                if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size_bytes'] == stat.st_size:
+                    return entry['model']
+
+            start_time = time.time()
+            try:
+                model = joblib.load(model_path)
+            except Exception as e:
+                with self.lock:
+                    self.stats['load_errors'] += 1
+                logger.error(f"Error loading model {model_path}: {str(e)}")
+                raise
+            load_time = time.time() - start_time
+
+            with self.lock:
+                self.stats['loads'] += 1
+                self.stats['total_load_time'] += load_time
+                self._models[model_path] = {
+                    'model': model,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size_bytes': stat.st_size,
+                    'pinned': pin or bool(entry and entry['pinned'])
+                }
+                self._models.move_to_end(model_path)
+                self._evict()
+
+            logger.info(f"Loaded model {model_path} in {load_time * 1000:.1f}ms")
+            return model
+
+    def _evict(self):
+        """Evict least recently used unpinned models until within budget"""
+        resident = sum(entry['size_bytes'] for entry in self._models.values())
+        for path in list(self._models):
+            if resident <= self.memory_budget_bytes:
+                break
+            entry = self._models[path]
+            if entry['pinned']:
+                continue
+            del self._models[path]
+            resident -= entry['size_bytes']
+            self.stats['evictions'] += 1
+
+    def preload(self, model_path: str, pin: bool = True) -> bool:
+        """Load a model ahead of the first prediction; returns False if missing"""
+        try:
+            return self.get(model_path, pin=pin) is not None
+        except Exception:
+            return False
+
+    def invalidate(self, model_path: str = None):
+        """Drop one cached model (e.g. after retraining), or all of them"""
+        with self.lock:
+            if model_path is None:
+                self._models.clear()
+            else:
+                self._models.pop(model_path, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, load time and residency metrics"""
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+                'avg_load_time_ms': (self.stats['total_load_time'] / self.stats['loads'] * 1000
+                                     if self.stats['loads'] else 0.0),
+                'cached_models': len(self._models),
+                'resident_bytes': sum(entry['size_bytes'] for entry in self._models.values()),
+                'memory_budget_bytes': self.memory_budget_bytes
+            }
+
+
+# Global model registry instance
+model_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the global model registry instance"""
+    return model_registry
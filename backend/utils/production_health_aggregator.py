@@ -96,6 +96,9 @@ class ProductionHealthAggregator:
             'error_rate_warning': 1,  # 1%
             'error_rate_critical': 5,  # 5%
         }
+        
+        # Per-component limit so one slow dependency cannot stall the whole check
+        self.component_timeout = float(os.getenv('HEALTH_COMPONENT_TIMEOUT', '10'))
     
     async def get_comprehensive_health(self) -> SystemHealth:
         """Get comprehensive system health status"""
@@ -144,33 +147,50 @@ class ProductionHealthAggregator:
         return health
     
     async def _check_all_components(self) -> List[ComponentHealth]:
-        """Check health of all system components"""
-        components = []
-        
-        # Check database health
-        components.append(await self._check_database_health())
-        
-        # Check cache health
-        components.append(await self._check_cache_health())
-        
-        # Check performance metrics
-        components.append(await self._check_performance_health())
-        
-        # Check security status
-        components.append(await self._check_security_health())
-        
-        # Check backup system
-        components.append(await self._check_backup_health())
+        """Check health of all system components concurrently"""
+        checks = [
+            ('database', self._check_database_health),
+            ('cache', self._check_cache_health),
+            ('performance', self._check_performance_health),
+            ('security', self._check_security_health),
+            ('backup', self._check_backup_health)
+        ]
         
         # Check transfer engine
         if self.transfer_engine:
-            components.append(await self._check_transfer_engine_health())
+            checks.append(('transfer_engine', self._check_transfer_engine_health))
         
         # Check external API dependencies
-        components.extend(await self._check_external_apis())
+        checks.append(('external_apis', self._check_external_apis))
+        
+        results = await asyncio.gather(*(self._run_component_check(name, check) for name, check in checks))
         
+        components = []
+        for result in results:
+            components.extend(result if isinstance(result, list) else [result])
         return components
     
+    async def _run_component_check(self, name: str, check) -> Any:
+        """Run one component check on a worker thread with a timeout"""
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        
+        try:
+            # The checks call blocking APIs, so each gets its own thread and event loop
+            return await asyncio.wait_for(
+                loop.run_in_executor(None, asyncio.run, check()),
+                timeout=self.component_timeout
+            )
+        except asyncio.TimeoutError:
+            return ComponentHealth(
+                name=name,
+                status=HealthStatus.UNHEALTHY,
+                response_time_ms=(time.time() - start_time) * 1000,
+                last_check=datetime.now(AUSTRALIAN_TZ),
+                details={},
+                error_message=f"Health check timed out after {self.component_timeout:g}s"
+            )
+    
     async def _check_database_health(self) -> ComponentHealth:
         """Check database component health"""
         start_time = time.time()
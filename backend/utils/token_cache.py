@@ -0,0 +1,215 @@
+"""
+TAAXDOG Token Verification Cache
+Two-tier cache for Firebase ID token verification results
+
+- L1: bounded in-process LRU; entries never outlive the token's own ``exp``
+- L2: Redis, shared across workers, under the existing ``validated_token:``
+  keys so instances running older code keep reading each other's entries
+- Negative caching: tokens Firebase rejected as invalid or expired are
+  remembered briefly under separate ``invalid_token:`` keys
+- Hit ratio and verification latency counters
+
+Firebase signing certificates are already cached by the Admin SDK (its HTTP
+session honours the certificates' Cache-Control max-age), so a miss costs a
+local signature check rather than a network round trip.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', '10000'))
+DEFAULT_MAX_TTL = int(os.getenv('TOKEN_CACHE_TTL', '3600'))
+DEFAULT_NEGATIVE_TTL = int(os.getenv('TOKEN_NEGATIVE_CACHE_TTL', '30'))
+
+VALID_KEY_PREFIX = 'validated_token:'
+INVALID_KEY_PREFIX = 'invalid_token:'
+
+
+def token_hash(token: str) -> str:
+    """SHA-256 of the raw token; tokens themselves are never stored"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenVerificationCache:
+    """
+    Caches verified token claims (positive) and rejections (negative).
+
+    ``get`` returns ``(found, user_data)``; a found entry with ``None``
+    user_data is a token known to be invalid.
+    """
+
+    def __init__(self, redis_client=None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_ttl: int = DEFAULT_MAX_TTL, negative_ttl: int = DEFAULT_NEGATIVE_TTL,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            redis_client: Redis client for the shared tier (None for in-process only)
+            max_entries: Maximum L1 entries before least recently used are evicted
+            max_ttl: Upper bound on how long verified claims are cached, in seconds
+            negative_ttl: How long rejected tokens are remembered, in seconds (0 disables)
+            clock: Wall-clock time source, comparable with the token's ``exp``
+        """
+        self.redis_client = redis_client
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'negative_hits': 0, 'misses': 0,
+                      'evictions': 0, 'l2_errors': 0, 'verifications': 0,
+                      'verification_failures': 0, 'verification_ms': 0.0}
+
+    def _ttl_for(self, user_data: Dict[str, Any]) -> int:
+        """Seconds the claims stay cacheable: until ``exp``, capped at max_ttl"""
+        ttl = self.max_ttl
+        exp = user_data.get('exp')
+        if exp is not None:
+            try:
+                ttl = min(ttl, int(float(exp) - self.clock()))
+            except (TypeError, ValueError):
+                pass
+        return ttl
+
+    def _remember(self, key: str, ttl: float, user_data: Optional[Dict[str, Any]]):
+        with self.lock:
+            self.entries[key] = (self.clock() + ttl, user_data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _l1_get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, user_data = entry
+            if expires_at <= self.clock():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, user_data
+
+    def _l2_get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        if not self.redis_client:
+            return False, None
+        try:
+            valid, invalid = self.redis_client.mget([VALID_KEY_PREFIX + key, INVALID_KEY_PREFIX + key])
+        except Exception as e:
+            self.stats['l2_errors'] += 1
+            logger.debug(f"Token cache Redis read failed: {e}")
+            return False, None
+
+        if valid:
+            try:
+                user_data = json.loads(valid)
+            except ValueError:
+                return False, None
+            ttl = self._ttl_for(user_data)
+            if ttl <= 0:
+                return False, None
+            self._remember(key, ttl, user_data)
+            return True, user_data
+        if invalid and self.negative_ttl > 0:
+            self._remember(key, self.negative_ttl, None)
+            return True, None
+        return False, None
+
+    def _l2_set(self, redis_key: str, ttl: int, value: str):
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.setex(redis_key, ttl, value)
+        except Exception as e:
+            self.stats['l2_errors'] += 1
+            logger.debug(f"Token cache Redis write failed: {e}")
+
+    def get(self, token: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Look up a token in L1, then Redis.
+
+        Args:
+            token: Raw Firebase ID token
+
+        Returns:
+            Tuple[bool, Optional[Dict]]: (found, user_data); user_data is None
+            for a token cached as invalid
+        """
+        key = token_hash(token)
+        found, user_data = self._l1_get(key)
+        if found:
+            self.stats['l1_hits'] += 1
+        else:
+            found, user_data = self._l2_get(key)
+            self.stats['l2_hits' if found else 'misses'] += 1
+
+        if not found:
+            return False, None
+        if user_data is None:
+            self.stats['negative_hits'] += 1
+            return True, None
+        return True, dict(user_data)
+
+    def put(self, token: str, user_data: Dict[str, Any]):
+        """Cache verified claims until the token expires (at most max_ttl)"""
+        ttl = self._ttl_for(user_data)
+        if ttl <= 0:
+            return
+        key = token_hash(token)
+        self._remember(key, ttl, dict(user_data))
+        self._l2_set(VALID_KEY_PREFIX + key, ttl, json.dumps(user_data))
+
+    def put_invalid(self, token: str, reason: str):
+        """Remember a rejected token for negative_ttl seconds"""
+        if self.negative_ttl <= 0:
+            return
+        key = token_hash(token)
+        self._remember(key, self.negative_ttl, None)
+        self._l2_set(INVALID_KEY_PREFIX + key, self.negative_ttl, json.dumps({'reason': reason}))
+
+    def record_verification(self, elapsed_seconds: float, verified: bool):
+        """Record the latency of an upstream (Firebase SDK) verification"""
+        with self.lock:
+            self.stats['verifications'] += 1
+            self.stats['verification_ms'] += elapsed_seconds * 1000
+            if not verified:
+                self.stats['verification_failures'] += 1
+
+    def invalidate(self, token: str):
+        """Drop a token from both tiers (e.g. after sign-out)"""
+        key = token_hash(token)
+        with self.lock:
+            self.entries.pop(key, None)
+        if self.redis_client:
+            try:
+                self.redis_client.delete(VALID_KEY_PREFIX + key, INVALID_KEY_PREFIX + key)
+            except Exception as e:
+                self.stats['l2_errors'] += 1
+                logger.debug(f"Token cache Redis delete failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit ratio, verification latency and cache counters"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['cached_entries'] = len(self.entries)
+
+        hits = stats['l1_hits'] + stats['l2_hits']
+        lookups = hits + stats['misses']
+        stats['hit_ratio'] = round(hits / lookups, 4) if lookups else 0.0
+        stats['avg_verification_ms'] = (
+            round(stats['verification_ms'] / stats['verifications'], 3) if stats['verifications'] else 0.0
+        )
+        stats['verification_ms'] = round(stats['verification_ms'], 3)
+        return stats
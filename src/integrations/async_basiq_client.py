@@ -0,0 +1,469 @@
+"""
+Async BASIQ API Client
+
+Asyncio counterpart of BasiqClient for fan-out workloads running inside
+``async def`` code paths (insights, savings advisor, notifications):
+- Same surface as BasiqClient: token management, users, accounts,
+  transactions, connections and subaccount methods
+- aiohttp connection pooling with connect/read timeouts
+- Bounded request concurrency via a semaphore
+- Retry with jitter on 429/5xx for idempotent requests
+- Helpers to fetch many accounts' transactions concurrently
+- The OAuth token is shared with the synchronous client, so short-lived
+  instances (one per request and event loop) do not fetch new tokens
+
+Use an instance as ``async with AsyncBasiqClient() as basiq:`` inside the
+coroutine that owns the event loop, so its session is closed with the loop.
+"""
+
+import asyncio
+import base64
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .basiq_client import BasiqClient, basiq_client as shared_basiq_client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class AsyncBasiqClient:
+    """
+    Async BASIQ API client with pooled connections and bounded concurrency.
+
+    The aiohttp session is bound to the event loop it is first used on and is
+    closed on exit from ``async with``; the access token lives on the shared
+    synchronous client and is reused across instances and event loops.
+    """
+
+    def __init__(self, max_connections: Optional[int] = None,
+                 max_concurrency: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 retry_delay: Optional[float] = None,
+                 config: Optional[BasiqClient] = None):
+        """
+        Initialize the async client. Unset options fall back to the BASIQ_*
+        environment variables used by the synchronous client.
+
+        Args:
+            config: Synchronous client providing environment, key, URL and the
+                shared access token (defaults to the global basiq_client)
+        """
+        self.max_connections = max_connections or int(os.getenv('BASIQ_MAX_CONNECTIONS', '10'))
+        self.max_concurrency = max_concurrency or int(os.getenv('BASIQ_ASYNC_MAX_CONCURRENCY', str(self.max_connections)))
+        self.connect_timeout = connect_timeout or float(os.getenv('BASIQ_CONNECT_TIMEOUT', '5'))
+        self.read_timeout = read_timeout or float(os.getenv('BASIQ_TIMEOUT', '30'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('BASIQ_RETRY_ATTEMPTS', '3'))
+        self.retry_delay = retry_delay or float(os.getenv('BASIQ_RETRY_DELAY', '1.0'))
+
+        # Environment, key, URL and the access token are shared with the sync client
+        self._config = config if config is not None else shared_basiq_client
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def api_key(self):
+        return self._config.api_key
+
+    @property
+    def base_url(self):
+        return self._config.base_url
+
+    @property
+    def environment(self):
+        return self._config.environment
+
+    def _valid_token(self) -> Optional[str]:
+        """The shared access token, if it has not expired"""
+        token, expires = self._config.access_token, self._config.token_expires
+        if token and expires and datetime.now() < expires:
+            return token
+        return None
+
+    # Session Management
+
+    async def _get_pool(self) -> Tuple[aiohttp.ClientSession, asyncio.Semaphore, asyncio.Lock]:
+        """
+        Get the pooled session with its concurrency semaphore and token lock,
+        creating all three together on first use or after close().
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._token_lock = asyncio.Lock()
+        assert self._semaphore is not None and self._token_lock is not None
+        return self._session, self._semaphore, self._token_lock
+
+    async def close(self):
+        """Close pooled connections."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        await self._get_pool()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _request(self, method: str, url: str, retry_non_idempotent: bool = False,
+                       **kwargs) -> Any:
+        """
+        Send a request with bounded concurrency and retry with jitter.
+
+        Returns:
+            Parsed JSON body (or None for empty responses)
+
+        Raises:
+            aiohttp.ClientError: On connection failure or a non-2xx final response
+        """
+        session, semaphore, _ = await self._get_pool()
+        method = method.upper()
+        can_retry_errors = retry_non_idempotent or method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with semaphore:
+                    async with session.request(method, url, **kwargs) as response:
+                        retryable = response.status in RETRY_STATUS_CODES and (
+                            response.status == 429 or can_retry_errors
+                        )
+                        if not retryable or attempt >= self.max_retries:
+                            response.raise_for_status()
+                            if response.status == 204:
+                                return None
+                            return await response.json(content_type=None)
+                        retry_after = response.headers.get('Retry-After')
+                        logger.warning(f"⚠️ BASIQ {method} {url} returned {response.status}, retrying")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not can_retry_errors or attempt >= self.max_retries:
+                    raise
+                logger.warning(f"⚠️ BASIQ {method} {url} failed ({type(e).__name__}), retrying")
+
+            if retry_after and retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                delay = random.uniform(0, self.retry_delay * (2 ** attempt))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    # Token Management
+
+    async def get_access_token(self) -> Optional[str]:
+        """
+        Get a valid access token, refreshing if necessary.
+
+        The token is read from and stored on the shared synchronous client;
+        concurrent callers on this client share a single refresh.
+
+        Returns:
+            str: Access token or None if failed
+        """
+        token = self._valid_token()
+        if token:
+            return token
+
+        _, _, token_lock = await self._get_pool()
+        async with token_lock:
+            # Another coroutine may have refreshed while we waited
+            token = self._valid_token()
+            if token:
+                return token
+
+            if not self.api_key:
+                logger.error("❌ BASIQ API key not configured")
+                return None
+
+            encoded_key = base64.b64encode(self.api_key.encode()).decode()
+            headers = {
+                'Authorization': f'Basic {encoded_key}',
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'basiq-version': '3.0'
+            }
+            data = {
+                'scope': 'SERVER_ACCESS',
+                'grant_type': 'client_credentials'
+            }
+
+            try:
+                token_data = await self._request(
+                    'POST', f"{self.base_url}/token", headers=headers, data=data,
+                    retry_non_idempotent=True
+                )
+                access_token = token_data['access_token']
+
+                # Set expiration with 5-minute buffer
+                expires_in = token_data.get('expires_in', 3600)
+                self._config.token_expires = datetime.now() + timedelta(seconds=expires_in - 300)
+                self._config.access_token = access_token
+
+                logger.info(f"✅ BASIQ async token acquired for {self.environment} environment")
+                return access_token
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError) as e:
+                logger.error(f"❌ Failed to get BASIQ access token: {str(e)}")
+                return None
+
+    async def _get_headers(self, include_auth: bool = True) -> Dict[str, str]:
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'basiq-version': '3.0'
+        }
+        if include_auth:
+            token = await self.get_access_token()
+            if token:
+                headers['Authorization'] = f'Bearer {token}'
+        return headers
+
+    async def _call(self, method: str, path: str, result_key: str, error_context: str,
+                    **kwargs) -> Dict:
+        """Issue a request and wrap it in the {'success': ...} shape used by BasiqClient."""
+        try:
+            body = await self._request(
+                method, f"{self.base_url}{path}", headers=await self._get_headers(), **kwargs
+            )
+            return {'success': True, result_key: body}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"❌ Failed to {error_context}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    # User Management Methods
+
+    async def create_basiq_user(self, user_data: Dict) -> Dict:
+        clean_data = {k: v for k, v in user_data.items() if v is not None}
+        return await self._call('POST', '/users', 'user', 'create BASIQ user', json=clean_data)
+
+    async def get_user(self, user_id: str) -> Dict:
+        return await self._call('GET', f'/users/{user_id}', 'user', f'get BASIQ user {user_id}')
+
+    # Institution and Connection Methods
+
+    async def get_supported_institutions(self) -> List[Dict]:
+        result = await self._call('GET', '/institutions', 'institutions', 'get institutions')
+        if not result['success']:
+            return []
+        return [
+            inst for inst in (result['institutions'] or {}).get('data', [])
+            if inst.get('country') == 'AU'
+        ]
+
+    async def create_user_connection(self, user_id: str, institution_id: str) -> Dict:
+        data = {
+            'loginId': institution_id,
+            'password': 'password'  # This will be handled by BASIQ's secure flow
+        }
+        return await self._call('POST', f'/users/{user_id}/connections', 'connection',
+                                'create connection', json=data)
+
+    async def get_user_connections(self, user_id: str) -> Dict:
+        return await self._call('GET', f'/users/{user_id}/connections', 'connections',
+                                f'get connections for user {user_id}')
+
+    async def refresh_connection(self, user_id: str, connection_id: str) -> Dict:
+        return await self._call('POST', f'/users/{user_id}/connections/{connection_id}/refresh',
+                                'job', f'refresh connection {connection_id}')
+
+    async def delete_connection(self, user_id: str, connection_id: str) -> Dict:
+        result = await self._call('DELETE', f'/users/{user_id}/connections/{connection_id}',
+                                  'response', f'delete connection {connection_id}')
+        if result['success']:
+            return {'success': True, 'message': 'Connection deleted successfully'}
+        return result
+
+    # Account Management Methods
+
+    async def get_user_accounts(self, user_id: str) -> Dict:
+        return await self._call('GET', f'/users/{user_id}/accounts', 'accounts',
+                                f'get accounts for user {user_id}')
+
+    # Transaction Methods
+
+    async def get_account_transactions(self, user_id: str, account_id: str,
+                                       from_date: Optional[str] = None,
+                                       to_date: Optional[str] = None) -> Dict:
+        """Get the first page of transactions for a specific account."""
+        params = self._date_params(from_date, to_date)
+        return await self._call('GET', f'/users/{user_id}/accounts/{account_id}/transactions',
+                                'transactions', f'get transactions for account {account_id}',
+                                params=params)
+
+    async def get_user_transactions(self, user_id: str, filter_str: Optional[str] = None) -> Dict:
+        """Get the first page of transactions for a user."""
+        params = {'filter': filter_str} if filter_str else {}
+        return await self._call('GET', f'/users/{user_id}/transactions', 'transactions',
+                                f'get transactions for user {user_id}', params=params)
+
+    @staticmethod
+    def _date_params(from_date: Optional[str], to_date: Optional[str]) -> Dict[str, str]:
+        params = {}
+        if from_date:
+            params['filter.transaction.postDate.from'] = from_date
+        if to_date:
+            params['filter.transaction.postDate.to'] = to_date
+        return params
+
+    async def _iter_pages(self, url: Optional[str], params: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """Lazily yield items from a paginated endpoint, following links.next."""
+        while url:
+            page = await self._request('GET', url, headers=await self._get_headers(), params=params) or {}
+            for item in page.get('data', []):
+                yield item
+
+            next_url = (page.get('links') or {}).get('next')
+            if next_url and next_url.startswith('/'):
+                next_url = f"{self.base_url}{next_url}"
+            url = next_url if next_url != url else None
+            params = None
+
+    def iter_account_transactions(self, user_id: str, account_id: str,
+                                  from_date: Optional[str] = None,
+                                  to_date: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Stream all transactions for an account across every page."""
+        url = f"{self.base_url}/users/{user_id}/accounts/{account_id}/transactions"
+        return self._iter_pages(url, self._date_params(from_date, to_date))
+
+    def iter_user_transactions(self, user_id: str, filter_str: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Stream all transactions for a user across every page."""
+        url = f"{self.base_url}/users/{user_id}/transactions"
+        return self._iter_pages(url, {'filter': filter_str} if filter_str else None)
+
+    async def fetch_accounts_transactions(self, user_id: str, account_ids: List[str],
+                                          from_date: Optional[str] = None,
+                                          to_date: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch every page of transactions for several accounts concurrently.
+
+        Concurrency is bounded by the client's semaphore. Accounts that fail are
+        logged and returned with an empty list.
+
+        Returns:
+            dict: account_id -> list of raw BASIQ transactions
+        """
+        async def collect(account_id: str) -> List[Dict]:
+            try:
+                return [t async for t in self.iter_account_transactions(user_id, account_id, from_date, to_date)]
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"❌ Failed to get transactions for account {account_id}: {str(e)}")
+                return []
+
+        results = await asyncio.gather(*(collect(account_id) for account_id in account_ids))
+        return dict(zip(account_ids, results))
+
+    async def fetch_user_transactions(self, user_id: str, from_date: Optional[str] = None,
+                                      to_date: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch a user's transactions by listing accounts and fanning out per account.
+
+        Returns:
+            list: Raw BASIQ transactions across all accounts, newest first
+        """
+        accounts_result = await self.get_user_accounts(user_id)
+        if not accounts_result['success']:
+            return []
+
+        account_ids = [account['id'] for account in (accounts_result['accounts'] or {}).get('data', [])]
+        by_account = await self.fetch_accounts_transactions(user_id, account_ids, from_date, to_date)
+
+        transactions = [t for account_transactions in by_account.values() for t in account_transactions]
+        transactions.sort(key=lambda t: t.get('postDate') or '', reverse=True)
+        return transactions
+
+    # Subaccount Methods
+
+    async def check_subaccount_support(self, institution_id: str) -> Dict:
+        try:
+            institutions = await self.get_supported_institutions()
+            institution = next((inst for inst in institutions if inst['id'] == institution_id), None)
+
+            if not institution:
+                return {
+                    'supported': False,
+                    'features': [],
+                    'error': 'Institution not found'
+                }
+
+            # Currently, all institutions are treated as virtual subaccount only
+            return {
+                'supported': False,
+                'features': [],
+                'institution_name': institution.get('name', 'Unknown'),
+                'virtual_subaccount_available': True,
+                'real_subaccount_available': False,
+                'reason': 'Bank API subaccount creation not yet supported by Australian banks'
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Error checking subaccount support for {institution_id}: {str(e)}")
+            return {
+                'supported': False,
+                'features': [],
+                'error': str(e)
+            }
+
+    async def create_subaccount(self, user_id: str, account_id: str, subaccount_data: Dict) -> Dict:
+        logger.info(f"🏦 Virtual subaccount creation requested for account {account_id}")
+        return {
+            'success': False,
+            'is_virtual': True,
+            'reason': 'Bank subaccount creation not supported. Using virtual subaccount tracking.',
+            'virtual_subaccount_id': None,
+            'bank_subaccount_id': None,
+            'institution_support': await self.check_subaccount_support(account_id)
+        }
+
+    # The remaining subaccount methods are local placeholders with no I/O,
+    # so they share the synchronous implementation
+
+    async def get_subaccount_balance(self, user_id: str, subaccount_id: str) -> Dict:
+        return self._config.get_subaccount_balance(user_id, subaccount_id)
+
+    async def sync_subaccount_transactions(self, user_id: str, subaccount_id: str) -> Dict:
+        return self._config.sync_subaccount_transactions(user_id, subaccount_id)
+
+    async def transfer_to_subaccount(self, user_id: str, from_account_id: str,
+                                     to_subaccount_id: str, amount: float,
+                                     description: str = None) -> Dict:
+        return self._config.transfer_to_subaccount(
+            user_id, from_account_id, to_subaccount_id, amount, description
+        )
+
+    async def close_subaccount(self, user_id: str, subaccount_id: str, reason: str = None) -> Dict:
+        return self._config.close_subaccount(user_id, subaccount_id, reason)
+
+    async def get_institution_subaccount_features(self, institution_id: str) -> Dict:
+        support_info = await self.check_subaccount_support(institution_id)
+        return {
+            'institution_id': institution_id,
+            'institution_name': support_info.get('institution_name', 'Unknown'),
+            'supported_features': {
+                'real_time_balance': False,
+                'automatic_transfers': False,
+                'interest_calculation': False,
+                'transaction_categorization': False,
+                'spending_limits': False,
+                'notifications': False,
+                'virtual_subaccounts': True  # Always available through TAAXDOG
+            },
+            'real_subaccount_supported': support_info.get('real_subaccount_available', False),
+            'virtual_subaccount_supported': support_info.get('virtual_subaccount_available', True),
+            'notes': 'Virtual subaccounts are fully supported through TAAXDOG platform'
+        }
+
@@ -4,7 +4,7 @@ import json
 import os
 from datetime import datetime, timedelta
 from flask import current_app
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterator
 import logging
 try:
     from fuzzywuzzy import fuzz
@@ -16,9 +16,42 @@ except ImportError:
     fuzz = MockFuzz()
 import re
 
+from .basiq_sync_store import BasiqSyncStore
+from .http_session import PooledHTTPSession, TokenBucket, get_http_session
+from .transaction_matching import get_match_index_registry, match_transaction
+
+try:
+    from firebase_config import db
+except ImportError:
+    try:
+        from backend.firebase_config import db
+    except ImportError:
+        db = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+# BASIQ limits requests per API key, so every request in this process draws from one bucket
+basiq_rate_limiter = TokenBucket(
+    float(os.getenv('BASIQ_SYNC_RATE_LIMIT_PER_SECOND', '2.0')),
+    int(os.getenv('BASIQ_SYNC_RATE_LIMIT_BURST', '4'))
+)
+
+
+def get_basiq_http_session() -> PooledHTTPSession:
+    """Get the shared pooled HTTP session used for all BASIQ calls in this process."""
+    return get_http_session(
+        'basiq',
+        pool_size=int(os.getenv('BASIQ_MAX_CONNECTIONS', '10')),
+        connect_timeout=float(os.getenv('BASIQ_CONNECT_TIMEOUT', '5')),
+        read_timeout=float(os.getenv('BASIQ_TIMEOUT', '30')),
+        max_retries=int(os.getenv('BASIQ_RETRY_ATTEMPTS', '3')),
+        backoff_base=float(os.getenv('BASIQ_RETRY_DELAY', '1.0')),
+        rate_limiter=basiq_rate_limiter
+    )
+
+
 class BasiqClient:
     """
     Comprehensive BASIQ API client with environment switching capabilities.
@@ -36,6 +69,7 @@ class BasiqClient:
         self.access_token = None
         self.token_expires = None
         self.app = app
+        self.sync_store = BasiqSyncStore()
         
         if app:
             self.init_app(app)
@@ -89,6 +123,11 @@ class BasiqClient:
             return os.getenv('BASIQ_BASE_URL_PROD', 'https://au-api.basiq.io')
         return os.getenv('BASIQ_BASE_URL_DEV', 'https://au-api.basiq.io')
     
+    @property
+    def http(self) -> PooledHTTPSession:
+        """Pooled HTTP session with keep-alive, timeouts and retries."""
+        return get_basiq_http_session()
+    
     @property
     def environment(self):
         """Get the current environment."""
@@ -129,7 +168,7 @@ class BasiqClient:
         }
         
         try:
-            response = requests.post(url, headers=headers, data=data)
+            response = self.http.post(url, headers=headers, data=data, retry_non_idempotent=True)
             response.raise_for_status()
             
             token_data = response.json()
@@ -171,6 +210,39 @@ class BasiqClient:
         
         return headers
     
+    def _iter_pages(self, url: str, params: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Lazily yield items from a paginated BASIQ list endpoint.
+        
+        Follows ``links.next`` until it is absent, requesting one page at a time
+        so callers can stream arbitrarily long histories in constant memory.
+        
+        Args:
+            url: First page URL
+            params: Query parameters for the first page (later pages carry
+                them in the ``links.next`` URL)
+            
+        Yields:
+            dict: Items from each page's ``data`` array
+            
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+        """
+        while url:
+            # Re-read headers per page so a token refresh mid-stream is picked up
+            response = self.http.get(url, headers=self._get_headers(), params=params)
+            response.raise_for_status()
+            page = response.json()
+            
+            for item in page.get('data', []):
+                yield item
+            
+            next_url = (page.get('links') or {}).get('next')
+            if next_url and next_url.startswith('/'):
+                next_url = f"{self.base_url}{next_url}"
+            url = next_url if next_url != url else None
+            params = None
+    
     # User Management Methods
     
     def create_basiq_user(self, user_data: Dict) -> Dict:
@@ -190,7 +262,7 @@ class BasiqClient:
         clean_data = {k: v for k, v in user_data.items() if v is not None}
         
         try:
-            response = requests.post(url, headers=headers, json=clean_data)
+            response = self.http.post(url, headers=headers, json=clean_data)
             response.raise_for_status()
             
             user = response.json()
@@ -230,7 +302,7 @@ class BasiqClient:
         headers = self._get_headers()
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             response.raise_for_status()
             
             return {
@@ -258,7 +330,7 @@ class BasiqClient:
         headers = self._get_headers()
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             response.raise_for_status()
             
             institutions = response.json()
@@ -296,7 +368,7 @@ class BasiqClient:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.http.post(url, headers=headers, json=data)
             response.raise_for_status()
             
             connection = response.json()
@@ -361,7 +433,7 @@ class BasiqClient:
         headers = self._get_headers()
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             response.raise_for_status()
             
             connections = response.json()
@@ -395,7 +467,7 @@ class BasiqClient:
         headers = self._get_headers()
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             response.raise_for_status()
             
             accounts = response.json()
@@ -462,7 +534,9 @@ class BasiqClient:
                                from_date: Optional[str] = None, 
                                to_date: Optional[str] = None) -> Dict:
         """
-        Get transactions for a specific account.
+        Get the first page of transactions for a specific account.
+        
+        Use iter_account_transactions to stream every page.
         
         Args:
             user_id: BASIQ user ID
@@ -483,7 +557,7 @@ class BasiqClient:
             params['filter.transaction.postDate.to'] = to_date
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, headers=headers, params=params)
             response.raise_for_status()
             
             transactions = response.json()
@@ -499,9 +573,39 @@ class BasiqClient:
                 'error': str(e)
             }
     
+    def iter_account_transactions(self, user_id: str, account_id: str,
+                                  from_date: Optional[str] = None,
+                                  to_date: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream all transactions for a specific account across every page.
+        
+        Args:
+            user_id: BASIQ user ID
+            account_id: Account ID
+            from_date: Start date (YYYY-MM-DD format)
+            to_date: End date (YYYY-MM-DD format)
+            
+        Yields:
+            dict: Raw BASIQ transactions
+            
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+        """
+        url = f"{self.base_url}/users/{user_id}/accounts/{account_id}/transactions"
+        
+        params = {}
+        if from_date:
+            params['filter.transaction.postDate.from'] = from_date
+        if to_date:
+            params['filter.transaction.postDate.to'] = to_date
+        
+        return self._iter_pages(url, params)
+    
     def get_user_transactions(self, user_id: str, filter_str: Optional[str] = None) -> Dict:
         """
-        Get all transactions for a user.
+        Get the first page of transactions for a user.
+        
+        Use iter_user_transactions to stream every page.
         
         Args:
             user_id: BASIQ user ID
@@ -518,7 +622,7 @@ class BasiqClient:
             params['filter'] = filter_str
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, headers=headers, params=params)
             response.raise_for_status()
             
             transactions = response.json()
@@ -534,18 +638,47 @@ class BasiqClient:
                 'error': str(e)
             }
     
-    def import_transactions(self, user_id: str, days_back: int = 30) -> List[Dict]:
+    def iter_user_transactions(self, user_id: str, filter_str: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream all transactions for a user across every page.
+        
+        Args:
+            user_id: BASIQ user ID
+            filter_str: Optional filter string
+            
+        Yields:
+            dict: Raw BASIQ transactions
+            
+        Raises:
+            requests.exceptions.RequestException: If a page request fails
+        """
+        url = f"{self.base_url}/users/{user_id}/transactions"
+        
+        params = {}
+        if filter_str:
+            params['filter'] = filter_str
+        
+        return self._iter_pages(url, params)
+    
+    def import_transactions(self, user_id: str, days_back: int = 30,
+                            incremental: bool = True) -> List[Dict]:
         """
         Import and process transactions for a user.
         
+        In incremental mode each account keeps a sync cursor; only transactions
+        posted since the cursor (plus a short overlap for late postings) are
+        fetched, and only new or changed ones are processed and upserted by
+        basiq_transaction_id. ``days_back`` is used as the initial backfill for
+        accounts without a cursor.
+        
         Args:
             user_id: BASIQ user ID
             days_back: Number of days to look back for transactions
+            incremental: Fetch only activity since the last sync cursor
             
         Returns:
-            list: List of processed transactions
+            list: List of new or changed processed transactions
         """
-        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
         to_date = datetime.now().strftime('%Y-%m-%d')
         
         # Get user accounts first
@@ -559,36 +692,157 @@ class BasiqClient:
         
         for account in accounts:
             account_id = account['id']
+            cursor = self.sync_store.get_cursor(user_id, account_id) if incremental else None
+            from_date = self.sync_store.delta_from_date(cursor, days_back)
+            account_transactions, _ = self._sync_account(user_id, account_id, cursor, from_date, to_date)
+            all_transactions.extend(account_transactions)
+        
+        logger.info(f"✅ Imported {len(all_transactions)} new or changed transactions for user {user_id}")
+        return all_transactions
+    
+    def _sync_account(self, user_id: str, account_id: str, cursor: Optional[Dict],
+                      from_date: str, to_date: str) -> Tuple[List[Dict], bool]:
+        """
+        Fetch one account's window, store new or changed transactions and advance its cursor.
+        
+        Args:
+            user_id: BASIQ user ID
+            account_id: Account ID
+            cursor: The account's current sync cursor (None for a full window)
+            from_date: Start date (YYYY-MM-DD format)
+            to_date: End date (YYYY-MM-DD format)
             
-            # Get transactions for this account
-            transactions_result = self.get_account_transactions(
+        Returns:
+            tuple: (processed new or changed transactions, whether the whole
+            window was read and the cursor advanced)
+        """
+        account_transactions = []
+        changed_transactions = []
+        # Only the fields the cursor needs are kept for the whole window
+        seen_transactions = []
+        
+        try:
+            for transaction in self.iter_account_transactions(
                 user_id, account_id, from_date, to_date
-            )
+            ):
+                seen_transactions.append({
+                    'id': transaction['id'],
+                    'postDate': transaction.get('postDate'),
+                    'status': transaction.get('status')
+                })
+                
+                if not self.sync_store.is_new_or_changed(cursor, transaction):
+                    continue
+                
+                transaction_data = {
+                    'basiq_transaction_id': transaction['id'],
+                    'account_id': account_id,
+                    'amount': float(transaction['amount']),
+                    'description': transaction['description'],
+                    'date': transaction['postDate'],
+                    'merchant': transaction.get('merchant', {}).get('businessName'),
+                    'category': transaction.get('class', {}).get('title'),
+                    'status': transaction['status'],
+                    'processed_at': datetime.now().isoformat()
+                }
+                account_transactions.append(transaction_data)
+                changed_transactions.append(transaction)
+                
+                # Save to database and attempt receipt matching
+                if hasattr(self, 'save_transaction_to_db'):
+                    self.save_transaction_to_db(user_id, transaction_data)
+                
+                # Try to match with receipts
+                self.match_transaction_with_receipts(user_id, transaction_data)
+        
+        except requests.exceptions.RequestException as e:
+            # Leave the cursor untouched so the window is retried next run
+            logger.error(f"❌ Failed to get transactions for account {account_id}: {str(e)}")
+            self.sync_store.upsert_transactions(user_id, account_transactions)
+            return account_transactions, False
+        
+        # Upsert by basiq_transaction_id so re-runs are idempotent
+        self.sync_store.upsert_transactions(user_id, account_transactions)
+        get_match_index_registry().update('transactions', user_id, changed_transactions)
+        self.sync_store.save_cursor(
+            user_id, account_id,
+            self.sync_store.advance_cursor(cursor, from_date, seen_transactions)
+        )
+        return account_transactions, True
+    
+    def _synced_history_available(self, user_id: str, account_id: str, from_date: str) -> bool:
+        """
+        Check whether synced history can serve an account window.
+        
+        History must reach back to ``from_date``. If it has not been synced
+        within the store's max staleness, a delta sync from the cursor is run
+        first; history is used only if that sync completes.
+        """
+        cursor = self.sync_store.get_cursor(user_id, account_id)
+        if not self.sync_store.reaches(cursor, from_date):
+            return False
+        if self.sync_store.is_fresh(cursor):
+            return True
+        
+        logger.info(f"🔄 Synced history for account {account_id} is stale, running delta sync")
+        _, complete = self._sync_account(
+            user_id, account_id, cursor,
+            self.sync_store.delta_from_date(cursor, 0),
+            datetime.now().strftime('%Y-%m-%d')
+        )
+        return complete
+    
+    def get_synced_account_transactions(self, user_id: str, account_id: str,
+                                        from_date: Optional[str] = None) -> Dict:
+        """
+        Get account transactions from synced history, falling back to the API.
+        
+        Synced history is used only when the account's cursor reaches back to
+        ``from_date`` and is fresh (a stale cursor is brought up to date with a
+        delta sync first); otherwise the window is fetched from BASIQ directly.
+        
+        Args:
+            user_id: BASIQ user ID
+            account_id: Account ID
+            from_date: Start date (YYYY-MM-DD format)
             
-            if transactions_result.get('success'):
-                for transaction in transactions_result.get('transactions', {}).get('data', []):
-                    transaction_data = {
-                        'basiq_transaction_id': transaction['id'],
-                        'account_id': account_id,
-                        'amount': float(transaction['amount']),
-                        'description': transaction['description'],
-                        'date': transaction['postDate'],
-                        'merchant': transaction.get('merchant', {}).get('businessName'),
-                        'category': transaction.get('class', {}).get('title'),
-                        'status': transaction['status'],
-                        'processed_at': datetime.now().isoformat()
-                    }
-                    all_transactions.append(transaction_data)
-                    
-                    # Save to database and attempt receipt matching
-                    if hasattr(self, 'save_transaction_to_db'):
-                        self.save_transaction_to_db(user_id, transaction_data)
-                    
-                    # Try to match with receipts
-                    self.match_transaction_with_receipts(user_id, transaction_data)
-        
-        logger.info(f"✅ Imported {len(all_transactions)} transactions for user {user_id}")
-        return all_transactions
+        Returns:
+            dict: Transaction data in the same shape as get_account_transactions
+        """
+        try:
+            if from_date and self._synced_history_available(user_id, account_id, from_date):
+                return {
+                    'success': True,
+                    'transactions': {
+                        'data': self.sync_store.get_transactions(user_id, account_id, from_date)
+                    },
+                    'source': 'sync_store'
+                }
+        except Exception as e:
+            logger.warning(f"⚠️ Synced history unavailable for account {account_id}: {str(e)}")
+        
+        return self.get_account_transactions(user_id, account_id, from_date)
+    
+    def iter_synced_account_transactions(self, user_id: str, account_id: str,
+                                         from_date: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream account transactions from synced history, falling back to the API.
+        
+        Args:
+            user_id: BASIQ user ID
+            account_id: Account ID
+            from_date: Start date (YYYY-MM-DD format)
+            
+        Yields:
+            dict: Transactions in BASIQ response format
+        """
+        try:
+            if from_date and self._synced_history_available(user_id, account_id, from_date):
+                return iter(self.sync_store.get_transactions(user_id, account_id, from_date))
+        except Exception as e:
+            logger.warning(f"⚠️ Synced history unavailable for account {account_id}: {str(e)}")
+        
+        return self.iter_account_transactions(user_id, account_id, from_date)
     
     # Receipt Matching Methods
     
@@ -655,36 +909,56 @@ class BasiqClient:
         """
         Attempt to match a transaction with existing receipts.
         
+        Probes the user's unmatched-receipt index (built from Firestore on
+        first use) by amount and date, and links the best receipt.
+        
         Args:
-            user_id: User ID
+            user_id: BASIQ user ID
             transaction: Transaction data
             
         Returns:
             bool: True if match found and linked
         """
-        try:
-            # This would require database integration
-            # For now, return a placeholder implementation
-            
-            amount = abs(float(transaction.get('amount', 0)))
-            transaction_date = datetime.strptime(transaction.get('date', ''), '%Y-%m-%d').date()
-            
-            # In a real implementation, you would:
-            # 1. Query receipts from database within amount and date range
-            # 2. Calculate match scores for each potential receipt
-            # 3. Link the best match if score > threshold
-            
-            logger.info(f"🔍 Attempting to match transaction {transaction.get('basiq_transaction_id')} "
-                       f"(${amount} on {transaction_date})")
-            
-            # Placeholder for actual database matching logic
+        if not db:
             return False
+        
+        try:
+            receipts = get_match_index_registry().get(
+                'receipts', user_id, lambda: self._load_unmatched_receipts(user_id)
+            )
+            match_result = match_transaction(transaction, receipts)
+            if not match_result:
+                return False
+            
+            receipt = match_result['receipt']
+            transaction_id = transaction.get('basiq_transaction_id') or transaction.get('id')
+            receipt_ref = (db.collection('users').document(receipt['firebase_user_id'])
+                           .collection('receipts').document(match_result['receipt_id']))
+            receipt_ref.update({
+                'matched_transaction_id': transaction_id,
+                'match_confidence': match_result['confidence'],
+                'updated_at': datetime.now().isoformat()
+            })
+            receipts.discard(match_result['receipt_id'])
+            
+            logger.info(f"🔗 Matched transaction {transaction_id} with receipt "
+                       f"{match_result['receipt_id']} ({match_result['confidence']:.2f} confidence)")
+            return True
             
         except Exception as e:
             logger.error(f"❌ Error matching transaction with receipts: {str(e)}")
             return False
     
-    # Connection Management
+    def _load_unmatched_receipts(self, user_id: str) -> Iterator[Dict]:
+        """Stream the unmatched receipts of the app user linked to a BASIQ user."""
+        users = db.collection('users').where('basiq_user_id', '==', user_id).limit(1).get()
+        for user_doc in users:
+            receipts = db.collection('users').document(user_doc.id).collection('receipts')
+            for receipt_doc in receipts.where('matched_transaction_id', '==', None).stream():
+                receipt = receipt_doc.to_dict()
+                receipt.setdefault('id', receipt_doc.id)
+                receipt['firebase_user_id'] = user_doc.id
+                yield receipt
     
     def refresh_connection(self, user_id: str, connection_id: str) -> Dict:
         """
@@ -701,7 +975,7 @@ class BasiqClient:
         headers = self._get_headers()
         
         try:
-            response = requests.post(url, headers=headers)
+            response = self.http.post(url, headers=headers)
             response.raise_for_status()
             
             job = response.json()
@@ -734,7 +1008,7 @@ class BasiqClient:
         headers = self._get_headers()
         
         try:
-            response = requests.delete(url, headers=headers)
+            response = self.http.delete(url, headers=headers)
             response.raise_for_status()
             
             logger.info(f"✅ Deleted connection {connection_id} for user {user_id}")
@@ -0,0 +1,276 @@
+"""
+BASIQ Sync Store
+
+Persists per-account sync cursors and synced transactions so BASIQ imports
+can fetch only new or changed activity instead of re-reading a fixed window:
+- Per-account cursor (last seen postDate and recently seen transaction ids)
+- Idempotent transaction upserts keyed by basiq_transaction_id
+- Read path for consumers that only need already-synced history, used only
+  while the account was synced within ``max_staleness``
+
+Uses Firestore when available and falls back to an in-process store.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional
+
+try:
+    from firebase_config import db
+except ImportError:
+    try:
+        from backend.firebase_config import db
+    except ImportError:
+        db = None
+
+logger = logging.getLogger(__name__)
+
+CURSORS_COLLECTION = 'basiq_sync_cursors'
+TRANSACTIONS_COLLECTION = 'basiq_transactions'
+
+DEFAULT_MAX_STALENESS = timedelta(hours=float(os.getenv('BASIQ_SYNC_MAX_STALENESS_HOURS', '12')))
+
+
+class BasiqSyncStore:
+    """
+    Storage for BASIQ account sync cursors and synced transactions.
+    """
+
+    def __init__(self, database=None, overlap_days: int = 2,
+                 max_staleness: timedelta = DEFAULT_MAX_STALENESS):
+        """
+        Initialize the sync store.
+
+        Args:
+            database: Firestore client (defaults to the shared client if configured)
+            overlap_days: Days re-read before the cursor to catch late postings
+                and status changes (e.g. pending -> posted)
+            max_staleness: How long after the last sync the stored history may
+                still be served without a delta sync
+        """
+        self.db = database if database is not None else db
+        self.overlap_days = overlap_days
+        self.max_staleness = max_staleness
+        self.lock = Lock()
+
+        # In-process fallback when Firestore is not available
+        self._memory_cursors: Dict[str, Dict] = {}
+        self._memory_transactions: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _cursor_id(user_id: str, account_id: str) -> str:
+        return f"{user_id}_{account_id}"
+
+    # Cursor Methods
+
+    def get_cursor(self, user_id: str, account_id: str) -> Optional[Dict]:
+        """
+        Get the sync cursor for an account.
+
+        Returns:
+            dict: Cursor with last_post_date, first_synced_date and recent_ids, or None
+        """
+        cursor_id = self._cursor_id(user_id, account_id)
+
+        if self.db:
+            try:
+                doc = self.db.collection(CURSORS_COLLECTION).document(cursor_id).get()
+                return doc.to_dict() if doc.exists else None
+            except Exception as e:
+                logger.error(f"❌ Failed to load sync cursor {cursor_id}: {str(e)}")
+                return None
+
+        with self.lock:
+            cursor = self._memory_cursors.get(cursor_id)
+            return dict(cursor) if cursor else None
+
+    def save_cursor(self, user_id: str, account_id: str, cursor: Dict):
+        """Persist the sync cursor for an account."""
+        cursor_id = self._cursor_id(user_id, account_id)
+        cursor = dict(cursor, user_id=user_id, account_id=account_id,
+                      updated_at=datetime.now().isoformat())
+
+        if self.db:
+            try:
+                self.db.collection(CURSORS_COLLECTION).document(cursor_id).set(cursor)
+            except Exception as e:
+                logger.error(f"❌ Failed to save sync cursor {cursor_id}: {str(e)}")
+            return
+
+        with self.lock:
+            self._memory_cursors[cursor_id] = cursor
+
+    def delta_from_date(self, cursor: Optional[Dict], days_back: int) -> str:
+        """
+        Get the postDate to fetch from for an account.
+
+        Args:
+            cursor: Existing cursor or None
+            days_back: Initial backfill window when no cursor exists
+
+        Returns:
+            str: Start date (YYYY-MM-DD format)
+        """
+        if cursor and cursor.get('last_post_date'):
+            last_post_date = datetime.strptime(cursor['last_post_date'][:10], '%Y-%m-%d')
+            return (last_post_date - timedelta(days=self.overlap_days)).strftime('%Y-%m-%d')
+        return (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+
+    def advance_cursor(self, cursor: Optional[Dict], from_date: str,
+                       transactions: List[Dict]) -> Dict:
+        """
+        Build the next cursor after processing a fetched window.
+
+        Only ids inside the overlap window are retained, keeping the cursor
+        small regardless of account history length.
+
+        Args:
+            cursor: Previous cursor or None
+            from_date: Start date of the window that was fetched
+            transactions: Raw BASIQ transactions seen in the window
+
+        Returns:
+            dict: Next cursor
+        """
+        cursor = cursor or {}
+        last_post_date = cursor.get('last_post_date') or ''
+        for transaction in transactions:
+            post_date = (transaction.get('postDate') or '')[:10]
+            if post_date > last_post_date:
+                last_post_date = post_date
+
+        recent_ids = {}
+        if last_post_date:
+            overlap_start = (
+                datetime.strptime(last_post_date, '%Y-%m-%d') - timedelta(days=self.overlap_days)
+            ).strftime('%Y-%m-%d')
+            for transaction_id, seen in (cursor.get('recent_ids') or {}).items():
+                if seen.get('post_date', '') >= overlap_start:
+                    recent_ids[transaction_id] = seen
+            for transaction in transactions:
+                post_date = (transaction.get('postDate') or '')[:10]
+                if post_date >= overlap_start:
+                    recent_ids[transaction['id']] = {
+                        'post_date': post_date,
+                        'status': transaction.get('status')
+                    }
+
+        return {
+            'last_post_date': last_post_date or None,
+            'first_synced_date': min(filter(None, [cursor.get('first_synced_date'), from_date])),
+            'recent_ids': recent_ids,
+            'last_synced_at': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def is_new_or_changed(cursor: Optional[Dict], transaction: Dict) -> bool:
+        """Check whether a fetched transaction was not yet seen in its current state."""
+        if not cursor:
+            return True
+        seen = (cursor.get('recent_ids') or {}).get(transaction.get('id'))
+        return seen is None or seen.get('status') != transaction.get('status')
+
+    # Transaction Methods
+
+    def upsert_transactions(self, user_id: str, transactions: List[Dict]) -> int:
+        """
+        Idempotently store processed transactions keyed by basiq_transaction_id.
+
+        Args:
+            user_id: BASIQ user ID
+            transactions: Processed transaction dictionaries
+
+        Returns:
+            int: Number of transactions written
+        """
+        if not transactions:
+            return 0
+
+        if self.db:
+            try:
+                collection = self.db.collection(TRANSACTIONS_COLLECTION)
+                # Firestore batches are limited to 500 writes
+                for start in range(0, len(transactions), 500):
+                    batch = self.db.batch()
+                    for transaction in transactions[start:start + 500]:
+                        doc_ref = collection.document(transaction['basiq_transaction_id'])
+                        batch.set(doc_ref, dict(transaction, user_id=user_id), merge=True)
+                    batch.commit()
+                return len(transactions)
+            except Exception as e:
+                logger.error(f"❌ Failed to upsert transactions for user {user_id}: {str(e)}")
+                return 0
+
+        with self.lock:
+            for transaction in transactions:
+                self._memory_transactions[transaction['basiq_transaction_id']] = dict(
+                    transaction, user_id=user_id
+                )
+        return len(transactions)
+
+    @staticmethod
+    def reaches(cursor: Optional[Dict], from_date: str) -> bool:
+        """Check whether a cursor's synced history reaches back to from_date."""
+        return bool(cursor and cursor.get('first_synced_date')
+                    and cursor['first_synced_date'] <= from_date)
+
+    def is_fresh(self, cursor: Optional[Dict], now: Optional[datetime] = None) -> bool:
+        """Check whether a cursor was synced within max_staleness."""
+        if not cursor or not cursor.get('last_synced_at'):
+            return False
+        try:
+            last_synced_at = datetime.fromisoformat(cursor['last_synced_at'])
+        except (TypeError, ValueError):
+            return False
+        return (now or datetime.now()) - last_synced_at <= self.max_staleness
+
+    def covers(self, user_id: str, account_id: str, from_date: str) -> bool:
+        """Check whether synced history for an account reaches back to from_date and is fresh."""
+        cursor = self.get_cursor(user_id, account_id)
+        return self.reaches(cursor, from_date) and self.is_fresh(cursor)
+
+    def get_transactions(self, user_id: str, account_id: str,
+                         from_date: Optional[str] = None) -> List[Dict]:
+        """
+        Get synced transactions for an account in BASIQ response format.
+
+        Args:
+            user_id: BASIQ user ID
+            account_id: Account ID
+            from_date: Start date (YYYY-MM-DD format)
+
+        Returns:
+            list: Transactions with id, amount, description, postDate and status
+        """
+        if self.db:
+            query = (self.db.collection(TRANSACTIONS_COLLECTION)
+                     .where('user_id', '==', user_id)
+                     .where('account_id', '==', account_id))
+            if from_date:
+                query = query.where('date', '>=', from_date)
+            records = [doc.to_dict() for doc in query.stream()]
+        else:
+            with self.lock:
+                records = [
+                    record for record in self._memory_transactions.values()
+                    if record.get('user_id') == user_id
+                    and record.get('account_id') == account_id
+                    and (not from_date or (record.get('date') or '')[:10] >= from_date)
+                ]
+
+        return [
+            {
+                'id': record['basiq_transaction_id'],
+                'account': record.get('account_id'),
+                'amount': record.get('amount'),
+                'description': record.get('description'),
+                'postDate': record.get('date'),
+                'date': record.get('date'),
+                'status': record.get('status'),
+                'class': {'title': record.get('category')},
+                'merchant': {'businessName': record.get('merchant')}
+            }
+            for record in sorted(records, key=lambda r: r.get('date') or '', reverse=True)
+        ]
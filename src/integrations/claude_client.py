@@ -8,6 +8,12 @@ from datetime import datetime
 import time
 from dataclasses import dataclass
 
+try:
+    from .claude_response_cache import get_claude_response_cache, response_cache_key
+except ImportError:
+    # Imported as a top-level module (src/integrations on sys.path)
+    from claude_response_cache import get_claude_response_cache, response_cache_key
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -21,6 +27,7 @@ class ClaudeResponse:
     error: Optional[str] = None
     confidence: float = 0.0
     processing_time: float = 0.0
+    cached: bool = False
 
 class ClaudeClientError(Exception):
     """Custom exception for Claude client errors"""
@@ -47,6 +54,9 @@ class ClaudeClient:
         if not self.api_key.startswith('sk-ant-api'):
             logger.warning("Claude API key format may be incorrect")
         
+        # Identical requests share responses and in-flight calls
+        self.response_cache = get_claude_response_cache()
+        
         logger.info(f"Claude client initialized with model: {self.model}")
 
     def _make_api_call(self, messages: List[Dict], system_prompt: str = "", 
@@ -81,12 +91,23 @@ class ClaudeClient:
         if system_prompt:
             payload["system"] = system_prompt
         
-        try:
+        def post_messages() -> Dict[str, Any]:
             logger.info(f"Making Claude API call with {len(messages)} messages")
             response = requests.post(self.api_url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
-            
-            result = response.json()
+            return response.json()
+        
+        try:
+            cached = False
+            if self.response_cache is not None:
+                cache_key = response_cache_key(
+                    payload["model"], system_prompt, messages, payload["temperature"], payload["max_tokens"]
+                )
+                result, cached = self.response_cache.get_or_call(
+                    cache_key, post_messages, cacheable=lambda r: bool(r.get("content"))
+                )
+            else:
+                result = post_messages()
             processing_time = time.time() - start_time
             
             # Extract content from response
@@ -97,7 +118,10 @@ class ClaudeClient:
             # Extract usage information
             usage = result.get("usage", {})
             
-            logger.info(f"Claude API call successful in {processing_time:.2f}s")
+            if cached:
+                logger.info(f"Claude response served from cache in {processing_time:.3f}s")
+            else:
+                logger.info(f"Claude API call successful in {processing_time:.2f}s")
             
             return ClaudeResponse(
                 success=True,
@@ -105,7 +129,8 @@ class ClaudeClient:
                 usage=usage,
                 model=result.get("model"),
                 processing_time=processing_time,
-                confidence=0.9  # High confidence for successful API calls
+                confidence=0.9,  # High confidence for successful API calls
+                cached=cached
             )
             
         except requests.exceptions.Timeout:
@@ -114,6 +139,7 @@ class ClaudeClient:
             return ClaudeResponse(success=False, content="", error=error_msg, processing_time=time.time() - start_time)
             
         except requests.exceptions.HTTPError as e:
+            response = e.response
             if response.status_code == 429:
                 error_msg = "Claude API rate limit exceeded"
             elif response.status_code == 401:
@@ -131,6 +157,12 @@ class ClaudeClient:
             logger.error(error_msg)
             return ClaudeResponse(success=False, content="", error=error_msg, processing_time=time.time() - start_time)
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit rate and tokens saved"""
+        if self.response_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.response_cache.get_stats()}
+
     def analyze_receipt(self, image_data: Union[str, bytes], user_profile: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Analyze receipt using Claude for comprehensive data extraction and Australian tax categorization
@@ -0,0 +1,227 @@
+"""
+Claude Response Cache
+
+Content-addressed cache in front of the Claude Messages API:
+- Keys are a SHA-256 of the canonical request (model, system prompt,
+  messages, temperature, max tokens), so identical prompts share a response
+- TTL expiry with LRU eviction bounded by entry count and stored bytes
+- In-flight coalescing: concurrent identical calls wait for one upstream
+  request instead of each sending their own
+- Hit-rate and tokens-saved counters for monitoring
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.getenv('CLAUDE_CACHE_TTL', '3600'))
+DEFAULT_MAX_ENTRIES = int(os.getenv('CLAUDE_CACHE_MAX_ENTRIES', '2000'))
+DEFAULT_MAX_BYTES = int(os.getenv('CLAUDE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+
+def response_cache_key(model: str, system_prompt: str, messages: List[Dict],
+                       temperature: Optional[float], max_tokens: Optional[int] = None) -> str:
+    """
+    Build the cache key for a Messages API request.
+
+    Args:
+        model: Model name
+        system_prompt: System prompt (empty string if none)
+        messages: Conversation messages, including any image blocks
+        temperature: Sampling temperature
+        max_tokens: Output token limit (affects truncation, so part of the key)
+
+    Returns:
+        str: Hex SHA-256 of the canonical request
+    """
+    canonical = json.dumps(
+        [model, system_prompt or '', messages, temperature, max_tokens],
+        sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _usage_tokens(result: Dict[str, Any]) -> int:
+    usage = result.get('usage') or {}
+    return int(usage.get('input_tokens', 0) or 0) + int(usage.get('output_tokens', 0) or 0)
+
+
+class _InFlight:
+    """An upstream call that concurrent identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class ClaudeResponseCache:
+    """
+    TTL + LRU cache of raw Messages API responses with request coalescing.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, clock: Callable[[], float] = time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: How long a response may be reused
+            max_entries: Maximum cached responses
+            max_bytes: Maximum total size of cached response bodies
+            clock: Time source
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        # key -> (expires_at, size, result)
+        self.entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self.in_flight: Dict[str, _InFlight] = {}
+        self.total_bytes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'tokens_saved': 0
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a live cached response without counting it as a hit or miss"""
+        with self.lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, result = entry
+        if expires_at <= self.clock():
+            del self.entries[key]
+            self.total_bytes -= size
+            self.stats['expirations'] += 1
+            return None
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a response, evicting least recently used entries to stay within bounds"""
+        size = len(json.dumps(result, separators=(',', ':')))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self.entries[key] = (self.clock() + self.ttl_seconds, size, result)
+            self.total_bytes += size
+            self.stats['stores'] += 1
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.stats['evictions'] += 1
+
+    def get_or_call(self, key: str, call: Callable[[], Dict[str, Any]],
+                    cacheable: Callable[[Dict[str, Any]], bool] = lambda result: True) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the cached response for ``key`` or make one upstream call for it.
+
+        Concurrent callers with the same key wait for the first caller's
+        request. If that request raises, waiters receive the same exception.
+
+        Args:
+            key: Cache key from ``response_cache_key``
+            call: Performs the upstream request and returns the raw response JSON
+            cacheable: Whether a response may be stored
+
+        Returns:
+            Tuple of (response JSON, served without a new upstream call)
+        """
+        with self.lock:
+            result = self._get_locked(key)
+            if result is not None:
+                self.stats['hits'] += 1
+                self.stats['tokens_saved'] += _usage_tokens(result)
+                return result, True
+
+            flight = self.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[key] = _InFlight()
+                self.stats['misses'] += 1
+            else:
+                flight.waiters += 1
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self.lock:
+                self.stats['tokens_saved'] += _usage_tokens(flight.result)
+            return flight.result, True
+
+        try:
+            result = call()
+            flight.result = result
+            if cacheable(result):
+                self.put(key, result)
+            return result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            flight.done.set()
+
+    def clear(self):
+        """Drop every cached response"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, tokens saved and current size"""
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+            served = self.stats['hits'] + self.stats['coalesced']
+            return {
+                **self.stats,
+                'hit_rate': round(served / lookups * 100, 2) if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'in_flight': len(self.in_flight)
+            }
+
+
+# Global response cache shared by every Claude caller in the process
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_claude_response_cache() -> Optional[ClaudeResponseCache]:
+    """Get the shared response cache, or None when CLAUDE_CACHE_ENABLED is false"""
+    global _response_cache
+    if os.getenv('CLAUDE_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ClaudeResponseCache()
+                logger.info(f"🗄️ Claude response cache enabled (TTL {_response_cache.ttl_seconds}s, "
+                            f"{_response_cache.max_entries} entries)")
+    return _response_cache
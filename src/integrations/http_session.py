@@ -0,0 +1,316 @@
+"""
+Pooled HTTP Sessions for External APIs
+
+Shared, per-process HTTP session layer used by the BASIQ and ABR integrations:
+- Keep-alive connection pooling (one requests.Session per named upstream)
+- Default connect/read timeouts on every call
+- Retry with full-jitter exponential backoff on 429/5xx and connection errors
+- Optional token-bucket pacing of every attempt, retries included
+- Per-endpoint latency histograms for monitoring
+"""
+
+import os
+import re
+import time
+import random
+import logging
+from threading import Event, Lock
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+# Path segments that look like identifiers are collapsed so metrics stay bounded
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[A-Za-z0-9_-]{6,}$')
+
+
+def endpoint_label(method: str, url: str) -> str:
+    """
+    Build a low-cardinality metrics label for a request.
+
+    Example: GET https://au-api.basiq.io/users/5f1c.../accounts -> "GET /users/{id}/accounts"
+    """
+    path = urlsplit(url).path or '/'
+    segments = ['{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/')]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace requests to an upstream.
+    
+    Tokens refill continuously at ``rate`` per second up to ``capacity``,
+    allowing short bursts while holding the long-run rate.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.lock = Lock()
+    
+    def configure(self, rate: float, capacity: int):
+        """Update the refill rate and capacity without losing accumulated tokens."""
+        with self.lock:
+            self._refill()
+            self.rate = max(rate, 0.001)
+            self.capacity = max(capacity, 1)
+            self.tokens = min(self.tokens, self.capacity)
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+    
+    def acquire(self, tokens: int = 1, stop_event: Optional[Event] = None) -> bool:
+        """
+        Block until ``tokens`` are available.
+        
+        Returns:
+            bool: True once acquired, False if ``stop_event`` was set while waiting
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait_seconds = (tokens - self.tokens) / self.rate
+            
+            if stop_event is not None:
+                if stop_event.wait(timeout=wait_seconds):
+                    return False
+            else:
+                time.sleep(wait_seconds)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one endpoint."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+        self.retries = 0
+
+    def observe(self, latency_ms: float, error: bool = False):
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        if error:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Approximate percentile as the upper bound of the containing bucket."""
+        if not self.count:
+            return None
+        target = self.count * pct / 100
+        cumulative = 0
+        for i, bucket_count in enumerate(self.buckets):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ['le_inf']
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': dict(zip(labels, self.buckets))
+        }
+
+
+class PooledHTTPSession:
+    """
+    Thread-safe pooled HTTP session with timeouts, retries and latency metrics.
+    """
+
+    def __init__(self, name: str, pool_size: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, rate_limiter: Optional[TokenBucket] = None):
+        """
+        Initialize the pooled session.
+
+        Args:
+            name: Upstream name used in logs and metrics
+            pool_size: Maximum keep-alive connections per host
+            connect_timeout: TCP/TLS connect timeout in seconds
+            read_timeout: Response read timeout in seconds
+            max_retries: Retries after the first attempt on 429/5xx/connection errors
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Maximum delay in seconds between retries
+            rate_limiter: Token bucket acquired before every attempt (None to disable)
+        """
+        self.name = name
+        self.pool_size = pool_size
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.pid = os.getpid()
+
+        self.session = requests.Session()
+        # Retries are handled here so backoff, jitter and metrics stay in one place
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.metrics_lock = Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def _histogram(self, label: str) -> LatencyHistogram:
+        histogram = self.histograms.get(label)
+        if histogram is None:
+            histogram = self.histograms.setdefault(label, LatencyHistogram())
+        return histogram
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After on 429."""
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, retry_non_idempotent: bool = False,
+                endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session.
+
+        429 responses are always retried. 5xx responses and connection errors
+        are retried only for idempotent methods unless ``retry_non_idempotent``
+        is set. The final response is returned as-is so callers can keep using
+        ``raise_for_status``. Every attempt, retries included, takes a token
+        from ``rate_limiter`` when one is configured.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            retry_non_idempotent: Allow retrying POST/PATCH on 5xx and connection errors
+            endpoint: Metrics label (derived from the URL when omitted)
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.exceptions.RequestException: If the final attempt fails to connect
+        """
+        method = method.upper()
+        kwargs.setdefault('timeout', self.timeout)
+        label = endpoint or endpoint_label(method, url)
+        can_retry_errors = retry_non_idempotent or method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                latency_ms = (time.perf_counter() - start) * 1000
+                with self.metrics_lock:
+                    self._histogram(label).observe(latency_ms, error=True)
+                if not can_retry_errors or attempt >= self.max_retries:
+                    raise
+                logger.warning(f"⚠️ {self.name} {label} failed ({type(e).__name__}), retrying")
+            else:
+                latency_ms = (time.perf_counter() - start) * 1000
+                should_retry = response.status_code in RETRY_STATUS_CODES and (
+                    response.status_code == 429 or can_retry_errors
+                )
+                with self.metrics_lock:
+                    self._histogram(label).observe(latency_ms, error=response.status_code >= 400)
+                if not should_retry or attempt >= self.max_retries:
+                    return response
+                logger.warning(f"⚠️ {self.name} {label} returned {response.status_code}, retrying")
+
+            delay = self._backoff_delay(attempt, response)
+            with self.metrics_lock:
+                self._histogram(label).retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get per-endpoint latency histograms and pool configuration."""
+        with self.metrics_lock:
+            endpoints = {label: histogram.to_dict() for label, histogram in self.histograms.items()}
+        return {
+            'name': self.name,
+            'pool_size': self.pool_size,
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            'max_retries': self.max_retries,
+            'endpoints': endpoints
+        }
+
+    def close(self):
+        self.session.close()
+
+
+# Per-process session registry
+_sessions: Dict[str, PooledHTTPSession] = {}
+_sessions_lock = Lock()
+
+
+def get_http_session(name: str, **config) -> PooledHTTPSession:
+    """
+    Get the shared pooled session for an upstream, creating it on first use.
+
+    Sessions are rebuilt after a fork so worker processes never share sockets
+    with their parent. ``config`` is only applied when the session is created.
+    """
+    session = _sessions.get(name)
+    if session is not None and session.pid == os.getpid():
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None or session.pid != os.getpid():
+            session = PooledHTTPSession(name, **config)
+            _sessions[name] = session
+            logger.info(f"🔌 Created pooled HTTP session '{name}' (pool size {session.pool_size})")
+        return session
+
+
+def get_http_metrics() -> Dict[str, Any]:
+    """Get metrics for every pooled session in this process."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    return {session.name: session.get_metrics() for session in sessions}
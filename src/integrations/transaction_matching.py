@@ -0,0 +1,424 @@
+"""
+Receipt/Transaction Matching Index
+
+Bucketed index for matching receipts with bank transactions by amount and
+date proximity without scoring a user's entire history on every lookup:
+- Day buckets, each holding entries sorted by cent-rounded amount
+- Exact-amount buckets for matches outside the date window
+- Incremental add/replace/discard as transactions sync and receipts arrive
+- Per-user registry so indexes are built once and reused across requests
+
+Scoring is unchanged from the original linear matcher: amount similarity
+weighted 0.7, date proximity (7 day tolerance) weighted 0.3, with a minimum
+confidence of 0.6.
+"""
+
+import itertools
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date, datetime
+from threading import Lock, RLock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MATCH_THRESHOLD = 0.6
+DATE_WINDOW_DAYS = 7
+AMOUNT_WEIGHT = 0.7
+DATE_WEIGHT = 0.3
+
+TRANSACTION_ID_FIELDS = ('id', 'basiq_transaction_id')
+TRANSACTION_DATE_FIELDS = ('postDateTime', 'transactionDate', 'postDate', 'date')
+RECEIPT_ID_FIELDS = ('id',)
+RECEIPT_DATE_FIELDS = ('date',)
+
+
+def to_cents(amount: Any) -> Optional[int]:
+    """Convert an amount to absolute whole cents, or None if missing/zero/invalid."""
+    try:
+        cents = abs(int(round(float(amount) * 100)))
+    except (TypeError, ValueError):
+        return None
+    return cents or None
+
+
+def to_day(value: Any) -> Optional[int]:
+    """Convert a date, datetime or ISO 8601 string to a day ordinal."""
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return None
+    return None
+
+
+def score_match(cents_a: int, day_a: int, cents_b: int, day_b: int,
+                date_window_days: int = DATE_WINDOW_DAYS) -> float:
+    """
+    Score how likely two records describe the same purchase.
+
+    Returns:
+        float: Combined confidence between 0.0 and 1.0
+    """
+    amount_diff = abs(cents_a - cents_b)
+    amount_score = 1.0 if amount_diff == 0 else max(0.0, 1.0 - amount_diff / max(cents_a, cents_b))
+    date_score = max(0.0, 1.0 - abs(day_a - day_b) / date_window_days)
+    return AMOUNT_WEIGHT * amount_score + DATE_WEIGHT * date_score
+
+
+class MatchIndex:
+    """
+    Amount/day bucketed index over receipts or transactions.
+
+    A lookup probes the day buckets inside the date window and, within each,
+    only the amount range that could still clear the confidence threshold at
+    that day's distance. Exact-amount candidates outside the window are
+    probed through a separate amount bucket. Ties go to the earliest indexed
+    item, matching the original first-best scan.
+    """
+
+    def __init__(self, id_fields: Tuple[str, ...] = TRANSACTION_ID_FIELDS,
+                 date_fields: Tuple[str, ...] = TRANSACTION_DATE_FIELDS,
+                 date_window_days: int = DATE_WINDOW_DAYS,
+                 threshold: float = MATCH_THRESHOLD):
+        """
+        Initialize an empty index.
+
+        Args:
+            id_fields: Item keys tried in order for the item's identifier
+            date_fields: Item keys tried in order for the item's date
+            date_window_days: Days apart at which date proximity scores zero
+            threshold: Minimum confidence (exclusive) for a match
+        """
+        self.id_fields = id_fields
+        self.date_fields = date_fields
+        self.date_window_days = date_window_days
+        self.threshold = threshold
+        self.lock = RLock()
+        self.built_at = time.time()
+
+        # day ordinal -> sorted [(cents, seq, item_id)]
+        self._by_day: Dict[int, List[Tuple[int, int, str]]] = {}
+        # cents -> {item_id: seq}
+        self._by_cents: Dict[int, Dict[str, int]] = {}
+        # item_id -> (cents, day, seq, item)
+        self._entries: Dict[str, Tuple[int, int, int, Dict]] = {}
+        self._seq = itertools.count()
+
+        # Minimum amount score needed at each day distance, precomputed
+        self._amount_floor = [
+            (threshold - DATE_WEIGHT * (1.0 - offset / date_window_days)) / AMOUNT_WEIGHT
+            for offset in range(date_window_days)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._entries
+
+    def _first_field(self, item: Dict, fields: Tuple[str, ...]) -> Any:
+        for field in fields:
+            value = item.get(field)
+            if value:
+                return value
+        return None
+
+    def add(self, item: Dict) -> bool:
+        """
+        Add or replace an item.
+
+        Returns:
+            bool: False if the item has no usable id, amount or date
+        """
+        item_id = self._first_field(item, self.id_fields)
+        cents = to_cents(item.get('amount'))
+        day = to_day(self._first_field(item, self.date_fields))
+        if not item_id or cents is None or day is None:
+            return False
+
+        with self.lock:
+            existing = self._entries.get(item_id)
+            if existing is not None:
+                # Replacing keeps the original position for tie-breaking
+                self._remove_entry(item_id, existing)
+                seq = existing[2]
+            else:
+                seq = next(self._seq)
+
+            insort(self._by_day.setdefault(day, []), (cents, seq, item_id))
+            self._by_cents.setdefault(cents, {})[item_id] = seq
+            self._entries[item_id] = (cents, day, seq, item)
+        return True
+
+    def add_many(self, items: Iterable[Dict]) -> int:
+        """Add items, returning how many were indexed."""
+        added = 0
+        for item in items:
+            if self.add(item):
+                added += 1
+        return added
+
+    def discard(self, item_id: str):
+        """Remove an item if present."""
+        with self.lock:
+            existing = self._entries.get(item_id)
+            if existing is not None:
+                self._remove_entry(item_id, existing)
+                del self._entries[item_id]
+
+    def _remove_entry(self, item_id: str, entry: Tuple[int, int, int, Dict]):
+        cents, day, seq, _ = entry
+        bucket = self._by_day[day]
+        position = bisect_left(bucket, (cents, seq, item_id))
+        del bucket[position]
+        if not bucket:
+            del self._by_day[day]
+
+        amount_bucket = self._by_cents[cents]
+        del amount_bucket[item_id]
+        if not amount_bucket:
+            del self._by_cents[cents]
+
+    def find_best(self, amount: Any, on_date: Any) -> Optional[Tuple[Dict, float]]:
+        """
+        Find the best-scoring item for an amount and date.
+
+        Args:
+            amount: Amount to match (sign is ignored)
+            on_date: Date, datetime or ISO 8601 string
+
+        Returns:
+            tuple: (item, confidence) or None if nothing clears the threshold
+        """
+        cents = to_cents(amount)
+        day = to_day(on_date)
+        if cents is None or day is None:
+            return None
+
+        best_key = None
+        best_entry = None
+        window = self.date_window_days
+
+        with self.lock:
+            for offset in range(-(window - 1), window):
+                bucket = self._by_day.get(day + offset)
+                if not bucket:
+                    continue
+
+                # amount_score > floor  <=>  |a - b| / max(a, b) < 1 - floor
+                ratio = 1.0 - max(self._amount_floor[abs(offset)], 0.0)
+                low = int(cents * (1.0 - ratio))
+                high = int(cents / (1.0 - ratio)) + 1 if ratio < 1.0 else None
+                start = bisect_left(bucket, (low,))
+                end = bisect_right(bucket, (high,)) if high is not None else len(bucket)
+
+                for candidate_cents, seq, item_id in bucket[start:end]:
+                    score = score_match(cents, day, candidate_cents, day + offset, window)
+                    if score > self.threshold:
+                        key = (score, -seq)
+                        if best_key is None or key > best_key:
+                            best_key = key
+                            best_entry = self._entries[item_id]
+
+            # Same amount outside the date window still clears the threshold
+            if AMOUNT_WEIGHT > self.threshold:
+                for item_id, seq in (self._by_cents.get(cents) or {}).items():
+                    entry = self._entries[item_id]
+                    if abs(entry[1] - day) < window:
+                        continue
+                    key = (AMOUNT_WEIGHT, -seq)
+                    if best_key is None or key > best_key:
+                        best_key = key
+                        best_entry = entry
+
+        if best_entry is None:
+            return None
+        return best_entry[3], best_key[0]
+
+
+def build_transaction_index(transactions: Iterable[Dict]) -> MatchIndex:
+    """Build a match index over bank transactions."""
+    index = MatchIndex(TRANSACTION_ID_FIELDS, TRANSACTION_DATE_FIELDS)
+    index.add_many(transactions)
+    return index
+
+
+def build_receipt_index(receipts: Iterable[Dict]) -> MatchIndex:
+    """Build a match index over receipts."""
+    index = MatchIndex(RECEIPT_ID_FIELDS, RECEIPT_DATE_FIELDS)
+    index.add_many(receipts)
+    return index
+
+
+def match_receipt(receipt: Dict,
+                  transactions: Union[MatchIndex, Iterable[Dict]]) -> Optional[Dict]:
+    """
+    Find the bank transaction that best matches a receipt.
+
+    Args:
+        receipt: Receipt with amount and date
+        transactions: Prebuilt transaction index or an iterable of transactions
+
+    Returns:
+        dict: transaction, transaction_id and confidence, or None
+    """
+    if not isinstance(transactions, MatchIndex):
+        transactions = build_transaction_index(transactions)
+
+    result = transactions.find_best(receipt.get('amount'), receipt.get('date'))
+    if not result:
+        return None
+
+    transaction, confidence = result
+    return {
+        'transaction': transaction,
+        'transaction_id': transaction.get('id') or transaction.get('basiq_transaction_id'),
+        'confidence': confidence
+    }
+
+
+def match_transaction(transaction: Dict,
+                      receipts: Union[MatchIndex, Iterable[Dict]]) -> Optional[Dict]:
+    """
+    Find the receipt that best matches a bank transaction.
+
+    Args:
+        transaction: Transaction with amount and a posting date
+        receipts: Prebuilt receipt index or an iterable of receipts
+
+    Returns:
+        dict: receipt, receipt_id and confidence, or None
+    """
+    if not isinstance(receipts, MatchIndex):
+        receipts = build_receipt_index(receipts)
+
+    on_date = None
+    for field in TRANSACTION_DATE_FIELDS:
+        on_date = transaction.get(field)
+        if on_date:
+            break
+
+    result = receipts.find_best(transaction.get('amount'), on_date)
+    if not result:
+        return None
+
+    receipt, confidence = result
+    return {
+        'receipt': receipt,
+        'receipt_id': receipt.get('id'),
+        'confidence': confidence
+    }
+
+
+class MatchIndexRegistry:
+    """
+    Per-user cache of transaction and receipt match indexes.
+
+    Indexes are built from a loader on first use, updated incrementally by
+    sync and upload paths, and rebuilt after ``max_age_seconds`` so drift
+    from changes made elsewhere is bounded.
+    """
+
+    KINDS = ('transactions', 'receipts')
+
+    def __init__(self, max_users: int = 256, max_age_seconds: float = 3600):
+        self.max_users = max_users
+        self.max_age_seconds = max_age_seconds
+        self.lock = Lock()
+        self._indexes: "OrderedDict[Tuple[str, str], MatchIndex]" = OrderedDict()
+
+    def _new_index(self, kind: str) -> MatchIndex:
+        if kind == 'transactions':
+            return MatchIndex(TRANSACTION_ID_FIELDS, TRANSACTION_DATE_FIELDS)
+        if kind == 'receipts':
+            return MatchIndex(RECEIPT_ID_FIELDS, RECEIPT_DATE_FIELDS)
+        raise ValueError(f"Unknown match index kind: {kind}")
+
+    def peek(self, kind: str, user_id: str) -> Optional[MatchIndex]:
+        """Get a fresh index if one is cached, without building it."""
+        key = (kind, user_id)
+        with self.lock:
+            index = self._indexes.get(key)
+            if index is None:
+                return None
+            if time.time() - index.built_at > self.max_age_seconds:
+                del self._indexes[key]
+                return None
+            self._indexes.move_to_end(key)
+            return index
+
+    def get(self, kind: str, user_id: str,
+            loader: Callable[[], Iterable[Dict]]) -> MatchIndex:
+        """
+        Get the index for a user, building it from ``loader`` on first use.
+
+        Args:
+            kind: 'transactions' or 'receipts'
+            user_id: Owner of the indexed items
+            loader: Returns every item to index when a build is needed
+
+        Returns:
+            MatchIndex
+        """
+        index = self.peek(kind, user_id)
+        if index is not None:
+            return index
+
+        start = time.time()
+        index = self._new_index(kind)
+        indexed = index.add_many(loader())
+        logger.info(f"🔍 Built {kind} match index for user {user_id} "
+                    f"({indexed} items in {time.time() - start:.2f}s)")
+
+        with self.lock:
+            self._indexes[(kind, user_id)] = index
+            self._indexes.move_to_end((kind, user_id))
+            while len(self._indexes) > self.max_users * len(self.KINDS):
+                self._indexes.popitem(last=False)
+        return index
+
+    def update(self, kind: str, user_id: str, items: Iterable[Dict]) -> int:
+        """
+        Add new or changed items to a cached index.
+
+        Users without a cached index are skipped; their index picks the items
+        up when it is next built.
+
+        Returns:
+            int: Number of items indexed
+        """
+        index = self.peek(kind, user_id)
+        if index is None:
+            return 0
+        return index.add_many(items)
+
+    def discard(self, kind: str, user_id: str, item_id: str):
+        """Remove an item from a cached index."""
+        index = self.peek(kind, user_id)
+        if index is not None:
+            index.discard(item_id)
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop cached indexes for one user, or for everyone."""
+        with self.lock:
+            if user_id is None:
+                self._indexes.clear()
+                return
+            for kind in self.KINDS:
+                self._indexes.pop((kind, user_id), None)
+
+
+# Global registry instance
+match_index_registry = MatchIndexRegistry()
+
+
+def get_match_index_registry() -> MatchIndexRegistry:
+    """Get the global match index registry."""
+    return match_index_registry
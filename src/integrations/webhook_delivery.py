@@ -0,0 +1,316 @@
+"""
+Streaming Webhook Delivery
+
+Delivers streamed chatbot output to caller-supplied webhooks without holding
+up the response stream:
+- Bounded per-request queue; chunks are dropped and counted when it is full
+- One background scheduler that coalesces queued chunks into a single POST
+  per stream every flush interval
+- Posts run on a small worker pool over a pooled keep-alive session with
+  short timeouts and no retries, at most one in flight per stream so chunk
+  order is preserved
+- Streams whose receiver keeps failing are abandoned instead of retried
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+try:
+    from .http_session import get_http_session
+except ImportError:
+    get_http_session = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL_MS = int(os.environ.get('WEBHOOK_FLUSH_INTERVAL_MS', '100'))
+DEFAULT_MAX_PENDING_CHUNKS = int(os.environ.get('WEBHOOK_MAX_PENDING_CHUNKS', '2000'))
+DEFAULT_MAX_WORKERS = int(os.environ.get('WEBHOOK_MAX_WORKERS', '8'))
+WEBHOOK_CONNECT_TIMEOUT = 2.0
+WEBHOOK_READ_TIMEOUT = 5.0
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+class WebhookStream:
+    """
+    Outgoing webhook traffic for one chat response.
+
+    The request thread only appends to a bounded deque; batching and
+    delivery happen on the dispatcher's threads.
+    """
+
+    def __init__(self, url: str, max_pending: int = DEFAULT_MAX_PENDING_CHUNKS):
+        self.url = url
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.final_payload: Optional[Dict[str, Any]] = None
+        self.closed = False
+        self.abandoned = False
+        self.in_flight = False
+        self.sequence = 0
+        self.failures = 0
+        self.created_at = time.time()
+        self.stats = {'queued': 0, 'dropped': 0, 'posts': 0, 'delivered_chunks': 0, 'errors': 0}
+
+    def send(self, chunk: str) -> bool:
+        """
+        Queue a chunk for delivery without blocking.
+
+        Returns:
+            bool: False if the chunk was dropped
+        """
+        with self.lock:
+            if self.closed or self.abandoned or len(self.pending) >= self.max_pending:
+                self.stats['dropped'] += 1
+                return False
+            self.pending.append(chunk)
+            self.stats['queued'] += 1
+            return True
+
+    def close(self, full_response: Optional[str] = None):
+        """Stop accepting chunks and queue the final full-response post"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if full_response is not None:
+                self.final_payload = {'full_response': full_response}
+
+    def next_payload(self) -> Optional[Dict[str, Any]]:
+        """
+        Claim the next POST body: queued chunks coalesced into one, or the
+        final payload once drained. Returns None while a post is in flight.
+        """
+        with self.lock:
+            if self.abandoned or self.in_flight:
+                return None
+            if self.pending:
+                chunks: List[str] = []
+                while self.pending:
+                    chunks.append(self.pending.popleft())
+                self.sequence += 1
+                self.in_flight = True
+                return {'chunk': ''.join(chunks), 'chunks': len(chunks), 'sequence': self.sequence}
+            if self.closed and self.final_payload is not None:
+                payload, self.final_payload = self.final_payload, None
+                self.in_flight = True
+                return payload
+            return None
+
+    @property
+    def finished(self) -> bool:
+        """Closed and fully delivered (or abandoned), with nothing in flight"""
+        with self.lock:
+            if self.in_flight:
+                return False
+            if self.abandoned:
+                return True
+            return self.closed and not self.pending and self.final_payload is None
+
+
+class WebhookDispatcher:
+    """
+    Background sender shared by all streaming chat responses.
+    """
+
+    def __init__(self, session=None, flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS,
+                 max_pending: int = DEFAULT_MAX_PENDING_CHUNKS, max_workers: int = DEFAULT_MAX_WORKERS,
+                 timeout: tuple = (WEBHOOK_CONNECT_TIMEOUT, WEBHOOK_READ_TIMEOUT)):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            session: HTTP session with ``post(url, json=..., timeout=...)``
+                (defaults to the pooled 'chatbot_webhooks' session)
+            flush_interval_ms: How often queued chunks are coalesced and posted
+            max_pending: Per-stream queue bound before chunks are dropped
+            max_workers: Concurrent webhook posts across all streams
+            timeout: (connect, read) timeout for each post
+        """
+        self._session = session
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.streams: List[WebhookStream] = []
+        self.streams_lock = threading.Lock()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.scheduler: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.stats = {'streams': 0, 'posts': 0, 'delivered_chunks': 0, 'dropped': 0, 'errors': 0, 'abandoned': 0}
+
+    @property
+    def session(self):
+        if self._session is None:
+            if get_http_session is None:
+                raise RuntimeError("HTTP session layer unavailable for webhook delivery")
+            self._session = get_http_session(
+                'chatbot_webhooks',
+                pool_size=self.max_workers,
+                connect_timeout=self.timeout[0],
+                read_timeout=self.timeout[1],
+                max_retries=0
+            )
+        return self._session
+
+    def open_stream(self, url: str) -> WebhookStream:
+        """
+        Register a webhook stream for one chat response.
+
+        Args:
+            url: Caller-supplied webhook URL
+
+        Returns:
+            WebhookStream: Non-blocking handle for queueing chunks
+        """
+        stream = WebhookStream(url, max_pending=self.max_pending)
+        with self.streams_lock:
+            self.streams.append(stream)
+            self.stats['streams'] += 1
+        self._ensure_started()
+        return stream
+
+    def _ensure_started(self):
+        if self.scheduler is not None and self.scheduler.is_alive():
+            return
+        with self.streams_lock:
+            if self.scheduler is not None and self.scheduler.is_alive():
+                return
+            self.stop_event.clear()
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='webhook-post')
+            self.scheduler = threading.Thread(target=self._run, name='webhook-scheduler', daemon=True)
+            self.scheduler.start()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wake_event.wait(self.flush_interval)
+            self.wake_event.clear()
+            try:
+                self.dispatch()
+            except Exception as e:
+                logger.error(f"❌ Webhook dispatch failed: {e}")
+
+    def dispatch(self) -> int:
+        """
+        Submit one coalesced post for every stream with queued data.
+
+        Posts run inline when the worker pool is not running.
+
+        Returns:
+            int: Number of posts submitted
+        """
+        executor = self.executor
+        with self.streams_lock:
+            streams = list(self.streams)
+
+        submitted = 0
+        finished = []
+        for stream in streams:
+            if stream.finished:
+                finished.append(stream)
+                continue
+            payload = stream.next_payload()
+            if payload is None:
+                continue
+            submitted += 1
+            if executor is None:
+                self._deliver(stream, payload)
+            else:
+                executor.submit(self._deliver, stream, payload)
+
+        if finished:
+            with self.streams_lock:
+                for stream in finished:
+                    if stream not in self.streams:
+                        continue
+                    self.streams.remove(stream)
+                    self.stats['dropped'] += stream.stats['dropped']
+                    if stream.stats['dropped']:
+                        logger.warning(f"⚠️ Webhook stream dropped {stream.stats['dropped']} chunks under backpressure")
+        return submitted
+
+    def _deliver(self, stream: WebhookStream, payload: Dict[str, Any]):
+        chunk_count = payload.get('chunks', 0)
+        try:
+            response = self.session.post(stream.url, json=payload, timeout=self.timeout, endpoint='POST webhook')
+            if getattr(response, 'status_code', 200) >= 400:
+                raise RuntimeError(f"HTTP {response.status_code}")
+        except Exception as e:
+            with stream.lock:
+                stream.failures += 1
+                stream.stats['errors'] += 1
+                if stream.failures >= MAX_CONSECUTIVE_FAILURES and not stream.abandoned:
+                    stream.abandoned = True
+                    stream.stats['dropped'] += len(stream.pending)
+                    stream.pending.clear()
+                    self.stats['abandoned'] += 1
+                    logger.warning(f"⚠️ Abandoning webhook stream after {stream.failures} failures")
+            self.stats['errors'] += 1
+            logger.error(f"❌ Webhook error: {e}")
+        else:
+            with stream.lock:
+                stream.failures = 0
+                stream.stats['posts'] += 1
+                stream.stats['delivered_chunks'] += chunk_count
+            self.stats['posts'] += 1
+            self.stats['delivered_chunks'] += chunk_count
+        finally:
+            with stream.lock:
+                stream.in_flight = False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Deliver everything queued, waiting up to ``timeout`` seconds.
+
+        Returns:
+            bool: True if every stream finished
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            self.dispatch()
+            with self.streams_lock:
+                if not self.streams:
+                    return True
+            time.sleep(min(self.flush_interval, 0.01))
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get delivery counters and the number of active streams"""
+        with self.streams_lock:
+            active = len(self.streams)
+            pending = sum(len(stream.pending) for stream in self.streams)
+        return {**self.stats, 'active_streams': active, 'pending_chunks': pending}
+
+    def stop(self, timeout: float = 5.0):
+        """Flush outstanding streams and stop the background threads"""
+        self.flush(timeout)
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.scheduler is not None:
+            self.scheduler.join(timeout)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        self.scheduler = None
+        self.executor = None
+
+
+# Global webhook dispatcher instance
+webhook_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    """Get the global webhook dispatcher instance."""
+    global webhook_dispatcher
+    if webhook_dispatcher is None:
+        with _dispatcher_lock:
+            if webhook_dispatcher is None:
+                webhook_dispatcher = WebhookDispatcher()
+    return webhook_dispatcher
@@ -0,0 +1,156 @@
+"""
+Performance Tests for the Rate Limiting Engine
+=============================================
+
+Benchmarks the sliding window counter store against the original
+per-IP timestamp lists with 100k distinct client IPs, and checks the
+limiter's window, eviction and fallback behaviour.
+"""
+
+import random
+import time
+import unittest
+
+from backend.middleware.rate_limiter import (
+    InMemoryRateLimitStore, RateLimit, RateLimitEngine
+)
+
+
+DISTINCT_IPS = 100_000
+TOTAL_HITS = 400_000
+# Partner integrations run at per-user limits in the thousands per minute
+LIMIT = RateLimit(1000, 60)
+
+
+class FakeClock:
+    """Manually advanced time source"""
+
+    def __init__(self, now=1_700_000_040.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def legacy_check(store, ip, now, limit=LIMIT.limit, window=LIMIT.window):
+    """Original check: filter the IP's full timestamp list on every request"""
+    window_start = now - window
+    if ip not in store:
+        store[ip] = {'requests': [now]}
+        return True
+    filtered = [t for t in store[ip]['requests'] if t > window_start]
+    if len(filtered) >= limit:
+        return False
+    filtered.append(now)
+    store[ip] = {'requests': filtered}
+    return True
+
+
+def build_traffic(seed=11):
+    """Skewed traffic: a few heavy clients and a long tail of one-off IPs"""
+    rng = random.Random(seed)
+    ips = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(DISTINCT_IPS)]
+    heavy = ips[:50]
+    return [rng.choice(heavy) if rng.random() < 0.5 else rng.choice(ips) for _ in range(TOTAL_HITS)]
+
+
+class BrokenRedisStore:
+    def hit(self, key, limit, cost=1):
+        raise ConnectionError('redis down')
+
+
+class TestRateLimiterSpeed(unittest.TestCase):
+    """Compare O(1) sliding window counters with per-IP timestamp lists"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.traffic = build_traffic()
+
+    def test_limit_enforced_within_window(self):
+        clock = FakeClock()
+        store = InMemoryRateLimitStore(clock=clock)
+        results = [store.hit('ip:1.2.3.4', RateLimit(10, 60)) for _ in range(12)]
+
+        self.assertEqual([r.allowed for r in results].count(True), 10)
+        self.assertEqual(results[9].remaining, 0)
+        self.assertFalse(results[-1].allowed)
+        self.assertGreater(results[-1].retry_after, 0)
+
+    def test_previous_window_is_weighted(self):
+        clock = FakeClock(now=1_700_000_040.0 + 59)  # end of a window
+        store = InMemoryRateLimitStore(clock=clock)
+        limit = RateLimit(10, 60)
+        for _ in range(10):
+            self.assertTrue(store.hit('k', limit).allowed)
+
+        # A quarter into the next window 75% of the previous count still applies
+        clock.now += 16
+        allowed = sum(store.hit('k', limit).allowed for _ in range(10))
+        self.assertEqual(allowed, 2)
+
+        # Two windows later the key starts fresh
+        clock.now += 120
+        self.assertEqual(store.hit('k', limit).remaining, 9)
+
+    def test_lru_bound_and_ttl_purge(self):
+        clock = FakeClock()
+        store = InMemoryRateLimitStore(max_keys=1000, clock=clock)
+        for i in range(5000):
+            store.hit(f'ip:{i}', LIMIT)
+        self.assertEqual(len(store), 1000)
+        self.assertEqual(store.stats['evicted'], 4000)
+
+        clock.now += 3 * LIMIT.window
+        for i in range(100):
+            store.hit(f'ip:new_{i}', LIMIT)
+        self.assertLess(len(store), 1000)
+        self.assertGreater(store.stats['expired'], 0)
+
+    def test_engine_falls_back_when_redis_fails(self):
+        engine = RateLimitEngine()
+        engine.redis_store = BrokenRedisStore()
+
+        self.assertTrue(engine.is_allowed('user:abc', 2))
+        self.assertTrue(engine.is_allowed('user:abc', 2))
+        self.assertFalse(engine.is_allowed('user:abc', 2))
+        self.assertEqual(engine.get_stats()['redis_errors'], 3)
+
+    def test_limit_parsing(self):
+        self.assertEqual(RateLimit.parse('10/minute'), RateLimit(10, 60))
+        self.assertEqual(RateLimit.parse('5 per second'), RateLimit(5, 1))
+        self.assertEqual(RateLimit.parse('1000/hours'), RateLimit(1000, 3600))
+        self.assertEqual(RateLimit.parse('30/10s'), RateLimit(30, 10))
+        self.assertEqual(RateLimit.parse(50), RateLimit(50, 60))
+
+    def test_benchmark_100k_distinct_ips(self):
+        """Per-hit cost must not grow with the limit and tracked keys must stay bounded"""
+        legacy_store = {}
+        start = time.perf_counter()
+        now = 1_700_000_040.0
+        for i, ip in enumerate(self.traffic):
+            legacy_check(legacy_store, ip, now + i * 0.0001)
+        legacy_time = (time.perf_counter() - start) / len(self.traffic)
+
+        clock = FakeClock()
+        store = InMemoryRateLimitStore(max_keys=50_000, clock=clock)
+        start = time.perf_counter()
+        for i, ip in enumerate(self.traffic):
+            clock.now = 1_700_000_040.0 + i * 0.0001
+            store.hit(ip, LIMIT)
+        engine_time = (time.perf_counter() - start) / len(self.traffic)
+
+        legacy_timestamps = sum(len(v['requests']) for v in legacy_store.values())
+
+        print(f"\nRate limiting {len(self.traffic):,} hits from {DISTINCT_IPS:,} IPs:")
+        print(f"  Timestamp lists per hit:  {legacy_time * 1e6:.2f}us "
+              f"({len(legacy_store):,} keys, {legacy_timestamps:,} timestamps)")
+        print(f"  Sliding counters per hit: {engine_time * 1e6:.2f}us "
+              f"({len(store):,} keys, {store.stats['evicted']:,} evicted)")
+        print(f"  Speedup per hit:          {legacy_time / engine_time:.1f}x")
+
+        self.assertLessEqual(len(store), 50_000)
+        self.assertLess(engine_time * 2, legacy_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Performance Tests for Receipt/Transaction Matching
+=================================================
+
+Benchmarks the bucketed match index against the original linear scan that
+scored every transaction a user has ever had, at 50k transactions per user.
+"""
+
+import random
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from src.integrations.transaction_matching import (
+    DATE_WINDOW_DAYS, MATCH_THRESHOLD, build_receipt_index, build_transaction_index,
+    match_receipt, match_transaction, score_match, to_cents, to_day
+)
+
+
+TRANSACTIONS_PER_USER = 50_000
+RECEIPT_LOOKUPS = 500
+
+RECURRING_AMOUNTS = [15.99, 42.00, 9.99, 120.00, 65.50]
+
+
+def legacy_match(receipt, transactions):
+    """Original linear scan: score every transaction and keep the first best"""
+    receipt_cents = to_cents(receipt['amount'])
+    receipt_day = to_day(receipt['date'])
+    best_match = None
+    best_score = 0.0
+    for transaction in transactions:
+        transaction_date = datetime.fromisoformat(transaction['postDate'].replace('Z', '+00:00'))
+        transaction_cents = to_cents(transaction['amount'])
+        transaction_day = transaction_date.date().toordinal()
+        # Stale near-miss amounts are out of scope for the index by design
+        if abs(transaction_day - receipt_day) >= DATE_WINDOW_DAYS and transaction_cents != receipt_cents:
+            continue
+        score = score_match(receipt_cents, receipt_day, transaction_cents, transaction_day)
+        if score > best_score and score > MATCH_THRESHOLD:
+            best_score = score
+            best_match = {'transaction_id': transaction['id'], 'confidence': score}
+    return best_match
+
+
+def build_synthetic_history(count, seed=42):
+    """Generate about two years of card activity with recurring charges"""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    transactions = []
+    for i in range(count):
+        if rng.random() < 0.1:
+            amount = rng.choice(RECURRING_AMOUNTS)
+        else:
+            amount = round(rng.lognormvariate(3.5, 1.0), 2) + 0.01
+        posted = start + timedelta(days=rng.randint(0, 729), minutes=rng.randint(0, 1439))
+        transactions.append({
+            'id': f'txn_{i}',
+            'amount': f'{-amount:.2f}',
+            'description': f'MERCHANT {i % 1500}',
+            'postDate': posted.strftime('%Y-%m-%dT%H:%M:%SZ')
+        })
+    return transactions
+
+
+def build_receipts(transactions, count, seed=7):
+    """Receipts for a sample of transactions, some with rounding or date drift"""
+    rng = random.Random(seed)
+    receipts = []
+    for i, transaction in enumerate(rng.sample(transactions, count)):
+        posted = datetime.fromisoformat(transaction['postDate'].replace('Z', '+00:00'))
+        drift_days = rng.choice([0, 0, 0, -1, 1, 2])
+        amount = abs(float(transaction['amount'])) + rng.choice([0, 0, 0, 0.05])
+        receipts.append({
+            'id': f'receipt_{i}',
+            'amount': round(amount, 2),
+            'date': (posted + timedelta(days=drift_days)).strftime('%Y-%m-%d')
+        })
+    return receipts
+
+
+class TestReceiptMatchingSpeed(unittest.TestCase):
+    """Compare the bucketed match index with a per-lookup linear scan"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.transactions = build_synthetic_history(TRANSACTIONS_PER_USER)
+        cls.receipts = build_receipts(cls.transactions, RECEIPT_LOOKUPS)
+
+    def test_index_matches_linear_scan(self):
+        """Index lookups must return the same match and confidence as the scan"""
+        index = build_transaction_index(self.transactions)
+        for receipt in self.receipts[:100]:
+            expected = legacy_match(receipt, self.transactions)
+            actual = match_receipt(receipt, index)
+            if expected is None:
+                self.assertIsNone(actual, msg=receipt)
+            else:
+                self.assertEqual(actual['transaction_id'], expected['transaction_id'], msg=receipt)
+                self.assertAlmostEqual(actual['confidence'], expected['confidence'])
+
+    def test_transaction_to_receipt_direction(self):
+        """A synced transaction should find the receipt recorded for it"""
+        receipts = [
+            {'id': 'receipt_fuel', 'amount': 67.80, 'date': '2024-01-14'},
+            {'id': 'receipt_office', 'amount': 118.50, 'date': '2024-01-15'}
+        ]
+        transaction = {
+            'basiq_transaction_id': 'txn_1', 'amount': -118.50, 'date': '2024-01-16T09:00:00Z'
+        }
+        result = match_transaction(transaction, build_receipt_index(receipts))
+        self.assertEqual(result['receipt_id'], 'receipt_office')
+
+    def test_incremental_updates(self):
+        """Synced transactions are matchable without rebuilding the index"""
+        index = build_transaction_index(self.transactions[:1000])
+        receipt = {'amount': 4321.09, 'date': '2025-03-01'}
+        self.assertIsNone(match_receipt(receipt, index))
+
+        index.add({'id': 'txn_new', 'amount': '-4321.09', 'postDate': '2025-03-02T08:00:00Z'})
+        self.assertEqual(match_receipt(receipt, index)['transaction_id'], 'txn_new')
+
+        index.discard('txn_new')
+        self.assertIsNone(match_receipt(receipt, index))
+
+    def test_benchmark_50k_transactions(self):
+        """Probing the index should be much faster than scanning per receipt"""
+        start = time.perf_counter()
+        legacy_results = [legacy_match(r, self.transactions) for r in self.receipts[:50]]
+        legacy_time = (time.perf_counter() - start) / 50
+
+        start = time.perf_counter()
+        index = build_transaction_index(self.transactions)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed_results = [match_receipt(r, index) for r in self.receipts]
+        lookup_time = (time.perf_counter() - start) / len(self.receipts)
+
+        print(f"\nReceipt matching against {len(self.transactions):,} transactions:")
+        print(f"  Linear scan per receipt:  {legacy_time * 1000:.2f}ms")
+        print(f"  Index build (once):       {build_time * 1000:.1f}ms")
+        print(f"  Index lookup per receipt: {lookup_time * 1000:.3f}ms")
+        print(f"  Speedup per lookup:       {legacy_time / lookup_time:.0f}x")
+
+        self.assertEqual(
+            [r and r['transaction_id'] for r in legacy_results],
+            [r and r['transaction_id'] for r in indexed_results[:50]]
+        )
+        self.assertLess(lookup_time * 20, legacy_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
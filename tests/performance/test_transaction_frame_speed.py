@@ -0,0 +1,188 @@
+"""
+Performance Tests for the Columnar Transaction Frame
+===================================================
+
+Checks that the frame aggregates match the per-analyzer dict loops they
+replace and benchmarks both on a synthetic 3-year transaction history.
+"""
+
+import random
+import time
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+
+from backend.transaction_frame import TransactionFrame
+
+
+CATEGORIES = ['Food', 'Housing', 'Transportation', 'Entertainment', 'Shopping',
+              'Office Supplies', 'Travel', 'Other', '', None]
+
+
+def make_history(days=3 * 365, per_day=20, seed=7):
+    """Synthetic BASIQ transactions, roughly 20k for 3 years"""
+    rng = random.Random(seed)
+    start = date(2022, 7, 1)
+    transactions = []
+    for day in range(days):
+        post_date = (start + timedelta(days=day)).isoformat()
+        for _ in range(per_day):
+            credit = rng.random() < 0.1
+            amount = round(rng.choice([rng.uniform(5, 25), rng.uniform(25, 400), rng.choice([200, 500, 12000])]), 2)
+            transaction = {
+                'amount': f"{amount if credit else -amount:.2f}",
+                'direction': 'credit' if credit else 'debit',
+                'postDate': f"{post_date}T00:00:00Z",
+                'description': rng.choice(['EFTPOS PURCHASE', 'CASH WITHDRAWAL', 'SALARY'])
+            }
+            category = rng.choice(CATEGORIES)
+            if category != '':
+                transaction['category'] = category
+            transactions.append(transaction)
+    # Missing and malformed dates are skipped by the monthly aggregates
+    transactions.append({'amount': '-40.00', 'direction': 'debit', 'postDate': '', 'category': 'Food'})
+    transactions.append({'amount': '-40.00', 'direction': 'debit', 'category': 'Food'})
+    return transactions
+
+
+def legacy_aggregates(transactions):
+    """The dict loops the analyzers used to run, one scan each"""
+    category_months = defaultdict(lambda: defaultdict(float))
+    for t in transactions:
+        if t.get('direction') == 'debit' and t.get('postDate', ''):
+            category = t.get('category')
+            category_months['Other' if category is None else category][t['postDate'][:7]] += abs(float(t.get('amount', 0)))
+
+    category_totals = defaultdict(float)
+    income = 0.0
+    for t in transactions:
+        amount = abs(float(t.get('amount', 0)))
+        if t.get('direction') == 'credit':
+            income += amount
+        else:
+            category = t.get('category')
+            category_totals['Other' if category is None else category] += amount
+
+    monthly = defaultdict(lambda: {'income': 0.0, 'expenses': 0.0})
+    for t in transactions:
+        date_str = t.get('postDate', '')
+        if date_str:
+            key = 'income' if t.get('direction') == 'credit' else 'expenses'
+            monthly[date_str[:7]][key] += abs(float(t.get('amount', 0)))
+
+    small = [t for t in transactions
+             if t.get('direction') == 'debit' and 5 <= abs(float(t.get('amount', 0))) <= 25]
+    uncategorized = sum(abs(float(t.get('amount', 0))) for t in transactions
+                        if t.get('direction') == 'debit' and not t.get('category'))
+    high_cash = sum(1 for t in transactions
+                    if abs(float(t.get('amount', 0))) > 10000 and 'cash' in t.get('description', '').lower())
+    round_count = len([t for t in transactions
+                       if abs(float(t.get('amount', 0))) % 100 == 0 and abs(float(t.get('amount', 0))) > 100])
+
+    return {
+        'category_months': {c: {m: a for m, a in sorted(months.items())} for c, months in category_months.items()},
+        'category_totals': dict(category_totals),
+        'income': income,
+        'monthly': {m: dict(v) for m, v in monthly.items()},
+        'small_count': len(small),
+        'uncategorized': uncategorized,
+        'high_cash': high_cash,
+        'round_count': round_count
+    }
+
+
+def frame_aggregates(transactions):
+    frame = TransactionFrame.from_transactions(transactions)
+    return {
+        'category_months': frame.debit_spending_by_category_month,
+        'category_totals': frame.expense_totals_by_category,
+        'income': frame.total_income,
+        'monthly': frame.monthly_flows,
+        'small_count': int((frame.is_debit & (frame.abs_amount >= 5) & (frame.abs_amount <= 25)).sum()),
+        'uncategorized': float(frame.abs_amount[frame.is_debit & frame.blank_category].sum()),
+        'high_cash': int(((frame.abs_amount > 10000) & frame.mentions_cash).sum()),
+        'round_count': int(((frame.abs_amount % 100 == 0) & (frame.abs_amount > 100)).sum())
+    }
+
+
+class TestTransactionFrame(unittest.TestCase):
+    """Test frame aggregates against the legacy loops"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.transactions = make_history()
+
+    def assertNestedAlmostEqual(self, expected, actual):
+        if isinstance(expected, dict):
+            self.assertEqual(set(expected), set(actual))
+            for key in expected:
+                self.assertNestedAlmostEqual(expected[key], actual[key])
+        else:
+            self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_aggregates_match_legacy_loops(self):
+        expected = legacy_aggregates(self.transactions)
+        actual = frame_aggregates(self.transactions)
+
+        self.assertEqual(set(expected), set(actual))
+        for name in expected:
+            with self.subTest(aggregate=name):
+                self.assertNestedAlmostEqual(expected[name], actual[name])
+
+    def test_months_are_ascending_per_category(self):
+        frame = TransactionFrame.from_transactions(self.transactions)
+        for months in frame.debit_spending_by_category_month.values():
+            self.assertEqual(list(months), sorted(months))
+        self.assertEqual(len(frame.monthly_flows), 36)
+
+    def test_malformed_values(self):
+        frame = TransactionFrame.from_transactions([
+            {'amount': 'n/a', 'direction': 'debit', 'postDate': '2024-02-30', 'category': 'Food'},
+            {'amount': None, 'direction': 'credit', 'postDate': '2024-03-01'},
+            {'amount': '-10', 'direction': 'debit', 'postDate': '2024-03-05T10:00:00+10:00'}
+        ])
+        self.assertEqual(frame.amount.tolist(), [0.0, 0.0, -10.0])
+        self.assertEqual(frame.has_date.tolist(), [False, True, True])
+        self.assertEqual(frame.debit_spending_by_category_month, {'Other': {'2024-03': 10.0}})
+        self.assertEqual(frame.categories, ['Food', None])
+
+    def test_empty_frame(self):
+        frame = TransactionFrame.from_transactions([])
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(frame.debit_spending_by_category_month, {})
+        self.assertEqual(frame.expense_totals_by_category, {})
+        self.assertEqual(frame.monthly_flows, {})
+        self.assertEqual(frame.total_income, 0.0)
+
+    def test_frame_is_faster_than_legacy_scans(self):
+        legacy_times = []
+        build_times = []
+        aggregate_times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            legacy_aggregates(self.transactions)
+            legacy_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            frame = TransactionFrame.from_transactions(self.transactions)
+            build_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            frame.debit_spending_by_category_month
+            frame.expense_totals_by_category
+            frame.monthly_flows
+            frame.total_income
+            aggregate_times.append(time.perf_counter() - start)
+
+        legacy_time = min(legacy_times)
+        build_time = min(build_times)
+        aggregate_time = min(aggregate_times)
+        print(f"\n{len(self.transactions)} transactions: legacy scans {legacy_time * 1000:.1f}ms, "
+              f"frame build {build_time * 1000:.1f}ms + aggregates {aggregate_time * 1000:.1f}ms")
+
+        # The dicts are read once; the group-bys themselves are a small fraction of a scan
+        self.assertLess(build_time + aggregate_time, legacy_time)
+        self.assertLess(aggregate_time * 5, legacy_time)
+
+if __name__ == '__main__':
+    unittest.main()
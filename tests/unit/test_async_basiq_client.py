@@ -0,0 +1,200 @@
+"""
+Unit Tests for the Async BASIQ Client
+====================================
+
+Runs AsyncBasiqClient against a local aiohttp server standing in for BASIQ
+to test links.next pagination, the concurrency limit, retries and token
+sharing across short-lived instances.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.integrations.async_basiq_client import AsyncBasiqClient
+from src.integrations.basiq_client import BasiqClient
+
+ACCOUNT_PATH = '/users/u1/accounts/{account_id}/transactions'
+
+
+class FakeBasiq:
+    """Records requests and serves scripted responses"""
+
+    def __init__(self):
+        self.requests = []
+        self.scripted = {}
+        self.pages = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0
+
+    def script(self, path, *statuses):
+        """Answer the next requests to path with these statuses (then 200)"""
+        self.scripted[path] = list(statuses)
+
+    async def token(self, request):
+        self.requests.append((request.method, request.path, dict(request.query)))
+        return web.json_response({'access_token': 'test-token', 'expires_in': 3600})
+
+    async def handle(self, request):
+        self.requests.append((request.method, request.path, dict(request.query)))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            statuses = self.scripted.get(request.path)
+            if statuses:
+                status = statuses.pop(0)
+                headers = {'Retry-After': '0'} if status == 429 else {}
+                return web.json_response({'error': status}, status=status, headers=headers)
+
+            page = request.query.get('page', '1')
+            return web.json_response(self.pages.get((request.path, page), {'data': []}))
+        finally:
+            self.in_flight -= 1
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/token', self.token)
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        return app
+
+
+def sync_config(server):
+    config = BasiqClient()
+    config.app = SimpleNamespace(config={
+        'BASIQ_ENVIRONMENT': 'development',
+        'BASIQ_API_KEY_DEV': 'test-key',
+        'BASIQ_BASE_URL_DEV': str(server.make_url('')).rstrip('/')
+    })
+    return config
+
+
+@asynccontextmanager
+async def basiq_client(fake, **kwargs):
+    server = TestServer(fake.app())
+    await server.start_server()
+    client = AsyncBasiqClient(retry_delay=0.001, config=sync_config(server), **kwargs)
+    try:
+        yield client
+    finally:
+        await client.close()
+        await server.close()
+
+
+def data_requests(fake):
+    return [r for r in fake.requests if r[1] != '/token']
+
+
+@pytest.mark.asyncio
+async def test_follows_relative_next_links():
+    fake = FakeBasiq()
+    path = ACCOUNT_PATH.format(account_id='acc-1')
+    fake.pages[(path, '1')] = {'data': [{'id': 't1'}, {'id': 't2'}],
+                               'links': {'next': f'{path}?page=2'}}
+    fake.pages[(path, '2')] = {'data': [{'id': 't3'}], 'links': {'next': None}}
+
+    async with basiq_client(fake) as client:
+        transactions = [t async for t in client.iter_account_transactions(
+            'u1', 'acc-1', from_date='2024-07-01', to_date='2025-06-30')]
+
+    assert [t['id'] for t in transactions] == ['t1', 't2', 't3']
+    first, second = data_requests(fake)
+    assert first[2] == {'filter.transaction.postDate.from': '2024-07-01',
+                        'filter.transaction.postDate.to': '2025-06-30'}
+    # The next link carries its own query; the date filter is not re-sent
+    assert second[2] == {'page': '2'}
+    # The token is fetched once and reused across pages
+    assert [r for r in fake.requests if r[1] == '/token'] == [('POST', '/token', {})]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_concurrency_limit():
+    fake = FakeBasiq()
+    fake.delay = 0.02
+    account_ids = [f'acc-{i}' for i in range(6)]
+    for account_id in account_ids:
+        fake.pages[(ACCOUNT_PATH.format(account_id=account_id), '1')] = {
+            'data': [{'id': f'{account_id}-t1', 'postDate': '2025-01-01'}]
+        }
+
+    async with basiq_client(fake, max_concurrency=2) as client:
+        by_account = await client.fetch_accounts_transactions('u1', account_ids)
+
+    assert list(by_account) == account_ids
+    assert all(len(transactions) == 1 for transactions in by_account.values())
+    assert fake.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_get_on_server_errors_and_429():
+    fake = FakeBasiq()
+    fake.script('/users/u1', 503, 429)
+
+    async with basiq_client(fake, max_retries=3) as client:
+        result = await client.get_user('u1')
+
+    assert result['success']
+    assert len(data_requests(fake)) == 3
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    fake = FakeBasiq()
+    fake.script('/users/u1', 503, 503, 503)
+
+    async with basiq_client(fake, max_retries=2) as client:
+        result = await client.get_user('u1')
+
+    assert not result['success']
+    assert len(data_requests(fake)) == 3
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried_on_server_error():
+    fake = FakeBasiq()
+    fake.script('/users', 503)
+
+    async with basiq_client(fake, max_retries=3) as client:
+        result = await client.create_basiq_user({'email': 'user@example.com', 'mobile': None})
+
+    assert not result['success']
+    assert len(data_requests(fake)) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_account_returns_empty_list():
+    fake = FakeBasiq()
+    fake.pages[(ACCOUNT_PATH.format(account_id='ok'), '1')] = {'data': [{'id': 't1'}]}
+    fake.script(ACCOUNT_PATH.format(account_id='broken'), 404)
+
+    async with basiq_client(fake) as client:
+        by_account = await client.fetch_accounts_transactions('u1', ['ok', 'broken'])
+
+    assert by_account == {'ok': [{'id': 't1'}], 'broken': []}
+
+
+@pytest.mark.asyncio
+async def test_token_is_shared_across_instances():
+    fake = FakeBasiq()
+    server = TestServer(fake.app())
+    await server.start_server()
+    config = sync_config(server)
+    sessions = []
+    try:
+        # One short-lived client per request, as the savings advisor uses them
+        for _ in range(3):
+            async with AsyncBasiqClient(retry_delay=0.001, config=config) as client:
+                await client.get_user_accounts('u1')
+                sessions.append(client._session)
+    finally:
+        await server.close()
+
+    assert [r for r in fake.requests if r[1] == '/token'] == [('POST', '/token', {})]
+    assert config.access_token == 'test-token'
+    # Each request's session is closed when its client exits
+    assert len(sessions) == 3 and all(session.closed for session in sessions)
@@ -0,0 +1,417 @@
+"""
+Unit Tests for Streamed Tax Report Generation
+============================================
+
+Streams a multi-page tax year through the TaxReportAccumulator and the
+CSV, Excel and JSON report writers, and checks the totals and exported rows
+against the in-memory path the reports used before streaming. Also checks
+that the data fingerprint follows the accounts' update markers without
+reading the year's transactions.
+"""
+
+import asyncio
+import base64
+import copy
+import csv
+import io
+import json
+import unittest
+import zipfile
+from types import SimpleNamespace
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+from backend import automated_reports
+from backend.australian_tax_categorizer import TaxCategory
+from backend.automated_reports import (AutomatedReportGenerator, CSVReportWriter, ExcelReportWriter,
+                                       JSONReportWriter, OutputFormat, ReportType, TaxReportAccumulator)
+
+TAX_PROFILE = {'personalInfo': {'abn': '51824753556'}}
+SHEET_NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def fake_categorize(transaction, tax_profile):
+    """Deterministic stand-in for the tax categorizer"""
+    description = transaction.get('description', '').lower()
+    if 'fuel' in description:
+        return SimpleNamespace(category=TaxCategory.D1, deductibility=0.8)
+    if 'office' in description:
+        return SimpleNamespace(category=TaxCategory.P8, deductibility=1.0)
+    return SimpleNamespace(category=TaxCategory.PERSONAL, deductibility=0.0)
+
+
+def make_transaction(index):
+    kind = index % 5
+    if kind == 0:
+        direction, amount, description = 'credit', '2500.00', f'Salary ACME {index}'
+    elif kind == 1:
+        direction, amount, description = 'debit', f'-{40 + index}.35', f'Fuel BP {index}'
+    elif kind == 2:
+        direction, amount, description = 'debit', '-200.00', f'Office supplies {index}'
+    elif kind == 3:
+        direction, amount, description = 'debit', f'-{12 + index}.10', f'Groceries {index}'
+    else:
+        direction, amount, description = 'debit', '-15000.00', f'Cash withdrawal {index}'
+    return {
+        'id': f'txn-{index}',
+        'amount': amount,
+        'direction': direction,
+        'description': description,
+        'postDate': f'2024-{7 + index % 6:02d}-{1 + index % 28:02d}T00:00:00Z',
+        'status': 'posted',
+        'account': {'displayName': 'Everyday'}
+    }
+
+
+# Three Basiq pages of a tax year
+PAGES = [[make_transaction(page * 20 + i) for i in range(20)] for page in range(3)]
+TRANSACTIONS = [transaction for page in PAGES for transaction in page]
+
+
+def legacy_report(transactions, tax_profile, receipts):
+    """The totals the in-memory report path computed over the whole year"""
+    categories = {}
+    total_deductions = 0
+    for transaction in transactions:
+        if transaction.get('direction') == 'debit':
+            amount = abs(float(transaction.get('amount', 0)))
+            categorization = fake_categorize(transaction, tax_profile)
+            category = categories.setdefault(categorization.category.value,
+                                             {'total': 0, 'deductible': 0, 'transactions': []})
+            category['total'] += amount
+            category['transactions'].append(transaction)
+            if categorization.category != TaxCategory.PERSONAL:
+                deductible_amount = amount * categorization.deductibility
+                category['deductible'] += deductible_amount
+                total_deductions += deductible_amount
+
+    gst_collected = 0
+    gst_paid = 0
+    if tax_profile and tax_profile.get('personalInfo', {}).get('abn'):
+        for transaction in transactions:
+            amount = abs(float(transaction.get('amount', 0)))
+            if transaction.get('direction') == 'credit':
+                gst_collected += amount * 0.1
+            elif transaction.get('direction') == 'debit':
+                if fake_categorize(transaction, tax_profile).category != TaxCategory.PERSONAL:
+                    gst_paid += amount * 0.1
+
+    compliance_score = 100
+    audit_risks = []
+    business_transactions = [t for t in transactions
+                             if t.get('direction') == 'debit' and abs(float(t.get('amount', 0))) > 50]
+    receipt_coverage = len(receipts) / len(business_transactions) if business_transactions else 1
+    if receipt_coverage < 0.7:
+        compliance_score -= 20
+        audit_risks.append("Low receipt coverage for business expenses")
+    large_cash_count = 0
+    for transaction in transactions:
+        amount = abs(float(transaction.get('amount', 0)))
+        if amount > 10000 and 'cash' in transaction.get('description', '').lower():
+            large_cash_count += 1
+            compliance_score -= 10
+    if large_cash_count > 0:
+        audit_risks.append(f"{large_cash_count} large cash transactions detected")
+    round_transactions = [t for t in transactions
+                          if abs(float(t.get('amount', 0))) % 100 == 0 and abs(float(t.get('amount', 0))) > 100]
+    if len(round_transactions) > len(transactions) * 0.2:
+        compliance_score -= 10
+        audit_risks.append("High percentage of round-number transactions")
+
+    return {
+        'total_income': sum(abs(float(t['amount'])) for t in transactions if t['direction'] == 'credit'),
+        'total_expenses': sum(abs(float(t['amount'])) for t in transactions if t['direction'] == 'debit'),
+        'total_deductions': total_deductions,
+        'gst_collected': gst_collected,
+        'gst_paid': gst_paid,
+        'categories': categories,
+        'compliance_score': max(0, compliance_score),
+        'audit_risks': audit_risks
+    }
+
+
+def stream_pages(writer, receipts=(), tax_profile=TAX_PROFILE):
+    accumulator = TaxReportAccumulator(gst_registered=bool(tax_profile.get('personalInfo', {}).get('abn')))
+    for page in PAGES:
+        for transaction in page:
+            row = accumulator.add(transaction, fake_categorize(transaction, tax_profile))
+            if writer is not None:
+                writer.write_transaction(transaction, row)
+    if writer is not None:
+        for receipt in receipts:
+            writer.write_receipt(receipt)
+    return accumulator.to_report_data('user-1', '2024', len(receipts))
+
+
+def sheet_rows(xlsx_bytes, sheet_name):
+    """Cell values of one worksheet, as lists of strings per row"""
+    with zipfile.ZipFile(io.BytesIO(xlsx_bytes)) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        names = [sheet.get('name') for sheet in workbook.find('s:sheets', SHEET_NS)]
+        sheet = ElementTree.fromstring(archive.read(f'xl/worksheets/sheet{names.index(sheet_name) + 1}.xml'))
+        shared = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            strings = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+            shared = [''.join(t.text or '' for t in si.iter(f"{{{SHEET_NS['s']}}}t")) for si in strings]
+
+    rows = []
+    for row in sheet.iter(f"{{{SHEET_NS['s']}}}row"):
+        values = []
+        for cell in row.findall('s:c', SHEET_NS):
+            if cell.get('t') == 'inlineStr':
+                values.append(''.join(t.text or '' for t in cell.iter(f"{{{SHEET_NS['s']}}}t")))
+            elif cell.get('t') == 's':
+                values.append(shared[int(cell.find('s:v', SHEET_NS).text)])
+            else:
+                value = cell.find('s:v', SHEET_NS)
+                values.append(value.text if value is not None else '')
+        rows.append(values)
+    return names, rows
+
+
+class TestTaxReportAccumulator(unittest.TestCase):
+    """Test streamed totals against the in-memory computation"""
+
+    def assert_matches_legacy(self, report_data, legacy):
+        for field in ('total_income', 'total_expenses', 'total_deductions', 'gst_collected', 'gst_paid'):
+            self.assertAlmostEqual(getattr(report_data, field), legacy[field], places=6, msg=field)
+        self.assertAlmostEqual(report_data.net_gst, legacy['gst_collected'] - legacy['gst_paid'], places=6)
+        self.assertEqual(report_data.compliance_score, legacy['compliance_score'])
+        self.assertEqual(report_data.audit_risks, legacy['audit_risks'])
+
+        self.assertEqual(set(report_data.categories), set(legacy['categories']))
+        for name, category in legacy['categories'].items():
+            streamed = report_data.categories[name]
+            self.assertAlmostEqual(streamed['total'], category['total'], places=6)
+            self.assertAlmostEqual(streamed['deductible'], category['deductible'], places=6)
+            self.assertEqual(streamed['count'], len(category['transactions']))
+
+    def test_totals_match_in_memory_report(self):
+        report_data = stream_pages(None)
+        self.assert_matches_legacy(report_data, legacy_report(TRANSACTIONS, TAX_PROFILE, []))
+        self.assertEqual(report_data.transaction_count, len(TRANSACTIONS))
+        self.assertEqual(report_data.income_transaction_count,
+                         sum(1 for t in TRANSACTIONS if t['direction'] == 'credit'))
+
+    def test_receipt_coverage_matches(self):
+        receipts = [{'id': f'r{i}'} for i in range(40)]
+        report_data = stream_pages(None, receipts)
+        self.assert_matches_legacy(report_data, legacy_report(TRANSACTIONS, TAX_PROFILE, receipts))
+
+    def test_no_gst_without_abn(self):
+        report_data = stream_pages(None, tax_profile={'personalInfo': {}})
+        legacy = legacy_report(TRANSACTIONS, {'personalInfo': {}}, [])
+        self.assertEqual((report_data.gst_collected, report_data.gst_paid), (0, 0))
+        self.assert_matches_legacy(report_data, legacy)
+
+    def test_sample_is_bounded(self):
+        report_data = stream_pages(None)
+        self.assertEqual(len(report_data.sample_transactions), automated_reports.PDF_TRANSACTION_DETAIL_LIMIT)
+        self.assertEqual(report_data.sample_transactions[0]['id'], 'txn-0')
+
+
+class TestReportWriters(unittest.TestCase):
+    """Test the streamed exports against the rows the in-memory exports held"""
+
+    def test_csv_rows(self):
+        writer = CSVReportWriter()
+        try:
+            stream_pages(writer)
+            rows = list(csv.DictReader(io.StringIO(writer.finish().decode('utf-8'))))
+        finally:
+            writer.close()
+
+        self.assertEqual(len(rows), len(TRANSACTIONS))
+        for row, transaction in zip(rows, TRANSACTIONS):
+            self.assertEqual(row['id'], transaction['id'])
+            self.assertEqual(row['date'], transaction['postDate'])
+            self.assertEqual(float(row['amount']), abs(float(transaction['amount'])))
+            self.assertEqual(row['tax_category'], fake_categorize(transaction, TAX_PROFILE).category.value)
+
+    def test_json_document(self):
+        receipts = [{'id': 'r1', 'total': 12.5}, {'id': 'r2', 'total': 80}]
+        writer = JSONReportWriter()
+        try:
+            report_data = stream_pages(writer, receipts)
+            document = json.loads(writer.finish({'summary': {'total_income': report_data.total_income},
+                                                 'audit_risks': report_data.audit_risks}))
+        finally:
+            writer.close()
+
+        legacy = legacy_report(TRANSACTIONS, TAX_PROFILE, receipts)
+        self.assertEqual(list(document), ['transactions', 'receipts', 'summary', 'audit_risks'])
+        self.assertEqual(document['receipts'], receipts)
+        self.assertEqual(document['audit_risks'], legacy['audit_risks'])
+        self.assertAlmostEqual(document['summary']['total_income'], legacy['total_income'])
+
+        # Raw transactions are kept, with the categorization alongside
+        self.assertEqual(len(document['transactions']), len(TRANSACTIONS))
+        for streamed, transaction in zip(document['transactions'], TRANSACTIONS):
+            tax_category = streamed.pop('tax_category')
+            streamed.pop('deductible_amount')
+            self.assertEqual(streamed, transaction)
+            self.assertEqual(tax_category, fake_categorize(transaction, TAX_PROFILE).category.value)
+
+    def test_json_without_receipts(self):
+        writer = JSONReportWriter()
+        try:
+            document = json.loads(writer.finish({'summary': {}}))
+        finally:
+            writer.close()
+        self.assertEqual(document, {'transactions': [], 'receipts': [], 'summary': {}})
+
+    def test_excel_sheets(self):
+        generator = AutomatedReportGenerator()
+        writer = ExcelReportWriter()
+        try:
+            report_data = stream_pages(writer)
+            result = asyncio.run(generator._generate_excel_report(report_data, ReportType.ANNUAL_SUMMARY, writer))
+        finally:
+            writer.close()
+
+        self.assertTrue(result['success'])
+        xlsx = base64.b64decode(result['data'])
+        names, transaction_rows = sheet_rows(xlsx, 'All Transactions')
+        self.assertEqual(names, ['Summary', 'Income', 'Deductions', 'All Transactions', 'GST Summary'])
+
+        # Same rows the in-memory workbook wrote, in stream order
+        self.assertEqual(len(transaction_rows), len(TRANSACTIONS) + 1)
+        self.assertEqual([row[1] for row in transaction_rows[1:]], [t['description'] for t in TRANSACTIONS])
+
+        _, income_rows = sheet_rows(xlsx, 'Income')
+        credits = [t for t in TRANSACTIONS if t['direction'] == 'credit']
+        self.assertEqual([row[1] for row in income_rows[1:]], [t['description'] for t in credits])
+        self.assertEqual([float(row[2]) for row in income_rows[1:]], [abs(float(t['amount'])) for t in credits])
+
+        _, deduction_rows = sheet_rows(xlsx, 'Deductions')
+        legacy = legacy_report(TRANSACTIONS, TAX_PROFILE, [])
+        expected = {name: len(category['transactions'])
+                    for name, category in legacy['categories'].items() if category['deductible'] > 0}
+        self.assertEqual({row[0]: int(float(row[3])) for row in deduction_rows[1:]}, expected)
+
+    def test_close_removes_excel_file(self):
+        writer = ExcelReportWriter()
+        path = writer.path
+        writer.close()
+        self.assertFalse(automated_reports.os.path.exists(path))
+
+
+class FakeSnapshotLoader:
+    async def load_async(self, user_id, sections):
+        return SimpleNamespace(tax_profile=TAX_PROFILE)
+
+
+class TestGenerateReport(unittest.TestCase):
+    """Test the generator over a paged transaction stream"""
+
+    def setUp(self):
+        self.generator = AutomatedReportGenerator()
+        self.pages_served = 0
+
+        def iter_user_transactions(user_id, filter_str):
+            for page in PAGES:
+                self.pages_served += 1
+                yield from page
+
+        patchers = [
+            patch.object(automated_reports, 'iter_user_transactions', iter_user_transactions),
+            patch.object(automated_reports, 'categorize_transaction', fake_categorize),
+            patch.object(automated_reports, 'get_user_snapshot_loader', lambda: FakeSnapshotLoader()),
+            patch.object(automated_reports, 'db', None)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def generate(self, output_format):
+        return asyncio.run(self.generator.generate_comprehensive_tax_report(
+            'user-1', ReportType.INDIVIDUAL_TAX_RETURN, '2024', output_format))
+
+    def test_csv_report_streams_every_page(self):
+        result = self.generate(OutputFormat.CSV)
+        self.assertTrue(result['success'])
+        self.assertEqual(self.pages_served, len(PAGES))
+        rows = list(csv.DictReader(io.StringIO(base64.b64decode(result['data']).decode('utf-8'))))
+        self.assertEqual([row['id'] for row in rows], [t['id'] for t in TRANSACTIONS])
+
+    def test_json_report_summary_matches_in_memory_report(self):
+        result = self.generate(OutputFormat.JSON)
+        document = json.loads(base64.b64decode(result['data']))
+        legacy = legacy_report(TRANSACTIONS, TAX_PROFILE, [])
+
+        self.assertAlmostEqual(document['summary']['total_income'], legacy['total_income'])
+        self.assertAlmostEqual(document['summary']['total_deductions'], legacy['total_deductions'])
+        self.assertAlmostEqual(document['gst']['net'], legacy['gst_collected'] - legacy['gst_paid'])
+        self.assertEqual(document['summary']['compliance_score'], legacy['compliance_score'])
+        self.assertEqual(document['summary']['transaction_count'], len(TRANSACTIONS))
+
+    def test_unsupported_format_raises(self):
+        with self.assertRaises(ValueError):
+            self.generator._create_report_writer(OutputFormat.XML)
+        with self.assertRaises(ValueError):
+            self.generate(OutputFormat.XML)
+        self.assertEqual(self.pages_served, 0)
+
+
+class TestDataFingerprint(unittest.TestCase):
+    """Test that the fingerprint follows account changes without paging transactions"""
+
+    def setUp(self):
+        self.generator = AutomatedReportGenerator()
+        self.accounts = [
+            {'id': 'acc-2', 'balance': '310.00', 'availableFunds': '310.00',
+             'lastUpdated': '2024-09-01T08:00:00Z'},
+            {'id': 'acc-1', 'balance': '1520.45', 'availableFunds': '1480.45',
+             'lastUpdated': '2024-09-01T08:00:00Z'}
+        ]
+        self.accounts_available = True
+
+        def get_user_accounts(user_id):
+            if not self.accounts_available:
+                return {'success': False, 'error': 'accounts request failed'}
+            return {'success': True, 'accounts': {'data': copy.deepcopy(self.accounts)}}
+
+        def iter_user_transactions(user_id, filter_str=None):
+            raise AssertionError('fingerprint must not page through transactions')
+
+        patchers = [
+            patch.object(automated_reports, 'get_user_accounts', get_user_accounts),
+            patch.object(automated_reports, 'iter_user_transactions', iter_user_transactions),
+            patch.object(automated_reports, 'db', None)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fingerprint(self):
+        return self.generator.compute_data_fingerprint('user-1', '2024')
+
+    def test_unchanged_accounts_are_stable(self):
+        baseline = self.fingerprint()
+        self.assertEqual(self.fingerprint(), baseline)
+
+        # Account order in the response does not matter
+        self.accounts.reverse()
+        self.assertEqual(self.fingerprint(), baseline)
+
+    def test_account_changes(self):
+        baseline = self.fingerprint()
+
+        self.accounts[0]['lastUpdated'] = '2024-09-02T08:00:00Z'
+        refreshed = self.fingerprint()
+        self.assertNotEqual(refreshed, baseline)
+
+        self.accounts[1]['balance'] = '1400.45'
+        self.assertNotEqual(self.fingerprint(), refreshed)
+
+        self.accounts.append({'id': 'acc-3', 'balance': '0.00', 'availableFunds': '0.00',
+                              'lastUpdated': '2024-09-02T08:00:00Z'})
+        self.assertNotEqual(self.fingerprint(), refreshed)
+
+    def test_failed_accounts_request_never_matches(self):
+        self.accounts_available = False
+        self.assertNotEqual(self.fingerprint(), self.fingerprint())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+Unit Tests for Annual BAS Preparation
+====================================
+
+Tests single-pass BAS preparation: quarter bucketing at quarter boundaries,
+exact Decimal GST totals, agreement with the per-quarter path, and the
+quarter total calculation.
+"""
+
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from backend import australian_business_compliance
+from backend.australian_business_compliance import AustralianBusinessCompliance, BASQuarterData
+
+GST_REGISTERED = {'personalInfo': {'abn': '51824753556'}, 'tax_settings': {'gst_registered': True}}
+
+
+def receipt(receipt_date, gst, merchant='Officeworks'):
+    return {'merchant_name': merchant, 'date': receipt_date, 'gst': gst,
+            'total_amount': float(Decimal(gst) * 11)}
+
+
+def sale(post_date, amount):
+    return {'postDate': post_date, 'amount': amount, 'description': 'Invoice payment'}
+
+
+class TestQuarterIndex(unittest.TestCase):
+    """Test calendar quarter bucketing"""
+
+    def setUp(self):
+        self.compliance = AustralianBusinessCompliance()
+
+    def test_quarter_boundaries(self):
+        cases = {
+            '2025-01-01': 0,
+            '2025-03-31': 0,
+            '2025-03-31T23:59:59Z': 0,
+            '2025-04-01': 1,
+            '2025-06-30T23:59:59+10:00': 1,
+            # The financial year starts in the third calendar quarter
+            '2025-07-01': 2,
+            '2025-07-01T00:00:00Z': 2,
+            '2025-09-30': 2,
+            '2025-09-30T23:59:59Z': 2,
+            '2025-10-01': 3,
+            '2025-12-31': 3,
+            '2025-12-31T23:59:59.999Z': 3,
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(self.compliance._bas_quarter_index(value, 2025), expected)
+
+    def test_dates_outside_year_or_unparseable(self):
+        for value in ('2024-12-31T23:59:59Z', '2026-01-01', '', None, 'yesterday', '31/03/2025'):
+            with self.subTest(value=value):
+                self.assertIsNone(self.compliance._bas_quarter_index(value, 2025))
+
+    def test_date_and_datetime_values(self):
+        self.assertEqual(self.compliance._bas_quarter_index(date(2025, 9, 30), 2025), 2)
+        self.assertEqual(self.compliance._bas_quarter_index(datetime(2025, 12, 31, 23, 59), 2025), 3)
+        self.assertIsNone(self.compliance._bas_quarter_index(datetime(2026, 3, 31), 2025))
+
+
+class TestFinalizeTotals(unittest.TestCase):
+    """Test net GST and refund/payable"""
+
+    def test_totals(self):
+        bas_data = BASQuarterData(period_start=datetime(2025, 7, 1), period_end=datetime(2025, 9, 30),
+                                  sales_gst=Decimal('1000.10'), input_tax_credits=Decimal('1200.30'),
+                                  payg_withholding=Decimal('450.00'), payg_instalment=Decimal('125.05'))
+        AustralianBusinessCompliance()._finalize_bas_totals(bas_data)
+
+        self.assertEqual(bas_data.net_gst, Decimal('-200.20'))
+        self.assertEqual(bas_data.total_refund_payable, Decimal('374.85'))
+
+
+class TestPrepareBasYearData(unittest.TestCase):
+    """Test single-pass preparation of a year"""
+
+    def setUp(self):
+        self.compliance = AustralianBusinessCompliance()
+
+    def test_exact_decimal_gst_totals(self):
+        receipts = [receipt('2025-03-31', '0.10'), receipt('2025-03-31', '0.20'),
+                    receipt('2025-04-01', '0.70'), receipt('2025-12-31', '1.01')]
+        transactions = [sale('2025-09-30T23:59:59Z', '110.00'), sale('2025-10-01T00:00:00Z', '55.00'),
+                        sale('2025-12-31', '-42.00')]
+
+        year_data = self.compliance.prepare_bas_year_data(transactions, receipts, GST_REGISTERED, 2025)
+
+        q1, q2, q3, q4 = year_data.quarters
+        self.assertEqual(q1.purchases_gst, Decimal('0.30'))
+        self.assertEqual(q2.purchases_gst, Decimal('0.70'))
+        self.assertEqual(q3.purchases_gst, Decimal('0'))
+        self.assertEqual(q4.purchases_gst, Decimal('1.01'))
+        self.assertEqual(year_data.purchases_gst, Decimal('2.01'))
+
+        # Sales GST is 1/11th of GST-inclusive receipts; debits are not sales
+        self.assertEqual(q3.sales_gst, Decimal('10'))
+        self.assertEqual(q4.sales_gst, Decimal('5'))
+        self.assertEqual(year_data.sales_gst, Decimal('15'))
+
+        for field in ('sales_gst', 'purchases_gst', 'input_tax_credits', 'net_gst', 'total_refund_payable'):
+            with self.subTest(field=field):
+                self.assertEqual(getattr(year_data, field), sum(getattr(q, field) for q in year_data.quarters))
+        self.assertEqual(year_data.net_gst, year_data.sales_gst - year_data.input_tax_credits)
+        self.assertTrue(all(isinstance(getattr(year_data, field), Decimal)
+                            for field in ('sales_gst', 'input_tax_credits', 'net_gst')))
+
+    def test_quarter_periods(self):
+        year_data = self.compliance.prepare_bas_year_data([], [], GST_REGISTERED, 2025)
+        self.assertEqual([(q.period_start.date(), q.period_end.date()) for q in year_data.quarters], [
+            (date(2025, 1, 1), date(2025, 3, 31)),
+            (date(2025, 4, 1), date(2025, 6, 30)),
+            (date(2025, 7, 1), date(2025, 9, 30)),
+            (date(2025, 10, 1), date(2025, 12, 31)),
+        ])
+
+    def test_records_outside_year_are_skipped(self):
+        receipts = [receipt('2024-12-31', '1.00'), receipt('not a date', '1.00'), receipt('2025-07-01', '1.00')]
+        transactions = [sale('2026-01-01T00:00:00Z', '110.00'), {'amount': '110.00'}]
+
+        year_data = self.compliance.prepare_bas_year_data(transactions, receipts, GST_REGISTERED, 2025)
+
+        self.assertEqual(year_data.skipped_records, 4)
+        self.assertEqual(year_data.quarters[2].purchases_gst, Decimal('1.00'))
+        self.assertEqual(year_data.sales_gst, Decimal('0'))
+
+    def test_matches_per_quarter_preparation(self):
+        receipts = [receipt('2025-02-14', '4.55'), receipt('2025-05-20', '12.30', merchant='Bunnings'),
+                    receipt('2025-08-08', '0.91'), receipt('2025-11-30', '27.27')]
+        transactions = [sale('2025-01-15', '1650.00'), sale('2025-06-01', '330.33'),
+                        sale('2025-07-01', '99.99'), sale('2025-11-11', '2200.00')]
+
+        year_data = self.compliance.prepare_bas_year_data(transactions, receipts, GST_REGISTERED, 2025)
+
+        for bas_quarter in year_data.quarters:
+            with self.subTest(quarter=bas_quarter.period_start.month):
+                expected = self.compliance.prepare_bas_quarter_data(
+                    transactions, receipts, GST_REGISTERED, bas_quarter.period_start, bas_quarter.period_end
+                )
+                for field in ('sales_gst', 'purchases_gst', 'input_tax_credits', 'net_gst',
+                              'total_refund_payable'):
+                    self.assertEqual(getattr(bas_quarter, field), getattr(expected, field))
+                self.assertEqual(len(bas_quarter.line_items), len(expected.line_items))
+
+    def test_each_receipt_is_categorized_once(self):
+        categorize = Mock(side_effect=australian_business_compliance.categorize_receipt)
+        receipts = [receipt('2025-03-01', '1.00'), receipt('2025-09-01', '2.00')]
+
+        with patch.object(australian_business_compliance, 'categorize_receipt', categorize):
+            self.compliance.prepare_bas_year_data(iter([]), iter(receipts), GST_REGISTERED, 2025)
+
+        self.assertEqual(categorize.call_count, 2)
+
+    def test_missing_categorizer_raises(self):
+        with patch.object(australian_business_compliance, 'categorize_receipt', None):
+            with self.assertRaises(RuntimeError):
+                self.compliance.prepare_bas_year_data([], [receipt('2025-03-01', '1.00')], GST_REGISTERED, 2025)
+
+
+if __name__ == '__main__':
+    unittest.main()
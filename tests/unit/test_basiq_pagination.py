@@ -0,0 +1,137 @@
+"""
+Unit Tests for BASIQ links.next Pagination
+=========================================
+
+Tests the streaming transaction iterators against a mocked pooled session:
+multi-page responses, an empty last page, a missing links.next, relative
+next links and failures part-way through a stream.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import requests
+
+from src.integrations.basiq_client import BasiqClient
+
+try:
+    from backend import basiq_api
+except ImportError:  # python-dotenv is not installed
+    basiq_api = None
+
+BASE_URL = 'https://au-api.basiq.io'
+
+
+def page(ids, next_url=None, links=True):
+    body = {'type': 'list', 'data': [{'id': transaction_id, 'amount': '-1.00'} for transaction_id in ids]}
+    if links:
+        body['links'] = {'self': 'ignored'}
+        if next_url is not None:
+            body['links']['next'] = next_url
+    return body
+
+
+class FakeSession:
+    """Pooled session stand-in serving canned pages by URL"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.calls.append((url, params))
+        body = self.pages[url]
+        if isinstance(body, Exception):
+            raise body
+        response = Mock(status_code=200)
+        response.json.return_value = body
+        response.raise_for_status.return_value = None
+        return response
+
+
+class TestTransactionPagination(unittest.TestCase):
+    """Test links.next iteration on the BASIQ client"""
+
+    def setUp(self):
+        self.client = BasiqClient()
+        # A cached token keeps the iterators from requesting one
+        self.client.access_token = 'token'
+        self.client.token_expires = datetime.now() + timedelta(hours=1)
+
+    def stream(self, pages, iterator):
+        session = FakeSession(pages)
+        with patch('src.integrations.basiq_client.get_basiq_http_session', return_value=session):
+            return [item['id'] for item in iterator()], session.calls
+
+    def test_multi_page_account_transactions(self):
+        first = f'{BASE_URL}/users/u1/accounts/a1/transactions'
+        second = f'{first}?next=p2'
+        third = f'{first}?next=p3'
+        ids, calls = self.stream(
+            {first: page(['t1', 't2'], second), second: page(['t3'], third), third: page(['t4'])},
+            lambda: self.client.iter_account_transactions('u1', 'a1', '2025-01-01', '2025-03-31')
+        )
+
+        self.assertEqual(ids, ['t1', 't2', 't3', 't4'])
+        self.assertEqual([url for url, _ in calls], [first, second, third])
+        # Filters go on the first request only; next links already carry them
+        self.assertEqual(calls[0][1], {'filter.transaction.postDate.from': '2025-01-01',
+                                       'filter.transaction.postDate.to': '2025-03-31'})
+        self.assertEqual([params for _, params in calls[1:]], [None, None])
+
+    def test_empty_last_page(self):
+        first = f'{BASE_URL}/users/u1/transactions'
+        second = f'{first}?next=p2'
+        ids, calls = self.stream(
+            {first: page(['t1'], second), second: page([], None)},
+            lambda: self.client.iter_user_transactions('u1')
+        )
+        self.assertEqual(ids, ['t1'])
+        self.assertEqual(len(calls), 2)
+
+    def test_missing_links_ends_stream(self):
+        first = f'{BASE_URL}/users/u1/transactions'
+        ids, calls = self.stream({first: page(['t1', 't2'], links=False)},
+                                 lambda: self.client.iter_user_transactions('u1', "account.id.eq('a1')"))
+        self.assertEqual(ids, ['t1', 't2'])
+        self.assertEqual(calls, [(first, {'filter': "account.id.eq('a1')"})])
+
+    def test_relative_and_self_referencing_next_links(self):
+        first = f'{BASE_URL}/users/u1/transactions'
+        second = f'{BASE_URL}/users/u1/transactions?next=p2'
+        ids, calls = self.stream(
+            {first: page(['t1'], '/users/u1/transactions?next=p2'), second: page(['t2'], second)},
+            lambda: self.client.iter_user_transactions('u1')
+        )
+        # A next link pointing at the current page stops instead of looping
+        self.assertEqual(ids, ['t1', 't2'])
+        self.assertEqual(len(calls), 2)
+
+    def test_pages_are_fetched_lazily(self):
+        first = f'{BASE_URL}/users/u1/transactions'
+        second = f'{first}?next=p2'
+        session = FakeSession({first: page(['t1'], second),
+                               second: requests.exceptions.ConnectionError('reset')})
+        with patch('src.integrations.basiq_client.get_basiq_http_session', return_value=session):
+            iterator = self.client.iter_user_transactions('u1')
+            self.assertEqual(session.calls, [])
+            self.assertEqual(next(iterator)['id'], 't1')
+            self.assertEqual(len(session.calls), 1)
+            with self.assertRaises(requests.exceptions.RequestException):
+                next(iterator)
+
+
+@unittest.skipIf(basiq_api is None, 'backend.basiq_api requires python-dotenv')
+class TestBasiqApiIterators(unittest.TestCase):
+    """Test that the module-level helper streams through the shared client"""
+
+    def test_iter_user_transactions_delegates(self):
+        with patch.object(basiq_api.basiq_client, 'iter_user_transactions',
+                          return_value=iter([{'id': 't1'}])) as iterate:
+            self.assertEqual(list(basiq_api.iter_user_transactions('u1', "account.id.eq('a1')")), [{'id': 't1'}])
+        iterate.assert_called_once_with('u1', "account.id.eq('a1')")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Unit Tests for the BASIQ Sync Scheduler
+======================================
+
+Tests per-request pacing through the shared token bucket and the handling
+of timed-out workers that keep running into later sync cycles.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from backend.tasks.basiq_sync import BasiqSyncScheduler
+from src.integrations.http_session import PooledHTTPSession, TokenBucket
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1, stop_event=None):
+        self.acquired += tokens
+        return True
+
+
+class FakeConfig:
+    environment = 'development'
+
+    def __init__(self, **overrides):
+        self.config = {
+            'sync_workers': 4,
+            'sync_user_timeout_seconds': 0.2,
+            'sync_rate_limit_per_second': 1000.0,
+            'sync_rate_limit_burst': 1000,
+            **overrides
+        }
+
+    def get_config(self):
+        return self.config
+
+
+def new_results():
+    return {'users_processed': 0, 'users_successful': 0, 'users_failed': 0,
+            'total_transactions': 0, 'total_accounts': 0, 'errors': []}
+
+
+class TestRequestPacing(unittest.TestCase):
+    """Test that the bucket is drawn per HTTP attempt"""
+
+    def test_every_attempt_takes_a_token(self):
+        limiter = CountingLimiter()
+        session = PooledHTTPSession('basiq-test', max_retries=2, backoff_base=0, rate_limiter=limiter)
+        session.session.request = Mock(side_effect=[Mock(status_code=503, headers={}),
+                                                    Mock(status_code=503, headers={}),
+                                                    Mock(status_code=200, headers={}),
+                                                    Mock(status_code=200, headers={})])
+
+        response = session.get('https://au-api.basiq.io/users/abc123/accounts')
+        session.get('https://au-api.basiq.io/users/abc123/transactions')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(limiter.acquired, 4)
+
+    def test_token_bucket_holds_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # One token from the burst, five refilled at 50/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_acquire_stops_with_event(self):
+        bucket = TokenBucket(rate=0.01, capacity=1)
+        bucket.acquire()
+        stop = threading.Event()
+        stop.set()
+        self.assertFalse(bucket.acquire(stop_event=stop))
+
+
+class TestSyncCycles(unittest.TestCase):
+    """Test timeouts and stragglers across cycles"""
+
+    def setUp(self):
+        self.scheduler = BasiqSyncScheduler()
+        self.scheduler.config = FakeConfig()
+        self.release = threading.Event()
+        self.calls = []
+
+        def sync_user(user_id, basiq_user_id):
+            self.calls.append(user_id)
+            if user_id == 'slow':
+                self.release.wait(5)
+            return {'success': True, 'transactions_count': 3, 'accounts_count': 1}
+
+        self.scheduler._sync_user = sync_user
+
+    def tearDown(self):
+        self.release.set()
+
+    def wait_for(self, condition, timeout=3):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertTrue(condition())
+
+    def test_timed_out_user_is_skipped_until_it_returns(self):
+        users = [('slow', 'b-slow'), ('fast', 'b-fast')]
+
+        first = new_results()
+        self.scheduler._run_sync_cycle(users, first)
+        self.assertEqual((first['users_successful'], first['users_failed']), (1, 1))
+        self.assertIn('timed out', first['errors'][0]['error'])
+        self.assertEqual(self.scheduler.get_progress()['timed_out'], 1)
+
+        # The slow worker is still running, so the next cycle leaves that user alone
+        second = new_results()
+        self.scheduler._run_sync_cycle(users, second)
+        progress = self.scheduler.get_progress()
+        self.assertEqual(self.calls.count('slow'), 1)
+        self.assertEqual(second['users_processed'], 1)
+        self.assertEqual(progress['skipped_in_flight'], 1)
+        self.assertEqual(progress['stragglers'], 1)
+
+        # When the straggler returns it does not touch the current cycle's figures
+        self.release.set()
+        self.wait_for(lambda: self.scheduler.get_progress()['stragglers'] == 0)
+        progress = self.scheduler.get_progress()
+        self.assertEqual((progress['completed'], progress['in_flight']), (1, 0))
+        self.assertEqual(second['users_processed'], 1)
+        self.wait_for(lambda: not self.scheduler.active_syncs)
+
+        third = new_results()
+        self.scheduler._run_sync_cycle(users, third)
+        self.assertEqual(third['users_successful'], 2)
+        self.assertEqual(self.calls.count('slow'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Unit Tests for the BASIQ Sync Store
+==================================
+
+Tests the per-account cursor (overlap window, advancement, dedupe), the
+in-process transaction store, and the staleness check that decides when
+synced history may be served instead of calling BASIQ.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import requests
+
+from src.integrations.basiq_client import BasiqClient
+from src.integrations.basiq_sync_store import BasiqSyncStore
+
+
+def memory_store(**kwargs):
+    store = BasiqSyncStore(**kwargs)
+    store.db = None  # Never touch Firestore from unit tests
+    return store
+
+
+def basiq_transaction(transaction_id, post_date, status='posted', amount='-12.50'):
+    return {
+        'id': transaction_id,
+        'amount': amount,
+        'description': f'EFTPOS {transaction_id}',
+        'postDate': f'{post_date}T00:00:00Z',
+        'status': status,
+        'class': {'title': 'Food'},
+        'merchant': {'businessName': 'Cafe'}
+    }
+
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+class TestSyncCursor(unittest.TestCase):
+    """Test cursor windows, advancement and dedupe"""
+
+    def setUp(self):
+        self.store = memory_store(overlap_days=2)
+
+    def test_delta_from_date(self):
+        self.assertEqual(self.store.delta_from_date(None, days_back=30), days_ago(30))
+        cursor = {'last_post_date': '2025-03-10'}
+        # Re-reads the overlap window before the last seen post date
+        self.assertEqual(self.store.delta_from_date(cursor, days_back=30), '2025-03-08')
+
+    def test_advance_cursor_keeps_only_overlap_ids(self):
+        first = self.store.advance_cursor(None, '2025-03-01', [
+            {'id': 't1', 'postDate': '2025-03-01T00:00:00Z', 'status': 'posted'},
+            {'id': 't2', 'postDate': '2025-03-05T00:00:00Z', 'status': 'posted'},
+            {'id': 't3', 'postDate': '2025-03-06T00:00:00Z', 'status': 'pending'}
+        ])
+        self.assertEqual(first['last_post_date'], '2025-03-06')
+        self.assertEqual(first['first_synced_date'], '2025-03-01')
+        self.assertEqual(set(first['recent_ids']), {'t2', 't3'})
+
+        second = self.store.advance_cursor(first, '2025-03-04', [
+            {'id': 't4', 'postDate': '2025-03-09T00:00:00Z', 'status': 'posted'}
+        ])
+        self.assertEqual(second['last_post_date'], '2025-03-09')
+        # The backfill start never moves forward
+        self.assertEqual(second['first_synced_date'], '2025-03-01')
+        self.assertEqual(set(second['recent_ids']), {'t4'})
+
+    def test_empty_window_keeps_cursor(self):
+        cursor = self.store.advance_cursor(None, '2025-03-01', [])
+        self.assertIsNone(cursor['last_post_date'])
+        self.assertEqual(cursor['recent_ids'], {})
+        self.assertEqual(self.store.delta_from_date(cursor, days_back=7), days_ago(7))
+
+    def test_is_new_or_changed(self):
+        cursor = {'recent_ids': {'t1': {'post_date': '2025-03-05', 'status': 'pending'}}}
+        self.assertTrue(self.store.is_new_or_changed(None, basiq_transaction('t1', '2025-03-05')))
+        self.assertTrue(self.store.is_new_or_changed(cursor, basiq_transaction('t2', '2025-03-05')))
+        self.assertFalse(self.store.is_new_or_changed(cursor, basiq_transaction('t1', '2025-03-05', 'pending')))
+        # pending -> posted is a change
+        self.assertTrue(self.store.is_new_or_changed(cursor, basiq_transaction('t1', '2025-03-05', 'posted')))
+
+    def test_upsert_is_idempotent(self):
+        record = {'basiq_transaction_id': 't1', 'account_id': 'acc-1', 'amount': -5.0,
+                  'date': '2025-03-05T00:00:00Z', 'status': 'pending'}
+        self.store.upsert_transactions('user-1', [record])
+        self.store.upsert_transactions('user-1', [dict(record, status='posted')])
+
+        transactions = self.store.get_transactions('user-1', 'acc-1', '2025-03-01')
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(transactions[0]['status'], 'posted')
+        self.assertEqual(self.store.get_transactions('user-1', 'acc-1', '2025-03-06'), [])
+
+
+class TestStaleness(unittest.TestCase):
+    """Test that old mirrors are not served"""
+
+    def setUp(self):
+        self.store = memory_store(max_staleness=timedelta(hours=12))
+
+    def save(self, synced_hours_ago):
+        self.store.save_cursor('user-1', 'acc-1', {
+            'last_post_date': days_ago(1),
+            'first_synced_date': days_ago(90),
+            'recent_ids': {},
+            'last_synced_at': (datetime.now() - timedelta(hours=synced_hours_ago)).isoformat()
+        })
+
+    def test_covers_requires_reach_and_freshness(self):
+        self.save(synced_hours_ago=1)
+        self.assertTrue(self.store.covers('user-1', 'acc-1', days_ago(60)))
+        self.assertFalse(self.store.covers('user-1', 'acc-1', days_ago(120)))
+
+        self.save(synced_hours_ago=13)
+        self.assertFalse(self.store.covers('user-1', 'acc-1', days_ago(60)))
+
+    def test_missing_or_malformed_sync_time_is_stale(self):
+        self.assertFalse(self.store.is_fresh(None))
+        self.assertFalse(self.store.is_fresh({'last_synced_at': 'yesterday'}))
+
+
+class TestSyncedAccountTransactions(unittest.TestCase):
+    """Test the client read path over the store"""
+
+    def setUp(self):
+        self.client = BasiqClient()
+        self.client.sync_store = memory_store(max_staleness=timedelta(hours=12))
+        self.client.match_transaction_with_receipts = Mock(return_value=False)
+        self.client.get_account_transactions = Mock(return_value={'success': True, 'source': 'api'})
+        self.api_pages = [[basiq_transaction('t1', days_ago(3))]]
+
+        def iter_account_transactions(user_id, account_id, from_date=None, to_date=None):
+            return iter(self.api_pages.pop(0))
+
+        self.iter_account_transactions = Mock(side_effect=iter_account_transactions)
+        self.client.iter_account_transactions = self.iter_account_transactions
+
+        # Initial backfill of 90 days
+        self.client._sync_account('user-1', 'acc-1', None, days_ago(90), days_ago(0))
+
+    def age_cursor(self, hours):
+        cursor = self.client.sync_store.get_cursor('user-1', 'acc-1')
+        cursor['last_synced_at'] = (datetime.now() - timedelta(hours=hours)).isoformat()
+        self.client.sync_store.save_cursor('user-1', 'acc-1', cursor)
+
+    def test_fresh_history_is_served_locally(self):
+        result = self.client.get_synced_account_transactions('user-1', 'acc-1', days_ago(30))
+        self.assertEqual(result['source'], 'sync_store')
+        self.assertEqual([t['id'] for t in result['transactions']['data']], ['t1'])
+        self.assertEqual(self.iter_account_transactions.call_count, 1)
+
+    def test_stale_history_runs_delta_sync_first(self):
+        self.age_cursor(hours=24)
+        self.api_pages.append([basiq_transaction('t1', days_ago(3)), basiq_transaction('t2', days_ago(1))])
+
+        result = self.client.get_synced_account_transactions('user-1', 'acc-1', days_ago(30))
+
+        self.assertEqual(result['source'], 'sync_store')
+        self.assertEqual({t['id'] for t in result['transactions']['data']}, {'t1', 't2'})
+        delta_from = self.iter_account_transactions.call_args[0][2]
+        self.assertEqual(delta_from, days_ago(5))
+        self.assertTrue(self.client.sync_store.is_fresh(self.client.sync_store.get_cursor('user-1', 'acc-1')))
+
+    def test_failed_delta_sync_falls_back_to_api(self):
+        self.age_cursor(hours=24)
+        self.client.iter_account_transactions = Mock(side_effect=requests.exceptions.ConnectionError('down'))
+
+        result = self.client.get_synced_account_transactions('user-1', 'acc-1', days_ago(30))
+        self.assertEqual(result['source'], 'api')
+
+    def test_window_beyond_history_uses_api(self):
+        result = self.client.get_synced_account_transactions('user-1', 'acc-1', days_ago(365))
+        self.assertEqual(result['source'], 'api')
+
+
+if __name__ == '__main__':
+    unittest.main()
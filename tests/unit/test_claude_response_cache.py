@@ -0,0 +1,201 @@
+"""
+Unit Tests for the Claude Response Cache
+=======================================
+
+Tests content-addressed keys, TTL and size-bounded eviction, in-flight
+coalescing, and ClaudeClient against a local stub Messages API server.
+"""
+
+import json
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from src.integrations.claude_response_cache import ClaudeResponseCache, response_cache_key
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+
+def api_result(text, input_tokens=120, output_tokens=30):
+    return {
+        'model': 'claude-test',
+        'content': [{'type': 'text', 'text': text}],
+        'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClaudeResponseCache(unittest.TestCase):
+    """Test caching and coalescing independent of HTTP"""
+
+    def test_key_covers_request_content(self):
+        messages = [{'role': 'user', 'content': 'Categorise: BUNNINGS 123'}]
+        key = response_cache_key('claude-test', 'system', messages, 0.1, 4000)
+
+        self.assertEqual(key, response_cache_key('claude-test', 'system', [dict(m) for m in messages], 0.1, 4000))
+        self.assertNotEqual(key, response_cache_key('claude-other', 'system', messages, 0.1, 4000))
+        self.assertNotEqual(key, response_cache_key('claude-test', 'other', messages, 0.1, 4000))
+        self.assertNotEqual(key, response_cache_key('claude-test', 'system', messages, 0.7, 4000))
+
+    def test_hits_count_tokens_saved(self):
+        cache = ClaudeResponseCache()
+        calls = []
+
+        def call():
+            calls.append(1)
+            return api_result('D5')
+
+        self.assertEqual(cache.get_or_call('k', call), (api_result('D5'), False))
+        self.assertEqual(cache.get_or_call('k', call), (api_result('D5'), True))
+
+        stats = cache.get_stats()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['tokens_saved'], 150)
+        self.assertEqual(stats['hit_rate'], 50.0)
+
+    def test_ttl_and_size_bounds(self):
+        clock = FakeClock()
+        cache = ClaudeResponseCache(ttl_seconds=60, max_entries=3, clock=clock)
+        for i in range(5):
+            cache.put(f'k{i}', api_result(str(i)))
+        self.assertIsNone(cache.get('k0'))
+        self.assertIsNotNone(cache.get('k4'))
+        self.assertEqual(cache.get_stats()['evictions'], 2)
+
+        clock.now += 61
+        self.assertIsNone(cache.get('k4'))
+
+        size = len(json.dumps(api_result('x' * 100), separators=(',', ':')))
+        small = ClaudeResponseCache(max_bytes=size * 2)
+        for i in range(3):
+            small.put(f'k{i}', api_result('x' * 100))
+        self.assertEqual(small.get_stats()['entries'], 2)
+
+    def test_uncacheable_and_failed_calls_are_not_stored(self):
+        cache = ClaudeResponseCache()
+        cache.get_or_call('empty', lambda: {'content': []}, cacheable=lambda r: bool(r.get('content')))
+        self.assertIsNone(cache.get('empty'))
+
+        def fail():
+            raise TimeoutError('upstream timeout')
+
+        with self.assertRaises(TimeoutError):
+            cache.get_or_call('fail', fail)
+        self.assertEqual(cache.get_stats()['in_flight'], 0)
+
+    def test_concurrent_identical_calls_share_one_request(self):
+        cache = ClaudeResponseCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return api_result('shared')
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_call('k', slow_call)))
+                   for _ in range(10)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while cache.get_stats()['coalesced'] < 9:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r[0]['content'][0]['text'] for r in results], ['shared'] * 10)
+        self.assertEqual(sorted(r[1] for r in results), [False] + [True] * 9)
+
+
+class StubMessagesHandler(BaseHTTPRequestHandler):
+    """Minimal Messages API that counts requests"""
+
+    requests_seen = 0
+    delay = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).requests_seen += 1
+        time.sleep(self.delay)
+        payload = json.dumps(api_result(f"echo: {body['messages'][-1]['content']}")).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@unittest.skipIf(requests is None, "requests is not installed")
+class TestClaudeClientCaching(unittest.TestCase):
+    """ClaudeClient against a local stub server"""
+
+    def setUp(self):
+        StubMessagesHandler.requests_seen = 0
+        StubMessagesHandler.delay = 0.0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubMessagesHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        env = {
+            'CLAUDE_API_KEY': 'sk-ant-api-test',
+            'CLAUDE_API_URL': f'http://127.0.0.1:{self.server.server_port}/v1/messages'
+        }
+        with mock.patch.dict(os.environ, env):
+            from src.integrations.claude_client import ClaudeClient
+            self.client = ClaudeClient()
+        self.client.response_cache = ClaudeResponseCache()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_repeated_prompt_served_from_cache(self):
+        messages = [{'role': 'user', 'content': 'BUNNINGS WAREHOUSE'}]
+        first = self.client._make_api_call(messages, 'Categorise this expense')
+        second = self.client._make_api_call(messages, 'Categorise this expense')
+
+        self.assertTrue(first.success)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.content, 'echo: BUNNINGS WAREHOUSE')
+        self.assertEqual(StubMessagesHandler.requests_seen, 1)
+        self.assertEqual(self.client.get_cache_stats()['tokens_saved'], 150)
+
+    def test_concurrent_calls_coalesce(self):
+        StubMessagesHandler.delay = 0.2
+        messages = [{'role': 'user', 'content': 'dashboard refresh'}]
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.client._make_api_call(messages)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(StubMessagesHandler.requests_seen, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
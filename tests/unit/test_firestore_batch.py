@@ -0,0 +1,209 @@
+"""
+Unit Tests for Batched Firestore Writes
+======================================
+
+Tests per-document merging, 500-write chunking and the commit failure path,
+including that increments are never replayed after a failed commit.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from backend.utils import firestore_batch
+from backend.utils.firestore_batch import BatchCommitError, FirestoreWriteBatcher, MAX_BATCH_WRITES
+
+
+class FakeIncrement:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, FakeIncrement) and other.value == self.value
+
+    def __repr__(self):
+        return f'Increment({self.value})'
+
+
+class FakeDocRef:
+    def __init__(self, path):
+        self.path = path
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, doc_ref, data, merge=False):
+        self.writes.append(('merge' if merge else 'set', doc_ref.path, data))
+
+    def update(self, doc_ref, data):
+        self.writes.append(('update', doc_ref.path, data))
+
+    def commit(self):
+        self.db.commits.append(self.writes)
+        error = self.db.fail(self.writes)
+        if error:
+            raise error
+        self.db.applied.extend(self.writes)
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, document_id):
+        return FakeDocRef(f'{self.name}/{document_id}')
+
+
+class FakeFirestore:
+    def __init__(self, fail=lambda writes: None):
+        self.fail = fail
+        self.commits = []
+        self.applied = []
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def collection(self, name):
+        return FakeCollection(name)
+
+
+class BatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(firestore_batch, 'Increment', FakeIncrement)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestMerging(BatcherTestCase):
+    """Test that writes to one document coalesce"""
+
+    def setUp(self):
+        super().setUp()
+        self.db = FakeFirestore()
+        self.batcher = FirestoreWriteBatcher(self.db)
+
+    def test_updates_merge_fields(self):
+        self.batcher.update('transfer_rules', 'r1', {'retry_count': 1, 'last_error': 'timeout'})
+        self.batcher.update('transfer_rules', 'r1', {'retry_count': 0, 'last_error': None})
+        self.assertEqual(len(self.batcher), 1)
+        self.assertEqual(self.batcher.flush(), 1)
+        self.assertEqual(self.db.applied, [('update', 'transfer_rules/r1', {'retry_count': 0, 'last_error': None})])
+
+    def test_set_replaces_earlier_writes(self):
+        self.batcher.increment('goals', 'g1', 'currentAmount', 10.0)
+        self.batcher.update('goals', 'g1', {'name': 'Holiday'})
+        self.batcher.set('goals', 'g1', {'currentAmount': 0.0})
+        self.batcher.flush()
+        self.assertEqual(self.db.applied, [('set', 'goals/g1', {'currentAmount': 0.0})])
+
+    def test_merge_set(self):
+        self.batcher.set('goals', 'g1', {'a': 1}, merge=True)
+        self.batcher.set('goals', 'g1', {'b': 2}, merge=True)
+        self.batcher.flush()
+        self.assertEqual(self.db.applied, [('merge', 'goals/g1', {'a': 1, 'b': 2})])
+
+    def test_increments_are_summed(self):
+        self.batcher.increment('goals', 'g1', 'currentAmount', 25.0, data={'updatedAt': 't1'})
+        self.batcher.increment('goals', 'g1', 'currentAmount', 12.5, data={'updatedAt': 't2'})
+        self.batcher.increment('goals', 'g2', 'currentAmount', 5.0)
+        self.batcher.flush()
+
+        self.assertEqual(self.db.applied, [
+            ('update', 'goals/g1', {'updatedAt': 't2', 'currentAmount': FakeIncrement(37.5)}),
+            ('update', 'goals/g2', {'currentAmount': FakeIncrement(5.0)})
+        ])
+        stats = self.batcher.get_stats()
+        self.assertEqual((stats['mutations'], stats['writes'], stats['commits'], stats['pending']), (3, 2, 1, 0))
+
+    def test_context_manager_flushes(self):
+        with FirestoreWriteBatcher(self.db) as writer:
+            writer.update('goals', 'g1', {'a': 1})
+        self.assertEqual(len(self.db.applied), 1)
+
+
+class TestChunking(BatcherTestCase):
+    """Test the 500-write batch limit"""
+
+    def test_flush_commits_in_chunks_of_500(self):
+        db = FakeFirestore()
+        batcher = FirestoreWriteBatcher(db, max_batch_size=1000, auto_flush=False)
+        for i in range(1201):
+            batcher.update('transfer_rules', f'r{i}', {'n': i})
+
+        self.assertEqual(batcher.flush(), 1201)
+        self.assertEqual([len(writes) for writes in db.commits], [500, 500, 201])
+
+    def test_full_batch_flushes_automatically(self):
+        db = FakeFirestore()
+        batcher = FirestoreWriteBatcher(db, max_batch_size=3)
+        for i in range(7):
+            batcher.update('transfer_rules', f'r{i}', {'n': i})
+
+        self.assertEqual([len(writes) for writes in db.commits], [3, 3])
+        self.assertEqual(len(batcher), 1)
+
+        # Repeated writes to pending documents do not count towards the batch
+        batcher.update('transfer_rules', 'r6', {'n': 60})
+        self.assertEqual(len(db.commits), 2)
+
+
+class TestFlushFailures(BatcherTestCase):
+    """Test retries after a failed commit"""
+
+    def test_bad_document_does_not_drop_the_chunk(self):
+        db = FakeFirestore(fail=lambda writes: (
+            ValueError('No document to update') if any(path == 'transfer_rules/deleted' for _, path, _ in writes)
+            else None
+        ))
+        batcher = FirestoreWriteBatcher(db)
+        for document_id in ('r1', 'deleted', 'r2'):
+            batcher.update('transfer_rules', document_id, {'retry_count': 0})
+
+        self.assertEqual(batcher.flush(), 2)
+        self.assertEqual(sorted(path for _, path, _ in db.applied), ['transfer_rules/r1', 'transfer_rules/r2'])
+        stats = batcher.get_stats()
+        self.assertEqual((stats['failed_writes'], stats['unconfirmed_writes']), (1, 0))
+
+    def test_increments_are_not_replayed_after_failed_commit(self):
+        attempts = []
+
+        def fail_first_commit(writes):
+            attempts.append(writes)
+            return TimeoutError('Deadline exceeded') if len(attempts) == 1 else None
+
+        db = FakeFirestore(fail=fail_first_commit)
+        batcher = FirestoreWriteBatcher(db)
+        batcher.increment('goals', 'g1', 'currentAmount', 50.0)
+        batcher.update('transfer_rules', 'r1', {'retry_count': 0})
+        batcher.increment('goals', 'g2', 'currentAmount', 20.0)
+
+        with self.assertRaises(BatchCommitError) as raised:
+            batcher.flush()
+
+        self.assertEqual(raised.exception.documents, [('goals', 'g1'), ('goals', 'g2')])
+        self.assertIsInstance(raised.exception.cause, TimeoutError)
+        # Only the plain update was retried
+        self.assertEqual(db.applied, [('update', 'transfer_rules/r1', {'retry_count': 0})])
+        self.assertEqual(batcher.get_stats()['unconfirmed_writes'], 2)
+
+    def test_other_chunks_commit_before_error_is_raised(self):
+        db = FakeFirestore(fail=lambda writes: (
+            TimeoutError('Deadline exceeded') if any(path == 'goals/g0' for _, path, _ in writes) else None
+        ))
+        batcher = FirestoreWriteBatcher(db, max_batch_size=2, auto_flush=False)
+        for i in range(5):
+            batcher.increment('goals', f'g{i}', 'currentAmount', 1.0)
+
+        with self.assertRaises(BatchCommitError) as raised:
+            batcher.flush()
+
+        self.assertEqual(raised.exception.documents, [('goals', 'g0'), ('goals', 'g1')])
+        self.assertEqual([path for _, path, _ in db.applied], ['goals/g2', 'goals/g3', 'goals/g4'])
+        self.assertEqual(len(batcher), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
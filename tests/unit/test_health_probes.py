@@ -0,0 +1,170 @@
+"""
+Unit Tests for the Health Probe Scheduler
+========================================
+
+Tests concurrent probe runs, per-probe intervals and timeouts, and the
+staleness and readiness reported by immutable health snapshots.
+"""
+
+import threading
+import time
+import unittest
+from enum import Enum
+from types import MappingProxyType
+
+from backend.monitoring.health_probes import (
+    DEGRADED, HEALTHY, UNHEALTHY, UNKNOWN,
+    HealthProbe, HealthProbeScheduler, HealthSnapshot, ProbeResult, default_status
+)
+
+
+class Status(Enum):
+    HEALTHY = 'healthy'
+    DEGRADED = 'degraded'
+
+
+class ServiceHealth:
+    def __init__(self, status):
+        self.status = status
+
+
+def snapshot_with(probes, results):
+    return HealthSnapshot(
+        probes=MappingProxyType({probe.name: probe for probe in probes}),
+        results=MappingProxyType({result.name: result for result in results})
+    )
+
+
+class TestHealthSnapshot(unittest.TestCase):
+    """Test status roll-up, staleness and readiness without threads"""
+
+    def setUp(self):
+        self.database = HealthProbe('database', check=lambda: True, interval=10, timeout=5, critical=True)
+        self.cache = HealthProbe('cache', check=lambda: True, interval=10, timeout=5)
+
+    def test_default_status(self):
+        self.assertEqual(default_status(ServiceHealth(Status.DEGRADED)), DEGRADED)
+        self.assertEqual(default_status({'status': 'unhealthy'}), UNHEALTHY)
+        self.assertEqual(default_status(False), UNHEALTHY)
+        self.assertEqual(default_status({'hit_rate': 90}), HEALTHY)
+
+    def test_pending_component_blocks_readiness(self):
+        snapshot = snapshot_with([self.database, self.cache], [])
+        ready, reasons = snapshot.readiness(now=1000)
+
+        self.assertFalse(ready)
+        self.assertIn('database: awaiting first health probe', reasons)
+        self.assertEqual(snapshot.component('cache', now=1000)['status'], UNKNOWN)
+        self.assertEqual(snapshot.overall_status(now=1000), DEGRADED)
+
+    def test_staleness_is_reported_per_component(self):
+        snapshot = snapshot_with([self.database, self.cache], [
+            ProbeResult('database', HEALTHY, checked_at=1000, response_time_ms=3.0, value={'overall': 'healthy'}),
+            ProbeResult('cache', HEALTHY, checked_at=960, response_time_ms=1.0, value={})
+        ])
+        components = snapshot.components(now=1010)
+
+        # Stale after 2 intervals + timeout = 25s
+        self.assertFalse(components['database']['stale'])
+        self.assertTrue(components['cache']['stale'])
+        self.assertEqual(components['cache']['age_seconds'], 50)
+        self.assertEqual(snapshot.overall_status(now=1010), DEGRADED)
+        self.assertEqual(snapshot.readiness(now=1010), (True, []))
+
+        ready, reasons = snapshot.readiness(now=1030)
+        self.assertFalse(ready)
+        self.assertIn('stale', reasons[0])
+
+    def test_unhealthy_critical_component(self):
+        snapshot = snapshot_with([self.database, self.cache], [
+            ProbeResult('database', UNHEALTHY, checked_at=1000, response_time_ms=5000.0,
+                        error='Health check timed out after 5s', timed_out=True),
+            ProbeResult('cache', HEALTHY, checked_at=1000, response_time_ms=1.0, value={})
+        ])
+        self.assertEqual(snapshot.overall_status(now=1001), UNHEALTHY)
+        self.assertEqual(snapshot.readiness(now=1001), (False, ['database: Health check timed out after 5s']))
+        self.assertIsNone(snapshot.value('database'))
+        self.assertEqual(snapshot.overall_status(['cache'], now=1001), HEALTHY)
+
+
+class TestHealthProbeScheduler(unittest.TestCase):
+    """Test the scheduler with real threads and short intervals"""
+
+    def setUp(self):
+        self.scheduler = HealthProbeScheduler(max_workers=4)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_probes_run_concurrently(self):
+        for name in ('database', 'cache', 'security'):
+            self.scheduler.register(name, lambda: time.sleep(0.2) or {'status': 'healthy'}, timeout=2)
+
+        start = time.perf_counter()
+        snapshot = self.scheduler.run_now()
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(snapshot.overall_status(), HEALTHY)
+        self.assertEqual(set(snapshot.results), {'database', 'cache', 'security'})
+
+    def test_each_probe_runs_on_its_own_interval(self):
+        calls = {'fast': 0, 'slow': 0}
+
+        def counter(name):
+            def check():
+                calls[name] += 1
+                return True
+            return check
+
+        self.scheduler.register('fast', counter('fast'), interval=0.05)
+        self.scheduler.register('slow', counter('slow'), interval=10)
+        self.scheduler.start()
+        time.sleep(0.35)
+
+        self.assertGreaterEqual(calls['fast'], 4)
+        self.assertEqual(calls['slow'], 1)
+
+    def test_timed_out_probe_is_unhealthy_and_not_restarted(self):
+        release = threading.Event()
+        calls = []
+
+        def hung_check():
+            calls.append(1)
+            release.wait(5)
+            return True
+
+        self.scheduler.register('firebase', hung_check, interval=0.05, timeout=0.1, critical=True)
+        self.scheduler.start()
+        time.sleep(0.4)
+
+        component = self.scheduler.snapshot.component('firebase')
+        self.assertEqual(component['status'], UNHEALTHY)
+        self.assertTrue(component['timed_out'])
+        self.assertEqual(len(calls), 1)
+
+        # The late result is discarded; the next run reports recovery
+        release.set()
+        deadline = time.time() + 2
+        while self.scheduler.snapshot.component('firebase')['status'] != HEALTHY and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.scheduler.snapshot.component('firebase')['status'], HEALTHY)
+        self.assertEqual(self.scheduler.get_stats()['late_results'], 1)
+
+    def test_failures_and_snapshot_immutability(self):
+        def failing():
+            raise ConnectionError('connection refused')
+
+        self.scheduler.register('basiq_api', failing)
+        before = self.scheduler.snapshot
+        snapshot = self.scheduler.run_now()
+
+        self.assertIsNot(before, snapshot)
+        self.assertEqual(before.results, {})
+        self.assertEqual(snapshot.component('basiq_api')['error_message'], 'connection refused')
+        with self.assertRaises(TypeError):
+            snapshot.results['basiq_api'] = None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit Tests for Pooled HTTP Sessions
+==================================
+
+Tests retry decisions (429 with Retry-After, 5xx on idempotent vs
+non-idempotent methods, connection errors), jittered backoff bounds,
+latency metrics and the per-process session registry.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from src.integrations import http_session
+from src.integrations.http_session import PooledHTTPSession, endpoint_label, get_http_session
+
+URL = 'https://au-api.basiq.io/users/5f1c2e7a9b/accounts'
+
+
+def response(status_code, headers=None):
+    return Mock(status_code=status_code, headers=headers or {})
+
+
+class TestRetries(unittest.TestCase):
+    """Test which responses are retried and how long to wait"""
+
+    def setUp(self):
+        self.session = PooledHTTPSession('test', max_retries=3, backoff_base=0.5, backoff_max=8.0)
+        self.sleep = patch('src.integrations.http_session.time.sleep').start()
+        self.addCleanup(patch.stopall)
+
+    def respond(self, *outcomes):
+        self.session.session.request = Mock(side_effect=list(outcomes))
+        return self.session.session.request
+
+    def test_429_waits_for_retry_after(self):
+        send = self.respond(response(429, {'Retry-After': '3'}), response(200))
+        result = self.session.post(URL)
+
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(send.call_count, 2)
+        self.sleep.assert_called_once_with(3.0)
+        self.assertEqual(self.session.get_metrics()['endpoints']['POST /users/{id}/accounts']['retries'], 1)
+
+    def test_retry_after_is_capped(self):
+        self.respond(response(429, {'Retry-After': '120'}), response(200))
+        self.session.get(URL)
+        self.sleep.assert_called_once_with(8.0)
+
+    def test_503_on_post_is_not_retried_by_default(self):
+        send = self.respond(response(503), response(200))
+        result = self.session.post(URL, json={'amount': 10})
+
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(send.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_503_on_post_retried_when_allowed(self):
+        send = self.respond(response(503), response(201))
+        result = self.session.post(URL, retry_non_idempotent=True)
+        self.assertEqual(result.status_code, 201)
+        self.assertEqual(send.call_count, 2)
+
+    def test_503_on_get_retries_until_exhausted(self):
+        send = self.respond(*[response(503)] * 4)
+        result = self.session.get(URL)
+
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(send.call_count, 4)
+        # Full jitter: each delay is within [0, min(max, base * 2^attempt)]
+        for attempt, call in enumerate(self.sleep.call_args_list):
+            self.assertLessEqual(call.args[0], min(8.0, 0.5 * 2 ** attempt))
+            self.assertGreaterEqual(call.args[0], 0)
+
+    def test_connection_errors(self):
+        self.respond(requests.exceptions.ConnectionError('reset'), response(200))
+        self.assertEqual(self.session.get(URL).status_code, 200)
+
+        send = self.respond(requests.exceptions.ConnectionError('reset'), response(200))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.session.post(URL)
+        self.assertEqual(send.call_count, 1)
+
+    def test_4xx_is_returned_without_retry(self):
+        send = self.respond(response(404))
+        self.assertEqual(self.session.get(URL).status_code, 404)
+        self.assertEqual(send.call_count, 1)
+
+    def test_default_timeout_is_applied(self):
+        send = self.respond(response(200))
+        self.session.get(URL)
+        self.assertEqual(send.call_args.kwargs['timeout'], self.session.timeout)
+
+
+class TestSessionRegistry(unittest.TestCase):
+    """Test per-process session reuse"""
+
+    def setUp(self):
+        self.addCleanup(http_session._sessions.pop, 'registry-test', None)
+
+    def test_session_reused_within_process(self):
+        first = get_http_session('registry-test', pool_size=3)
+        self.assertIs(get_http_session('registry-test'), first)
+        self.assertEqual(first.pool_size, 3)
+
+    def test_session_rebuilt_after_fork(self):
+        parent = get_http_session('registry-test', pool_size=3)
+        with patch('src.integrations.http_session.os.getpid', return_value=parent.pid + 1):
+            child = get_http_session('registry-test', pool_size=3)
+            self.assertIsNot(child, parent)
+            self.assertEqual(child.pid, parent.pid + 1)
+            self.assertIs(get_http_session('registry-test'), child)
+
+    def test_endpoint_label_collapses_ids(self):
+        self.assertEqual(endpoint_label('get', URL), 'GET /users/{id}/accounts')
+        self.assertEqual(endpoint_label('POST', 'https://au-api.basiq.io/token'), 'POST /token')
+
+
+if __name__ == '__main__':
+    unittest.main()
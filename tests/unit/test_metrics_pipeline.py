@@ -0,0 +1,156 @@
+"""
+Unit Tests for the Request Metrics Pipeline
+==========================================
+
+Tests per-thread buffering, drop accounting, batched Redis writes and
+histogram-based percentiles.
+"""
+
+import random
+import threading
+import time
+import unittest
+
+from backend.monitoring.metrics_pipeline import (
+    MetricsAggregate, MetricsPipeline, bucket_for, bucket_upper_bound, hour_key
+)
+
+
+class FakeRedisPipeline:
+    """Records queued commands and applies them to a FakeRedis on execute"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+        return queue
+
+    def execute(self):
+        self.redis.executed.append(len(self.commands))
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Just enough of redis-py for the metrics hashes and sorted sets"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def zincrby(self, key, amount, member):
+        members = self.zsets.setdefault(key, {})
+        members[member] = members.get(member, 0) + amount
+
+    def expire(self, key, seconds):
+        return True
+
+    def hgetall(self, key):
+        return {field.encode(): str(value).encode() for field, value in self.hashes.get(key, {}).items()}
+
+    def zrevrange(self, key, start, end, withscores=False):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda x: x[1], reverse=True)
+        return [(member.encode(), float(score)) for member, score in members[start:end + 1]]
+
+
+class TestMetricsPipeline(unittest.TestCase):
+    """Test buffering, flushing and summaries"""
+
+    def test_histogram_percentiles_within_bucket_error(self):
+        rng = random.Random(1)
+        durations = [rng.lognormvariate(-2.5, 0.8) for _ in range(20000)]
+        aggregate = MetricsAggregate()
+        for duration in durations:
+            aggregate.add('/api/test', None, duration, 200)
+
+        exact = sorted(durations)
+        for fraction in (0.5, 0.95, 0.99):
+            expected = exact[int(len(exact) * fraction)]
+            self.assertAlmostEqual(aggregate.percentile(fraction), expected, delta=expected * 0.11)
+
+    def test_bucket_bounds_contain_duration(self):
+        for duration in (0.0005, 0.002, 0.0137, 0.25, 3.9, 42.0):
+            self.assertLessEqual(duration, bucket_upper_bound(bucket_for(duration)) * 1.0000001)
+
+    def test_hour_keys_are_utc(self):
+        self.assertEqual(hour_key(0), '1970010100')
+        self.assertEqual(hour_key(1_700_000_000), '2023111422')
+
+        pipeline = MetricsPipeline(start=False)
+        hours = pipeline._hours(3)
+        self.assertIn(hours[0], (hour_key(time.time() - 1), hour_key(time.time())))
+        self.assertEqual(len(set(hours)), 3)
+
+    def test_concurrent_threads_record_without_loss(self):
+        pipeline = MetricsPipeline(start=False, buffer_size=10000, flush_batch=10000)
+
+        def worker(index):
+            for i in range(2000):
+                pipeline.record('/api/goals', 'GET', f'user_{index}', 0.01 * (i % 10 + 1), 200 if i % 20 else 500)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(pipeline.flush(), 16000)
+        summary = pipeline.summarize(hours=1)
+        self.assertEqual(summary['total_requests'], 16000)
+        self.assertAlmostEqual(summary['error_rate'], 5.0)
+        self.assertEqual(len(summary['most_active_users']), 8)
+
+        # Buffers of finished threads are released after draining
+        self.assertEqual(pipeline.get_stats()['thread_buffers'], 0)
+
+    def test_full_buffer_drops_and_counts(self):
+        pipeline = MetricsPipeline(start=False, buffer_size=100, flush_batch=1000)
+        for _ in range(150):
+            pipeline.record('/api/receipts', 'POST', None, 0.2, 201)
+
+        stats = pipeline.get_stats()
+        self.assertEqual(stats['pending'], 100)
+        self.assertEqual(stats['dropped'], 50)
+        self.assertEqual(pipeline.flush(), 100)
+
+    def test_flush_writes_one_redis_pipeline_per_batch(self):
+        redis = FakeRedis()
+        pipeline = MetricsPipeline(redis_client=redis, start=False)
+        for i in range(500):
+            pipeline.record(f'/api/endpoint_{i % 3}', 'GET', 'user_1', 0.05, 200)
+        pipeline.flush()
+
+        # One round trip whose size depends on distinct fields, not on request count
+        self.assertEqual(len(redis.executed), 1)
+        self.assertLess(redis.executed[0], 20)
+
+        summary = pipeline.summarize(hours=2)
+        self.assertEqual(summary['total_requests'], 500)
+        self.assertEqual(summary['most_active_users'], [('user_1', 500)])
+        self.assertEqual(len(summary['slowest_endpoints']), 3)
+
+    def test_background_flusher_drains_buffers(self):
+        flushed = threading.Event()
+        pipeline = MetricsPipeline(flush_interval_ms=20, on_flush=lambda batch: flushed.set())
+        try:
+            pipeline.record('/api/health', 'GET', None, 0.001, 200)
+            self.assertTrue(flushed.wait(timeout=2))
+            self.assertEqual(pipeline.get_stats()['recorded'], 1)
+        finally:
+            pipeline.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Unit Tests for the Model Registry
+================================
+
+Tests that categorization models are loaded from disk once, reloaded when
+the file changes, and evicted least recently used within the memory budget
+while the pinned global model stays resident.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import joblib
+
+from backend.utils.model_registry import ModelRegistry
+
+
+class RegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.model_dir)
+
+    def save_model(self, name, model):
+        path = os.path.join(self.model_dir, f'categorization_model_{name}.joblib')
+        joblib.dump(model, path)
+        return path
+
+
+class TestModelLoading(RegistryTestCase):
+    """Test load-once, reload on change and invalidation"""
+
+    def setUp(self):
+        super().setUp()
+        self.registry = ModelRegistry(memory_budget_mb=64)
+
+    def test_model_is_loaded_once(self):
+        path = self.save_model('global', {'version': 1})
+        first = self.registry.get(path)
+        second = self.registry.get(path)
+
+        self.assertIs(first, second)
+        stats = self.registry.get_stats()
+        self.assertEqual((stats['loads'], stats['hits'], stats['misses']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['resident_bytes'], os.path.getsize(path))
+
+    def test_changed_file_is_reloaded(self):
+        path = self.save_model('global', {'version': 1})
+        self.registry.get(path)
+
+        # Retraining rewrites the file; a size change is detected even within mtime granularity
+        self.save_model('global', {'version': 2, 'classes': ['Food', 'Travel']})
+        self.assertEqual(self.registry.get(path)['version'], 2)
+        stats = self.registry.get_stats()
+        self.assertEqual((stats['loads'], stats['stale_reloads']), (2, 1))
+
+    def test_missing_file_returns_none(self):
+        path = self.save_model('user-1', {'version': 1})
+        self.registry.get(path)
+        os.remove(path)
+
+        self.assertIsNone(self.registry.get(path))
+        self.assertEqual(self.registry.get_stats()['cached_models'], 0)
+        self.assertFalse(self.registry.preload(path))
+
+    def test_invalidate_forces_reload(self):
+        path = self.save_model('user-1', {'version': 1})
+        self.registry.get(path)
+        self.registry.invalidate(path)
+        self.registry.get(path)
+        self.assertEqual(self.registry.get_stats()['loads'], 2)
+
+        self.registry.invalidate()
+        self.assertEqual(self.registry.get_stats()['cached_models'], 0)
+
+    def test_load_error_is_raised_and_counted(self):
+        path = os.path.join(self.model_dir, 'categorization_model_corrupt.joblib')
+        with open(path, 'wb') as f:
+            f.write(b'not a joblib file')
+
+        with self.assertRaises(Exception):
+            self.registry.get(path)
+        self.assertEqual(self.registry.get_stats()['load_errors'], 1)
+        self.assertFalse(self.registry.preload(path))
+
+    def test_concurrent_callers_share_one_load(self):
+        path = self.save_model('global', {'version': 1})
+        original_load = joblib.load
+
+        def slow_load(model_path):
+            time.sleep(0.05)
+            return original_load(model_path)
+
+        results = []
+        joblib.load = slow_load
+        try:
+            threads = [threading.Thread(target=lambda: results.append(self.registry.get(path)))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            joblib.load = original_load
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.registry.get_stats()['loads'], 1)
+
+
+class TestEviction(RegistryTestCase):
+    """Test the memory budget"""
+
+    def setUp(self):
+        super().setUp()
+        self.paths = {name: self.save_model(name, 'x' * 4096) for name in ('global', 'user-1', 'user-2', 'user-3')}
+        model_size = os.path.getsize(self.paths['global'])
+        # Room for three models
+        self.registry = ModelRegistry(memory_budget_mb=model_size * 3.5 / (1024 * 1024))
+
+    def test_least_recently_used_user_model_is_evicted(self):
+        self.assertTrue(self.registry.preload(self.paths['global']))
+        self.registry.get(self.paths['user-1'])
+        self.registry.get(self.paths['user-2'])
+        self.registry.get(self.paths['global'])
+        self.registry.get(self.paths['user-3'])
+
+        stats = self.registry.get_stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['cached_models'], 3)
+        self.assertLessEqual(stats['resident_bytes'], stats['memory_budget_bytes'])
+
+        # user-1 was least recently used; user-2 is still cached
+        self.registry.get(self.paths['user-2'])
+        self.assertEqual(self.registry.get_stats()['loads'], 4)
+        self.registry.get(self.paths['user-1'])
+        self.assertEqual(self.registry.get_stats()['loads'], 5)
+
+    def test_pinned_global_model_is_never_evicted(self):
+        self.registry.preload(self.paths['global'])
+        for name in ('user-1', 'user-2', 'user-3', 'user-1', 'user-2', 'user-3'):
+            self.registry.get(self.paths[name])
+
+        loads = self.registry.get_stats()['loads']
+        self.registry.get(self.paths['global'])
+        self.assertEqual(self.registry.get_stats()['loads'], loads)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit Tests for Rate Limiter Client Addresses
+===========================================
+
+Tests that anonymous limits are keyed by the connecting address, that
+forwarding headers sent by clients are ignored, and that X-Forwarded-For
+is honoured only through ProxyFix for the configured number of proxies.
+"""
+
+import unittest
+
+from flask import Flask, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from backend.middleware.rate_limiter import RateLimitEngine, RateLimiter, _client_ip
+
+
+def make_app(trusted_proxy_count=0):
+    app = Flask(__name__)
+    if trusted_proxy_count > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxy_count)
+
+    limiter = RateLimiter(RateLimitEngine())
+
+    @app.route('/ip')
+    def ip():
+        return jsonify({'ip': _client_ip()})
+
+    @app.route('/limited')
+    @limiter.apply_rate_limit('2/minute')
+    def limited():
+        return jsonify({'ok': True})
+
+    return app
+
+
+class TestClientIp(unittest.TestCase):
+    """Test which address anonymous rate limits are keyed by"""
+
+    def get_ip(self, app, headers=None, remote_addr='203.0.113.7'):
+        response = app.test_client().get('/ip', headers=headers or {},
+                                         environ_base={'REMOTE_ADDR': remote_addr})
+        return response.get_json()['ip']
+
+    def test_forwarding_headers_are_ignored_without_trusted_proxies(self):
+        app = make_app()
+        self.assertEqual(self.get_ip(app), '203.0.113.7')
+        self.assertEqual(self.get_ip(app, {'X-Forwarded-For': '198.51.100.1'}), '203.0.113.7')
+        self.assertEqual(self.get_ip(app, {'X-Real-IP': '198.51.100.1'}), '203.0.113.7')
+
+    def test_trusted_proxy_count_takes_the_matching_hop(self):
+        app = make_app(trusted_proxy_count=1)
+        # The client prepended a spoofed address; the proxy appended the real one
+        headers = {'X-Forwarded-For': '198.51.100.1, 192.0.2.44'}
+        self.assertEqual(self.get_ip(app, headers, remote_addr='10.0.0.2'), '192.0.2.44')
+        self.assertEqual(self.get_ip(app, remote_addr='10.0.0.2'), '10.0.0.2')
+
+        two_proxies = make_app(trusted_proxy_count=2)
+        headers = {'X-Forwarded-For': '198.51.100.1, 192.0.2.44, 10.0.0.9'}
+        self.assertEqual(self.get_ip(two_proxies, headers, remote_addr='10.0.0.2'), '192.0.2.44')
+
+    def test_spoofed_headers_do_not_reset_the_limit(self):
+        client = make_app().test_client()
+        statuses = [
+            client.get('/limited', headers={'X-Forwarded-For': f'198.51.100.{i}'},
+                       environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Unit Tests for Receipt Matching Routes
+=====================================
+
+Runs the receipt upload and match-suggestion endpoints against an in-memory
+Firestore and a stubbed OCR extractor, and checks that receipts are matched
+to the user's banking transactions through the transaction match index.
+"""
+
+import base64
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+import uuid
+from unittest.mock import patch
+
+from flask import Flask
+from PIL import Image
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TRANSACTIONS = [
+    {'id': 'txn-coffee', 'amount': '-4.50', 'postDate': '2024-08-02T00:00:00Z', 'description': 'Cafe'},
+    {'id': 'txn-fuel', 'amount': '-86.40', 'postDate': '2024-08-03T00:00:00Z', 'description': 'BP Fuel'},
+    {'id': 'txn-office', 'amount': '-120.00', 'postDate': '2024-07-15T00:00:00Z', 'description': 'Officeworks'}
+]
+
+
+class FakeDocument:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    @property
+    def exists(self):
+        return self.path in self.store
+
+    def get(self):
+        return self
+
+    def set(self, data):
+        self.store[self.path] = dict(data)
+
+    def to_dict(self):
+        return self.store.get(self.path)
+
+    def collection(self, name):
+        return FakeCollection(self.store, self.path + (name,))
+
+
+class FakeCollection:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    def document(self, document_id):
+        return FakeDocument(self.store, self.path + (document_id,))
+
+    def where(self, *args):
+        return self
+
+    def get(self):
+        return []
+
+
+class FakeFirestore:
+    """Path-keyed document store with the calls the receipt routes make"""
+
+    def __init__(self):
+        self.store = {}
+
+    def collection(self, name):
+        return FakeCollection(self.store, (name,))
+
+
+def png_base64(size=(120, 160)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+class TestReceiptMatchRoutes(unittest.TestCase):
+    """Test that uploaded and stored receipts are matched to transactions"""
+
+    @classmethod
+    def setUpClass(cls):
+        # The routes import their siblings bare, as they do when the backend runs
+        cls._saved_path = list(sys.path)
+        for directory in ('src', 'backend'):
+            sys.path.insert(0, os.path.join(PROJECT_ROOT, directory))
+
+        # Firestore and the Gemini OCR client are not available here
+        cls._saved_modules = {name: sys.modules.get(name)
+                              for name in ('firebase_config', 'integrations.formx_client')}
+        sys.modules['firebase_config'] = types.SimpleNamespace(db=None)
+        sys.modules['integrations.formx_client'] = types.SimpleNamespace(
+            extract_data_from_image_with_gemini=None, extract_data_from_image_enhanced=None
+        )
+
+        from backend.routes import receipt_routes
+        cls.routes = receipt_routes
+
+    @classmethod
+    def tearDownClass(cls):
+        for name, module in cls._saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        sys.path[:] = cls._saved_path
+
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.user_id = 'firebase-user'
+        self.basiq_user_id = f'basiq-{uuid.uuid4()}'
+        self.db.collection('users').document(self.user_id).set({'basiq_user_id': self.basiq_user_id})
+        self.extracted = {'merchant_name': 'BP', 'total_amount': 86.40, 'date': '2024-08-04'}
+
+        upload_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_folder, ignore_errors=True)
+        self.addCleanup(self.routes.get_match_index_registry().invalidate, self.basiq_user_id)
+
+        def extract(image_path, user_profile):
+            return {'success': True, 'documents': [{'data': dict(self.extracted)}],
+                    'processing_metadata': {'confidence': 0.9}}
+
+        patchers = [
+            patch.object(self.routes, 'db', self.db),
+            patch.object(self.routes, 'get_user_id', lambda: self.user_id),
+            patch.object(self.routes, 'iter_user_transactions', lambda basiq_user_id: iter(TRANSACTIONS)),
+            patch.object(self.routes, 'extract_data_from_image_enhanced', extract),
+            patch.object(self.routes, 'invalidate_user_snapshot', lambda *args: None)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        app = Flask(__name__)
+        app.config['UPLOAD_FOLDER'] = upload_folder
+        app.register_blueprint(self.routes.receipt_routes)
+        self.client = app.test_client()
+
+    def test_suggest_matches_stored_receipt(self):
+        receipts = self.db.collection('users').document(self.user_id).collection('receipts')
+        receipts.document('r1').set({'id': 'r1', 'amount': 86.40, 'date': '2024-08-04'})
+
+        response = self.client.get('/api/receipts/r1/match/suggest')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['transaction_id'], 'txn-fuel')
+        self.assertEqual(body['matched_transaction']['id'], 'txn-fuel')
+        self.assertGreaterEqual(body['confidence'], self.routes.MatchIndex().threshold)
+
+    def test_upload_matches_new_receipt(self):
+        response = self.client.post('/api/receipts/upload', data={'image_base64': png_base64()})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['matched_transaction'], 'txn-fuel')
+        self.assertGreater(body['match_confidence'], 0)
+
+        receipts = self.db.collection('users').document(self.user_id).collection('receipts')
+        stored = receipts.document(body['receipt_id']).to_dict()
+        self.assertEqual(stored['matched_transaction_id'], 'txn-fuel')
+
+    def test_upload_without_a_match(self):
+        self.extracted['total_amount'] = 999.99
+
+        response = self.client.post('/api/receipts/upload', data={'image_base64': png_base64()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.get_json()['matched_transaction'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Unit Tests for the Report Job Queue
+==================================
+
+Tests job deduplication, claiming, progress, stored-report reuse, stale
+job recovery and retention purging against a temporary SQLite store.
+"""
+
+import base64
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import unittest
+from enum import Enum
+
+from backend.jobs.report_queue import ReportJobRunner, ReportJobStore
+
+
+class FakeReportType(Enum):
+    INDIVIDUAL_TAX_RETURN = "individual_tax_return"
+
+
+class FakeOutputFormat(Enum):
+    PDF = "pdf"
+
+
+class FakeGenerator:
+    """Stands in for AutomatedReportGenerator"""
+
+    def __init__(self, fingerprint='v1'):
+        self.fingerprint = fingerprint
+        self.generated = 0
+
+    def compute_data_fingerprint(self, user_id, tax_year):
+        return self.fingerprint
+
+    async def generate_comprehensive_tax_report(self, user_id, report_type, tax_year,
+                                                output_format, progress_callback=None):
+        self.generated += 1
+        progress_callback(50, 'Halfway')
+        return {
+            'success': True,
+            'data': base64.b64encode(b'%PDF-report').decode('utf-8'),
+            'filename': f'tax_report_{tax_year}.pdf'
+        }
+
+
+class TestReportJobQueue(unittest.TestCase):
+    """Test the SQLite-backed job store and worker runner"""
+
+    @classmethod
+    def setUpClass(cls):
+        # The runner resolves enums from automated_reports, whose PDF/Excel deps are optional here
+        cls._saved_module = sys.modules.get('automated_reports')
+        sys.modules['automated_reports'] = types.SimpleNamespace(
+            ReportType=FakeReportType, OutputFormat=FakeOutputFormat
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls._saved_module is None:
+            sys.modules.pop('automated_reports', None)
+        else:
+            sys.modules['automated_reports'] = cls._saved_module
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.store = ReportJobStore(self.data_dir)
+        self.generator = FakeGenerator()
+        self.runner = ReportJobRunner(self.store, generator=self.generator)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def _enqueue(self, user_id='user_1'):
+        return self.store.enqueue(user_id, 'individual_tax_return', '2024', 'pdf')
+
+    def test_identical_active_requests_share_a_job(self):
+        first = self._enqueue()
+        second = self._enqueue()
+        other_user = self._enqueue('user_2')
+
+        self.assertEqual(first['id'], second['id'])
+        self.assertNotEqual(first['id'], other_user['id'])
+
+    def test_job_is_claimed_once(self):
+        job = self._enqueue()
+
+        claimed = self.store.claim_next('worker_a')
+        self.assertEqual(claimed['id'], job['id'])
+        self.assertEqual(claimed['status'], 'running')
+        self.assertIsNone(self.store.claim_next('worker_b'))
+
+    def test_run_job_stores_report(self):
+        job = self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+
+        finished = self.store.get_job(job['id'])
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual(finished['progress'], 100)
+
+        artifact = self.store.get_artifact(finished['report_id'])
+        with open(artifact['path'], 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-report')
+        self.assertEqual(artifact['content_type'], 'application/pdf')
+
+    def test_unchanged_data_reuses_stored_report(self):
+        self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+        first = self.store.list_artifacts('user_1')[0]
+
+        repeat = self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+        repeat = self.store.get_job(repeat['id'])
+
+        self.assertEqual(self.generator.generated, 1)
+        self.assertTrue(repeat['cached'])
+        self.assertEqual(repeat['report_id'], first['id'])
+
+        # New data produces a new report
+        self.generator.fingerprint = 'v2'
+        changed = self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+        changed = self.store.get_job(changed['id'])
+
+        self.assertEqual(self.generator.generated, 2)
+        self.assertNotEqual(changed['report_id'], first['id'])
+
+    def test_stale_running_job_is_requeued(self):
+        job = self._enqueue()
+        self.store.claim_next('worker_a')
+
+        self.assertEqual(self.store.requeue_stale_jobs(stale_seconds=3600), 0)
+        time.sleep(0.01)
+        self.assertEqual(self.store.requeue_stale_jobs(stale_seconds=0), 1)
+        self.assertEqual(self.store.get_job(job['id'])['status'], 'queued')
+
+    def test_worker_threads_drain_queue(self):
+        jobs = [self._enqueue(f'user_{i}') for i in range(4)]
+        runner = ReportJobRunner(self.store, worker_count=2, generator=self.generator, poll_interval=0.05)
+        runner.start()
+        try:
+            deadline = time.time() + 10
+            while time.time() < deadline:
+                statuses = {self.store.get_job(job['id'])['status'] for job in jobs}
+                if statuses == {'completed'}:
+                    break
+                time.sleep(0.05)
+        finally:
+            runner.stop()
+
+        self.assertEqual(statuses, {'completed'})
+
+    def _age(self, seconds):
+        """Backdate every job and stored report"""
+        with self.store._connect() as conn:
+            conn.execute('UPDATE report_jobs SET finished_at = finished_at - ?, created_at = created_at - ?',
+                         (seconds, seconds))
+            conn.execute('UPDATE report_artifacts SET created_at = created_at - ?', (seconds,))
+
+    def test_purge_removes_expired_jobs_and_reports(self):
+        job = self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+        artifact = self.store.get_artifact(self.store.get_job(job['id'])['report_id'])
+        active = self._enqueue('user_2')
+
+        self.assertEqual(self.store.purge_expired(retention_seconds=3600),
+                         {'jobs': 0, 'artifacts': 0, 'orphans': 0})
+
+        self._age(7200)
+        self.assertEqual(self.store.purge_expired(retention_seconds=3600),
+                         {'jobs': 1, 'artifacts': 1, 'orphans': 0})
+        self.assertIsNone(self.store.get_job(job['id']))
+        self.assertIsNone(self.store.get_artifact(artifact['id']))
+        self.assertFalse(os.path.exists(artifact['path']))
+        # Queued and running jobs are never purged
+        self.assertEqual(self.store.get_job(active['id'])['status'], 'queued')
+
+    def test_purge_keeps_reports_referenced_by_recent_jobs(self):
+        self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+        self._age(7200)
+
+        # A recent job served from the old stored report keeps it downloadable
+        repeat = self._enqueue()
+        self.runner.run_job(self.store.claim_next('worker_a'))
+        repeat = self.store.get_job(repeat['id'])
+        self.assertTrue(repeat['cached'])
+
+        self.assertEqual(self.store.purge_expired(retention_seconds=3600)['artifacts'], 0)
+        self.assertIsNotNone(self.store.get_artifact(repeat['report_id']))
+
+    def test_purge_removes_orphaned_files(self):
+        orphan = os.path.join(self.store.artifact_dir, 'crashed.pdf.part')
+        with open(orphan, 'wb') as f:
+            f.write(b'partial')
+
+        self.assertEqual(self.store.purge_expired(retention_seconds=3600)['orphans'], 0)
+        old = time.time() - 7200
+        os.utime(orphan, (old, old))
+        self.assertEqual(self.store.purge_expired(retention_seconds=3600)['orphans'], 1)
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_runner_purges_once_per_interval(self):
+        calls = []
+        self.store.purge_expired = lambda retention_seconds: calls.append(retention_seconds)
+        runner = ReportJobRunner(self.store, generator=self.generator, retention_seconds=60)
+
+        runner.purge_if_due()
+        runner.purge_if_due()
+        self.assertEqual(calls, [60])
+
+
+if __name__ == '__main__':
+    unittest.main()
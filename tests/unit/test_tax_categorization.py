@@ -17,7 +17,11 @@ from backend.australian_tax_categorizer import (
     CategorizationResult,
     ConfidenceLevel,
     DeductibilityLevel,
-    categorize_receipt
+    categorize_receipt,
+    categorize_transaction,
+    categorize_transactions_batch,
+    get_categorizer,
+    reload_categorizer
 )
 
 
@@ -556,5 +560,118 @@ class TestIntegrationWithProfile(unittest.TestCase):
         self.assertIn(result.category, [TaxCategory.P8, TaxCategory.D5])
 
 
+class TestCategorizationCache(unittest.TestCase):
+    """Test the shared categorizer instance and result memoization"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.categorizer = AustralianTaxCategorizer()
+    
+    def test_repeated_merchant_hits_cache(self):
+        """Test repeated merchants are served from the result cache"""
+        for _ in range(5):
+            self.categorizer.categorize_transaction(merchant_name="BP CONNECT", amount=60.00)
+        
+        stats = self.categorizer.get_cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 4)
+        self.assertEqual(stats["size"], 1)
+    
+    def test_cached_result_still_applies_amount_evidence(self):
+        """Test amount-dependent evidence is not frozen into the cache"""
+        small = self.categorizer.categorize_transaction(merchant_name="OFFICEWORKS", amount=20.00)
+        large = self.categorizer.categorize_transaction(merchant_name="OFFICEWORKS", amount=1500.00)
+        
+        self.assertEqual(small.category, large.category)
+        self.assertNotIn("Detailed receipt with GST breakdown", small.suggested_evidence)
+        self.assertIn("Detailed receipt with GST breakdown", large.suggested_evidence)
+    
+    def test_profile_fingerprint_separates_business_users(self):
+        """Test business and individual profiles do not share cache entries"""
+        individual = self.categorizer.categorize_transaction(
+            merchant_name="OFFICEWORKS", amount=50.00,
+            user_profile={"personalInfo": {}}
+        )
+        business = self.categorizer.categorize_transaction(
+            merchant_name="OFFICEWORKS", amount=50.00,
+            user_profile={"personalInfo": {"abn": "53004085616"}}
+        )
+        
+        self.assertEqual(individual.category, TaxCategory.D5)
+        self.assertEqual(business.category, TaxCategory.P8)
+    
+    def test_lru_eviction(self):
+        """Test the result cache is bounded"""
+        categorizer = AustralianTaxCategorizer(result_cache_size=2)
+        for merchant in ["SHELL", "CALTEX", "MOBIL"]:
+            categorizer.categorize_transaction(merchant_name=merchant, amount=10.00)
+        
+        self.assertEqual(categorizer.get_cache_stats()["size"], 2)
+    
+    def test_shared_instance(self):
+        """Test convenience functions reuse one categorizer until reloaded"""
+        shared = get_categorizer()
+        self.assertIs(get_categorizer(), shared)
+        
+        categorize_transaction({"description": "WOOLWORTHS 1234", "amount": -45.20})
+        self.assertGreater(shared.get_cache_stats()["misses"] + shared.get_cache_stats()["hits"], 0)
+        
+        reloaded = reload_categorizer()
+        self.assertIsNot(reloaded, shared)
+        self.assertIs(get_categorizer(), reloaded)
+
+
+class TestBatchCategorization(unittest.TestCase):
+    """Test columnar batch categorization"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.categorizer = AustralianTaxCategorizer()
+        self.profile = {"personalInfo": {"abn": "53004085616"}}
+        self.transactions = [
+            {"id": "t1", "description": "OFFICEWORKS SYDNEY", "amount": -85.50},
+            {"id": "t2", "description": "SHELL COLES EXPRESS", "amount": "-67.80"},
+            {"id": "t3", "description": "OFFICEWORKS SYDNEY", "amount": -1250.00},
+            {"id": "t4", "description": "WOOLWORTHS 1234", "amount": -45.20},
+            {"id": "t5", "description": "OFFICEWORKS SYDNEY", "amount": -12.00},
+        ]
+    
+    def test_batch_matches_single_categorization(self):
+        """Test batch results agree with per-transaction categorization"""
+        batch = self.categorizer.categorize_transactions_batch(self.transactions, self.profile)
+        
+        self.assertEqual(len(batch), len(self.transactions))
+        for row, transaction in enumerate(self.transactions):
+            single = categorize_transaction(transaction, self.profile)
+            with self.subTest(row=row):
+                self.assertEqual(batch.category_codes[row], single.category.name)
+                self.assertEqual(batch.confidences[row], single.confidence)
+                self.assertEqual(batch.deductibility[row], single.deductibility)
+                self.assertEqual(batch.requires_verification[row], single.requires_verification)
+                self.assertEqual(
+                    sorted(batch.result_for(row).suggested_evidence),
+                    sorted(single.suggested_evidence)
+                )
+    
+    def test_identical_rows_share_results(self):
+        """Test duplicate merchants in the same amount tier resolve once"""
+        batch = self.categorizer.categorize_transactions_batch(self.transactions)
+        
+        self.assertEqual(batch.result_index[0], batch.result_index[4])
+        self.assertNotEqual(batch.result_index[0], batch.result_index[2])
+        self.assertEqual(len(batch.unique_results), 4)
+    
+    def test_invalid_amount_reported_per_row(self):
+        """Test unparseable amounts are reported without failing the batch"""
+        batch = categorize_transactions_batch([
+            {"id": "bad", "description": "SHELL", "amount": "n/a"},
+            {"id": "good", "description": "SHELL", "amount": "-10"},
+        ])
+        
+        self.assertIn(0, batch.errors)
+        self.assertNotIn(1, batch.errors)
+        self.assertEqual(batch.category_codes[1], "D1")
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Unit Tests for the Token Verification Cache
+==========================================
+
+Tests expiry at the token's own exp, LRU bounds, negative caching and the
+shared Redis tier with a fake clock and an in-memory Redis stand-in.
+"""
+
+import unittest
+
+from backend.utils.token_cache import INVALID_KEY_PREFIX, VALID_KEY_PREFIX, TokenVerificationCache, token_hash
+
+TOKEN = 'eyJhbGciOiJSUzI1NiJ9.' + 'a' * 64
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """The subset of redis-py the cache uses, with expiry on the shared clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError('redis down')
+
+    def mget(self, keys):
+        self._check()
+        values = []
+        for key in keys:
+            entry = self.data.get(key)
+            values.append(entry[1].encode() if entry and entry[0] > self.clock() else None)
+        return values
+
+    def setex(self, key, ttl, value):
+        self._check()
+        self.data[key] = (self.clock() + ttl, value)
+
+    def delete(self, *keys):
+        self._check()
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def claims(clock, user_id='user-1', expires_in=3600):
+    return {'user_id': user_id, 'email': f'{user_id}@example.com', 'email_verified': True,
+            'exp': int(clock() + expires_in)}
+
+
+class TestTokenVerificationCache(unittest.TestCase):
+    """Test the in-process tier"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TokenVerificationCache(max_entries=3, max_ttl=3600, negative_ttl=30, clock=self.clock)
+
+    def test_entry_expires_with_token(self):
+        self.cache.put(TOKEN, claims(self.clock, expires_in=600))
+        found, user_data = self.cache.get(TOKEN)
+        self.assertTrue(found)
+        self.assertEqual(user_data['user_id'], 'user-1')
+
+        self.clock.now += 599
+        self.assertTrue(self.cache.get(TOKEN)[0])
+        self.clock.now += 1
+        self.assertEqual(self.cache.get(TOKEN), (False, None))
+
+    def test_expired_claims_are_not_cached(self):
+        self.cache.put(TOKEN, claims(self.clock, expires_in=-5))
+        self.assertEqual(self.cache.get(TOKEN), (False, None))
+        self.assertEqual(self.cache.get_stats()['cached_entries'], 0)
+
+    def test_lru_is_bounded(self):
+        tokens = [f'{TOKEN}{i}' for i in range(4)]
+        for token in tokens[:3]:
+            self.cache.put(token, claims(self.clock))
+        self.cache.get(tokens[0])  # Refresh the oldest entry
+        self.cache.put(tokens[3], claims(self.clock))
+
+        self.assertTrue(self.cache.get(tokens[0])[0])
+        self.assertFalse(self.cache.get(tokens[1])[0])
+        self.assertEqual(self.cache.get_stats()['evictions'], 1)
+        self.assertEqual(self.cache.get_stats()['cached_entries'], 3)
+
+    def test_negative_caching(self):
+        self.cache.put_invalid(TOKEN, 'expired')
+        self.assertEqual(self.cache.get(TOKEN), (True, None))
+        self.assertEqual(self.cache.get_stats()['negative_hits'], 1)
+
+        self.clock.now += 30
+        self.assertEqual(self.cache.get(TOKEN), (False, None))
+
+    def test_returned_claims_are_copies(self):
+        self.cache.put(TOKEN, claims(self.clock))
+        self.cache.get(TOKEN)[1]['roles'] = ['admin']
+        self.assertNotIn('roles', self.cache.get(TOKEN)[1])
+
+    def test_stats(self):
+        self.cache.get(TOKEN)
+        self.cache.record_verification(0.004, True)
+        self.cache.put(TOKEN, claims(self.clock))
+        for _ in range(3):
+            self.cache.get(TOKEN)
+        self.cache.record_verification(0.002, False)
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['l1_hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.75)
+        self.assertEqual(stats['verifications'], 2)
+        self.assertEqual(stats['verification_failures'], 1)
+        self.assertEqual(stats['avg_verification_ms'], 3.0)
+
+
+class TestSharedRedisTier(unittest.TestCase):
+    """Test two worker caches sharing one Redis"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.redis = FakeRedis(self.clock)
+        self.worker_a = TokenVerificationCache(redis_client=self.redis, clock=self.clock)
+        self.worker_b = TokenVerificationCache(redis_client=self.redis, clock=self.clock)
+
+    def test_l2_hit_is_promoted_to_l1(self):
+        self.worker_a.put(TOKEN, claims(self.clock, expires_in=900))
+        self.assertIn(VALID_KEY_PREFIX + token_hash(TOKEN), self.redis.data)
+
+        self.assertEqual(self.worker_b.get(TOKEN)[1]['user_id'], 'user-1')
+        self.worker_b.get(TOKEN)
+        stats = self.worker_b.get_stats()
+        self.assertEqual((stats['l2_hits'], stats['l1_hits']), (1, 1))
+
+        # The promoted entry still expires with the token
+        self.clock.now += 900
+        self.assertEqual(self.worker_b.get(TOKEN), (False, None))
+
+    def test_negative_entries_use_their_own_key(self):
+        self.worker_a.put_invalid(TOKEN, 'invalid')
+        self.assertNotIn(VALID_KEY_PREFIX + token_hash(TOKEN), self.redis.data)
+        self.assertIn(INVALID_KEY_PREFIX + token_hash(TOKEN), self.redis.data)
+        self.assertEqual(self.worker_b.get(TOKEN), (True, None))
+
+    def test_redis_failures_fall_back_to_l1(self):
+        self.redis.fail = True
+        self.worker_a.put(TOKEN, claims(self.clock))
+        self.assertTrue(self.worker_a.get(TOKEN)[0])
+        self.assertEqual(self.worker_b.get(TOKEN), (False, None))
+        self.assertEqual(self.worker_a.get_stats()['l2_errors'] + self.worker_b.get_stats()['l2_errors'], 2)
+
+    def test_invalidate_clears_both_tiers(self):
+        self.worker_a.put(TOKEN, claims(self.clock))
+        self.worker_a.invalidate(TOKEN)
+        self.assertEqual(self.redis.data, {})
+        self.assertEqual(self.worker_a.get(TOKEN), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,460 @@
+"""
+Unit Tests for the Transfer Engine
+=================================
+
+Tests scheduled transfer execution against an in-memory Firestore stand-in:
+per-slot claiming with create() and update-time preconditions, cursor paging
+of due rules, the per-user lock, and income detection shared across rules
+within a run.
+"""
+
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from backend.services import transfer_engine
+from backend.services.transfer_engine import (
+    TransferEngine, TransferFrequency, TransferRule, TransferRunContext, TransferStatus, TransferType
+)
+
+
+class AlreadyExists(Exception):
+    pass
+
+
+class FailedPrecondition(Exception):
+    pass
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data, update_time):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, db, collection, doc_id):
+        self.db = db
+        self.collection = collection
+        self.id = doc_id
+
+    @property
+    def _store(self):
+        return self.db.data.setdefault(self.collection, {})
+
+    def get(self):
+        data, update_time = self._store.get(self.id, (None, None))
+        return FakeSnapshot(self.id, data, update_time)
+
+    def _write(self, data):
+        with self.db.lock:
+            self.db.clock += 1
+            self._store[self.id] = (data, self.db.clock)
+
+    def create(self, data):
+        with self.db.lock:
+            if self.id in self._store:
+                raise AlreadyExists(self.id)
+            self._write(dict(data))
+
+    def set(self, data):
+        self._write(dict(data))
+
+    def update(self, data, option=None):
+        with self.db.lock:
+            current, update_time = self._store[self.id]
+            if option is not None and option != update_time:
+                raise FailedPrecondition(self.id)
+            self._write({**current, **data})
+
+
+class FakeQuery:
+    def __init__(self, db, collection, filters=(), order=None, after=None, count=None):
+        self.db = db
+        self.collection = collection
+        self.filters = filters
+        self.order = order
+        self.after = after
+        self.count = count
+
+    def _copy(self, **changes):
+        fields = dict(filters=self.filters, order=self.order, after=self.after, count=self.count)
+        fields.update(changes)
+        return FakeQuery(self.db, self.collection, **fields)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self.filters + ((field, op, value),))
+
+    def order_by(self, field):
+        return self._copy(order=field)
+
+    def start_after(self, snapshot):
+        return self._copy(after=snapshot)
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def stream(self):
+        self.db.queries.append(self)
+        ops = {'==': lambda a, b: a == b, '<=': lambda a, b: a is not None and a <= b}
+        docs = [FakeSnapshot(doc_id, data, update_time)
+                for doc_id, (data, update_time) in self.db.data.get(self.collection, {}).items()
+                if all(ops[op](data.get(field), value) for field, op, value in self.filters)]
+        docs.sort(key=lambda doc: doc.to_dict()[self.order])
+        if self.after is not None:
+            docs = [doc for doc in docs if doc.to_dict()[self.order] > self.after.to_dict()[self.order]]
+        return iter(docs[:self.count])
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id):
+        return FakeDocument(self.db, self.collection, doc_id)
+
+
+class FakeBatch:
+    def __init__(self):
+        self.writes = []
+
+    def set(self, doc_ref, data, merge=False):
+        self.writes.append((doc_ref, data))
+
+    def commit(self):
+        for doc_ref, data in self.writes:
+            doc_ref.set(data)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.data = {}
+        self.clock = 0
+        self.lock = threading.RLock()
+        self.queries = []
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def write_option(self, last_update_time):
+        return last_update_time
+
+    def batch(self):
+        return FakeBatch()
+
+
+def make_rule(rule_id='rule-1', user_id='user-1', due=datetime(2025, 3, 1, 9, 0), **overrides):
+    fields = dict(
+        id=rule_id, goal_id='goal-1', user_id=user_id, source_account_id='acc-1',
+        target_subaccount_id='sub-1', transfer_type=TransferType.FIXED_AMOUNT, amount=50.0,
+        frequency=TransferFrequency.WEEKLY, start_date=datetime(2025, 1, 1), next_execution_date=due
+    )
+    fields.update(overrides)
+    return TransferRule(**fields)
+
+
+class EngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = TransferEngine()
+        self.engine.db = FakeFirestore()
+        patcher = patch.multiple(transfer_engine, AlreadyExists=AlreadyExists,
+                                 FailedPrecondition=FailedPrecondition)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def slot(self, key):
+        return self.engine.db.collection('transfer_idempotency').document(key).get().to_dict()
+
+    def set_slot(self, key, status, claimed_minutes_ago=1):
+        claimed_at = datetime.now() - timedelta(minutes=claimed_minutes_ago)
+        self.engine.db.collection('transfer_idempotency').document(key).set(
+            {'rule_id': 'rule-1', 'status': status, 'claimed_at': claimed_at.isoformat()}
+        )
+
+
+class TestClaimTransferSlot(EngineTestCase):
+    """Test per-slot idempotency"""
+
+    def setUp(self):
+        super().setUp()
+        self.rule = make_rule()
+        self.key = self.engine._idempotency_key(self.rule)
+
+    def test_key_is_rule_and_scheduled_date(self):
+        self.assertEqual(self.key, 'rule-1_2025-03-01')
+
+    def test_first_claim_creates_slot(self):
+        self.assertTrue(self.engine._claim_transfer_slot(self.key, self.rule))
+        self.assertEqual(self.slot(self.key)['status'], TransferStatus.PROCESSING.value)
+        # create() refuses a second claim
+        self.assertFalse(self.engine._claim_transfer_slot(self.key, self.rule))
+
+    def test_completed_slot_is_not_reclaimed(self):
+        self.set_slot(self.key, TransferStatus.COMPLETED.value)
+        self.assertFalse(self.engine._claim_transfer_slot(self.key, self.rule))
+
+    def test_failed_slot_is_reclaimed(self):
+        self.set_slot(self.key, TransferStatus.FAILED.value)
+        self.assertTrue(self.engine._claim_transfer_slot(self.key, self.rule))
+        self.assertEqual(self.slot(self.key)['status'], TransferStatus.PROCESSING.value)
+
+    def test_stale_processing_slot_is_left_for_reconciliation(self):
+        self.set_slot(self.key, TransferStatus.PROCESSING.value,
+                      claimed_minutes_ago=self.engine.transfer_timeout_minutes + 60)
+        with self.assertLogs(transfer_engine.logger, 'WARNING'):
+            self.assertFalse(self.engine._claim_transfer_slot(self.key, self.rule))
+        self.assertEqual(self.slot(self.key)['status'], TransferStatus.PROCESSING.value)
+
+    def test_reclaim_is_guarded_by_update_time(self):
+        self.set_slot(self.key, TransferStatus.FAILED.value)
+        slot_ref = self.engine.db.collection('transfer_idempotency').document(self.key)
+        original_get = FakeDocument.get
+
+        def get_then_race(doc):
+            snapshot = original_get(doc)
+            # Another worker reclaims the slot between our read and our update
+            slot_ref.update({'status': TransferStatus.PROCESSING.value})
+            return snapshot
+
+        with patch.object(FakeDocument, 'get', get_then_race):
+            self.assertFalse(self.engine._claim_transfer_slot(self.key, self.rule))
+
+    def test_concurrent_claims_have_one_winner(self):
+        self.set_slot(self.key, TransferStatus.FAILED.value)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def claim():
+            barrier.wait()
+            results.append(self.engine._claim_transfer_slot(self.key, self.rule))
+
+        threads = [threading.Thread(target=claim) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+
+    def test_claimed_slot_is_skipped_on_rerun(self):
+        self.engine._execute_single_transfer = lambda rule, idempotency_key=None, run_context=None: {
+            'success': True, 'rule_id': rule.id, 'transfer_id': 'transfer-1'
+        }
+        first = self.engine._execute_idempotent_transfer(self.rule)
+        second = self.engine._execute_idempotent_transfer(self.rule)
+
+        self.assertTrue(first['success'])
+        self.assertNotIn('skipped', first)
+        self.assertTrue(second['skipped'])
+        self.assertEqual(self.slot(self.key)['status'], TransferStatus.COMPLETED.value)
+        self.assertEqual(self.slot(self.key)['transfer_id'], 'transfer-1')
+
+
+class TestTransferWrites(EngineTestCase):
+    """Test which writes are batched"""
+
+    def test_transfer_record_is_written_directly(self):
+        rule = make_rule()
+        run_context = TransferRunContext(self.engine.db)
+        records = self.engine.db.collection('transfer_records')
+
+        def perform_transfer(transfer):
+            # The audit record exists before any money moves
+            self.assertEqual(records.document(transfer.id).get().to_dict()['status'],
+                             TransferStatus.PENDING.value)
+            return {'success': True, 'transaction_id': 'bank-1'}
+
+        self.engine._perform_transfer = perform_transfer
+        self.engine._update_subaccount_balance = Mock()
+
+        result = self.engine._execute_single_transfer(rule, idempotency_key='rule-1_2025-03-01',
+                                                      run_context=run_context)
+
+        self.assertTrue(result['success'])
+        record = records.document(result['transfer_id']).get().to_dict()
+        self.assertEqual(record['status'], TransferStatus.COMPLETED.value)
+        self.assertEqual(record['external_transaction_id'], 'bank-1')
+
+        # The rule update waits for the end-of-run flush
+        rule_doc = self.engine.db.collection('transfer_rules').document(rule.id)
+        self.assertFalse(rule_doc.get().exists)
+        self.assertEqual(run_context.flush(), 1)
+        self.assertEqual(rule_doc.get().to_dict()['next_execution_date'],
+                         rule.next_execution_date.isoformat())
+
+
+class TestDueRulePaging(EngineTestCase):
+    """Test cursor paging over due rules"""
+
+    def setUp(self):
+        super().setUp()
+        now = datetime.now()
+        rules = self.engine.db.collection('transfer_rules')
+        for i in range(7):
+            rule = make_rule(f'rule-{i}', due=now - timedelta(hours=10 - i))
+            rules.document(rule.id).set(self.engine._transfer_rule_to_dict(rule))
+
+        inactive = make_rule('inactive', due=now - timedelta(hours=1))
+        inactive.is_active = False
+        future = make_rule('future', due=now + timedelta(days=1))
+        for rule in (inactive, future):
+            rules.document(rule.id).set(self.engine._transfer_rule_to_dict(rule))
+
+    def page_ids(self, page_size, limit=None):
+        return [[rule.id for rule in page] for page in self.engine._iter_due_rule_pages(page_size, limit)]
+
+    def test_pages_follow_cursor(self):
+        self.assertEqual(self.page_ids(3), [['rule-0', 'rule-1', 'rule-2'],
+                                            ['rule-3', 'rule-4', 'rule-5'],
+                                            ['rule-6']])
+        self.assertEqual([query.after is not None for query in self.engine.db.queries], [False, True, True])
+
+    def test_exact_multiple_stops_on_empty_page(self):
+        self.assertEqual(len(self.page_ids(7)), 1)
+        self.assertEqual(len(self.engine.db.queries), 2)
+
+    def test_limit_caps_total(self):
+        self.assertEqual(self.page_ids(3, limit=4), [['rule-0', 'rule-1', 'rule-2'], ['rule-3']])
+        self.assertEqual(self.engine.db.queries[-1].count, 1)
+
+
+class TestUserLock(EngineTestCase):
+    """Test that a user's rules never run concurrently"""
+
+    def test_rules_for_one_user_are_serialized(self):
+        rules = self.engine.db.collection('transfer_rules')
+        now = datetime.now()
+        for i in range(8):
+            rule = make_rule(f'rule-{i}', user_id=f'user-{i % 2}', due=now - timedelta(minutes=10 - i))
+            rules.document(rule.id).set(self.engine._transfer_rule_to_dict(rule))
+
+        lock = threading.Lock()
+        in_flight = {}
+        max_in_flight = {'per_user': 0, 'total': 0}
+        order = []
+
+        def execute(rule, run_context=None):
+            with lock:
+                in_flight[rule.user_id] = in_flight.get(rule.user_id, 0) + 1
+                max_in_flight['per_user'] = max(max_in_flight['per_user'], in_flight[rule.user_id])
+                max_in_flight['total'] = max(max_in_flight['total'], sum(in_flight.values()))
+                order.append(rule.id)
+            time.sleep(0.02)
+            with lock:
+                in_flight[rule.user_id] -= 1
+            return {'success': True, 'rule_id': rule.id}
+
+        self.engine._execute_idempotent_transfer = execute
+        # One rule per page, so each user's rules land in separate tasks
+        result = self.engine.execute_scheduled_transfers(max_workers=4, page_size=1)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['data']['successful'], 8)
+        self.assertEqual(max_in_flight['per_user'], 1)
+        self.assertEqual(max_in_flight['total'], 2)
+        self.assertIs(self.engine._user_lock('user-0'), self.engine._user_lock('user-0'))
+        self.assertIsNot(self.engine._user_lock('user-0'), self.engine._user_lock('user-1'))
+
+
+def income_rule(rule_id, transfer_type=TransferType.PERCENTAGE_INCOME, **overrides):
+    return make_rule(rule_id, transfer_type=transfer_type, amount=10.0,
+                     income_detection_enabled=True, **overrides)
+
+
+RECENT_TRANSACTIONS = [
+    {'amount': '3000.00', 'description': 'SALARY ACME PTY LTD', 'date': '2025-02-14'},
+    {'amount': '-84.20', 'description': 'WOOLWORTHS', 'date': '2025-02-15'},
+    {'amount': '3200.00', 'description': 'Salary Acme Pty Ltd', 'date': '2025-02-28'},
+    {'amount': '150.00', 'description': 'Transfer from savings', 'date': '2025-03-01'},
+]
+
+
+class TestSharedIncomeDetection(unittest.TestCase):
+    """Test that rules on one account share a fetch and an analysis per run"""
+
+    def setUp(self):
+        self.engine = TransferEngine()
+        self.fetches = []
+        fetch_lock = threading.Lock()
+
+        def iter_synced_account_transactions(user_id, account_id, from_date):
+            with fetch_lock:
+                self.fetches.append((user_id, account_id))
+            time.sleep(0.01)
+            return iter(RECENT_TRANSACTIONS)
+
+        self.engine.basiq_client = Mock()
+        self.engine.basiq_client.iter_synced_account_transactions = Mock(
+            side_effect=iter_synced_account_transactions
+        )
+
+    def test_rules_on_same_account_share_fetch_and_analysis(self):
+        run_context = TransferRunContext()
+        percentage = income_rule('percentage')
+        surplus = income_rule('surplus', transfer_type=TransferType.SMART_SURPLUS)
+
+        percentage_amount = self.engine._calculate_transfer_amount(percentage, run_context)
+        surplus_amount = self.engine._calculate_transfer_amount(surplus, run_context)
+
+        self.assertEqual(len(self.fetches), 1)
+        stats = run_context.get_stats()
+        self.assertEqual((stats['income_analyses'], stats['income_analyses_saved']), (1, 1))
+        self.assertEqual((stats['transaction_fetches'], stats['transaction_fetches_saved']), (1, 0))
+
+        # Same figures as the uncached path
+        self.assertEqual(percentage_amount, self.engine._calculate_transfer_amount(percentage))
+        self.assertEqual(surplus_amount, self.engine._calculate_transfer_amount(surplus))
+        self.assertEqual(percentage_amount['detected_income'], (3000 + 3200 + 150) / 3)
+        self.assertEqual(len(self.fetches), 3)
+
+    def test_threshold_changes_analysis_but_not_fetch(self):
+        run_context = TransferRunContext()
+        low = self.engine._detect_recent_income(income_rule('low'), run_context)
+        high = self.engine._detect_recent_income(income_rule('high', minimum_income_threshold=1000.0),
+                                                 run_context)
+
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(run_context.get_stats()['income_analyses'], 2)
+        self.assertEqual(len(low['transactions']), 3)
+        self.assertEqual(high['amount'], 3100.0)
+
+    def test_accounts_and_users_are_fetched_separately(self):
+        run_context = TransferRunContext()
+        for rule in (income_rule('a'), income_rule('b', source_account_id='acc-2'),
+                     income_rule('c', user_id='user-2'), income_rule('d', source_account_id='acc-2')):
+            self.engine._detect_recent_income(rule, run_context)
+
+        self.assertEqual(sorted(self.fetches), [('user-1', 'acc-1'), ('user-1', 'acc-2'), ('user-2', 'acc-1')])
+
+    def test_concurrent_rules_wait_for_one_fetch(self):
+        run_context = TransferRunContext()
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(
+            self.engine._detect_recent_income(income_rule(f'rule-{i}'), run_context)))
+            for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.fetches), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_failed_fetch_is_not_cached(self):
+        run_context = TransferRunContext()
+        self.engine.basiq_client.iter_synced_account_transactions.side_effect = [
+            ConnectionError('BASIQ unavailable'), iter(RECENT_TRANSACTIONS)
+        ]
+        rule = income_rule('rule-1')
+
+        self.assertFalse(self.engine._detect_recent_income(rule, run_context)['success'])
+        self.assertTrue(self.engine._detect_recent_income(rule, run_context)['success'])
+        self.assertEqual(run_context.get_stats()['transaction_fetches'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit Tests for the User Financial Snapshot Loader
+================================================
+
+Tests concurrent source fetches, request-scoped and TTL caching, in-flight
+deduplication and invalidation with stub fetchers.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from backend.services.user_snapshot import SNAPSHOT_SOURCES, UserSnapshotLoader
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingFetchers:
+    """Stub sources that count upstream reads"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = {source: 0 for source in SNAPSHOT_SOURCES}
+        self.lock = threading.Lock()
+
+    def fetcher(self, source):
+        def fetch(user_id, period_months):
+            with self.lock:
+                self.calls[source] += 1
+            time.sleep(self.delay)
+            if source == 'transactions':
+                return [{'id': f'txn_{period_months}', 'amount': '-10.00'}]
+            if source in ('profile', 'tax_profile'):
+                return {'userId': user_id}
+            return [{'id': f'{source}_1'}]
+        return fetch
+
+    def all(self):
+        return {source: self.fetcher(source) for source in SNAPSHOT_SOURCES}
+
+
+class TestUserSnapshotLoader(unittest.TestCase):
+    """Test loading, caching and invalidation"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fetchers = CountingFetchers()
+        self.loader = UserSnapshotLoader(fetchers=self.fetchers.all(), ttl_seconds=60, clock=self.clock)
+
+    def test_sources_are_fetched_concurrently(self):
+        fetchers = CountingFetchers(delay=0.1)
+        loader = UserSnapshotLoader(fetchers=fetchers.all())
+
+        start = time.perf_counter()
+        snapshot = loader.load('user_1')
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.3)
+        self.assertEqual(snapshot.profile, {'userId': 'user_1'})
+        self.assertEqual(set(snapshot.to_dict()), set(SNAPSHOT_SOURCES))
+
+    def test_request_scope_reads_each_source_once(self):
+        loader = UserSnapshotLoader(fetchers=self.fetchers.all(), ttl_seconds=0)
+        with loader.request_scope():
+            loader.load('user_1')
+            loader.load('user_1', ['goals', 'tax_profile'])
+            asyncio.run(loader.load_async('user_1'))
+
+        self.assertEqual(set(self.fetchers.calls.values()), {1})
+
+        # Without a scope and with caching disabled, every load reads again
+        loader.load('user_1', ['goals'])
+        self.assertEqual(self.fetchers.calls['goals'], 2)
+
+    def test_ttl_cache_across_requests(self):
+        self.loader.load('user_1')
+        self.loader.load('user_1')
+        self.assertEqual(self.fetchers.calls['profile'], 1)
+
+        # Transactions are cached per window
+        self.loader.load('user_1', ['transactions'], period_months=12)
+        self.assertEqual(self.fetchers.calls['transactions'], 2)
+
+        self.clock.now += 61
+        self.loader.load('user_1', ['profile'])
+        self.assertEqual(self.fetchers.calls['profile'], 2)
+
+    def test_concurrent_loads_share_fetches(self):
+        fetchers = CountingFetchers(delay=0.1)
+        loader = UserSnapshotLoader(fetchers=fetchers.all())
+        threads = [threading.Thread(target=loader.load, args=('user_1',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(fetchers.calls.values()), {1})
+
+    def test_invalidation_refetches_only_changed_sources(self):
+        self.loader.load('user_1')
+        self.loader.load('user_2', ['receipts'])
+        self.loader.invalidate('user_1', ['receipts'])
+
+        self.loader.load('user_1')
+        self.loader.load('user_2', ['receipts'])
+        self.assertEqual(self.fetchers.calls['receipts'], 3)
+        self.assertEqual(self.fetchers.calls['transactions'], 1)
+
+    def test_failed_source_is_reported_and_not_cached(self):
+        calls = []
+
+        def failing(user_id, period_months):
+            calls.append(1)
+            raise ConnectionError('BASIQ unavailable')
+
+        loader = UserSnapshotLoader(fetchers=dict(self.fetchers.all(), transactions=failing))
+        snapshot = loader.load('user_1')
+        self.assertEqual(snapshot.transactions, [])
+        self.assertIn('transactions', snapshot.errors)
+        self.assertEqual(snapshot.profile, {'userId': 'user_1'})
+
+        loader.load('user_1', ['transactions'])
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
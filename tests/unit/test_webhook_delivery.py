@@ -0,0 +1,125 @@
+"""
+Unit Tests for Streaming Webhook Delivery
+========================================
+
+Tests chunk coalescing, ordering, backpressure drops and isolation of the
+response stream from slow or failing webhook receivers.
+"""
+
+import threading
+import time
+import unittest
+
+from src.integrations.webhook_delivery import WebhookDispatcher
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+class FakeSession:
+    """Records webhook posts, optionally slow or failing"""
+
+    def __init__(self, delay=0.0, status_code=200, error=None):
+        self.delay = delay
+        self.status_code = status_code
+        self.error = error
+        self.posts = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None, endpoint=None):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        with self.lock:
+            self.posts.append((url, json))
+        return FakeResponse(self.status_code)
+
+
+class TestWebhookDelivery(unittest.TestCase):
+    """Test the per-stream queue and background sender"""
+
+    def test_chunks_coalesce_into_one_post(self):
+        session = FakeSession()
+        dispatcher = WebhookDispatcher(session=session)
+        stream = dispatcher.open_stream('https://hooks.example.com/a')
+
+        for chunk in ['Hel', 'lo ', 'there']:
+            stream.send(chunk)
+        stream.close('Hello there')
+        dispatcher.stop()
+
+        payloads = [payload for _, payload in session.posts]
+        self.assertEqual(payloads[0], {'chunk': 'Hello there', 'chunks': 3, 'sequence': 1})
+        self.assertEqual(payloads[-1], {'full_response': 'Hello there'})
+
+    def test_ordered_delivery_across_batches(self):
+        session = FakeSession(delay=0.005)
+        dispatcher = WebhookDispatcher(session=session, flush_interval_ms=2)
+        stream = dispatcher.open_stream('https://hooks.example.com/a')
+        text = ''.join(f'{i},' for i in range(300))
+        for i in range(300):
+            stream.send(f'{i},')
+            if i % 50 == 0:
+                time.sleep(0.01)
+        stream.close(text)
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.stop()
+
+        chunks = [payload for _, payload in session.posts if 'chunk' in payload]
+        self.assertGreater(len(chunks), 1)
+        self.assertLess(len(chunks), 300)
+        self.assertEqual([p['sequence'] for p in chunks], list(range(1, len(chunks) + 1)))
+        self.assertEqual(''.join(p['chunk'] for p in chunks), text)
+        self.assertEqual(session.posts[-1][1], {'full_response': text})
+
+    def test_full_queue_drops_and_counts(self):
+        dispatcher = WebhookDispatcher(session=FakeSession(), max_pending=10)
+        stream = dispatcher.open_stream('https://hooks.example.com/a')
+
+        accepted = [stream.send('x') for _ in range(25)]
+        self.assertEqual(accepted.count(True), 10)
+        self.assertEqual(stream.stats['dropped'], 15)
+        stream.close('x' * 25)
+        dispatcher.stop()
+        self.assertEqual(dispatcher.get_stats()['dropped'], 15)
+
+    def test_slow_receiver_does_not_block_sender(self):
+        session = FakeSession(delay=0.2)
+        dispatcher = WebhookDispatcher(session=session, flush_interval_ms=10)
+        stream = dispatcher.open_stream('https://hooks.example.com/slow')
+
+        start = time.perf_counter()
+        for i in range(1000):
+            stream.send(f'token{i} ')
+        elapsed = time.perf_counter() - start
+        stream.close('done')
+        dispatcher.stop()
+
+        # Queueing 1000 chunks costs microseconds each; the old loop paid 1000 posts
+        self.assertLess(elapsed, 0.1)
+        self.assertLess(len(session.posts), 10)
+        self.assertEqual(dispatcher.get_stats()['delivered_chunks'], 1000)
+
+    def test_failing_receiver_is_abandoned(self):
+        session = FakeSession(error=ConnectionError('refused'))
+        dispatcher = WebhookDispatcher(session=session, flush_interval_ms=1)
+        stream = dispatcher.open_stream('https://hooks.example.com/down')
+
+        for _ in range(5):
+            stream.send('chunk')
+            time.sleep(0.01)
+        stream.close('chunk' * 5)
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.stop()
+
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['abandoned'], 1)
+        self.assertEqual(stats['active_streams'], 0)
+        self.assertEqual(stats['posts'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()